@@ -0,0 +1,80 @@
+"""
+Benchmark: chunking throughput on multi-MB documents
+
+Chunks synthetic markdown documents of increasing size with every
+registered strategy and reports MB/s. Throughput should stay flat as the
+document grows (linear time). Also checks that every chunk's start_char /
+end_char offsets reproduce its content and that no chunk exceeds the token
+budget.
+
+Run from the backend directory:
+    python -m benchmarks.chunking
+    CHUNK_BENCH_SIZES_MB=1,8,32 python -m benchmarks.chunking
+"""
+import os
+import random
+import time
+
+from src.services.chunking import (
+    CHUNK_MAX_TOKENS,
+    TIKTOKEN_AVAILABLE,
+    ChunkingStrategyFactory,
+    chunk_text,
+)
+
+SIZES_MB = [float(size) for size in os.getenv("CHUNK_BENCH_SIZES_MB", "1,4,16").split(",")]
+
+WORDS = (
+    "retrieval augmented generation embeds document chunks into a vector index and "
+    "ranks them against the query before the model answers using the best matches"
+).split()
+
+
+def build_document(size_bytes: int, seed: int = 7) -> str:
+    """Markdown with headings, paragraphs of varying length, lists and code blocks"""
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    section = 0
+    while size < size_bytes:
+        section += 1
+        block = [f"## Section {section}\n"]
+        for _ in range(rng.randint(2, 6)):
+            sentences = [
+                " ".join(rng.choices(WORDS, k=rng.randint(6, 30))).capitalize() + "."
+                for _ in range(rng.randint(1, 12))
+            ]
+            block.append(" ".join(sentences) + "\n")
+        if section % 5 == 0:
+            block.append("```\n# comment, not a heading\nprint('x')\n```\n")
+        if section % 7 == 0:
+            block.append("\n".join(f"- item {i}" for i in range(10)) + "\n")
+        text = "\n".join(block) + "\n"
+        parts.append(text)
+        size += len(text)
+    return "".join(parts)
+
+
+def check(text: str, chunks: list):
+    for chunk in chunks:
+        metadata = chunk["metadata"]
+        assert text[metadata["start_char"]:metadata["end_char"]] == chunk["content"], "offset drift"
+        assert metadata["token_count"] <= CHUNK_MAX_TOKENS, "chunk over token budget"
+
+
+def main():
+    tokenizer = "tiktoken" if TIKTOKEN_AVAILABLE else "regex estimate"
+    print(f"Token budget {CHUNK_MAX_TOKENS}, tokenizer: {tokenizer}\n")
+    print(f"{'strategy':<12}{'size':>8}{'chunks':>10}{'seconds':>10}{'MB/s':>8}")
+    for name in ChunkingStrategyFactory.available():
+        for size_mb in SIZES_MB:
+            text = build_document(int(size_mb * 1024 * 1024))
+            started = time.perf_counter()
+            chunks = chunk_text(text, strategy=name)
+            elapsed = time.perf_counter() - started
+            check(text, chunks)
+            print(f"{name:<12}{size_mb:>6g}MB{len(chunks):>10}{elapsed:>10.2f}{size_mb / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Micro-benchmark: per-call overhead of MessageNormalizingLLM input normalization
+
+Measures normalize_input() on a 100-message history for each input shape the
+wrapper receives, next to the previous behaviour (deep copy of prompt values,
+re-instantiating every message) as a baseline.
+
+Run from the backend directory:
+    python -m benchmarks.message_normalization
+"""
+import copy
+import timeit
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.prompt_values import ChatPromptValue
+
+from src.services.message_normalizer import extract_text, normalize_input
+
+HISTORY_SIZE = 100
+ITERATIONS = 2000
+
+
+def build_history(list_content: bool = False) -> list:
+    """Alternating user/assistant history; optionally with Gemini-style list content"""
+    messages = []
+    for i in range(HISTORY_SIZE // 2):
+        messages.append(HumanMessage(content=f"Question {i} about the documents?"))
+        text = f"Answer {i}: " + "lorem ipsum " * 20
+        content = [{"type": "text", "text": text}] if list_content else text
+        messages.append(AIMessage(content=content))
+    return messages
+
+
+def legacy_normalize(messages: list) -> list:
+    """Previous behaviour: rebuild a new list, re-instantiating non-string messages"""
+    normalized = []
+    for msg in messages:
+        if isinstance(msg.content, str):
+            normalized.append(msg)
+        else:
+            normalized.append(type(msg)(content=extract_text(msg.content)))
+    return normalized
+
+
+def legacy_normalize_prompt_value(value: ChatPromptValue) -> ChatPromptValue:
+    """Previous behaviour for prompt values: deep copy, then normalize"""
+    copied = copy.deepcopy(value)
+    copied.messages = legacy_normalize(value.messages)
+    return copied
+
+
+def bench(label: str, fn) -> None:
+    seconds = timeit.timeit(fn, number=ITERATIONS)
+    print(f"{label:<45} {seconds / ITERATIONS * 1e6:10.1f} us/call")
+
+
+def main():
+    strings = build_history()
+    lists = build_history(list_content=True)
+    prompt_strings = ChatPromptValue(messages=strings)
+    prompt_lists = ChatPromptValue(messages=lists)
+
+    print(f"{HISTORY_SIZE}-message history, {ITERATIONS} iterations\n")
+    bench("list, string content (legacy)", lambda: legacy_normalize(strings))
+    bench("list, string content", lambda: normalize_input(strings))
+    bench("list, block content (legacy)", lambda: legacy_normalize(lists))
+    bench("list, block content", lambda: normalize_input(lists))
+    bench("dict, string content", lambda: normalize_input({"messages": strings}))
+    bench("prompt value, string content (legacy)", lambda: legacy_normalize_prompt_value(prompt_strings))
+    bench("prompt value, string content", lambda: normalize_input(prompt_strings))
+    bench("prompt value, block content (legacy)", lambda: legacy_normalize_prompt_value(prompt_lists))
+    bench("prompt value, block content", lambda: normalize_input(prompt_lists))
+
+
+if __name__ == "__main__":
+    main()
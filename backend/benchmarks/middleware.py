@@ -0,0 +1,202 @@
+"""
+Benchmark: middleware overhead on small JSON responses and SSE streams
+
+Compares the previous stack (RequestIDMiddleware + LoggingMiddleware as
+BaseHTTPMiddleware subclasses, plus SlowAPIMiddleware when slowapi is
+installed) with the single pure-ASGI RequestContextMiddleware, both wrapped
+around the same Starlette app. Requests are driven in-process through the
+ASGI interface, so the numbers are middleware + framework cost only.
+
+Reported per stack:
+- JSON: requests/s for a small JSON endpoint, sequential and concurrent
+- SSE: time to first event and total time for a stream of events, which
+  shows any buffering added between the app and the client
+
+Access log lines are built but not written unless MIDDLEWARE_BENCH_LOG=true.
+
+Run from the backend directory:
+    python -m benchmarks.middleware
+    MIDDLEWARE_BENCH_REQUESTS=20000 python -m benchmarks.middleware
+"""
+import asyncio
+import logging
+import os
+import statistics
+import time
+import uuid
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from src.api.middleware import RequestContextMiddleware
+from src.utils.logger import flush_logging
+from src.utils.rate_limiter import RateLimiter
+
+REQUESTS = int(os.getenv("MIDDLEWARE_BENCH_REQUESTS", "5000"))
+CONCURRENCY = int(os.getenv("MIDDLEWARE_BENCH_CONCURRENCY", "50"))
+SSE_STREAMS = int(os.getenv("MIDDLEWARE_BENCH_SSE_STREAMS", "20"))
+SSE_EVENTS = int(os.getenv("MIDDLEWARE_BENCH_SSE_EVENTS", "200"))
+# Delay between SSE events (seconds), like tokens streamed from an LLM
+SSE_EVENT_INTERVAL = float(os.getenv("MIDDLEWARE_BENCH_SSE_INTERVAL", "0.001"))
+WRITE_LOGS = os.getenv("MIDDLEWARE_BENCH_LOG", "false").lower() == "true"
+
+# High enough that the limiter is exercised but never rejects
+BENCH_LIMIT = "1000000/minute"
+
+
+async def json_endpoint(request):
+    return JSONResponse({"status": "ok", "request_id": request.state.request_id})
+
+
+async def sse_endpoint(request):
+    async def events():
+        for i in range(SSE_EVENTS):
+            yield f"data: {i}\n\n"
+            await asyncio.sleep(SSE_EVENT_INTERVAL)
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def build_app() -> Starlette:
+    return Starlette(routes=[Route("/json", json_endpoint), Route("/stream", sse_endpoint)])
+
+
+class LegacyRequestIDMiddleware(BaseHTTPMiddleware):
+    """The previous RequestIDMiddleware"""
+
+    async def dispatch(self, request, call_next):
+        request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
+        request.state.request_id = request_id
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    """The previous LoggingMiddleware (request and response lines, stdlib logging)"""
+
+    async def dispatch(self, request, call_next):
+        logger = logging.getLogger("bench.legacy")
+        start_time = time.time()
+        request_id = getattr(request.state, "request_id", "unknown")
+        logger.info(f"Request: {request.method} {request.url.path} | Request-ID: {request_id}")
+        response = await call_next(request)
+        duration = time.time() - start_time
+        logger.info(f"Response: {request.method} {request.url.path} | Status: {response.status_code} | Duration: {duration:.3f}s")
+        response.headers["X-Response-Time"] = f"{duration:.3f}"
+        return response
+
+
+def legacy_stack():
+    app = build_app()
+    try:
+        from slowapi import Limiter
+        from slowapi.middleware import SlowAPIMiddleware
+        from slowapi.util import get_remote_address
+        app.state.limiter = Limiter(key_func=get_remote_address, default_limits=[BENCH_LIMIT])
+        app.add_middleware(SlowAPIMiddleware)
+        name = "BaseHTTPMiddleware x3"
+    except ImportError:
+        name = "BaseHTTPMiddleware x2"
+    app.add_middleware(LegacyLoggingMiddleware)
+    app.add_middleware(LegacyRequestIDMiddleware)
+    return name, app
+
+
+def asgi_stack():
+    app = build_app()
+    app.add_middleware(RequestContextMiddleware, limiter=RateLimiter(), default_limit=BENCH_LIMIT)
+    return "pure ASGI x1", app
+
+
+async def call(app, path: str):
+    """
+    Drive one request through the ASGI interface
+
+    Returns:
+        (seconds to first body chunk, total seconds)
+    """
+    done = asyncio.Event()
+    request_sent = False
+    first_body = None
+    started = time.perf_counter()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal first_body
+        if message["type"] == "http.response.body":
+            if first_body is None and message.get("body"):
+                first_body = time.perf_counter() - started
+            if not message.get("more_body", False):
+                done.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    await app(scope, receive, send)
+    done.set()
+    return first_body or 0.0, time.perf_counter() - started
+
+
+async def bench_json(app) -> tuple:
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        await call(app, "/json")
+    sequential = REQUESTS / (time.perf_counter() - started)
+
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def limited():
+        async with semaphore:
+            await call(app, "/json")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(limited() for _ in range(REQUESTS)))
+    concurrent = REQUESTS / (time.perf_counter() - started)
+    return sequential, concurrent
+
+
+async def bench_sse(app) -> tuple:
+    results = await asyncio.gather(*(call(app, "/stream") for _ in range(SSE_STREAMS)))
+    first = statistics.median(r[0] for r in results)
+    total = statistics.median(r[1] for r in results)
+    return first, total
+
+
+async def main():
+    if not WRITE_LOGS:
+        for name in ("bench.legacy", "dosibridge.access"):
+            logging.getLogger(name).setLevel(logging.WARNING)
+    print(f"{REQUESTS} JSON requests (concurrency {CONCURRENCY}), "
+          f"{SSE_STREAMS} SSE streams x {SSE_EVENTS} events\n")
+    print(f"{'stack':<24}{'json seq/s':>12}{'json conc/s':>13}{'sse first ms':>14}{'sse total ms':>14}")
+    for build in (legacy_stack, asgi_stack):
+        name, app = build()
+        await call(app, "/json")  # build the middleware stack outside the timing
+        sequential, concurrent = await bench_json(app)
+        first, total = await bench_sse(app)
+        print(f"{name:<24}{sequential:>12.0f}{concurrent:>13.0f}{first * 1000:>14.2f}{total * 1000:>14.1f}")
+    flush_logging()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""
+Startup benchmark: cold import time of the service layer and the app
+
+Each measurement runs in a fresh interpreter so module caches don't hide
+regressions. Lazy services (RAG systems) are then built explicitly to show
+what the lifespan warm-up pays off the request path. Exits non-zero when an
+import exceeds its budget, so it can gate CI.
+
+Run from the backend directory:
+    python -m benchmarks.startup
+    IMPORT_BUDGET_SECONDS=3 python -m benchmarks.startup
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RUNS = int(os.getenv("STARTUP_BENCH_RUNS", "5"))
+# Cold import budget per target (seconds)
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "4.0"))
+
+TARGETS = ["src.services", "src.api"]
+
+IMPORT_SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+heavy = [m for m in ("sentence_transformers", "torch", "langchain_google_genai", "langchain_ollama") if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "modules": len(sys.modules), "heavy": heavy}}))
+"""
+
+WARMUP_SNIPPET = """
+import json
+import src.services
+from src.dependency_injection.container import get_container
+print(json.dumps(get_container().warm_up()))
+"""
+
+
+def run_snippet(code: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True, text=True, check=True, env={**os.environ, "SERVICE_WARMUP": "false"}
+    ).stdout
+    # Services print status lines on import - the JSON result is the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    over_budget = False
+    print(f"Cold import time over {RUNS} runs (budget {IMPORT_BUDGET_SECONDS:.2f}s)")
+    for module in TARGETS:
+        results = [run_snippet(IMPORT_SNIPPET.format(module=module)) for _ in range(RUNS)]
+        seconds = [r["seconds"] for r in results]
+        median = statistics.median(seconds)
+        status = "ok" if median <= IMPORT_BUDGET_SECONDS else "OVER BUDGET"
+        over_budget |= median > IMPORT_BUDGET_SECONDS
+        print(
+            f"  {module:<15} median {median:6.3f}s  min {min(seconds):6.3f}s  "
+            f"modules {results[-1]['modules']:5d}  [{status}]"
+        )
+        if results[-1]["heavy"]:
+            print(f"    eagerly imported: {', '.join(results[-1]['heavy'])}")
+
+    print("Lazy service initialization (paid by warm-up or first use)")
+    for name, seconds in run_snippet(WARMUP_SNIPPET).items():
+        print(f"  {name:<25} {seconds:6.3f}s")
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
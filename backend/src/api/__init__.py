@@ -23,24 +23,30 @@ from src.core.auth import get_current_user, get_optional_current_user
 from src.core import User
 from typing import Optional
 
-# Try to import slowapi for rate limiting (optional)
+# Try to import slowapi for per-route rate limits (optional)
 try:
     from slowapi import Limiter, _rate_limit_exceeded_handler
     from slowapi.util import get_remote_address
     from slowapi.errors import RateLimitExceeded
-    from slowapi.middleware import SlowAPIMiddleware
-    from src.core.constants import RATE_LIMIT_DEFAULT
+    # Registers the "engine://" limits storage backed by src.utils.rate_limiter
+    from src.utils.rate_limiter import EngineStorage
     SLOWAPI_AVAILABLE = True
 except ImportError:
-    print("⚠️  Warning: slowapi not installed. Rate limiting will be disabled.")
-    print("   Install with: pip install slowapi")
     SLOWAPI_AVAILABLE = False
     Limiter = None
     _rate_limit_exceeded_handler = None
     get_remote_address = None
     RateLimitExceeded = None
-    SlowAPIMiddleware = None
-    RATE_LIMIT_DEFAULT = "200/minute"
+    EngineStorage = None
+
+from src.core.constants import RATE_LIMIT_DEFAULT
+from src.utils.rate_limiter import limiter_for_storage
+
+# Apply RATE_LIMIT_DEFAULT per client address and endpoint
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# limits storage for rate limit counters: "engine://" is per process, a shared
+# URI (e.g. redis://...) makes limits hold across workers
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "engine://" if EngineStorage else "memory://")
 
 # Initialize FastAPI app with MCP lifespan
 app = FastAPI(
@@ -50,32 +56,28 @@ app = FastAPI(
     lifespan=mcp_lifespan
 )
 
-# Initialize rate limiter (if available)
+# slowapi limiter for @limiter.limit route decorators (if available); the
+# default limit is enforced by RequestContextMiddleware below
 if SLOWAPI_AVAILABLE:
-    limiter = Limiter(
-        key_func=get_remote_address,
-        default_limits=[RATE_LIMIT_DEFAULT],
-        storage_uri="memory://"
-    )
+    limiter = Limiter(key_func=get_remote_address, storage_uri=RATE_LIMIT_STORAGE_URI)
     app.state.limiter = limiter
     app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
-    # Apply rate limiting middleware (applies default limits to all routes)
-    app.add_middleware(SlowAPIMiddleware)
-    print("✓ Rate limiting enabled")
 else:
     # Create a dummy limiter for compatibility
     app.state.limiter = None
-    print("⚠️  Rate limiting disabled (slowapi not installed)")
 
-# Add custom middleware for request ID and logging
-try:
-    from .middleware import RequestIDMiddleware, LoggingMiddleware
-    app.add_middleware(RequestIDMiddleware)
-    app.add_middleware(LoggingMiddleware)
-    print("✓ Custom middleware enabled")
-except Exception as e:
-    print(f"⚠️  Warning: Could not load custom middleware: {e}")
+# Request ID, default rate limit, timing and access logging in one
+# pure-ASGI layer (no BaseHTTPMiddleware task/stream wrapping per request)
+from .middleware import RequestContextMiddleware
+app.add_middleware(
+    RequestContextMiddleware,
+    limiter=limiter_for_storage(RATE_LIMIT_STORAGE_URI) if RATE_LIMIT_ENABLED else None,
+    default_limit=RATE_LIMIT_DEFAULT,
+)
+if RATE_LIMIT_ENABLED:
+    print(f"✓ Rate limiting enabled ({RATE_LIMIT_DEFAULT} per client and endpoint, storage {RATE_LIMIT_STORAGE_URI.split('://')[0]}://)")
+else:
+    print("⚠️  Rate limiting disabled (RATE_LIMIT_ENABLED=false)")
 
 # Configure CORS origins from environment variable
 CORS_ORIGINS_ENV = os.getenv("CORS_ORIGINS", "")
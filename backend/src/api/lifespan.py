@@ -12,6 +12,29 @@ from src.core.env_validation import validate_and_exit_on_error
 # from src.core.auth import get_password_hash # Removed
 from src.mcp import MCP_SERVERS
 from src.utils import suppress_mcp_cleanup_errors
+from src.dependency_injection.container import get_container
+
+# Build lazy services (RAG systems) in the background after startup
+SERVICE_WARMUP = os.getenv("SERVICE_WARMUP", "true").lower() == "true"
+# Also load the cross-encoder re-ranker during warm-up (costs memory per worker)
+WARM_UP_RERANKER = os.getenv("WARM_UP_RERANKER", "false").lower() == "true"
+
+
+def _warm_up_services():
+    """Build lazily registered services so the first request doesn't pay for them"""
+    built = get_container().warm_up()
+    if WARM_UP_RERANKER:
+        from src.services.advanced_rag import advanced_rag_system
+        getattr(advanced_rag_system, "reranker", None)
+    if built:
+        timings = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in built.items())
+        print(f"✓ Services warmed up: {timings}")
+
+
+async def _cancel_task(task: asyncio.Task):
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError, Exception):
+        await task
 
 
 @contextlib.asynccontextmanager
@@ -167,7 +190,57 @@ async def mcp_lifespan(app: FastAPI):
         # If we can't set the handler, that's okay - errors will still be logged
         pass
 
+    # Warm in-memory quota counters from APIUsage and keep them reconciled
+    from src.services.quota_engine import quota_engine
+    await quota_engine.start()
+
+    # Keep hourly usage rollups backfilled and compact old raw usage rows
+    from src.services.usage_rollup import usage_compaction_job
+    await usage_compaction_job.start()
+
+    # Start the document ingestion worker pool
+    from src.services.ingestion_worker import ingestion_worker_pool
+    await ingestion_worker_pool.start()
+
+    # Sync agent tools run on a bounded thread pool, shut down on exit
+    from src.services.tool_executor import shutdown_tool_thread_pool
+    # Pooled HTTP client used by the built-in MCP servers
+    from src.mcp.http_client import http_client
+    # Isolated math expression workers (only started if MATH_EVAL_PROCESSES > 0)
+    from src.utils.safe_eval import shutdown_eval_pool
+
+    # Event bus: observers consume events on background tasks
+    from src.observers import event_dispatcher, register_chat_observers
+    register_chat_observers(event_dispatcher)
+    await event_dispatcher.start()
+
+    # Shared health snapshot for /ws/health, refreshed on MCP server changes
+    from src.services.health_broadcaster import health_broadcaster
+    await health_broadcaster.start()
+
+    # Outbound email delivery workers
+    from src.utils.email_service import email_service
+    email_service.start()
+
+    # Background log writer; drained last so shutdown messages are written
+    from src.utils.logger import flush_logging
+
     async with contextlib.AsyncExitStack() as stack:
+        stack.push_async_callback(asyncio.to_thread, flush_logging)
+        # Stopped after the services that emit events, draining queued events
+        stack.push_async_callback(event_dispatcher.stop)
+        stack.push_async_callback(quota_engine.stop)
+        stack.push_async_callback(usage_compaction_job.stop)
+        stack.push_async_callback(health_broadcaster.stop)
+        stack.push_async_callback(ingestion_worker_pool.stop)
+        stack.push_async_callback(shutdown_tool_thread_pool)
+        stack.push_async_callback(http_client.aclose)
+        stack.push_callback(shutdown_eval_pool)
+        stack.push_async_callback(asyncio.to_thread, email_service.stop)
+        if SERVICE_WARMUP:
+            # Runs off the event loop; the app serves requests meanwhile
+            warmup_task = asyncio.create_task(asyncio.to_thread(_warm_up_services))
+            stack.push_async_callback(_cancel_task, warmup_task)
         # Enter all MCP server session managers
         for server in MCP_SERVERS.values():
             if hasattr(server, 'session_manager'):
@@ -1,71 +1,133 @@
 """
 Custom middleware for the API
 """
+import json
+import os
 import time
 import uuid
-import logging
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    """Add unique request ID to each request for tracing"""
-    
-    async def dispatch(self, request: Request, call_next):
-        # Skip WebSocket connections - they use a different protocol
-        if request.url.path.startswith("/api/ws/"):
-            return await call_next(request)
-        
-        # Generate or get request ID
-        request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
-        request.state.request_id = request_id
-        
-        # Add request ID to response headers
-        response: Response = await call_next(request)
-        response.headers["X-Request-ID"] = request_id
-        
-        return response
-
-
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Log all requests with timing information"""
-    
-    async def dispatch(self, request: Request, call_next):
-        # Skip WebSocket connections - they use a different protocol
-        if request.url.path.startswith("/api/ws/"):
-            return await call_next(request)
-        
-        start_time = time.time()
-        request_id = getattr(request.state, "request_id", "unknown")
-        
-        # Log request
-        logger.info(
-            f"Request: {request.method} {request.url.path} | "
-            f"Request-ID: {request_id} | "
-            f"Client: {request.client.host if request.client else 'unknown'}"
-        )
-        
-        # Process request
-        response: Response = await call_next(request)
-        
-        # Calculate duration
-        duration = time.time() - start_time
-        
-        # Log response
-        logger.info(
-            f"Response: {request.method} {request.url.path} | "
-            f"Status: {response.status_code} | "
-            f"Duration: {duration:.3f}s | "
-            f"Request-ID: {request_id}"
-        )
-        
-        # Add timing header
-        response.headers["X-Response-Time"] = f"{duration:.3f}"
-        
-        return response
+from typing import Optional
+from starlette.routing import Match
+from src.utils.logger import get_logger, request_id_var
+from src.utils.metrics import http_request_seconds
+from src.utils.rate_limiter import parse_rate_limit
 
+# Fraction of successful requests written to the access log (errors are always logged)
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+
+logger = get_logger("dosibridge.access")
+
+
+def _header(scope: dict, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _route_path(scope: dict) -> Optional[str]:
+    """Path template of the endpoint the router will dispatch to (None if unmatched)"""
+    router = getattr(scope.get("app"), "router", None)
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL and hasattr(route, "endpoint"):
+            return route.path
+    return None
+
+
+class RequestContextMiddleware:
+    """
+    Request ID, rate limiting, timing and access logging in one pure-ASGI layer
+
+    Unlike BaseHTTPMiddleware, this runs the app in the caller's task and
+    passes response messages straight through, so streaming (SSE) responses
+    are neither buffered nor cancelled by the middleware, and the request ID
+    context variable is visible to everything the request runs.
+
+    Per request:
+    - the ID from X-Request-ID (or a new uuid4) is stored in
+      request.state.request_id and request_id_var, and echoed back
+    - requests to an endpoint are checked against `default_limit` per
+      client address and endpoint (as slowapi's default limits were);
+      over the limit, a 429 is returned without calling the app. Requests
+      that match no endpoint (404s, mounted apps) are not limited.
+    - X-Response-Time is the time to the response headers; the access log
+      line (one per request, written when the response body is complete)
+      also carries the total duration, which for streams is their lifetime
+    """
+
+    def __init__(self, app, limiter=None, default_limit: Optional[str] = None):
+        self.app = app
+        self.limiter = limiter if default_limit else None
+        self.limit_text = default_limit
+        self.max_requests, self.window_seconds = parse_rate_limit(default_limit) if self.limiter else (0, 0)
+
+    async def __call__(self, scope, receive, send):
+        # WebSocket and lifespan scopes pass through untouched
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        request_id = _header(scope, b"x-request-id") or str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
+        client = scope.get("client")
+        client_host = client[0] if client else "unknown"
+        status_code = 500
+        header_time: Optional[float] = None
+
+        async def send_with_headers(message):
+            nonlocal status_code, header_time
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                header_time = time.perf_counter() - start_time
+                headers = list(message.get("headers", ()))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                headers.append((b"x-response-time", f"{header_time:.3f}".encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            if self.limiter is not None:
+                route_path = _route_path(scope)
+                if route_path is not None:
+                    allowed, _ = self.limiter.is_allowed(
+                        f"ip:{client_host}:{scope['method']} {route_path}", self.max_requests, self.window_seconds
+                    )
+                    if not allowed:
+                        await self._reject(send_with_headers)
+                        return
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            duration = time.perf_counter() - start_time
+            context = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "duration_ms": round(duration * 1000, 1),
+                "client": client_host,
+            }
+            if header_time is not None and duration - header_time >= 0.001:
+                context["headers_ms"] = round(header_time * 1000, 1)
+            # Route template (not the raw path) keeps the label set bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            http_request_seconds.observe(duration, method=scope["method"], route=route, status=str(status_code))
+            if status_code >= 500:
+                logger.warning("Request failed", context)
+            else:
+                logger.info("Request", context, sample_rate=ACCESS_LOG_SAMPLE_RATE)
+            request_id_var.reset(token)
+
+    async def _reject(self, send):
+        """429 in the same shape as slowapi's handler"""
+        body = json.dumps({"error": f"Rate limit exceeded: {self.limit_text}"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(self.window_seconds).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
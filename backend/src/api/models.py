@@ -91,8 +91,11 @@ class AddTextRequest(BaseModel):
     title: str = Field(..., min_length=1, max_length=500, description="Document title")
     content: str = Field(..., min_length=1, description="Text content to add")
     collection_id: Optional[int] = Field(None, description="Optional collection ID")
-    chunk_size: Optional[int] = Field(1000, ge=100, le=5000, description="Chunk size in characters")
-    chunk_overlap: Optional[int] = Field(200, ge=0, le=1000, description="Chunk overlap in characters")
+    chunk_size: Optional[int] = Field(None, ge=100, le=5000, description="Deprecated: chunk size in characters (use max_tokens)")
+    chunk_overlap: Optional[int] = Field(None, ge=0, le=1000, description="Deprecated: chunk overlap in characters (use overlap_tokens)")
+    chunk_strategy: Optional[Literal["paragraph", "sentence", "recursive", "markdown"]] = Field(None, description="Chunking strategy (default: server setting)")
+    max_tokens: Optional[int] = Field(None, ge=16, le=8192, description="Chunk size in tokens")
+    overlap_tokens: Optional[int] = Field(None, ge=0, le=1024, description="Chunk overlap in tokens")
     metadata: Optional[dict] = Field(None, description="Additional metadata")
     
     @validator('content')
@@ -28,7 +28,10 @@ def send_appointment_emails(
     user_id: Optional[int] = None
 ):
     """
-    Background task to send appointment confirmation and notification emails
+    Background task to queue appointment confirmation and notification emails
+
+    Delivery (pooled SMTP connection, retries, dead-lettering) happens in the
+    email service's queue workers.
 
     Args:
         appointment_id: Appointment request ID
@@ -43,18 +46,7 @@ def send_appointment_emails(
         user_id: User ID if authenticated (optional)
     """
     try:
-        # Send confirmation email to user
-        email_service.send_appointment_confirmation(
-            to_email=email,
-            to_name=name,
-            appointment_id=appointment_id,
-            request_type=request_type,
-            preferred_date=preferred_date,
-            preferred_time=preferred_time
-        )
-
-        # Send notification email to team
-        email_service.send_appointment_notification_to_team(
+        queued = email_service.queue_appointment_emails(
             appointment_id=appointment_id,
             name=name,
             email=email,
@@ -67,13 +59,14 @@ def send_appointment_emails(
             user_id=user_id
         )
 
-        app_logger.info(
-            "Appointment emails sent",
-            {"appointment_id": appointment_id, "email": email}
-        )
+        if queued:
+            app_logger.info(
+                "Appointment emails queued",
+                {"appointment_id": appointment_id, "email": email}
+            )
     except Exception as e:
         app_logger.error(
-            "Failed to send appointment emails",
+            "Failed to queue appointment emails",
             {"appointment_id": appointment_id, "error": str(e)},
             exc_info=True
         )
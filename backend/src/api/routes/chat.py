@@ -7,13 +7,13 @@ it's functional.
 """
 import asyncio
 import json
+import time
 import traceback
 from typing import AsyncGenerator
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
 from starlette.requests import Request
 from fastapi.responses import StreamingResponse
-from langchain.agents import create_agent
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage
 from langchain_core.tools import BaseTool
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
@@ -23,6 +23,9 @@ from src.services import history_manager, MCPClientManager, create_llm_from_conf
 from src.services.chat_service import ChatService
 from src.services.tools import retrieve_dosiblog_context, load_custom_rag_tools, create_appointment_tool
 from src.services.usage_tracker import usage_tracker
+from src.observers.event_dispatcher import EventType, event_dispatcher
+from src.services.agent_cache import agent_cache
+from src.services.agent_stream import stream_agent_events
 from typing import Optional
 from sqlalchemy.orm import Session
 from ..models import ChatRequest, ChatResponse
@@ -30,10 +33,29 @@ from ..exceptions import APIException, ValidationError, UnauthorizedError
 from src.utils import sanitize_tools_for_gemini
 from src.utils.utils import extract_token_usage, estimate_tokens
 from src.utils.logger import app_logger
+from src.utils.metrics import time_to_first_token_seconds
 from src.core.constants import DAILY_REQUEST_LIMIT, DAILY_REQUEST_LIMIT_UNAUTHENTICATED
 
 router = APIRouter()
 
+# SSE events carrying answer text (status and done events have an empty chunk)
+_CONTENT_EVENT_PREFIX = 'data: {"chunk": "'
+_EMPTY_EVENT_PREFIX = 'data: {"chunk": "",'
+
+
+async def _observe_first_token(events: AsyncGenerator[str, None], mode: str) -> AsyncGenerator[str, None]:
+    """Pass SSE events through, recording the time to the first content chunk"""
+    started = time.perf_counter()
+    waiting = True
+    try:
+        async for event in events:
+            if waiting and event.startswith(_CONTENT_EVENT_PREFIX) and not event.startswith(_EMPTY_EVENT_PREFIX):
+                waiting = False
+                time_to_first_token_seconds.observe(time.perf_counter() - started, mode=mode)
+            yield event
+    finally:
+        await events.aclose()
+
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(
@@ -92,7 +114,7 @@ async def chat(
         # - Unauthenticated users: 10/day (Guest Mode)
         # TODO: Make these limits configurable
         limit = 10 if user_id is None else DAILY_REQUEST_LIMIT
-        is_allowed, current_count, remaining = usage_tracker.check_daily_limit(
+        is_allowed, current_count, remaining = usage_tracker.admit_request(
             user_id, db, is_default_llm=is_default_llm, ip_address=ip_address, guest_email=chat_request.guest_email
         )
         if not is_allowed:
@@ -155,9 +177,8 @@ async def chat(
         # Record usage with actual token counts from LLM response
         # llm_config already loaded above
         token_usage = result.get("token_usage", {})
-        usage_tracker.record_request(
+        await event_dispatcher.publish(EventType.CHAT_REQUEST_COMPLETED, dict(
             user_id=user_id,
-            db=db,
             llm_provider=llm_config.get("type"),
             llm_model=llm_config.get("model"),
             input_tokens=token_usage.get("input_tokens", 0),
@@ -168,7 +189,7 @@ async def chat(
             success=True,
             ip_address=ip_address,
             guest_email=chat_request.guest_email
-        )
+        ))
 
         app_logger.info(
             "Chat request processed successfully",
@@ -243,7 +264,7 @@ async def chat_stream(
         # - Unauthenticated users: 10/day (Guest Mode)
         from src.core.constants import DAILY_REQUEST_LIMIT_UNAUTHENTICATED
         limit = 10 if user_id is None else DAILY_REQUEST_LIMIT
-        is_allowed, current_count, remaining = usage_tracker.check_daily_limit(
+        is_allowed, current_count, remaining = usage_tracker.admit_request(
             user_id, db, is_default_llm=is_default_llm, ip_address=ip_address, guest_email=chat_request.guest_email
         )
         if not is_allowed:
@@ -323,6 +344,7 @@ async def chat_stream(
                 ])
 
                 # Retrieve context
+                await rag_system.ready()
                 context = rag_system.retrieve_context(chat_request.message)
 
                 # Switch to answering status
@@ -432,9 +454,8 @@ async def chat_stream(
 
                     # Only record usage if llm_config exists
                     if llm_config:
-                        usage_tracker.record_request(
+                        await event_dispatcher.publish(EventType.CHAT_REQUEST_COMPLETED, dict(
                             user_id=user_id,
-                            db=db,
                             llm_provider=llm_config.get("type"),
                             llm_model=llm_config.get("model"),
                             input_tokens=input_tokens,
@@ -445,7 +466,7 @@ async def chat_stream(
                             success=True,
                             ip_address=ip_address,
                             guest_email=chat_request.guest_email
-                        )
+                        ))
 
                 yield f"data: {json.dumps({'chunk': '', 'done': True})}\n\n"
                 stream_completed = True
@@ -525,10 +546,9 @@ async def chat_stream(
                     sanitized_tools = sanitize_tools_for_gemini(formatted_tools, llm_config.get("type", ""))
 
                     try:
-                        agent = create_agent(
-                            model=llm,
-                            tools=sanitized_tools,
-                            system_prompt=system_prompt
+                        agent = agent_cache.get_agent(
+                            llm, llm_config, sanitized_tools, system_prompt,
+                            streaming=True, temperature=0
                         )
                         yield f"data: {json.dumps({'chunk': '', 'done': False, 'status': 'agent_ready'})}\n\n"
                     except Exception as e:
@@ -559,98 +579,55 @@ async def chat_stream(
                     full_response = ""
                     tool_calls_made = []
                     seen_tools = set()
-                    last_streamed_length = 0
-                    is_thinking = True
                     is_answering = False
                     last_ai_message = None  # Track last AI message for token extraction
 
                     try:
-                        async for event in agent.astream({"messages": messages}, stream_mode="values"):
-                            # Normalize all messages in the event to ensure no list content
-                            event_messages = event.get("messages", [])
-                            normalized_event_messages = ChatService._normalize_messages(event_messages)
-                            event["messages"] = normalized_event_messages
-
-                            last_msg = normalized_event_messages[-1] if normalized_event_messages else None
-
-                            # Track last AI message for token usage extraction
-                            if isinstance(last_msg, AIMessage):
-                                last_ai_message = last_msg
-
-                            if isinstance(last_msg, AIMessage):
-                                if getattr(last_msg, "tool_calls", None):
-                                    # Tool calling phase
-                                    if is_thinking:
-                                        is_thinking = False
-                                        yield f"data: {json.dumps({'chunk': '', 'done': False, 'status': 'tool_calling'})}\n\n"
-
-                                    for call in last_msg.tool_calls:
-                                        tool_name = call.get('name') or call.get('tool_name', 'unknown')
-
-                                        # Validate tool exists
-                                        tool_exists = any(
-                                            (hasattr(tool, 'name') and tool.name == tool_name) or
-                                            (hasattr(tool, '__name__') and tool.__name__ == tool_name) or
-                                            str(tool) == tool_name
-                                            for tool in all_tools
-                                        )
+                        async for event in stream_agent_events(agent, messages):
+                            if event.kind == "tool_start":
+                                tool_name = event.tool_name or 'unknown'
+
+                                # Validate tool exists
+                                tool_exists = any(
+                                    (hasattr(tool, 'name') and tool.name == tool_name) or
+                                    (hasattr(tool, '__name__') and tool.__name__ == tool_name) or
+                                    str(tool) == tool_name
+                                    for tool in all_tools
+                                )
 
-                                        if not tool_exists:
-                                            error_msg = (
-                                                "An internal error occurred while processing your request. "
-                                                "Please try again or rephrase your question."
-                                            )
-                                            try:
-                                                yield f"data: {json.dumps({'error': error_msg, 'done': True})}\n\n"
-                                                stream_completed = True
-                                            except (GeneratorExit, StopAsyncIteration, asyncio.CancelledError):
-                                                stream_completed = True
-                                            return
-
-                                        if tool_name not in seen_tools:
-                                            tool_calls_made.append(tool_name)
-                                            seen_tools.add(tool_name)
-                                            yield f"data: {json.dumps({'chunk': '', 'done': False, 'status': 'tool_calling'})}\n\n"
-                                elif last_msg.content:
-                                    # Answering phase
-                                    if is_thinking:
-                                        is_thinking = False
-                                        yield f"data: {json.dumps({'chunk': '', 'done': False, 'status': 'answering'})}\n\n"
-                                    if not is_answering:
-                                        is_answering = True
-                                        yield f"data: {json.dumps({'chunk': '', 'done': False, 'status': 'answering'})}\n\n"
-                                    content_raw = last_msg.content
-
-                                    if isinstance(content_raw, str):
-                                        content = content_raw
-                                    elif isinstance(content_raw, list):
-                                        content = ""
-                                        for item in content_raw:
-                                            if isinstance(item, dict):
-                                                if "text" in item:
-                                                    content += item["text"]
-                                                elif "type" in item and item.get("type") == "text":
-                                                    content += item.get("text", "")
-                                            elif isinstance(item, str):
-                                                content += item
-                                    elif isinstance(content_raw, dict):
-                                        if "text" in content_raw:
-                                            content = content_raw["text"]
-                                        else:
-                                            content = str(content_raw)
-                                    else:
-                                        content = str(content_raw)
-
-                                    if content:
-                                        # Update full_response to the latest content
-                                        full_response = content
-                                        # Stream only new characters (incremental)
-                                        if len(full_response) > last_streamed_length:
-                                            new_content = full_response[last_streamed_length:]
-                                            for char in new_content:
-                                                yield f"data: {json.dumps({'chunk': char, 'done': False})}\n\n"
-                                                await asyncio.sleep(0.005)
-                                            last_streamed_length = len(full_response)
+                                if not tool_exists:
+                                    error_msg = (
+                                        "An internal error occurred while processing your request. "
+                                        "Please try again or rephrase your question."
+                                    )
+                                    try:
+                                        yield f"data: {json.dumps({'error': error_msg, 'done': True})}\n\n"
+                                        stream_completed = True
+                                    except (GeneratorExit, StopAsyncIteration, asyncio.CancelledError):
+                                        stream_completed = True
+                                    return
+
+                                if tool_name not in seen_tools:
+                                    tool_calls_made.append(tool_name)
+                                    seen_tools.add(tool_name)
+                                is_answering = False
+                                # Only the last model step (the one without tool calls) is the answer;
+                                # text streamed before a tool call was a preamble
+                                full_response = ""
+                                # Send tool status (without tool name)
+                                yield f"data: {json.dumps({'chunk': '', 'done': False, 'status': 'tool_calling'})}\n\n"
+                            elif event.kind == "tool_end":
+                                yield f"data: {json.dumps({'chunk': '', 'done': False, 'status': 'thinking'})}\n\n"
+                            elif event.kind == "token":
+                                # Answering phase - forward each delta as it arrives
+                                if not is_answering:
+                                    is_answering = True
+                                    yield f"data: {json.dumps({'chunk': '', 'done': False, 'status': 'answering'})}\n\n"
+                                full_response += event.text
+                                yield f"data: {json.dumps({'chunk': event.text, 'done': False})}\n\n"
+                            elif event.kind == "ai_message":
+                                # Track last AI message for token usage extraction
+                                last_ai_message = event.message
                     except Exception as e:
                         import traceback
                         error_details = str(e)
@@ -725,9 +702,8 @@ async def chat_stream(
                         input_tokens = estimate_tokens(chat_request.message)
                         output_tokens = estimate_tokens(full_response)
 
-                        usage_tracker.record_request(
+                        await event_dispatcher.publish(EventType.CHAT_REQUEST_COMPLETED, dict(
                             user_id=user_id,
-                            db=db,
                             llm_provider=llm_config.get("type"),
                             llm_model=llm_config.get("model"),
                             input_tokens=input_tokens,
@@ -738,7 +714,7 @@ async def chat_stream(
                             success=True,
                             ip_address=ip_address,
                             guest_email=chat_request.guest_email
-                        )
+                        ))
 
                     yield f"data: {json.dumps({'chunk': '', 'done': True, 'tools_used': tool_calls_made})}\n\n"
                     stream_completed = True
@@ -792,6 +768,7 @@ async def chat_stream(
                                 history = db_history_manager.get_session_messages(chat_request.session_id, user_id, db)
                             else:
                                 history = history_manager.get_session_messages(chat_request.session_id, user_id)
+                            await rag_system.ready()
                             context = rag_system.retrieve_context(chat_request.message)
 
                             # Use custom prompt if provided, otherwise use default
@@ -917,9 +894,8 @@ async def chat_stream(
                                 output_tokens = estimate_tokens(full_response)
                                 # Only record usage if llm_config exists
                                 if llm_config:
-                                    usage_tracker.record_request(
+                                    await event_dispatcher.publish(EventType.CHAT_REQUEST_COMPLETED, dict(
                                         user_id=user_id,
-                                        db=db,
                                         llm_provider=llm_config.get("type"),
                                         llm_model=llm_config.get("model"),
                                         input_tokens=input_tokens,
@@ -928,7 +904,7 @@ async def chat_stream(
                                         mode=chat_request.mode,
                                         session_id=chat_request.session_id,
                                         success=True
-                                    )
+                                    ))
 
                             yield f"data: {json.dumps({'chunk': '', 'done': True})}\n\n"
                             stream_completed = True
@@ -976,10 +952,9 @@ async def chat_stream(
                             # Sanitize tools for Gemini compatibility
                             sanitized_tools = sanitize_tools_for_gemini(formatted_tools, llm_config.get("type", ""))
 
-                            agent = create_agent(
-                                model=llm,
-                                tools=sanitized_tools,
-                                system_prompt=system_prompt
+                            agent = agent_cache.get_agent(
+                                llm, llm_config, sanitized_tools, system_prompt,
+                                streaming=True, temperature=0
                             )
                             yield f"data: {json.dumps({'chunk': '', 'done': False, 'status': 'agent_ready'})}\n\n"
                         except Exception as e:
@@ -1010,100 +985,55 @@ async def chat_stream(
                         full_response = ""
                         tool_calls_made = []
                         seen_tools = set()  # Track tools we've already sent
-                        is_thinking = True
                         is_answering = False
                         last_ai_message = None  # Track last AI message for token extraction
 
                         try:
-                            async for event in agent.astream({"messages": messages}, stream_mode="values"):
-                                # Normalize all messages in the event to ensure no list content
-                                event_messages = event.get("messages", [])
-                                normalized_event_messages = ChatService._normalize_messages(event_messages)
-                                event["messages"] = normalized_event_messages
-
-                                last_msg = normalized_event_messages[-1] if normalized_event_messages else None
-
-                                # Track last AI message for token usage extraction
-                                if isinstance(last_msg, AIMessage):
-                                    last_ai_message = last_msg
-
-                                if isinstance(last_msg, AIMessage):
-                                    if getattr(last_msg, "tool_calls", None):
-                                        # Tool calling phase
-                                        if is_thinking:
-                                            is_thinking = False
-                                            yield f"data: {json.dumps({'chunk': '', 'done': False, 'status': 'tool_calling'})}\n\n"
-
-                                        for call in last_msg.tool_calls:
-                                            tool_name = call.get('name') or call.get('tool_name', 'unknown')
-
-                                            # Validate tool exists in our tools list
-                                            tool_exists = any(
-                                                (hasattr(tool, 'name') and tool.name == tool_name) or
-                                                (hasattr(tool, '__name__') and tool.__name__ == tool_name) or
-                                                str(tool) == tool_name
-                                                for tool in all_tools
-                                            )
-
-                                            if not tool_exists:
-                                                error_msg = (
-                                                    "An internal error occurred while processing your request. "
-                                                    "Please try again or rephrase your question."
-                                                )
-                                                try:
-                                                    yield f"data: {json.dumps({'error': error_msg, 'done': True})}\n\n"
-                                                    stream_completed = True
-                                                except (GeneratorExit, StopAsyncIteration, asyncio.CancelledError):
-                                                    stream_completed = True
-                                                return
-
-                                            if tool_name not in seen_tools:
-                                                tool_calls_made.append(tool_name)
-                                                seen_tools.add(tool_name)
-                                                # Send tool metadata with status (without tool name)
-                                                yield f"data: {json.dumps({'chunk': '', 'done': False, 'status': 'tool_calling'})}\n\n"
-                                    elif last_msg.content:
-                                        # Answering phase
-                                        if is_thinking:
-                                            is_thinking = False
-                                            yield f"data: {json.dumps({'chunk': '', 'done': False, 'status': 'answering'})}\n\n"
-                                        if not is_answering:
-                                            is_answering = True
-                                            yield f"data: {json.dumps({'chunk': '', 'done': False, 'status': 'answering'})}\n\n"
-                                        # Stream the actual response character by character for smooth streaming
-                                        # Handle different content types (string, list, dict)
-                                        content_raw = last_msg.content
-
-                                        # Convert content to string if needed
-                                        if isinstance(content_raw, str):
-                                            content = content_raw
-                                        elif isinstance(content_raw, list):
-                                            # Handle list of content blocks (e.g., from Gemini)
-                                            content = ""
-                                            for item in content_raw:
-                                                if isinstance(item, dict):
-                                                    # Extract text from content blocks
-                                                    if "text" in item:
-                                                        content += item["text"]
-                                                    elif "type" in item and item.get("type") == "text":
-                                                        content += item.get("text", "")
-                                                elif isinstance(item, str):
-                                                    content += item
-                                        elif isinstance(content_raw, dict):
-                                            # Handle dict content (e.g., from some models)
-                                            if "text" in content_raw:
-                                                content = content_raw["text"]
-                                            else:
-                                                content = str(content_raw)
-                                        else:
-                                            content = str(content_raw)
+                            async for event in stream_agent_events(agent, messages):
+                                if event.kind == "tool_start":
+                                    tool_name = event.tool_name or 'unknown'
+
+                                    # Validate tool exists in our tools list
+                                    tool_exists = any(
+                                        (hasattr(tool, 'name') and tool.name == tool_name) or
+                                        (hasattr(tool, '__name__') and tool.__name__ == tool_name) or
+                                        str(tool) == tool_name
+                                        for tool in all_tools
+                                    )
 
-                                        if content and content != full_response:  # Only stream new content
-                                            new_content = content[len(full_response):]
-                                            for char in new_content:
-                                                full_response += char
-                                                yield f"data: {json.dumps({'chunk': char, 'done': False})}\n\n"
-                                                await asyncio.sleep(0.005)  # Small delay for smooth streaming
+                                    if not tool_exists:
+                                        error_msg = (
+                                            "An internal error occurred while processing your request. "
+                                            "Please try again or rephrase your question."
+                                        )
+                                        try:
+                                            yield f"data: {json.dumps({'error': error_msg, 'done': True})}\n\n"
+                                            stream_completed = True
+                                        except (GeneratorExit, StopAsyncIteration, asyncio.CancelledError):
+                                            stream_completed = True
+                                        return
+
+                                    if tool_name not in seen_tools:
+                                        tool_calls_made.append(tool_name)
+                                        seen_tools.add(tool_name)
+                                    is_answering = False
+                                    # Only the last model step (the one without tool calls) is the answer;
+                                    # text streamed before a tool call was a preamble
+                                    full_response = ""
+                                    # Send tool status (without tool name)
+                                    yield f"data: {json.dumps({'chunk': '', 'done': False, 'status': 'tool_calling'})}\n\n"
+                                elif event.kind == "tool_end":
+                                    yield f"data: {json.dumps({'chunk': '', 'done': False, 'status': 'thinking'})}\n\n"
+                                elif event.kind == "token":
+                                    # Answering phase - forward each delta as it arrives
+                                    if not is_answering:
+                                        is_answering = True
+                                        yield f"data: {json.dumps({'chunk': '', 'done': False, 'status': 'answering'})}\n\n"
+                                    full_response += event.text
+                                    yield f"data: {json.dumps({'chunk': event.text, 'done': False})}\n\n"
+                                elif event.kind == "ai_message":
+                                    # Track last AI message for token usage extraction
+                                    last_ai_message = event.message
                         except Exception as e:
                             import traceback
                             error_details = str(e)
@@ -1176,9 +1106,8 @@ async def chat_stream(
 
                                 # Only record usage if llm_config exists
                                 if llm_config:
-                                    usage_tracker.record_request(
+                                    await event_dispatcher.publish(EventType.CHAT_REQUEST_COMPLETED, dict(
                                         user_id=user_id,
-                                        db=db,
                                         llm_provider=llm_config.get("type"),
                                         llm_model=llm_config.get("model"),
                                         input_tokens=input_tokens,
@@ -1187,7 +1116,7 @@ async def chat_stream(
                                         mode=chat_request.mode,
                                         session_id=chat_request.session_id,
                                         success=True
-                                    )
+                                    ))
 
                         yield f"data: {json.dumps({'chunk': '', 'done': True, 'tools_used': tool_calls_made})}\n\n"
                         stream_completed = True
@@ -1266,7 +1195,7 @@ async def chat_stream(
     # Note: FastAPI Swagger UI doesn't display streaming responses properly
     # Use curl or the frontend to test streaming
     return StreamingResponse(
-        generate(),
+        _observe_first_token(generate(), chat_request.mode),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -27,8 +27,6 @@ from src.core.chat_constants import (
     EVENT_KEY_TOOL_COUNT,
     MAX_ERROR_TRACEBACK_LENGTH,
     MAX_ERROR_DETAIL_LENGTH,
-    CONTENT_TYPE_TEXT,
-    CONTENT_TYPE_KEY,
     UNKNOWN_TOOL_NAME,
     DEFAULT_LLM_TEMPERATURE,
     DEFAULT_EMBEDDING_TOKENS,
@@ -37,6 +35,7 @@ from src.services import history_manager, MCPClientManager, create_llm_from_conf
 from src.services.db_history import db_history_manager
 from src.services.tools import retrieve_dosiblog_context, load_custom_rag_tools, create_appointment_tool
 from src.services.chat_service import ChatService
+from src.services.message_normalizer import extract_text
 from src.utils.logger import app_logger
 from src.utils.utils import extract_token_usage, estimate_tokens
 from sqlalchemy.orm import Session
@@ -83,35 +82,7 @@ class ContentNormalizer:
     @staticmethod
     def normalize_content(content_raw: Any) -> str:
         """Extract text content from various content types"""
-        if isinstance(content_raw, str):
-            return content_raw
-        elif isinstance(content_raw, list):
-            return ContentNormalizer._extract_from_list(content_raw)
-        elif isinstance(content_raw, dict):
-            return ContentNormalizer._extract_from_dict(content_raw)
-        else:
-            return str(content_raw)
-
-    @staticmethod
-    def _extract_from_list(content_list: List) -> str:
-        """Extract text from list of content blocks"""
-        result = ""
-        for item in content_list:
-            if isinstance(item, dict):
-                if "text" in item:
-                    result += item["text"]
-                elif CONTENT_TYPE_KEY in item and item.get(CONTENT_TYPE_KEY) == CONTENT_TYPE_TEXT:
-                    result += item.get("text", "")
-            elif isinstance(item, str):
-                result += item
-        return result
-
-    @staticmethod
-    def _extract_from_dict(content_dict: Dict) -> str:
-        """Extract text from dict content"""
-        if "text" in content_dict:
-            return content_dict["text"]
-        return str(content_dict)
+        return extract_text(content_raw)
 
 
 class ErrorMessageFormatter:
@@ -3,25 +3,24 @@ Document upload and management endpoints
 """
 import asyncio
 from typing import Optional, List
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
 from sqlalchemy.orm import Session
 import json
 
 from src.core import get_db, DB_AVAILABLE, User
 from src.core.auth import get_current_active_user
-from src.core.models import Document, DocumentCollection, DocumentChunk
+from src.core.models import Document, DocumentCollection, DocumentChunk, IngestionJob
 from ..models import CollectionRequest, AddTextRequest
 from src.services.document_processor import document_processor
 from src.services.advanced_rag import advanced_rag_system
 from src.services.human_in_loop import human_in_loop
-from src.core.database import get_db_context
+from src.services.ingestion_worker import ingestion_worker_pool
 
 router = APIRouter()
 
 
 @router.post("/documents/upload")
 async def upload_document(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     collection_id: Optional[int] = Form(None),
     current_user: User = Depends(get_current_active_user),
@@ -42,22 +41,28 @@ async def upload_document(
     if not DB_AVAILABLE:
         raise HTTPException(status_code=503, detail="Database not available")
     
-    # Validate file
-    file_content = await file.read()
-    is_valid, error_msg = document_processor.validate_file(file_content, file.filename)
-    
+    # Validate file type before reading any content
+    is_valid, error_msg = document_processor.validate_filename(file.filename)
     if not is_valid:
         raise HTTPException(status_code=400, detail=error_msg)
+
+    # Reject early if the client declared an oversized body
+    declared_size = getattr(file, "size", None)
+    if declared_size is not None and declared_size > document_processor.MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail=document_processor.size_error_message())
     
     # Get file type
     file_type = file.filename.split('.')[-1].lower()
     
-    # Save file
-    file_path, unique_filename = document_processor.save_file(
-        file_content,
-        file.filename,
-        current_user.id
-    )
+    # Stream file to disk (size and hash computed incrementally)
+    try:
+        file_path, unique_filename, file_size, content_hash = await document_processor.save_upload_stream(
+            file,
+            file.filename,
+            current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Create document record
     document = Document(
@@ -67,22 +72,19 @@ async def upload_document(
         original_filename=file.filename,
         file_path=file_path,
         file_type=file_type,
-        file_size=len(file_content),
+        file_size=file_size,
+        document_metadata=json.dumps({"sha256": content_hash}),
         status="pending"
     )
     
     db.add(document)
+    db.flush()
+
+    # Queue for the ingestion worker pool (durable - survives restarts)
+    ingestion_worker_pool.enqueue(db, document.id, current_user.id)
     db.commit()
     db.refresh(document)
-    
-    # Process document in background
-    background_tasks.add_task(
-        process_document_task,
-        document.id,
-        current_user.id,
-        file_path,
-        file_type
-    )
+    ingestion_worker_pool.notify()
     
     return {
         "message": "Document uploaded successfully. Processing in background.",
@@ -90,99 +92,6 @@ async def upload_document(
     }
 
 
-async def process_document_task(document_id: int, user_id: int, file_path: str, file_type: str):
-    """Background task to process uploaded document"""
-    with get_db_context() as db:
-        try:
-            document = db.query(Document).filter(Document.id == document_id).first()
-            if not document:
-                return
-            
-            # Update status to processing
-            document.status = "processing"
-            db.commit()
-            
-            # Extract text
-            extracted_text, metadata = document_processor.extract_text(file_path, file_type)
-            
-            # Check if review is needed
-            needs_review = human_in_loop.should_require_review(document, extracted_text)
-            
-            # Chunk text
-            chunks = document_processor.chunk_text(extracted_text, chunk_size=1000, chunk_overlap=200)
-            
-            # Save chunks to database
-            chunk_objects = []
-            for chunk_data in chunks:
-                chunk_metadata = json.dumps(chunk_data.get("metadata", {}))
-                chunk = DocumentChunk(
-                    document_id=document_id,
-                    chunk_index=chunk_data["chunk_index"],
-                    content=chunk_data["content"],
-                    metadata=chunk_metadata
-                )
-                chunk_objects.append(chunk)
-                db.add(chunk)
-            
-            # Update document
-            document.chunk_count = len(chunks)
-            document.document_metadata = json.dumps(metadata)
-            document.status = "needs_review" if needs_review else "ready"
-            document.embedding_status = "pending"
-            
-            db.commit()
-            
-            # Generate embeddings and add to vectorstore (if ready)
-            if document.status == "ready":
-                # Prepare chunks for vectorstore
-                rag_chunks = []
-                for chunk_obj in chunk_objects:
-                    chunk_metadata = {}
-                    if chunk_obj.chunk_metadata:
-                        try:
-                            chunk_metadata = json.loads(chunk_obj.chunk_metadata)
-                        except:
-                            pass
-                    
-                    rag_chunks.append({
-                        "content": chunk_obj.content,
-                        "metadata": {
-                            **chunk_metadata,
-                            "chunk_id": chunk_obj.id,
-                            "document_id": document_id,
-                            "original_filename": document.original_filename
-                        }
-                    })
-                
-                # Add to vectorstore
-                success = advanced_rag_system.add_documents(
-                    user_id=user_id,
-                    chunks=rag_chunks,
-                    collection_id=document.collection_id
-                )
-                
-                if success:
-                    document.embedding_status = "completed"
-                else:
-                    document.embedding_status = "failed"
-                
-                db.commit()
-            
-            print(f"✓ Processed document {document_id}: {len(chunks)} chunks")
-        except Exception as e:
-            print(f"❌ Error processing document {document_id}: {e}")
-            import traceback
-            traceback.print_exc()
-            
-            # Update document status to error
-            document = db.query(Document).filter(Document.id == document_id).first()
-            if document:
-                document.status = "error"
-                error_metadata = {"error": str(e)}
-                document.document_metadata = json.dumps(error_metadata)
-                db.commit()
-
-
 @router.get("/documents")
 async def list_documents(
     collection_id: Optional[int] = None,
@@ -227,8 +136,13 @@ async def get_document(
     
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
+
+    # Latest ingestion job (progress, attempts, last error)
+    job = db.query(IngestionJob).filter(
+        IngestionJob.document_id == document_id
+    ).order_by(IngestionJob.id.desc()).first()
     
-    return {"document": document.to_dict()}
+    return {"document": document.to_dict(), "ingestion": job.to_dict() if job else None}
 
 
 @router.delete("/documents/{document_id}")
@@ -250,6 +164,7 @@ async def delete_document(
         raise HTTPException(status_code=404, detail="Document not found")
     
     # Delete from vectorstore
+    await advanced_rag_system.ready()
     advanced_rag_system.delete_documents(current_user.id, [document_id])
     
     # Delete file
@@ -309,6 +224,7 @@ async def approve_document(
                     }
                 })
             
+            await advanced_rag_system.ready()
             success = advanced_rag_system.add_documents(
                 user_id=current_user.id,
                 chunks=rag_chunks,
@@ -482,7 +398,10 @@ async def add_text_to_rag(
         chunks = document_processor.chunk_text(
             text=request.content,
             chunk_size=request.chunk_size,
-            chunk_overlap=request.chunk_overlap
+            chunk_overlap=request.chunk_overlap,
+            strategy=request.chunk_strategy,
+            max_tokens=request.max_tokens,
+            overlap_tokens=request.overlap_tokens
         )
         
         if not chunks:
@@ -550,6 +469,7 @@ async def add_text_to_rag(
             })
         
         # Add to vectorstore
+        await advanced_rag_system.ready()
         success = advanced_rag_system.add_documents(
             user_id=current_user.id,
             chunks=rag_chunks,
@@ -10,10 +10,16 @@ from ..models import MCPServerRequest
 from ..exceptions import UnauthorizedError, ValidationError, APIException
 from src.utils.mcp_connection_test import test_mcp_connection
 from src.utils.logger import app_logger
+from src.observers.event_dispatcher import EventType, event_dispatcher
 
 router = APIRouter()
 
 
+def _servers_changed(user_id: Optional[int]):
+    """Tell listeners (e.g. the health publisher) that a user's servers changed"""
+    event_dispatcher.emit(EventType.MCP_SERVERS_CHANGED, {"user_id": user_id})
+
+
 @router.get("/mcp-servers")
 async def list_mcp_servers(
     db: Session = Depends(get_db),
@@ -197,6 +203,7 @@ async def add_mcp_server(
         db.add(mcp_server)
         db.commit()
         db.refresh(mcp_server)
+        _servers_changed(current_user.id)
 
         # Get total count for this user
         total_servers = db.query(MCPServer).filter(MCPServer.user_id == current_user.id).count()
@@ -255,6 +262,7 @@ async def delete_mcp_server(
         # Delete server
         db.delete(mcp_server)
         db.commit()
+        _servers_changed(current_user.id)
 
         # Get remaining count for this user
         remaining_count = db.query(MCPServer).filter(MCPServer.user_id == current_user.id).count()
@@ -361,6 +369,7 @@ async def update_mcp_server(
 
         db.commit()
         db.refresh(mcp_server)
+        _servers_changed(current_user.id)
 
         return {
             "status": "success",
@@ -484,6 +493,7 @@ async def toggle_global_mcp_server_preference(
 
         db.commit()
         db.refresh(preference)
+        _servers_changed(user_id)
 
         status = "enabled" if preference.enabled else "disabled"
         return {
@@ -551,6 +561,7 @@ async def toggle_mcp_server(
         mcp_server.enabled = not mcp_server.enabled
         db.commit()
         db.refresh(mcp_server)
+        _servers_changed(current_user.id)
 
         return {
             "status": "success",
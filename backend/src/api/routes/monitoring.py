@@ -1,17 +1,41 @@
 """
 API Usage Monitoring Endpoints
 """
+import hmac
+import os
 from fastapi import APIRouter, HTTPException, Depends, Request, Query
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 from src.core import get_db, User
 from src.core.auth import get_current_user, get_current_active_user, get_optional_current_user
 from src.services.usage_tracker import usage_tracker
 from src.core.constants import DAILY_REQUEST_LIMIT, DAILY_REQUEST_LIMIT_UNAUTHENTICATED
+from src.utils.metrics import metrics
+
+# Bearer token required by /metrics (unset: the endpoint is disabled)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
 
 router = APIRouter()
 
 
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(request: Request):
+    """
+    Latency histograms and counters in the Prometheus text format
+
+    Values are per worker process. Requires `Authorization: Bearer <METRICS_TOKEN>`;
+    without METRICS_TOKEN the endpoint answers 404, since labels include
+    users' private MCP server and tool names.
+    """
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    authorization = request.headers.get("authorization", "")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {METRICS_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @router.get("/usage/stats")
 async def get_usage_stats(
     request: Request,
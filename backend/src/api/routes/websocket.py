@@ -6,7 +6,8 @@ import json
 from typing import Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
 from sqlalchemy.orm import Session
-from src.core import get_db, DB_AVAILABLE, MCPServer, get_db_context
+from src.core import get_db_context
+from src.services.health_broadcaster import health_broadcaster, HEALTH_KEEPALIVE_SECONDS
 
 router = APIRouter()
 
@@ -14,50 +15,12 @@ router = APIRouter()
 async def get_health_status(db: Optional[Session] = None, user_id: Optional[int] = None) -> dict:
     """
     Get current health status including MCP servers count and RAG availability
+
+    Served from the shared health publisher's snapshot (no per-call queries).
     """
-    try:
-        # Count MCP servers
-        mcp_count = 0
-        if DB_AVAILABLE:
-            try:
-                if db:
-                    query = db.query(MCPServer).filter(MCPServer.enabled == True)
-                    if user_id is not None:
-                        query = query.filter(MCPServer.user_id == user_id)
-                    mcp_count = query.count()
-                else:
-                    from src.core import get_db_context
-                    with get_db_context() as session:
-                        query = session.query(MCPServer).filter(MCPServer.enabled == True)
-                        if user_id is not None:
-                            query = query.filter(MCPServer.user_id == user_id)
-                        mcp_count = query.count()
-            except Exception as e:
-                print(f"⚠️  Error counting MCP servers: {e}")
-                mcp_count = 0
-        
-        # Check RAG availability (check if advanced_rag system is available)
-        rag_available = False
-        try:
-            from src.services.advanced_rag import advanced_rag_system
-            rag_available = advanced_rag_system is not None
-        except Exception:
-            rag_available = False
-        
-        return {
-            "status": "healthy",
-            "version": "1.0.0",
-            "rag_available": rag_available,
-            "mcp_servers": mcp_count
-        }
-    except Exception as e:
-        print(f"⚠️  Error getting health status: {e}")
-        return {
-            "status": "unhealthy",
-            "version": "1.0.0",
-            "rag_available": False,
-            "mcp_servers": 0
-        }
+    if not health_broadcaster.is_loaded():
+        await health_broadcaster.refresh()
+    return health_broadcaster.snapshot(user_id)
 
 
 @router.websocket("/ws/health")
@@ -65,8 +28,10 @@ async def websocket_health(websocket: WebSocket, token: Optional[str] = Query(No
     """
     WebSocket endpoint for real-time health status updates
     
-    Sends health status every 5 seconds to keep connection alive and provide updates.
-    Client can send ping messages to request immediate status update.
+    Sends the current status on connect, then pushes an update whenever the
+    shared health publisher sees a change (re-sending the cached status as a
+    keepalive when idle). Client can send ping messages to request immediate
+    status update.
     
     Optional query parameter: token - JWT token for authenticated users (for user-specific MCP server count)
     """
@@ -120,29 +85,39 @@ async def websocket_health(websocket: WebSocket, token: Optional[str] = Query(No
             # print(f"⚠️  Error verifying token in WebSocket: {e}") # Reduce log noise
             pass
     
+    updates = await health_broadcaster.subscribe(user_id)
+    receive_task = asyncio.create_task(websocket.receive_text())
     try:
         # Send initial health status
-        health_status = await get_health_status(None, user_id)
-        await websocket.send_json(health_status)
+        await websocket.send_json(health_broadcaster.snapshot(user_id))
         print(f"✓ Sent initial health status to WebSocket client")
-        
-        # Keep connection alive and send periodic updates
+
+        # Forward published changes; answer client messages from the cached snapshot
         while True:
             try:
-                # Wait for either a message from client or timeout
-                # Use asyncio.wait_for to implement timeout
-                try:
-                    # Wait for client message with 5 second timeout
-                    message = await asyncio.wait_for(websocket.receive_text(), timeout=5.0)
-                    
+                update_task = asyncio.create_task(updates.get())
+                done, _ = await asyncio.wait(
+                    {receive_task, update_task},
+                    timeout=HEALTH_KEEPALIVE_SECONDS,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if update_task in done:
+                    await websocket.send_json(update_task.result())
+                else:
+                    update_task.cancel()
+
+                if receive_task in done:
+                    # Raises WebSocketDisconnect when the client went away
+                    message = receive_task.result()
+                    receive_task = asyncio.create_task(websocket.receive_text())
+
                     # Handle client messages
                     try:
                         data = json.loads(message)
                         if data.get("type") == "ping":
                             # Client requested immediate status update
-                            health_status = await get_health_status(None, user_id)
                             await websocket.send_json({
-                                **health_status,
+                                **health_broadcaster.snapshot(user_id),
                                 "type": "pong"
                             })
                         elif data.get("type") == "close":
@@ -152,11 +127,10 @@ async def websocket_health(websocket: WebSocket, token: Optional[str] = Query(No
                     except json.JSONDecodeError:
                         # Invalid JSON, ignore
                         pass
-                except asyncio.TimeoutError:
-                    # Timeout - send periodic health update
-                    health_status = await get_health_status(None, user_id)
-                    await websocket.send_json(health_status)
-                    
+                elif not done:
+                    # Idle - re-send the cached status to keep the connection alive
+                    await websocket.send_json(health_broadcaster.snapshot(user_id))
+
             except WebSocketDisconnect:
                 # Client disconnected normally
                 print("✓ WebSocket client disconnected")
@@ -177,7 +151,7 @@ async def websocket_health(websocket: WebSocket, token: Optional[str] = Query(No
                 except:
                     pass
                 break
-                
+
     except WebSocketDisconnect:
         # Normal disconnect
         print("✓ WebSocket disconnected normally")
@@ -185,4 +159,6 @@ async def websocket_health(websocket: WebSocket, token: Optional[str] = Query(No
         print(f"⚠️  WebSocket connection error: {e}")
         import traceback
         traceback.print_exc()
-
+    finally:
+        receive_task.cancel()
+        health_broadcaster.unsubscribe(user_id, updates)
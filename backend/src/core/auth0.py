@@ -5,12 +5,16 @@ import urllib.request
 from typing import Optional, Dict, Any
 from jose import jwt
 from fastapi import HTTPException, status
+from src.utils.cache import get_cache
 
 # Auth0 Configuration
 AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN")
 AUTH0_API_AUDIENCE = os.getenv("AUTH0_AUDIENCE")
 ALGORITHMS = ["RS256"]
 
+# JWKS rarely rotates - cache it instead of fetching on every token
+_jwks_cache = get_cache("jwks", default_ttl_seconds=3600, max_entries=8)
+
 class Auth0Error(Exception):
     def __init__(self, error: str, status_code: int):
         self.error = error
@@ -23,7 +27,10 @@ def get_auth0_public_key(token: str) -> str:
     
     json_url = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
     try:
-        jwks = json.loads(urllib.request.urlopen(json_url).read())
+        jwks = _jwks_cache.get_or_compute_sync(
+            json_url,
+            lambda: json.loads(urllib.request.urlopen(json_url).read())
+        )
     except Exception as e:
         raise Auth0Error(f"Failed to fetch JWKS: {str(e)}", 500)
         
@@ -40,7 +47,9 @@ def get_auth0_public_key(token: str) -> str:
                 "e": key["e"]
             }
             return rsa_key
-            
+
+    # Unknown kid - keys may have rotated, refetch on next call
+    _jwks_cache.delete(json_url)
     raise Auth0Error("Unable to find appropriate key", 401)
 
 def verify_auth0_token(token: str) -> Dict[str, Any]:
@@ -7,6 +7,10 @@ import json
 from pathlib import Path
 from typing import Optional
 from sqlalchemy.orm import Session
+from src.utils.logger import get_logger
+from src.utils.metrics import config_load_seconds
+
+log = get_logger(__name__)
 
 # Load environment variables
 try:
@@ -59,6 +63,7 @@ class Config:
     ROOT_DIR = Path(__file__).parent.parent
 
     @classmethod
+    @config_load_seconds.time(config="mcp_servers")
     def load_mcp_servers(cls, additional_servers: list = None, db: Optional[Session] = None, user_id: Optional[int] = None) -> list[dict]:
         """
         Load MCP servers from database - USER-SPECIFIC AND PRIVATE ONLY.
@@ -81,7 +86,7 @@ class Config:
 
         # REQUIRE user_id - no MCP access without authentication
         if user_id is None:
-            print("⚠️  MCP servers require authentication - user_id is required. No MCP access for unauthenticated users.")
+            log.debug("MCP servers require authentication - no MCP access for unauthenticated users")
             return []
 
         # Load from database - user-specific servers AND global servers (user_id=None)
@@ -172,12 +177,12 @@ class Config:
                 user_servers = [s for s in servers if not s.get('is_global')]
                 global_servers = [s for s in servers if s.get('is_global')]
                 if servers:
-                    print(f"📝 Loaded {len(user_servers)} user-specific + {len(global_servers)} global MCP server(s)")
+                    log.debug("Loaded MCP servers", {"user": len(user_servers), "global": len(global_servers)})
             except Exception as e:
-                print(f"⚠️  Failed to load MCP servers from database: {e}")
+                log.warning("Failed to load MCP servers from database", {"error": str(e)})
                 servers = []
         else:
-            print("⚠️  Database not available - cannot load user-specific MCP servers")
+            log.warning("Database not available - cannot load user-specific MCP servers")
             return []
 
         # NO environment variable fallback - all MCPs must be user-specific and private
@@ -186,15 +191,16 @@ class Config:
         # Add any additional servers passed as argument (should also be user-specific)
         if additional_servers:
             servers.extend(additional_servers)
-            print(f"📝 Added {len(additional_servers)} additional server(s)")
+            log.debug("Added additional MCP servers", {"count": len(additional_servers)})
 
         # No servers configured for this user
         if not servers:
-            print(f"📝 No MCP servers configured - agent will use local tools only")
+            log.debug("No MCP servers configured - agent will use local tools only")
 
         return servers
 
     @classmethod
+    @config_load_seconds.time(config="llm")
     def load_llm_config(cls, db: Optional[Session] = None, user_id: Optional[int] = None) -> Optional[dict]:
         """
         Load LLM configuration from database for a specific user, with fallback to default DeepSeek.
@@ -293,7 +299,7 @@ class Config:
                                 pass
 
                         # Log config loaded (without sensitive info)
-                        print(f"📝 Loaded LLM config: {config.get('type', 'unknown')} - {config.get('model', 'unknown')}")
+                        log.debug("Loaded LLM config", {"type": config.get('type', 'unknown'), "model": config.get('model', 'unknown')})
                         return config
                 else:
                     # Create new session
@@ -377,21 +383,21 @@ class Config:
                                     pass
                                 # If still no API key, warn but don't fail (superadmin should configure via dashboard)
                                 if not config.get('api_key'):
-                                    print(f"⚠️  No API key found for {config.get('type', 'LLM')} config. Please configure via environment variables.")
+                                    log.warning("No API key found for LLM config. Please configure via environment variables.", {"type": config.get('type', 'LLM')})
 
                             # Log config loaded (without sensitive info)
-                            print(f"📝 Loaded LLM config: {config.get('type', 'unknown')} - {config.get('model', 'unknown')}")
+                            log.debug("Loaded LLM config", {"type": config.get('type', 'unknown'), "model": config.get('model', 'unknown')})
                             return config
             except Exception as e:
-                print(f"⚠️  Failed to load LLM config from database: {e}")
+                log.warning("Failed to load LLM config from database", {"error": str(e)})
 
         # No automatic fallback to environment variables after first initialization
         # LLM configs must be configured via environment variables or user settings
         # If no config found, return None - callers should handle this gracefully
         if DB_AVAILABLE and user_id is not None:
-            print("⚠️  No active LLM configuration found. Please configure LLM providers via environment variables or create a personal LLM config.")
+            log.warning("No active LLM configuration found. Please configure LLM providers via environment variables or create a personal LLM config.", {"user_id": user_id})
         else:
-            print("⚠️  No active LLM configuration found. Please configure LLM providers via the superadmin dashboard.")
+            log.warning("No active LLM configuration found. Please configure LLM providers via the superadmin dashboard.")
         return None
 
     @classmethod
@@ -430,7 +436,7 @@ class Config:
                     session.add(llm_config)
                     # Context manager will commit automatically
 
-                print(f"✓ LLM config saved to database")
+                log.info("LLM config saved to database")
                 return True
 
             # If using provided session, update here (caller will commit)
@@ -449,9 +455,9 @@ class Config:
             session.add(llm_config)
             # Don't commit - caller handles it
 
-            print(f"✓ LLM config saved to database: {config.get('type', 'unknown')} - {config.get('model', 'unknown')}")
+            log.info("LLM config saved to database", {"type": config.get('type', 'unknown'), "model": config.get('model', 'unknown')})
             return True
         except Exception as e:
-            print(f"⚠️  Failed to save LLM config to database: {e}")
+            log.warning("Failed to save LLM config to database", {"error": str(e)})
             raise
 
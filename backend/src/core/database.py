@@ -459,6 +459,7 @@ def init_db():
                                 content TEXT NOT NULL,
                                 chunk_metadata TEXT,
                                 embedding TEXT,
+                                embedded_at TIMESTAMP WITH TIME ZONE,
                                 created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
                             )
                         """)
@@ -466,6 +467,19 @@ def init_db():
                     conn.execute(text("CREATE INDEX idx_document_chunks_document_id ON document_chunks(document_id)"))
                     conn.commit()
                     print("✓ Created document_chunks table")
+                else:
+                    # Check and add embedded_at column (embedding checkpoint) to document_chunks table
+                    result = conn.execute(
+                        text("SELECT column_name FROM information_schema.columns "
+                             "WHERE table_name='document_chunks' AND column_name='embedded_at'")
+                    )
+                    if not result.fetchone():
+                        print("📝 Adding embedded_at column to document_chunks table...")
+                        conn.execute(
+                            text("ALTER TABLE document_chunks ADD COLUMN embedded_at TIMESTAMP WITH TIME ZONE")
+                        )
+                        conn.commit()
+                        print("✓ Added embedded_at column to document_chunks table")
                 
                 # Check if api_usage table exists
                 result = conn.execute(
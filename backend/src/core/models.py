@@ -404,6 +404,7 @@ if Base is not None:
         content = Column(Text, nullable=False)
         chunk_metadata = Column(Text, nullable=True)  # JSON string for chunk metadata (page number, etc.) (renamed from metadata to avoid SQLAlchemy conflict)
         embedding = Column(Text, nullable=True)  # Base64 encoded embedding vector
+        embedded_at = Column(DateTime(timezone=True), nullable=True)  # Set once the chunk is saved in the vectorstore (ingestion checkpoint)
         created_at = Column(DateTime(timezone=True), server_default=func.now())
 
         # Relationships
@@ -428,6 +429,42 @@ if Base is not None:
                 "created_at": self.created_at.isoformat() if self.created_at else None,
             }
 
+    class IngestionJob(Base):
+        """Durable queue entry for background document ingestion"""
+        __tablename__ = "ingestion_jobs"
+
+        id = Column(Integer, primary_key=True, index=True)
+        document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+        user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+        status = Column(String(50), nullable=False, default="queued", index=True)  # queued, running, completed, failed
+        stage = Column(String(50), nullable=True)  # extracting, chunking, storing, embedding
+        progress = Column(Integer, default=0, nullable=False)  # 0-100
+        attempts = Column(Integer, default=0, nullable=False)
+        max_attempts = Column(Integer, default=3, nullable=False)
+        last_error = Column(Text, nullable=True)
+        run_after = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)  # Retry backoff
+        locked_at = Column(DateTime(timezone=True), nullable=True)  # Set while a worker holds the job
+        created_at = Column(DateTime(timezone=True), server_default=func.now())
+        updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+        # Relationships
+        document = relationship("Document", backref="ingestion_jobs")
+
+        def to_dict(self) -> dict:
+            """Convert model to dictionary"""
+            return {
+                "id": self.id,
+                "document_id": self.document_id,
+                "status": self.status,
+                "stage": self.stage,
+                "progress": self.progress,
+                "attempts": self.attempts,
+                "max_attempts": self.max_attempts,
+                "last_error": self.last_error,
+                "created_at": self.created_at.isoformat() if self.created_at else None,
+                "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            }
+
     class CustomRAGTool(Base):
         """Custom RAG tool model for user-defined retrieval tools"""
         __tablename__ = "custom_rag_tools"
@@ -593,6 +630,25 @@ if Base is not None:
                 "created_at": self.created_at.isoformat() if self.created_at else None,
             }
 
+    class APIRequestHourly(Base):
+        """Hourly per-user rollup of APIRequest rows (maintained on write, survives raw-row compaction)"""
+        __tablename__ = "api_request_hourly"
+
+        id = Column(Integer, primary_key=True, index=True)
+        bucket_start = Column(DateTime(timezone=True), nullable=False, index=True)  # Start of the hour
+        user_id = Column(Integer, nullable=False, default=0, index=True)  # 0 for anonymous users (NULLs would defeat the unique key)
+        request_count = Column(Integer, default=0, nullable=False)
+        valid_requests = Column(Integer, default=0, nullable=False)  # Successful requests that consumed tokens
+        error_count = Column(Integer, default=0, nullable=False)  # Failed requests
+        input_tokens = Column(Integer, default=0, nullable=False)
+        output_tokens = Column(Integer, default=0, nullable=False)
+        embedding_tokens = Column(Integer, default=0, nullable=False)
+        total_tokens = Column(Integer, default=0, nullable=False)
+
+        __table_args__ = (
+            UniqueConstraint('bucket_start', 'user_id', name='uq_api_request_hourly_bucket_user'),
+        )
+
     class UserAppeal(Base):
         """User appeals/messages from blocked users to superadmin"""
         __tablename__ = "user_appeals"
@@ -635,8 +691,10 @@ else:
     Message = None  # type: ignore
     DocumentCollection = None  # type: ignore
     APIRequest = None  # type: ignore
+    APIRequestHourly = None  # type: ignore
     Document = None  # type: ignore
     DocumentChunk = None  # type: ignore
+    IngestionJob = None  # type: ignore
     CustomRAGTool = None  # type: ignore
     AppointmentRequest = None  # type: ignore
     APIUsage = None  # type: ignore
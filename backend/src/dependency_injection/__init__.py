@@ -2,12 +2,20 @@
 Dependency Injection Container
 Following Dependency Injection Pattern
 """
-from .container import Container, get_container
-from .providers import ServiceProvider
+from .container import Container, LazyService, get_container
 
 __all__ = [
     "Container",
     "get_container",
+    "LazyService",
     "ServiceProvider",
 ]
 
+
+def __getattr__(name):
+    # ServiceProvider pulls in repositories and services; import it on demand so
+    # service modules can register lazy services without a circular import
+    if name == "ServiceProvider":
+        from .providers import ServiceProvider
+        return ServiceProvider
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
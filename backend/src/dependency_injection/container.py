@@ -4,12 +4,25 @@ Following Dependency Injection Pattern
 
 Simple DI container - not using a full framework like injector or dependency-injector
 to keep dependencies minimal. This works fine for our needs.
+
+Heavy services (RAG systems, reranker models) are registered lazily: importing
+their module only creates a LazyService proxy, and the real instance is built
+on first use or by warm_up() in the app lifespan. Each service is built under
+its own lock; async code awaits `service.ready()` before first use so a build
+in progress (e.g. the warm-up thread) never blocks the event loop.
 """
-from typing import Dict, Callable, Any, Optional, TypeVar, Type
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Callable, Any, List, Optional, TypeVar, Type
 from functools import lru_cache
 
 T = TypeVar('T')
 
+# Seconds a lazy service may take to initialize before a warning is logged
+SERVICE_INIT_BUDGET_SECONDS = float(os.getenv("SERVICE_INIT_BUDGET_SECONDS", "2.0"))
+
 
 class Container:
     """
@@ -24,6 +37,12 @@ class Container:
         self._services: Dict[str, Any] = {}
         self._factories: Dict[str, Callable] = {}
         self._singletons: Dict[str, Any] = {}
+        # Per-service locks so concurrent first uses build one instance without
+        # waiting on other services' builds
+        self._locks: Dict[str, threading.RLock] = {}
+        self._locks_guard = threading.Lock()
+        self._lazy: Dict[str, float] = {}  # lazy service name -> init budget
+        self._init_times: Dict[str, float] = {}
 
     def register(self, service_name: str, service: Any, singleton: bool = False):
         """Register a service"""
@@ -49,13 +68,95 @@ class Container:
         # Check factories - create on demand
         if service_name in self._factories:
             factory, singleton = self._factories[service_name]
-            instance = factory()
-            if singleton:
+            if not singleton:
+                return factory()
+            with self._service_lock(service_name):
+                if service_name in self._singletons:
+                    return self._singletons[service_name]
+                instance = self._create(service_name, factory)
                 self._singletons[service_name] = instance  # Cache if singleton
-            return instance
+                return instance
 
         raise ValueError(f"Service '{service_name}' not found")
 
+    async def aget(self, service_name: str) -> Any:
+        """Get a service from async code, building it in a worker thread if needed"""
+        if service_name in self._singletons:
+            return self._singletons[service_name]
+        return await asyncio.to_thread(self.get, service_name)
+
+    def _service_lock(self, service_name: str) -> threading.RLock:
+        """Lock guarding a singleton's creation (reentrant for factories that use the container)"""
+        with self._locks_guard:
+            lock = self._locks.get(service_name)
+            if lock is None:
+                lock = self._locks[service_name] = threading.RLock()
+            return lock
+
+    def _create(self, service_name: str, factory: Callable) -> Any:
+        """Run a factory, recording how long it took"""
+        started = time.perf_counter()
+        instance = factory()
+        elapsed = time.perf_counter() - started
+        self._init_times[service_name] = elapsed
+        budget = self._lazy.get(service_name)
+        if budget is not None and elapsed > budget:
+            print(f"⚠️  {service_name} took {elapsed:.2f}s to initialize (budget {budget:.2f}s)")
+        return instance
+
+    def register_lazy(
+        self,
+        service_name: str,
+        factory: Callable[[], T],
+        budget_seconds: Optional[float] = None
+    ) -> T:
+        """
+        Register a singleton that is built on first use
+
+        Returns:
+            A LazyService proxy that can be bound to a module-level name in
+            place of the instance (attribute access builds the service)
+        """
+        self.register_factory(service_name, factory, singleton=True)
+        self._lazy[service_name] = SERVICE_INIT_BUDGET_SECONDS if budget_seconds is None else budget_seconds
+        return LazyService(self, service_name)
+
+    def is_initialized(self, service_name: str) -> bool:
+        """True once a singleton has been built"""
+        return service_name in self._singletons
+
+    def warm_up(self, service_names: Optional[List[str]] = None) -> Dict[str, float]:
+        """
+        Build lazy services ahead of first use
+
+        Args:
+            service_names: Services to build (defaults to every lazy service)
+
+        Returns:
+            Initialization time in seconds per service built by this call
+        """
+        built: Dict[str, float] = {}
+        for name in service_names or list(self._lazy):
+            if self.is_initialized(name):
+                continue
+            try:
+                self.get(name)
+                built[name] = self._init_times.get(name, 0.0)
+            except Exception as e:
+                print(f"⚠️  Warm-up of {name} failed: {e}")
+        return built
+
+    def startup_report(self) -> Dict[str, Dict[str, Any]]:
+        """Initialization status and timing of lazy services"""
+        return {
+            name: {
+                "initialized": self.is_initialized(name),
+                "init_seconds": self._init_times.get(name),
+                "budget_seconds": budget,
+            }
+            for name, budget in self._lazy.items()
+        }
+
     def has(self, service_name: str) -> bool:
         """Check if service is registered"""
         return (
@@ -69,6 +170,46 @@ class Container:
         self._services.clear()
         self._factories.clear()
         self._singletons.clear()
+        self._lazy.clear()
+        self._init_times.clear()
+
+
+class LazyService:
+    """
+    Stand-in for a lazily registered service
+
+    Forwards attribute access to the real instance, building it through the
+    container the first time. Existing `from module import service` call
+    sites keep working unchanged.
+    """
+
+    __slots__ = ("_container", "_service_name")
+
+    def __init__(self, container: Container, service_name: str):
+        object.__setattr__(self, "_container", container)
+        object.__setattr__(self, "_service_name", service_name)
+
+    def _resolve(self) -> Any:
+        return self._container.get(self._service_name)
+
+    async def ready(self) -> Any:
+        """
+        Build the service off the event loop if needed
+
+        Await this in async code before touching the proxy; attribute access
+        on an unbuilt service blocks until it is built.
+        """
+        return await self._container.aget(self._service_name)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._resolve(), name, value)
+
+    def __repr__(self) -> str:
+        state = "initialized" if self._container.is_initialized(self._service_name) else "not initialized"
+        return f"<LazyService {self._service_name} ({state})>"
 
 
 # Global container instance
@@ -0,0 +1,134 @@
+"""
+Shared async HTTP client for the built-in MCP servers
+One httpx.AsyncClient (HTTP/2 when the h2 package is installed) with a
+keep-alive connection pool, a per-host concurrency limit and retry with
+exponential backoff for transient failures. Firecrawl and Open-Meteo calls
+reuse pooled connections instead of paying DNS + TLS setup per call.
+
+The client is created on first use and closed by the app lifespan.
+"""
+import asyncio
+import os
+import random
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+# Connection pool size across all hosts
+HTTP_MAX_CONNECTIONS = int(os.getenv("MCP_HTTP_MAX_CONNECTIONS", "100"))
+# Idle connections kept open for reuse
+HTTP_MAX_KEEPALIVE = int(os.getenv("MCP_HTTP_MAX_KEEPALIVE", "20"))
+# Seconds an idle connection is kept
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("MCP_HTTP_KEEPALIVE_EXPIRY", "30"))
+# Concurrent requests per host
+HTTP_PER_HOST_LIMIT = int(os.getenv("MCP_HTTP_PER_HOST_LIMIT", "10"))
+# Retries for connection errors, timeouts, 429 and 5xx responses
+HTTP_MAX_RETRIES = int(os.getenv("MCP_HTTP_MAX_RETRIES", "2"))
+# Base delay for exponential backoff (seconds)
+HTTP_BACKOFF_BASE = float(os.getenv("MCP_HTTP_BACKOFF_BASE", "0.5"))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class SharedHTTPClient:
+    """Lazily created, pooled httpx.AsyncClient with per-host limits and retries"""
+
+    def __init__(
+        self,
+        per_host_limit: int = HTTP_PER_HOST_LIMIT,
+        max_retries: int = HTTP_MAX_RETRIES,
+        backoff_base: float = HTTP_BACKOFF_BASE
+    ):
+        self.per_host_limit = per_host_limit
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client (created on first use)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(30.0, connect=10.0),
+            )
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return limit
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Backoff delay, honouring Retry-After when the server sends one"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), 30.0)
+        return self.backoff_base * (2 ** attempt) * (0.5 + random.random())
+
+    async def request(self, method: str, url: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        """
+        Send a request, retrying transient failures
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            timeout: Per-request timeout override (seconds)
+            **kwargs: Passed to httpx.AsyncClient.request (params, json, headers, ...)
+
+        Returns:
+            The response (raise_for_status() is left to the caller)
+
+        Raises:
+            httpx.HTTPError: If the last attempt fails to connect or times out
+        """
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        async with self._host_limit(url):
+            for attempt in range(self.max_retries + 1):
+                last_attempt = attempt == self.max_retries
+                try:
+                    response = await self.client.request(method, url, **kwargs)
+                except httpx.TransportError:
+                    if last_attempt:
+                        raise
+                    await asyncio.sleep(self._retry_delay(attempt))
+                    continue
+                if response.status_code in RETRY_STATUS_CODES and not last_attempt:
+                    await response.aclose()
+                    await asyncio.sleep(self._retry_delay(attempt, response))
+                    continue
+                return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        """Close pooled connections (app shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._host_limits.clear()
+
+
+# Global client shared by the built-in MCP servers
+http_client = SharedHTTPClient()
@@ -1,9 +1,11 @@
 from mcp.server.fastmcp import FastMCP
 import math
-import operator
 from decimal import Decimal, getcontext
 from typing import Any, Dict, Union
 
+from src.utils.safe_eval import ExpressionError, aevaluate, checked_pow
+from src.utils.tool_cache import memoize, PURE
+
 # Set high precision for decimal operations
 getcontext().prec = 100
 
@@ -34,50 +36,13 @@ def _safe_convert_number(value: Union[str, int, float]) -> Union[int, float, Dec
     except (ValueError, TypeError):
         raise ValueError(f"Cannot convert '{value}' to number")
 
-# Safe math namespace for expression evaluation
-SAFE_MATH_NAMESPACE = {
-    '__builtins__': {},
-    'abs': abs, 'round': round, 'min': min, 'max': max, 'sum': sum,
-    'int': int, 'float': float,
-    'pow': pow, '**': operator.pow,
-    '+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv,
-    '//': operator.floordiv, '%': operator.mod,
-    'math': math,
-    'sin': math.sin, 'cos': math.cos, 'tan': math.tan,
-    'asin': math.asin, 'acos': math.acos, 'atan': math.atan, 'atan2': math.atan2,
-    'sinh': math.sinh, 'cosh': math.cosh, 'tanh': math.tanh,
-    'exp': math.exp, 'log': math.log, 'log10': math.log10, 'log2': math.log2,
-    'sqrt': math.sqrt, 'cbrt': lambda x: x ** (1/3),
-    'pi': math.pi, 'e': math.e,
-    'ceil': math.ceil, 'floor': math.floor, 'trunc': math.trunc,
-    'degrees': math.degrees, 'radians': math.radians,
-    'factorial': math.factorial, 'gcd': math.gcd, 'lcm': lambda a, b: abs(a * b) // math.gcd(a, b) if a and b else 0,
-}
-
-def _evaluate_expression(expr: str) -> Union[int, float, complex]:
-    """Safely evaluate mathematical expression"""
-    try:
-        # Compile and evaluate in restricted namespace
-        code = compile(expr, '<string>', 'eval')
-        result = eval(code, SAFE_MATH_NAMESPACE)
-        
-        # Handle complex numbers
-        if isinstance(result, complex):
-            return result
-        
-        # Return appropriate type
-        if isinstance(result, (int, float)):
-            return result
-        raise ValueError(f"Expression returned non-numeric: {type(result)}")
-    except ZeroDivisionError:
-        raise ValueError("Division by zero")
-    except SyntaxError as e:
-        raise ValueError(f"Invalid expression syntax: {str(e)}")
-    except Exception as e:
-        raise ValueError(f"Evaluation error: {str(e)}")
+async def _evaluate_expression(expr: str) -> Union[int, float, complex]:
+    """Evaluate a mathematical expression with the bounded-cost AST evaluator"""
+    return await aevaluate(expr)
 
 @mcp.tool()
-def calculate(expression: str) -> dict:
+@memoize(PURE)
+async def calculate(expression: str) -> dict:
     """PRIMARY MATH TOOL: Evaluate ANY mathematical expression with multiple numbers and operations. Use this for ALL calculations including adding/subtracting/multiplying multiple numbers, complex expressions, and any math operations.
     
     Supports: multiple numbers (e.g., "2 + 3 + 4 + 5"), all standard operations, functions (sin, cos, log, sqrt, etc.), and constants (pi, e). Handles integers, floats, and large numbers.
@@ -98,7 +63,7 @@ def calculate(expression: str) -> dict:
     try:
         if not expression or not expression.strip():
             return _err("Expression cannot be empty", "VALIDATION_ERROR")
-        result = _evaluate_expression(expression.strip())
+        result = await _evaluate_expression(expression.strip())
         return _ok(result)
     except ValueError as e:
         return _err(str(e), "MATH_ERROR")
@@ -106,6 +71,7 @@ def calculate(expression: str) -> dict:
         return _err(f"Unexpected error: {str(e)}", "INTERNAL_ERROR")
 
 @mcp.tool()
+@memoize(PURE)
 def add(a: Union[str, int, float], b: Union[str, int, float]) -> dict:
     """Add exactly two numbers. For adding more than two numbers or complex expressions, use the 'calculate' tool instead. Example: use calculate("2 + 3 + 4") instead of multiple add calls."""
     try:
@@ -119,6 +85,7 @@ def add(a: Union[str, int, float], b: Union[str, int, float]) -> dict:
         return _err(f"Addition error: {str(e)}", "MATH_ERROR")
 
 @mcp.tool()
+@memoize(PURE)
 def add_multiple(numbers: str) -> dict:
     """Add multiple numbers together. Provide numbers as a comma-separated string or space-separated string.
     
@@ -159,6 +126,7 @@ def add_multiple(numbers: str) -> dict:
         return _err(f"Addition error: {str(e)}", "MATH_ERROR")
 
 @mcp.tool()
+@memoize(PURE)
 def subtract(a: Union[str, int, float], b: Union[str, int, float]) -> dict:
     """Subtract two numbers. Supports any numeric value regardless of size."""
     try:
@@ -172,6 +140,7 @@ def subtract(a: Union[str, int, float], b: Union[str, int, float]) -> dict:
         return _err(f"Subtraction error: {str(e)}", "MATH_ERROR")
 
 @mcp.tool()
+@memoize(PURE)
 def multiply(a: Union[str, int, float], b: Union[str, int, float]) -> dict:
     """Multiply two numbers. Supports any numeric value regardless of size."""
     try:
@@ -185,6 +154,7 @@ def multiply(a: Union[str, int, float], b: Union[str, int, float]) -> dict:
         return _err(f"Multiplication error: {str(e)}", "MATH_ERROR")
 
 @mcp.tool()
+@memoize(PURE)
 def divide(a: Union[str, int, float], b: Union[str, int, float]) -> dict:
     """Divide two numbers. Supports any numeric value regardless of size."""
     try:
@@ -200,13 +170,16 @@ def divide(a: Union[str, int, float], b: Union[str, int, float]) -> dict:
         return _err(f"Division error: {str(e)}", "MATH_ERROR")
 
 @mcp.tool()
+@memoize(PURE)
 def power(base: Union[str, int, float], exponent: Union[str, int, float]) -> dict:
     """Raise base to the power of exponent. Supports any numeric value."""
     try:
         num_base = _safe_convert_number(base)
         num_exp = _safe_convert_number(exponent)
-        result = pow(num_base, num_exp)
+        result = checked_pow(num_base, num_exp)
         return _ok(result)
+    except ExpressionError as e:
+        return _err(str(e), "MATH_ERROR")
     except ValueError as e:
         return _err(str(e), "VALIDATION_ERROR")
     except OverflowError:
@@ -215,6 +188,7 @@ def power(base: Union[str, int, float], exponent: Union[str, int, float]) -> dic
         return _err(f"Power operation error: {str(e)}", "MATH_ERROR")
 
 @mcp.tool()
+@memoize(PURE)
 def sqrt(value: Union[str, int, float]) -> dict:
     """Calculate square root. Supports any positive numeric value."""
     try:
@@ -229,6 +203,7 @@ def sqrt(value: Union[str, int, float]) -> dict:
         return _err(f"Square root error: {str(e)}", "MATH_ERROR")
 
 @mcp.tool()
+@memoize(PURE)
 def factorial(n: Union[str, int]) -> dict:
     """Calculate factorial of a non-negative integer. Supports large integers."""
     try:
@@ -250,6 +225,7 @@ def factorial(n: Union[str, int]) -> dict:
         return _err(f"Factorial error: {str(e)}", "MATH_ERROR")
 
 @mcp.tool()
+@memoize(PURE)
 def log(value: Union[str, int, float], base: Union[str, int, float] = "e") -> dict:
     """Calculate logarithm. Default is natural log (base e)."""
     try:
@@ -270,6 +246,7 @@ def log(value: Union[str, int, float], base: Union[str, int, float] = "e") -> di
         return _err(f"Logarithm error: {str(e)}", "MATH_ERROR")
 
 @mcp.tool()
+@memoize(PURE)
 def sin(angle: Union[str, int, float], unit: str = "radians") -> dict:
     """Calculate sine. Angle can be in radians (default) or degrees."""
     try:
@@ -284,6 +261,7 @@ def sin(angle: Union[str, int, float], unit: str = "radians") -> dict:
         return _err(f"Sine error: {str(e)}", "MATH_ERROR")
 
 @mcp.tool()
+@memoize(PURE)
 def cos(angle: Union[str, int, float], unit: str = "radians") -> dict:
     """Calculate cosine. Angle can be in radians (default) or degrees."""
     try:
@@ -298,6 +276,7 @@ def cos(angle: Union[str, int, float], unit: str = "radians") -> dict:
         return _err(f"Cosine error: {str(e)}", "MATH_ERROR")
 
 @mcp.tool()
+@memoize(PURE)
 def tan(angle: Union[str, int, float], unit: str = "radians") -> dict:
     """Calculate tangent. Angle can be in radians (default) or degrees."""
     try:
@@ -2,11 +2,15 @@ from typing import Any, Dict, Optional
 import os
 import httpx
 from mcp.server.fastmcp import FastMCP
-from .web import FIRECRAWL_API_KEY, FIRECRAWL_BASE_URL
+from .web import FIRECRAWL_API_KEY, firecrawl_post
+from src.utils.tool_cache import memoize, minutes
 
 
 mcp_people = FastMCP(name="people", stateless_http=True)
 
+# The About page changes rarely - reuse one scrape for all people tools
+ABOUT_PAGE_CACHE = minutes(60)
+
 
 def _ok(data: Any):
     return {"ok": True, "data": data, "error": None, "meta": {}}
@@ -16,13 +20,6 @@ def _err(message: str, code: str = "ERROR"):
     return {"ok": False, "data": None, "error": {"message": message, "code": code}, "meta": {}}
 
 
-def _headers() -> Dict[str, str]:
-    return {
-        "Authorization": f"Bearer {FIRECRAWL_API_KEY}",
-        "Content-Type": "application/json",
-    }
-
-
 HARD_CODED = {
    
     "mihadul islam": {
@@ -45,34 +42,28 @@ HARD_CODED = {
 
 
 @mcp_people.tool()
-def about_page_crawl() -> Dict[str, Any]:
+@memoize(ABOUT_PAGE_CACHE)
+async def about_page_crawl() -> Dict[str, Any]:
     """Crawl/scrape the DosiBridge About page and return markdown content."""
     try:
         if not FIRECRAWL_API_KEY:
             return _err("FIRECRAWL_API_KEY env not set", code="CONFIG_ERROR")
-        api = f"{FIRECRAWL_BASE_URL}/v1/scrape"
         payload = {"url": "https://dosibridge.com/about", "formats": ["markdown"], "onlyMainContent": True}
-        with httpx.Client(timeout=60.0) as client:
-            r = client.post(api, headers=_headers(), json=payload)
-            r.raise_for_status()
-            data = r.json()
-            md = data.get("markdown") or data.get("content") or data
-            return _ok({"url": "https://dosibridge.com/about", "markdown": md})
+        data = await firecrawl_post("/v1/scrape", payload, timeout=60.0)
+        md = data.get("markdown") or data.get("content") or data
+        return _ok({"url": "https://dosibridge.com/about", "markdown": md})
     except httpx.HTTPError as e:
         return _err(str(e), code="HTTP_ERROR")
 
 
-def _fetch_about_markdown() -> str:
+@memoize(ABOUT_PAGE_CACHE)
+async def _fetch_about_markdown() -> str:
     if not FIRECRAWL_API_KEY:
         raise ValueError("FIRECRAWL_API_KEY env not set")
-    api = f"{FIRECRAWL_BASE_URL}/v1/scrape"
     payload = {"url": "https://dosibridge.com/about", "formats": ["markdown"], "onlyMainContent": True}
-    with httpx.Client(timeout=60.0) as client:
-        r = client.post(api, headers=_headers(), json=payload)
-        r.raise_for_status()
-        data = r.json()
-        md = data.get("markdown") or data.get("content") or ""
-        return md if isinstance(md, str) else str(md)
+    data = await firecrawl_post("/v1/scrape", payload, timeout=60.0)
+    md = data.get("markdown") or data.get("content") or ""
+    return md if isinstance(md, str) else str(md)
 
 
 def _extract_person_snippet(markdown: str, person_keywords: str) -> str:
@@ -94,11 +85,11 @@ def _extract_person_snippet(markdown: str, person_keywords: str) -> str:
 
 
 @mcp_people.tool()
-def sazib_info() -> Dict[str, Any]:
+async def sazib_info() -> Dict[str, Any]:
     """Return hardcoded info for Abdullah Al Sazib and include About page snippet."""
     base = HARD_CODED["abdullah al sazib"]
     try:
-        md = _fetch_about_markdown()
+        md = await _fetch_about_markdown()
         snippet = _extract_person_snippet(md, "Abdullah Al Sazib")
         return _ok({**base, "about_markdown_snippet": snippet})
     except (httpx.HTTPError, ValueError):
@@ -106,11 +97,11 @@ def sazib_info() -> Dict[str, Any]:
 
 
 @mcp_people.tool()
-def mihadul_info() -> Dict[str, Any]:
+async def mihadul_info() -> Dict[str, Any]:
     """Return hardcoded info for Mihadul Islam and include About page snippet."""
     base = HARD_CODED["mihadul islam"]
     try:
-        md = _fetch_about_markdown()
+        md = await _fetch_about_markdown()
         snippet = _extract_person_snippet(md, "Mihadul Islam")
         return _ok({**base, "about_markdown_snippet": snippet})
     except (httpx.HTTPError, ValueError):
@@ -118,10 +109,10 @@ def mihadul_info() -> Dict[str, Any]:
 
 
 @mcp_people.tool()
-def dosibridge_people() -> Dict[str, Any]:
+async def dosibridge_people() -> Dict[str, Any]:
     """Return combined info for Abdullah Al Sazib and Mihadul Islam from About page."""
     try:
-        md = _fetch_about_markdown()
+        md = await _fetch_about_markdown()
         sazib_snippet = _extract_person_snippet(md, "Abdullah Al Sazib")
         mihadul_snippet = _extract_person_snippet(md, "Mihadul Islam")
         return _ok({
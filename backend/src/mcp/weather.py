@@ -4,6 +4,9 @@ from typing import Any, Dict, Optional
 import httpx
 from mcp.server.fastmcp import FastMCP
 
+from src.utils.tool_cache import memoize, minutes
+from .http_client import http_client
+
 
 mcp_weather = FastMCP(name="weather", stateless_http=True)
 
@@ -11,9 +14,14 @@ mcp_weather = FastMCP(name="weather", stateless_http=True)
 GEOCODE_API = "https://geocoding-api.open-meteo.com/v1/search"
 FORECAST_API = "https://api.open-meteo.com/v1/forecast"
 
+# Open-Meteo updates current conditions every 15 minutes
+WEATHER_CACHE = minutes(10, ignore_case=True)
+# City coordinates practically never change
+GEOCODE_CACHE = minutes(24 * 60, ignore_case=True)
+
 
-def _http_client(timeout: float = 20.0) -> httpx.Client:
-    return httpx.Client(timeout=timeout)
+# Seconds an Open-Meteo request may take
+HTTP_TIMEOUT = 20.0
 
 
 def _ok(data: Any, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -35,23 +43,24 @@ def current_time(tz: Optional[str] = None) -> Dict[str, Any]:
         return _err(str(e), code="INTERNAL_ERROR")
 
 
-def _geocode_city(city: str) -> Optional[Dict[str, Any]]:
+@memoize(GEOCODE_CACHE)
+async def _geocode_city(city: str) -> Optional[Dict[str, Any]]:
     params = {"name": city, "count": 1, "language": "en", "format": "json"}
-    with _http_client() as client:
-        r = client.get(GEOCODE_API, params=params)
-        r.raise_for_status()
-        data = r.json()
-        results = data.get("results") or []
-        return results[0] if results else None
+    r = await http_client.get(GEOCODE_API, params=params, timeout=HTTP_TIMEOUT)
+    r.raise_for_status()
+    data = r.json()
+    results = data.get("results") or []
+    return results[0] if results else None
 
 
 @mcp_weather.tool()
-def weather_by_city(city: str) -> Dict[str, Any]:
+@memoize(WEATHER_CACHE)
+async def weather_by_city(city: str) -> Dict[str, Any]:
     """Get current weather for a city name using Open-Meteo (no API key)."""
     if not city:
         return _err("city is required", code="VALIDATION_ERROR")
     try:
-        location = _geocode_city(city)
+        location = await _geocode_city(city)
         if not location:
             return _err(f"city not found: {city}", code="NOT_FOUND")
         lat = location["latitude"]
@@ -61,23 +70,23 @@ def weather_by_city(city: str) -> Dict[str, Any]:
             "longitude": lon,
             "current": ["temperature_2m", "relative_humidity_2m", "wind_speed_10m"],
         }
-        with _http_client() as client:
-            r = client.get(FORECAST_API, params=params)
-            r.raise_for_status()
-            data = r.json()
-            current = data.get("current") or {}
-            return _ok({
-                "city": location.get("name"),
-                "lat": lat,
-                "lon": lon,
-                "current": current,
-            })
+        r = await http_client.get(FORECAST_API, params=params, timeout=HTTP_TIMEOUT)
+        r.raise_for_status()
+        data = r.json()
+        current = data.get("current") or {}
+        return _ok({
+            "city": location.get("name"),
+            "lat": lat,
+            "lon": lon,
+            "current": current,
+        })
     except httpx.HTTPError as e:
         return _err(str(e), code="HTTP_ERROR")
 
 
 @mcp_weather.tool()
-def weather_by_coords(latitude: float, longitude: float) -> Dict[str, Any]:
+@memoize(WEATHER_CACHE)
+async def weather_by_coords(latitude: float, longitude: float) -> Dict[str, Any]:
     """Get current weather by coordinates (latitude, longitude)."""
     try:
         params = {
@@ -85,12 +94,11 @@ def weather_by_coords(latitude: float, longitude: float) -> Dict[str, Any]:
             "longitude": longitude,
             "current": ["temperature_2m", "relative_humidity_2m", "wind_speed_10m"],
         }
-        with _http_client() as client:
-            r = client.get(FORECAST_API, params=params)
-            r.raise_for_status()
-            data = r.json()
-            current = data.get("current") or {}
-            return _ok({"lat": latitude, "lon": longitude, "current": current})
+        r = await http_client.get(FORECAST_API, params=params, timeout=HTTP_TIMEOUT)
+        r.raise_for_status()
+        data = r.json()
+        current = data.get("current") or {}
+        return _ok({"lat": latitude, "lon": longitude, "current": current})
     except httpx.HTTPError as e:
         return _err(str(e), code="HTTP_ERROR")
 
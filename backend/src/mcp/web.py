@@ -3,6 +3,8 @@ import os
 import httpx
 from mcp.server.fastmcp import FastMCP
 
+from .http_client import http_client
+
 # Firecrawl API key comes from environment
 FIRECRAWL_API_KEY = os.environ.get("FIRECRAWL_API_KEY", "")
 
@@ -20,6 +22,13 @@ def _headers() -> Dict[str, str]:
     }
 
 
+async def firecrawl_post(path: str, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    """POST to a Firecrawl endpoint on the shared client and return the JSON body"""
+    resp = await http_client.post(f"{FIRECRAWL_BASE_URL}{path}", headers=_headers(), json=payload, timeout=timeout)
+    resp.raise_for_status()
+    return resp.json()
+
+
 def _ok(data: Any, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     return {"ok": True, "data": data, "error": None, "meta": meta or {}}
 
@@ -29,7 +38,7 @@ def _err(message: str, code: Optional[str] = None, meta: Optional[Dict[str, Any]
 
 
 @mcp_web.tool()
-def web_search(query: str, limit: int = 5) -> Dict[str, Any]:
+async def web_search(query: str, limit: int = 5) -> Dict[str, Any]:
     """Search the web using Firecrawl's search API.
 
     Args:
@@ -41,20 +50,16 @@ def web_search(query: str, limit: int = 5) -> Dict[str, Any]:
     if not FIRECRAWL_API_KEY:
         return _err("FIRECRAWL_API_KEY env not set", code="CONFIG_ERROR")
 
-    url = f"{FIRECRAWL_BASE_URL}/v1/search"
     payload = {"query": query, "limit": limit}
     try:
-        with httpx.Client(timeout=30.0) as client:
-            resp = client.post(url, headers=_headers(), json=payload)
-            resp.raise_for_status()
-            data = resp.json()
-            return _ok({"results": data})
+        data = await firecrawl_post("/v1/search", payload, timeout=30.0)
+        return _ok({"results": data})
     except httpx.HTTPError as e:
         return _err(str(e), code="HTTP_ERROR")
 
 
 @mcp_web.tool()
-def web_scrape(url: str) -> Dict[str, Any]:
+async def web_scrape(url: str) -> Dict[str, Any]:
     """Scrape a single URL using Firecrawl.
 
     Args:
@@ -65,20 +70,16 @@ def web_scrape(url: str) -> Dict[str, Any]:
     if not FIRECRAWL_API_KEY:
         return _err("FIRECRAWL_API_KEY env not set", code="CONFIG_ERROR")
 
-    api = f"{FIRECRAWL_BASE_URL}/v1/scrape"
     payload = {"url": url, "formats": ["markdown"], "onlyMainContent": True}
     try:
-        with httpx.Client(timeout=60.0) as client:
-            resp = client.post(api, headers=_headers(), json=payload)
-            resp.raise_for_status()
-            data = resp.json()
-            return _ok({"content": data})
+        data = await firecrawl_post("/v1/scrape", payload, timeout=60.0)
+        return _ok({"content": data})
     except httpx.HTTPError as e:
         return _err(str(e), code="HTTP_ERROR")
 
 
 @mcp_web.tool()
-def web_crawl(start_url: str, limit: int = 10) -> Dict[str, Any]:
+async def web_crawl(start_url: str, limit: int = 10) -> Dict[str, Any]:
     """Crawl a website starting from start_url using Firecrawl (limited pages).
 
     Args:
@@ -90,18 +91,14 @@ def web_crawl(start_url: str, limit: int = 10) -> Dict[str, Any]:
     if not FIRECRAWL_API_KEY:
         return _err("FIRECRAWL_API_KEY env not set", code="CONFIG_ERROR")
 
-    api = f"{FIRECRAWL_BASE_URL}/v1/crawl"
     payload = {
         "url": start_url,
         "limit": limit,
         "scrapeOptions": {"formats": ["markdown"], "onlyMainContent": True},
     }
     try:
-        with httpx.Client(timeout=120.0) as client:
-            resp = client.post(api, headers=_headers(), json=payload)
-            resp.raise_for_status()
-            data = resp.json()
-            return _ok({"crawl": data})
+        data = await firecrawl_post("/v1/crawl", payload, timeout=120.0)
+        return _ok({"crawl": data})
     except httpx.HTTPError as e:
         return _err(str(e), code="HTTP_ERROR")
 
@@ -1,13 +1,16 @@
 """
 Observer Pattern - Event handling and notifications
 """
-from .event_dispatcher import EventDispatcher, Event
-from .chat_observers import ChatEventObserver, UsageTrackingObserver
+from .event_dispatcher import EventDispatcher, Event, EventType, OverflowPolicy, event_dispatcher
+from .chat_observers import ChatEventObserver, UsageTrackingObserver, register_chat_observers
 
 __all__ = [
     "EventDispatcher",
     "Event",
+    "EventType",
+    "OverflowPolicy",
+    "event_dispatcher",
     "ChatEventObserver",
     "UsageTrackingObserver",
+    "register_chat_observers",
 ]
-
@@ -8,12 +8,18 @@ Observers that react to chat events. Each observer does one thing:
 
 Easy to add more observers without changing existing code.
 """
-from typing import Dict, Any, Optional
+import os
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
 from sqlalchemy.orm import Session
 
-from .event_dispatcher import Event, EventType
+from .event_dispatcher import Event, EventDispatcher, EventType, OverflowPolicy
+from src.core import get_db_context
 from src.services.usage_tracker import usage_tracker
 
+# Completed chat requests written per usage transaction
+USAGE_EVENT_BATCH_SIZE = int(os.getenv("USAGE_EVENT_BATCH_SIZE", "100"))
+
 
 class ChatEventObserver:
     """Base observer for chat events - override handle_event in subclasses"""
@@ -28,31 +34,44 @@ class UsageTrackingObserver(ChatEventObserver):
     Observer that tracks usage for chat events
 
     Records token usage and request counts. Called automatically
-    when chat requests complete via the event system.
+    when chat requests complete via the event system. Subscribed with
+    batching (see register_chat_observers), so a burst of completed
+    requests is written in one transaction off the request path.
     """
 
+    # Event data keys passed through to usage_tracker.record_request()
+    RECORD_FIELDS = (
+        "user_id", "llm_provider", "llm_model", "input_tokens", "output_tokens",
+        "embedding_tokens", "mode", "session_id", "success", "ip_address", "guest_email"
+    )
+
     def __init__(self, db: Optional[Session] = None):
         self.db = db
 
+    @classmethod
+    def _record(cls, event: Event) -> Dict[str, Any]:
+        record = {field: event.data[field] for field in cls.RECORD_FIELDS if field in event.data}
+        # Usage is attributed to when the request completed, not when the batch is written
+        record["timestamp"] = datetime.fromtimestamp(event.timestamp, timezone.utc)
+        return record
+
     def handle_event(self, event: Event):
         """Track usage when chat request completes"""
-        if event.event_type == EventType.CHAT_REQUEST_COMPLETED:
-            # Extract data and record usage
-            data = event.data
-            usage_tracker.record_request(
-                user_id=data.get("user_id"),
-                db=self.db,
-                llm_provider=data.get("llm_provider"),
-                llm_model=data.get("llm_model"),
-                input_tokens=data.get("input_tokens", 0),
-                output_tokens=data.get("output_tokens", 0),
-                embedding_tokens=data.get("embedding_tokens", 0),
-                mode=data.get("mode"),
-                session_id=data.get("session_id"),
-                success=data.get("success", True),
-                ip_address=data.get("ip_address"),
-                guest_email=data.get("guest_email")
-            )
+        self.handle_events([event])
+
+    def handle_events(self, events: List[Event]):
+        """Track usage for a batch of events in one transaction"""
+        records = [
+            self._record(event) for event in events
+            if event.event_type == EventType.CHAT_REQUEST_COMPLETED
+        ]
+        if not records:
+            return
+        if self.db is not None:
+            usage_tracker.record_requests(records, self.db)
+            return
+        with get_db_context() as db:
+            usage_tracker.record_requests(records, db)
 
 
 class LoggingObserver(ChatEventObserver):
@@ -82,3 +101,17 @@ class ErrorTrackingObserver(ChatEventObserver):
                 exc_info=True
             )
 
+
+def register_chat_observers(dispatcher: EventDispatcher):
+    """Subscribe the observers the app runs with (idempotent)"""
+    if dispatcher.is_subscribed(EventType.CHAT_REQUEST_COMPLETED, "usage_tracking"):
+        return
+    # Usage is billing data: apply backpressure instead of dropping events
+    dispatcher.subscribe(
+        EventType.CHAT_REQUEST_COMPLETED,
+        UsageTrackingObserver().handle_events,
+        policy=OverflowPolicy.BLOCK,
+        batch_size=USAGE_EVENT_BATCH_SIZE,
+        blocking=True,
+        name="usage_tracking"
+    )
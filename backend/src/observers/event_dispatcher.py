@@ -1,13 +1,43 @@
 """
 Event Dispatcher - Observer Pattern
 
-Simple event system for decoupling components. Could use a proper event bus
-library but this is lightweight and works fine.
+Async event bus for decoupling components. Every subscriber gets its own
+bounded queue and a background consumer task, so emitting an event only
+costs an enqueue and a slow observer (e.g. one writing to the database)
+never adds latency to the request that emitted it, nor delays other
+observers.
+
+Per subscriber:
+- queue_size and an overflow policy decide what happens when the observer
+  falls behind (drop the new event, drop the oldest queued one, or apply
+  backpressure)
+- batch_size > 1 delivers lists of events, so DB-writing observers can
+  persist many events in one transaction
+- blocking=True runs sync callbacks in a worker thread
+- delivery counters are available from stats()
+
+Until start() is called (scripts, tests) events are delivered synchronously
+in the emitting thread, as before.
 """
-from typing import Dict, List, Callable, Any
+import asyncio
+import inspect
+import os
+import threading
+import time
+from typing import Dict, List, Callable, Any, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+from src.utils.logger import app_logger
+from src.utils.metrics import metrics
+
+# Events buffered per subscriber before the overflow policy applies
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "1000"))
+# Seconds to wait for a batch to fill before delivering a partial one
+EVENT_BATCH_INTERVAL = float(os.getenv("EVENT_BATCH_INTERVAL", "1.0"))
+# Seconds stop() waits for queued events to be delivered
+EVENT_DRAIN_TIMEOUT = float(os.getenv("EVENT_DRAIN_TIMEOUT", "5.0"))
+
 
 class EventType(Enum):
     """Event types - add more as needed"""
@@ -18,6 +48,18 @@ class EventType(Enum):
     MESSAGE_SAVED = "message_saved"
     DOCUMENT_UPLOADED = "document_uploaded"
     DOCUMENT_PROCESSED = "document_processed"
+    MCP_SERVERS_CHANGED = "mcp_servers_changed"
+
+
+class OverflowPolicy(Enum):
+    """What a full subscriber queue does with a new event"""
+    # Discard the new event
+    DROP_NEWEST = "drop_newest"
+    # Discard the oldest queued event to make room
+    DROP_OLDEST = "drop_oldest"
+    # publish() waits for room; emit() queues the event behind the waiters,
+    # up to another queue_size parked events, and drops the rest
+    BLOCK = "block"
 
 
 @dataclass
@@ -28,50 +70,336 @@ class Event:
     timestamp: float = None
 
     def __post_init__(self):
-        import time
         if self.timestamp is None:
             self.timestamp = time.time()
 
 
+class Subscription:
+    """One subscriber: callback, bounded queue, consumer task and counters"""
+
+    def __init__(
+        self,
+        event_type: EventType,
+        callback: Callable,
+        queue_size: int = EVENT_QUEUE_SIZE,
+        policy: OverflowPolicy = OverflowPolicy.DROP_NEWEST,
+        batch_size: int = 1,
+        batch_interval: float = EVENT_BATCH_INTERVAL,
+        blocking: bool = False,
+        name: Optional[str] = None
+    ):
+        self.event_type = event_type
+        self.callback = callback
+        self.queue_size = max(1, queue_size)
+        self.policy = policy
+        self.batch_size = max(1, batch_size)
+        self.batch_interval = batch_interval
+        self.blocking = blocking
+        self.name = name or getattr(callback, "__qualname__", repr(callback))
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        # Puts parked by emit() on a full BLOCK queue
+        self._pending_puts: set = set()
+        # Delivery counters
+        self.enqueued = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_lag = 0.0
+
+    def offer(self, event: Event):
+        """Enqueue without waiting, applying the overflow policy (event loop thread only)"""
+        if self.queue is None:
+            return
+        if not self.queue.full():
+            self.queue.put_nowait(event)
+        elif self.policy == OverflowPolicy.DROP_OLDEST:
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.dropped += 1
+            self.queue.put_nowait(event)
+        elif self.policy == OverflowPolicy.BLOCK and len(self._pending_puts) < self.queue_size:
+            # Can't wait in a sync caller: park the put on the loop instead,
+            # bounded so a stalled observer can't grow memory without limit
+            put = asyncio.get_running_loop().create_task(self.queue.put(event))
+            self._pending_puts.add(put)
+            put.add_done_callback(self._pending_puts.discard)
+        else:
+            self.dropped += 1
+            return
+        self.enqueued += 1
+
+    async def put(self, event: Event):
+        """Enqueue, waiting for room under the BLOCK policy"""
+        if self.policy == OverflowPolicy.BLOCK and self.queue is not None:
+            await self.queue.put(event)
+            self.enqueued += 1
+        else:
+            self.offer(event)
+
+    async def _next_batch(self) -> List[Event]:
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.batch_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def deliver(self, events: List[Event]):
+        """Call the callback with one event, or the list when batching"""
+        argument = events if self.batch_size > 1 else events[0]
+        if self.blocking:
+            result = await asyncio.to_thread(self.callback, argument)
+        else:
+            result = self.callback(argument)
+        if inspect.isawaitable(result):
+            await result
+
+    async def consume(self):
+        """Consumer task: deliver queued events until cancelled"""
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self.deliver(batch)
+                self.delivered += len(batch)
+                self.batches += 1
+                self.max_lag = max(self.max_lag, time.time() - batch[0].timestamp)
+            except Exception as e:
+                # One failing observer shouldn't break the others
+                self.failed += len(batch)
+                app_logger.error(
+                    "Error in event observer",
+                    {"observer": self.name, "event_type": self.event_type.value, "events": len(batch), "error": str(e)},
+                    exc_info=True
+                )
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def drain(self):
+        """Wait until every queued (and parked) event has been delivered"""
+        while self._pending_puts:
+            await asyncio.gather(*list(self._pending_puts), return_exceptions=True)
+        await self.queue.join()
+
+    def deliver_now(self, event: Event):
+        """Synchronous delivery (bus not running)"""
+        try:
+            result = self.callback([event] if self.batch_size > 1 else event)
+            if inspect.isawaitable(result):
+                try:
+                    asyncio.get_running_loop().create_task(result)
+                except RuntimeError:
+                    asyncio.run(result)
+            self.delivered += 1
+        except Exception as e:
+            self.failed += 1
+            app_logger.error(
+                "Error in event observer",
+                {"observer": self.name, "event_type": self.event_type.value, "error": str(e)},
+                exc_info=True
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "event_type": self.event_type.value,
+            "policy": self.policy.value,
+            "queue_size": self.queue_size,
+            "queued": (self.queue.qsize() if self.queue is not None else 0) + len(self._pending_puts),
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "max_lag_seconds": round(self.max_lag, 3),
+        }
+
+
 class EventDispatcher:
     """
     Event dispatcher following Observer Pattern
 
-    Basic pub/sub implementation. Observers can subscribe to events
-    and get notified when they happen. Keeps things decoupled.
+    Pub/sub with a bounded queue and consumer task per subscriber once
+    started. Observers can subscribe to events and get notified when they
+    happen. Keeps things decoupled.
     """
 
     def __init__(self):
-        self._listeners: Dict[EventType, List[Callable]] = {}
+        self._listeners: Dict[EventType, List[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
 
-    def subscribe(self, event_type: EventType, callback: Callable[[Event], None]):
-        """Subscribe to an event type"""
-        if event_type not in self._listeners:
-            self._listeners[event_type] = []
-        self._listeners[event_type].append(callback)
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    def _start_consumer(self, subscription: Subscription):
+        subscription.queue = asyncio.Queue(maxsize=subscription.queue_size)
+        subscription.task = self._loop.create_task(subscription.consume())
+
+    def subscribe(
+        self,
+        event_type: EventType,
+        callback: Callable[[Event], None],
+        queue_size: int = EVENT_QUEUE_SIZE,
+        policy: OverflowPolicy = OverflowPolicy.DROP_NEWEST,
+        batch_size: int = 1,
+        batch_interval: float = EVENT_BATCH_INTERVAL,
+        blocking: bool = False,
+        name: Optional[str] = None
+    ) -> Subscription:
+        """
+        Subscribe to an event type
+
+        Args:
+            event_type: Event type to receive
+            callback: Called with each Event (or a list of Events when
+                batch_size > 1); may be a coroutine function
+            queue_size: Events buffered before the overflow policy applies
+            policy: What to do when the queue is full
+            batch_size: Maximum events per call (1 = no batching)
+            batch_interval: Seconds to wait for a batch to fill
+            blocking: Run a sync callback in a worker thread (DB / network I/O)
+            name: Name used in stats and logs (default: callback name)
+
+        Returns:
+            The subscription (its stats() show delivery counters)
+        """
+        subscription = Subscription(
+            event_type, callback, queue_size, policy, batch_size, batch_interval, blocking, name
+        )
+        self._listeners.setdefault(event_type, []).append(subscription)
+        if self.running:
+            self._call_on_loop(self._start_consumer, subscription)
+        return subscription
+
+    def is_subscribed(self, event_type: EventType, name: str) -> bool:
+        """True if a subscriber with this name receives the event type"""
+        return any(s.name == name for s in self._listeners.get(event_type, []))
 
     def unsubscribe(self, event_type: EventType, callback: Callable[[Event], None]):
-        """Unsubscribe from an event type"""
-        if event_type in self._listeners:
-            self._listeners[event_type].remove(callback)
+        """Unsubscribe from an event type (queued events are discarded)"""
+        for subscription in list(self._listeners.get(event_type, [])):
+            if subscription.callback == callback:
+                self._listeners[event_type].remove(subscription)
+                if subscription.task is not None:
+                    self._call_on_loop(subscription.task.cancel)
+                    subscription.task = None
+                break
+
+    def _call_on_loop(self, fn: Callable, *args):
+        """Run fn on the bus loop: directly from the loop thread, else thread-safely"""
+        if threading.get_ident() == self._loop_thread:
+            fn(*args)
+        else:
+            try:
+                self._loop.call_soon_threadsafe(fn, *args)
+            except RuntimeError:
+                # Loop already closed (shutdown)
+                pass
 
     def dispatch(self, event: Event):
-        """Dispatch an event to all subscribers"""
-        if event.event_type in self._listeners:
-            for callback in self._listeners[event.event_type]:
-                try:
-                    callback(event)
-                except Exception as e:
-                    # Log error but don't stop other observers - one failing shouldn't break everything
-                    print(f"Error in event observer: {e}")
-                    # TODO: Maybe use proper logger here instead of print
+        """Hand an event to all subscribers (enqueue only while running)"""
+        subscriptions = self._listeners.get(event.event_type)
+        if not subscriptions:
+            return
+        for subscription in list(subscriptions):
+            if not self.running:
+                subscription.deliver_now(event)
+            else:
+                self._call_on_loop(subscription.offer, event)
 
     def emit(self, event_type: EventType, data: Dict[str, Any]):
-        """Emit an event"""
+        """Emit an event (never waits; safe from any thread)"""
         event = Event(event_type=event_type, data=data)
         self.dispatch(event)
 
+    async def publish(self, event_type: EventType, data: Dict[str, Any]):
+        """Emit an event from the event loop, waiting for room on BLOCK subscribers"""
+        event = Event(event_type=event_type, data=data)
+        if not self.running:
+            self.dispatch(event)
+            return
+        for subscription in list(self._listeners.get(event_type, [])):
+            await subscription.put(event)
+
+    async def start(self):
+        """Start a consumer task per subscriber on the running loop"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        for subscriptions in self._listeners.values():
+            for subscription in subscriptions:
+                self._start_consumer(subscription)
+
+    async def stop(self, timeout: float = EVENT_DRAIN_TIMEOUT):
+        """Deliver what is queued (up to `timeout` seconds), then stop the consumers"""
+        if not self.running:
+            return
+        subscriptions = [s for subs in self._listeners.values() for s in subs if s.task is not None]
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(s.drain() for s in subscriptions)),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            undelivered = sum(s.queue.qsize() for s in subscriptions)
+            app_logger.warning("Event bus stopped with undelivered events", {"events": undelivered})
+        self._loop = None
+        self._loop_thread = None
+        for subscription in subscriptions:
+            subscription.task.cancel()
+        await asyncio.gather(*(s.task for s in subscriptions), return_exceptions=True)
+        for subscription in subscriptions:
+            subscription.task = None
+            subscription.queue = None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Delivery counters per subscriber, keyed by event type and subscriber name"""
+        return {
+            f"{subscription.event_type.value}:{subscription.name}": subscription.stats()
+            for subscriptions in self._listeners.values()
+            for subscription in subscriptions
+        }
+
 
 # Global event dispatcher instance
 event_dispatcher = EventDispatcher()
 
+
+def _event_samples():
+    return [
+        ({"subscriber": key, "outcome": outcome}, counters[outcome])
+        for key, counters in event_dispatcher.stats().items()
+        for outcome in ("delivered", "dropped", "failed")
+    ]
+
+
+def _event_queue_samples():
+    return [({"subscriber": key}, counters["queued"]) for key, counters in event_dispatcher.stats().items()]
+
+
+metrics.register_collector(
+    "dosibridge_event_bus_events_total",
+    "counter",
+    "Events handled per subscriber by outcome (delivered, dropped, failed)",
+    _event_samples,
+)
+metrics.register_collector(
+    "dosibridge_event_bus_queue_depth",
+    "gauge",
+    "Events waiting in each subscriber queue",
+    _event_queue_samples,
+)
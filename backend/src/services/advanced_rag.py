@@ -1,21 +1,31 @@
 """
 Advanced RAG system with dynamic retrieval, re-ranking, hybrid search, and persistent storage
+
+Retrieval results are cached per user under a corpus version that
+add_documents/delete_documents bump, so repeated queries skip embedding,
+vector search, BM25 and re-ranking until the user's documents change. Query
+embeddings are cached separately (they don't depend on the corpus).
 """
 import os
+import hashlib
+import importlib.util
 import json
+import threading
 import base64
 import pickle
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Optional, Tuple, Any, Callable
 import numpy as np
 
-try:
-    from langchain_community.vectorstores import FAISS
-    from langchain_openai import OpenAIEmbeddings
-    from langchain_core.documents import Document as LangchainDocument
-    FAISS_AVAILABLE = True
-except ImportError:
-    FAISS_AVAILABLE = False
+from langchain_core.documents import Document as LangchainDocument
+
+# FAISS (langchain_community) and the OpenAI embeddings client are imported
+# when the system is built, not when this module is imported
+FAISS_AVAILABLE = all(
+    importlib.util.find_spec(name) is not None
+    for name in ("langchain_community", "langchain_openai")
+)
+if not FAISS_AVAILABLE:
     print("⚠️  FAISS not available")
 
 try:
@@ -25,16 +35,56 @@ except ImportError:
     BM25_AVAILABLE = False
     print("⚠️  rank-bm25 not available, BM25 search will be disabled")
 
-try:
-    from sentence_transformers import CrossEncoder
-    RERANKER_AVAILABLE = True
-except ImportError:
-    RERANKER_AVAILABLE = False
+# sentence-transformers pulls in torch - only check it is installed here and
+# import it when the re-ranker is first needed
+RERANKER_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
+if not RERANKER_AVAILABLE:
     print("⚠️  sentence-transformers not available, re-ranking will be disabled")
 
+RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
 from src.core import Config, DB_AVAILABLE
 from src.core.database import get_db_context
 from src.core.models import Document, DocumentChunk, DocumentCollection
+from src.dependency_injection.container import get_container
+from src.services.embedding_pipeline import EmbeddingPipeline
+from src.utils.cache import get_cache
+from src.utils.metrics import rag_stage_seconds
+
+# Seconds a retrieval result is reused (entries also die when the corpus version or saved index changes)
+RAG_RESULT_CACHE_TTL = int(os.getenv("RAG_RESULT_CACHE_TTL", "600"))
+# Maximum cached retrieval results per worker
+RAG_RESULT_CACHE_SIZE = int(os.getenv("RAG_RESULT_CACHE_SIZE", "2000"))
+# Seconds a query embedding is reused
+RAG_EMBEDDING_CACHE_TTL = int(os.getenv("RAG_EMBEDDING_CACHE_TTL", "86400"))
+# Maximum cached query embeddings per worker
+RAG_EMBEDDING_CACHE_SIZE = int(os.getenv("RAG_EMBEDDING_CACHE_SIZE", "5000"))
+
+_retrieval_cache = get_cache(
+    "rag_retrieval",
+    default_ttl_seconds=RAG_RESULT_CACHE_TTL,
+    max_entries=RAG_RESULT_CACHE_SIZE,
+    max_bytes=64 * 1024 * 1024
+)
+_query_embedding_cache = get_cache(
+    "rag_query_embeddings",
+    default_ttl_seconds=RAG_EMBEDDING_CACHE_TTL,
+    max_entries=RAG_EMBEDDING_CACHE_SIZE,
+    max_bytes=128 * 1024 * 1024
+)
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace so trivially different queries share cache entries"""
+    return " ".join(query.split())
+
+
+class _PartialResult(Exception):
+    """Carries results from a retrieval where a stage failed - returned, not cached"""
+
+    def __init__(self, results: List[Dict[str, Any]]):
+        super().__init__("partial retrieval result")
+        self.results = results
 
 
 class AdvancedRAGSystem:
@@ -60,28 +110,68 @@ class AdvancedRAGSystem:
         if not openai_api_key:
             raise ValueError("OPENAI_API_KEY is required for embeddings")
 
-        self.embeddings = OpenAIEmbeddings(api_key=openai_api_key) if FAISS_AVAILABLE else None
+        if FAISS_AVAILABLE:
+            from langchain_openai import OpenAIEmbeddings
+            self.embeddings = OpenAIEmbeddings(api_key=openai_api_key)
+        else:
+            self.embeddings = None
+        # Batched, rate-limit-aware document embedding (shared by all uploads)
+        self.embedding_pipeline = EmbeddingPipeline(self.embeddings) if self.embeddings else None
 
-        # Initialize re-ranker (optional)
-        self.reranker = None
-        if RERANKER_AVAILABLE:
-            try:
-                # Use a lightweight cross-encoder for re-ranking
-                self.reranker = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
-                print("✓ Re-ranker initialized")
-            except Exception as e:
-                print(f"⚠️  Failed to initialize re-ranker: {e}")
+        # Re-ranker (optional) is loaded on first use - see the reranker property
+        self._reranker = None
+        self._reranker_loaded = not RERANKER_AVAILABLE
+        self._reranker_lock = threading.Lock()
 
         # Per-user vector stores (loaded on demand)
         self.vectorstores: Dict[int, Any] = {}
         self.bm25_indexes: Dict[int, BM25Okapi] = {}
         self.chunk_texts: Dict[int, List[str]] = {}
+        # Per-user corpus version - part of every retrieval cache key
+        self.corpus_versions: Dict[int, int] = {}
+        # Per-user stamp of the saved index this worker's state reflects
+        self._disk_stamps: Dict[int, Optional[Tuple[int, int]]] = {}
+        # Per-user locks serializing load -> embed -> save of a user's vectorstore,
+        # so concurrent uploads (ingestion workers) can't extend or replace it at once
+        self._user_locks: Dict[int, threading.Lock] = {}
+        self._user_locks_guard = threading.Lock()
 
         print("✓ Advanced RAG System initialized")
 
+    def _user_lock(self, user_id: int) -> threading.Lock:
+        """Lock held while a user's vectorstore is modified"""
+        with self._user_locks_guard:
+            lock = self._user_locks.get(user_id)
+            if lock is None:
+                lock = self._user_locks[user_id] = threading.Lock()
+            return lock
+
     def _get_vectorstore_path(self, user_id: int) -> Path:
-        """Get path to user's vectorstore"""
-        return self.vectorstore_dir / f"user_{user_id}" / "faiss_index"
+        """Get path to user's saved FAISS index (save_local writes it into the parent directory)"""
+        return self.vectorstore_dir / f"user_{user_id}" / "index.faiss"
+
+    def _disk_stamp(self, user_id: int) -> Optional[Tuple[int, int]]:
+        """Change stamp (mtime, size) of the user's saved index, seen by every worker"""
+        try:
+            stat = self._get_vectorstore_path(user_id).stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _corpus_version(self, user_id: int) -> Tuple[int, Optional[Tuple[int, int]]]:
+        """
+        Version of the user's corpus for retrieval cache keys
+
+        Another worker that added or deleted documents has rewritten the saved
+        index: drop this worker's copies so they are reloaded, and key cached
+        results by the saved index's stamp so no stale entry is served.
+        """
+        stamp = self._disk_stamp(user_id)
+        if user_id in self._disk_stamps and self._disk_stamps[user_id] != stamp:
+            self.vectorstores.pop(user_id, None)
+            self._bump_corpus_version(user_id)
+        self._disk_stamps[user_id] = stamp
+        return self.corpus_versions.get(user_id, 0), stamp
 
     def _load_vectorstore(self, user_id: int) -> Optional[Any]:
         """Load user's vectorstore from disk"""
@@ -95,6 +185,7 @@ class AdvancedRAGSystem:
 
         if vectorstore_path.exists():
             try:
+                from langchain_community.vectorstores import FAISS
                 vectorstore = FAISS.load_local(
                     str(vectorstore_path.parent),
                     self.embeddings,
@@ -109,6 +200,40 @@ class AdvancedRAGSystem:
 
         return None
 
+    def _bump_corpus_version(self, user_id: int):
+        """
+        Invalidate cached retrievals and the BM25 index after the user's
+        documents changed
+        """
+        self.corpus_versions[user_id] = self.corpus_versions.get(user_id, 0) + 1
+        self.bm25_indexes.pop(user_id, None)
+        self.chunk_texts.pop(user_id, None)
+        # This worker's state now matches the saved index
+        self._disk_stamps[user_id] = self._disk_stamp(user_id)
+
+    def _embed_query(self, query: str) -> List[float]:
+        """Embedding for a query, cached by model and normalized text"""
+        query = normalize_query(query)
+        model = getattr(self.embeddings, "model", "") or ""
+        key = f"{model}:{hashlib.sha256(query.encode('utf-8')).hexdigest()}"
+        return _query_embedding_cache.get_or_compute_sync(key, lambda: self.embeddings.embed_query(query))
+
+    @property
+    def reranker(self):
+        """Cross-encoder used for re-ranking (None if unavailable)"""
+        if not self._reranker_loaded:
+            with self._reranker_lock:
+                if not self._reranker_loaded:
+                    try:
+                        from sentence_transformers import CrossEncoder
+                        # Use a lightweight cross-encoder for re-ranking
+                        self._reranker = CrossEncoder(RERANKER_MODEL)
+                        print("✓ Re-ranker initialized")
+                    except Exception as e:
+                        print(f"⚠️  Failed to initialize re-ranker: {e}")
+                    self._reranker_loaded = True
+        return self._reranker
+
     def _build_bm25_index(self, user_id: int) -> Optional[BM25Okapi]:
         """Build BM25 index for user's documents"""
         if user_id in self.bm25_indexes:
@@ -156,7 +281,14 @@ class AdvancedRAGSystem:
             print(f"⚠️  Failed to build BM25 index: {e}")
             return None
 
-    def add_documents(self, user_id: int, chunks: List[Dict[str, Any]], collection_id: Optional[int] = None) -> bool:
+    def add_documents(
+        self,
+        user_id: int,
+        chunks: List[Dict[str, Any]],
+        collection_id: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> bool:
         """
         Add document chunks to vector store
 
@@ -164,6 +296,8 @@ class AdvancedRAGSystem:
             user_id: User ID
             chunks: List of chunk dictionaries with 'content' and 'metadata'
             collection_id: Optional collection ID
+            batch_size: Chunks per embeddings request (default: EMBEDDING_BATCH_SIZE)
+            progress_callback: Called with (chunks_done, chunks_total) after each batch
 
         Returns:
             True if successful
@@ -172,47 +306,69 @@ class AdvancedRAGSystem:
             print("⚠️  FAISS not available, cannot add documents")
             return False
 
-        try:
-            # Convert chunks to LangChain documents
-            documents = []
-            for chunk in chunks:
-                metadata = chunk.get('metadata', {})
-                if collection_id:
-                    metadata['collection_id'] = collection_id
-                metadata['user_id'] = user_id
-
-                doc = LangchainDocument(
-                    page_content=chunk['content'],
-                    metadata=metadata
-                )
-                documents.append(doc)
+        with self._user_lock(user_id):
+            try:
+                # Convert chunks to LangChain documents
+                documents = []
+                for chunk in chunks:
+                    metadata = chunk.get('metadata', {})
+                    if collection_id:
+                        metadata['collection_id'] = collection_id
+                    metadata['user_id'] = user_id
 
-            # Load or create vectorstore
-            vectorstore = self._load_vectorstore(user_id)
+                    doc = LangchainDocument(
+                        page_content=chunk['content'],
+                        metadata=metadata
+                    )
+                    documents.append(doc)
 
-            if vectorstore:
-                # Add to existing vectorstore
-                vectorstore.add_documents(documents)
-            else:
-                # Create new vectorstore
-                vectorstore = FAISS.from_documents(documents, self.embeddings)
+                # Embed into the user's vectorstore (created on first upload)
+                vectorstore = self._embed_into(self._load_vectorstore(user_id), documents, batch_size, progress_callback)
                 self.vectorstores[user_id] = vectorstore
 
-            # Save to disk
-            vectorstore_path = self._get_vectorstore_path(user_id)
-            vectorstore_path.parent.mkdir(parents=True, exist_ok=True)
-            vectorstore.save_local(str(vectorstore_path.parent))
+                # Save to disk
+                vectorstore_path = self._get_vectorstore_path(user_id)
+                vectorstore_path.parent.mkdir(parents=True, exist_ok=True)
+                vectorstore.save_local(str(vectorstore_path.parent))
 
-            # Rebuild BM25 index
-            self._build_bm25_index(user_id)
+                # Invalidate cached retrievals and rebuild BM25 index
+                self._bump_corpus_version(user_id)
+                self._build_bm25_index(user_id)
 
-            print(f"✓ Added {len(documents)} chunks to vectorstore")
-            return True
-        except Exception as e:
-            print(f"❌ Failed to add documents: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
+                print(f"✓ Added {len(documents)} chunks to vectorstore")
+                return True
+            except Exception as e:
+                # Drop any partially extended index; the next load reads the last saved one
+                self.vectorstores.pop(user_id, None)
+                print(f"❌ Failed to add documents: {e}")
+                import traceback
+                traceback.print_exc()
+                return False
+
+    def _embed_into(
+        self,
+        vectorstore: Optional[Any],
+        documents: List[Any],
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Any:
+        """
+        Embed documents through the embedding pipeline and add them to
+        vectorstore (a new one is created if it is None)
+        """
+        from langchain_community.vectorstores import FAISS
+        texts = [doc.page_content for doc in documents]
+        for start, vectors in self.embedding_pipeline.iter_batches(texts, batch_size):
+            batch = documents[start:start + len(vectors)]
+            text_embeddings = [(doc.page_content, vector) for doc, vector in zip(batch, vectors)]
+            metadatas = [doc.metadata for doc in batch]
+            if vectorstore is None:
+                vectorstore = FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas=metadatas)
+            else:
+                vectorstore.add_embeddings(text_embeddings, metadatas=metadatas)
+            if progress_callback:
+                progress_callback(start + len(batch), len(documents))
+        return vectorstore
 
     def _calculate_dynamic_k(self, query: str, base_k: int = 5, max_k: int = 20) -> int:
         """Calculate dynamic k based on query complexity"""
@@ -254,6 +410,43 @@ class AdvancedRAGSystem:
         if k is None:
             k = self._calculate_dynamic_k(query)
 
+        key_parts = {
+            "user_id": user_id,
+            "version": self._corpus_version(user_id),
+            "collection_id": collection_id,
+            # Normalized the same way as the query embedding
+            "query": normalize_query(query),
+            "k": k,
+            "rerank": use_reranking,
+            "hybrid": use_hybrid,
+        }
+        cache_key = hashlib.sha256(json.dumps(key_parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+        def compute():
+            errors: List[str] = []
+            results = self._retrieve_uncached(query, user_id, k, use_reranking, use_hybrid, collection_id, errors)
+            if errors:
+                raise _PartialResult(results)
+            return results
+
+        try:
+            results = _retrieval_cache.get_or_compute_sync(cache_key, compute)
+        except _PartialResult as e:
+            results = e.results
+        # Callers may annotate results - hand out copies of the cached dicts
+        return [dict(result) for result in results]
+
+    def _retrieve_uncached(
+        self,
+        query: str,
+        user_id: int,
+        k: int,
+        use_reranking: bool,
+        use_hybrid: bool,
+        collection_id: Optional[int],
+        errors: List[str]
+    ) -> List[Dict[str, Any]]:
+        """Run the full retrieval pipeline; stage failures are appended to errors"""
         results = []
 
         # Vector search
@@ -265,7 +458,12 @@ class AdvancedRAGSystem:
                 if collection_id:
                     search_kwargs["filter"] = {"collection_id": collection_id}
 
-                vector_docs = vectorstore.similarity_search_with_score(query, **search_kwargs)
+                with rag_stage_seconds.time(stage="embed"):
+                    query_vector = self._embed_query(query)
+                with rag_stage_seconds.time(stage="faiss"):
+                    vector_docs = vectorstore.similarity_search_with_score_by_vector(
+                        query_vector, **search_kwargs
+                    )
 
                 for doc, score in vector_docs:
                     results.append({
@@ -276,15 +474,17 @@ class AdvancedRAGSystem:
                     })
             except Exception as e:
                 print(f"⚠️  Vector search failed: {e}")
+                errors.append("Vector search")
 
         # Hybrid search: combine with BM25
         if use_hybrid and BM25_AVAILABLE:
-            bm25_index = self._build_bm25_index(user_id)
+            with rag_stage_seconds.time(stage="bm25_index"):
+                bm25_index = self._build_bm25_index(user_id)
             if bm25_index and user_id in self.chunk_texts:
                 try:
                     # Get all chunks first (BM25 index is built for all chunks)
                     if DB_AVAILABLE:
-                        with get_db_context() as db:
+                        with rag_stage_seconds.time(stage="db"), get_db_context() as db:
                             all_chunks_query = db.query(DocumentChunk).join(Document).filter(
                                 Document.user_id == user_id,
                                 Document.status == "ready"
@@ -314,7 +514,8 @@ class AdvancedRAGSystem:
                         pass
                     else:
                         query_tokens = query.lower().split()
-                        bm25_scores = bm25_index.get_scores(query_tokens)
+                        with rag_stage_seconds.time(stage="bm25"):
+                            bm25_scores = bm25_index.get_scores(query_tokens)
 
                         # Get scores only for filtered chunks
                         if collection_id and filtered_indices:
@@ -375,13 +576,15 @@ class AdvancedRAGSystem:
                                 })
                 except Exception as e:
                     print(f"⚠️  BM25 search failed: {e}")
+                    errors.append("BM25 search")
 
         # Re-ranking with cross-encoder
         if use_reranking and self.reranker and results:
             try:
                 # Prepare pairs for re-ranking
                 pairs = [[query, result["content"]] for result in results]
-                rerank_scores = self.reranker.predict(pairs)
+                with rag_stage_seconds.time(stage="rerank"):
+                    rerank_scores = self.reranker.predict(pairs)
 
                 # Update scores
                 for i, result in enumerate(results):
@@ -397,6 +600,7 @@ class AdvancedRAGSystem:
                 results.sort(key=lambda x: x["score"], reverse=True)
             except Exception as e:
                 print(f"⚠️  Re-ranking failed: {e}")
+                errors.append("Re-ranking")
 
         # Sort by score and return top k
         results.sort(key=lambda x: x["score"], reverse=True)
@@ -406,100 +610,105 @@ class AdvancedRAGSystem:
         """Delete documents from vector store"""
         # For simplicity, rebuild vectorstore without deleted documents
         # In production, you might want a more efficient approach
-        try:
-            if not DB_AVAILABLE:
-                return False
+        with self._user_lock(user_id):
+            try:
+                if not DB_AVAILABLE:
+                    return False
+
+                with get_db_context() as db:
+                    # Get all remaining chunks
+                    chunks = db.query(DocumentChunk).join(Document).filter(
+                        Document.user_id == user_id,
+                        Document.status == "ready",
+                        ~Document.id.in_(document_ids)
+                    ).order_by(DocumentChunk.document_id, DocumentChunk.chunk_index).all()
+
+                    if not chunks:
+                        # No chunks left, delete vectorstore
+                        vectorstore_path = self._get_vectorstore_path(user_id)
+                        if vectorstore_path.exists():
+                            import shutil
+                            shutil.rmtree(vectorstore_path.parent)
+                        if user_id in self.vectorstores:
+                            del self.vectorstores[user_id]
+                        self._bump_corpus_version(user_id)
+                        return True
+
+                    # Rebuild vectorstore
+                    documents = []
+                    for chunk in chunks:
+                        metadata = chunk.chunk_metadata
+                        if metadata:
+                            try:
+                                metadata = json.loads(metadata)
+                            except:
+                                metadata = {}
+                        else:
+                            metadata = {}
 
-            with get_db_context() as db:
-                # Get all remaining chunks
-                chunks = db.query(DocumentChunk).join(Document).filter(
-                    Document.user_id == user_id,
-                    Document.status == "ready",
-                    ~Document.id.in_(document_ids)
-                ).order_by(DocumentChunk.document_id, DocumentChunk.chunk_index).all()
+                        metadata["chunk_id"] = chunk.id
+                        metadata["document_id"] = chunk.document_id
+                        metadata["user_id"] = user_id
+
+                        doc = LangchainDocument(
+                            page_content=chunk.content,
+                            metadata=metadata
+                        )
+                        documents.append(doc)
+
+                    if documents and FAISS_AVAILABLE and self.embeddings:
+                        vectorstore = self._embed_into(None, documents)
+                        self.vectorstores[user_id] = vectorstore
+
+                        vectorstore_path = self._get_vectorstore_path(user_id)
+                        vectorstore_path.parent.mkdir(parents=True, exist_ok=True)
+                        vectorstore.save_local(str(vectorstore_path.parent))
+
+                    # Invalidate cached retrievals and rebuild BM25 index
+                    self._bump_corpus_version(user_id)
+                    self._build_bm25_index(user_id)
 
-                if not chunks:
-                    # No chunks left, delete vectorstore
-                    vectorstore_path = self._get_vectorstore_path(user_id)
-                    if vectorstore_path.exists():
-                        import shutil
-                        shutil.rmtree(vectorstore_path.parent)
-                    if user_id in self.vectorstores:
-                        del self.vectorstores[user_id]
-                    if user_id in self.bm25_indexes:
-                        del self.bm25_indexes[user_id]
-                    if user_id in self.chunk_texts:
-                        del self.chunk_texts[user_id]
                     return True
+            except Exception as e:
+                print(f"❌ Failed to delete documents: {e}")
+                return False
 
-                # Rebuild vectorstore
-                documents = []
-                for chunk in chunks:
-                    metadata = chunk.chunk_metadata
-                    if metadata:
-                        try:
-                            metadata = json.loads(metadata)
-                        except:
-                            metadata = {}
-                    else:
-                        metadata = {}
 
-                    metadata["chunk_id"] = chunk.id
-                    metadata["document_id"] = chunk.document_id
-                    metadata["user_id"] = user_id
+class DummyAdvancedRAGSystem:
+    """Stand-in used when OPENAI_API_KEY is missing - fails when used"""
 
-                    doc = LangchainDocument(
-                        page_content=chunk.content,
-                        metadata=metadata
-                    )
-                    documents.append(doc)
+    def retrieve(self, *args, **kwargs):
+        raise ValueError("OPENAI_API_KEY is required for embeddings. Please set OPENAI_API_KEY environment variable.")
 
-                if documents and FAISS_AVAILABLE and self.embeddings:
-                    vectorstore = FAISS.from_documents(documents, self.embeddings)
-                    self.vectorstores[user_id] = vectorstore
 
-                    vectorstore_path = self._get_vectorstore_path(user_id)
-                    vectorstore_path.parent.mkdir(parents=True, exist_ok=True)
-                    vectorstore.save_local(str(vectorstore_path.parent))
+def _create_advanced_rag_system():
+    """Build the advanced RAG system, falling back to a dummy without an API key"""
+    try:
+        return AdvancedRAGSystem()
+    except ValueError as e:
+        # OPENAI_API_KEY missing - create a dummy instance that will fail gracefully
+        print(f"⚠️  Advanced RAG System initialization failed: {e}")
+        print("   Custom RAG tools will not be available until OPENAI_API_KEY is set.")
+        return DummyAdvancedRAGSystem()
 
-                # Rebuild BM25 index
-                self._build_bm25_index(user_id)
 
-                return True
-        except Exception as e:
-            print(f"❌ Failed to delete documents: {e}")
-            return False
+# Global instance - built on first use or by the lifespan warm-up
+advanced_rag_system = get_container().register_lazy("advanced_rag_system", _create_advanced_rag_system)
 
 
-# Global instance - initialize lazily to handle missing OPENAI_API_KEY gracefully
-_advanced_rag_system_instance = None
+def is_advanced_rag_available() -> bool:
+    """
+    Whether document RAG can serve requests, without building the system
+
+    Once built, true unless it fell back to the dummy; before that, true if
+    the build would succeed (FAISS installed and an OpenAI key configured).
+    """
+    container = get_container()
+    if container.is_initialized("advanced_rag_system"):
+        return isinstance(container.get("advanced_rag_system"), AdvancedRAGSystem)
+    return FAISS_AVAILABLE and bool(os.getenv("OPENAI_API_KEY"))
+
 
 def get_advanced_rag_system():
     """Get or create the global advanced RAG system instance"""
-    global _advanced_rag_system_instance
-    if _advanced_rag_system_instance is None:
-        try:
-            _advanced_rag_system_instance = AdvancedRAGSystem()
-        except ValueError as e:
-            # OPENAI_API_KEY missing - create a dummy instance that will fail gracefully
-            print(f"⚠️  Advanced RAG System initialization failed: {e}")
-            print("   Custom RAG tools will not be available until OPENAI_API_KEY is set.")
-            # Create a dummy instance that will raise errors when used
-            class DummyAdvancedRAGSystem:
-                def retrieve(self, *args, **kwargs):
-                    raise ValueError("OPENAI_API_KEY is required for embeddings. Please set OPENAI_API_KEY environment variable.")
-            _advanced_rag_system_instance = DummyAdvancedRAGSystem()
-    return _advanced_rag_system_instance
-
-# For backward compatibility, create instance on import (but handle errors)
-try:
-    advanced_rag_system = AdvancedRAGSystem()
-except ValueError as e:
-    print(f"⚠️  Advanced RAG System initialization failed: {e}")
-    print("   Custom RAG tools will not be available until OPENAI_API_KEY is set.")
-    # Create a dummy instance
-    class DummyAdvancedRAGSystem:
-        def retrieve(self, *args, **kwargs):
-            raise ValueError("OPENAI_API_KEY is required for embeddings. Please set OPENAI_API_KEY environment variable.")
-    advanced_rag_system = DummyAdvancedRAGSystem()
-
+    return get_container().get("advanced_rag_system")
@@ -96,6 +96,7 @@ async def run_rag_query(question: str, session_id: str = "default"):
             ) from e
         raise
 
+    await rag_system.ready()
     answer = rag_system.query_with_history(question, session_id, llm)
 
     print(f"\n✅ Answer: {answer}\n")
@@ -0,0 +1,210 @@
+"""
+Compiled agent cache
+create_agent() builds and compiles a LangGraph state graph, binds the tool
+schemas to the model and renders the system prompt - work that is identical
+for every message with the same LLM config, tool catalog and prompt. This
+module caches the compiled graph under that key.
+
+Tool instances are request-scoped (the appointment tool closes over the
+user and DB session, MCP tools over live client sessions), so the cached
+graph only holds schema-carrying proxies. The real tools for a run are
+passed in the run config and resolved by name when a tool is called, and
+async calls go through the run's ToolExecutor (see tool_executor.py).
+"""
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain.agents import create_agent
+from langchain_core.tools import BaseTool
+
+from src.services.tool_executor import ToolExecutor
+from src.utils.cache import get_cache
+from src.utils.metrics import agent_build_seconds
+
+# Maximum compiled agents kept per worker (LRU)
+AGENT_CACHE_SIZE = int(os.getenv("AGENT_CACHE_SIZE", "64"))
+# Seconds a compiled agent may be reused before it is rebuilt
+AGENT_CACHE_TTL = int(os.getenv("AGENT_CACHE_TTL", "3600"))
+
+# Run-config key carrying the request's {tool_name: tool} mapping
+SCOPED_TOOLS_KEY = "__scoped_tools__"
+# Run-config key carrying the request's ToolExecutor
+TOOL_EXECUTOR_KEY = "__tool_executor__"
+
+# LLM config fields that determine the model client
+_LLM_IDENTITY_FIELDS = ("type", "model", "api_key", "base_url", "api_base")
+
+
+class ScopedTool(BaseTool):
+    """
+    Stand-in for a request-scoped tool inside a cached agent graph
+
+    Carries the name, description and argument schema used for tool binding;
+    invocation is delegated to the tool of the same name found in the run
+    config, so every request executes its own tool instances.
+    """
+
+    def _resolve(self, config: Optional[dict]) -> BaseTool:
+        """Find the request's tool instance for this name"""
+        scoped = ((config or {}).get("configurable") or {}).get(SCOPED_TOOLS_KEY) or {}
+        tool = scoped.get(self.name)
+        if tool is None:
+            raise RuntimeError(f"Tool '{self.name}' is not available for this request")
+        return tool
+
+    def invoke(self, input, config=None, **kwargs):
+        return self._resolve(config).invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        tool = self._resolve(config)
+        executor = ((config or {}).get("configurable") or {}).get(TOOL_EXECUTOR_KEY)
+        if executor is None:
+            return await tool.ainvoke(input, config, **kwargs)
+        return await executor.run(tool, input, config, **kwargs)
+
+    def _run(self, *args, **kwargs):
+        raise RuntimeError("ScopedTool must be invoked through invoke()/ainvoke()")
+
+    @classmethod
+    def from_tool(cls, tool: BaseTool) -> "ScopedTool":
+        """Create a proxy with the same public schema as a tool"""
+        return cls(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            return_direct=tool.return_direct,
+            response_format=getattr(tool, "response_format", "content"),
+        )
+
+
+class CachedAgent:
+    """
+    Cached agent graph bound to one request's tools
+
+    Exposes the astream/ainvoke/stream/invoke surface of the compiled graph
+    and injects the request's tools and tool executor (concurrency limit,
+    timeouts) into every run config.
+    """
+
+    def __init__(self, graph, tools: List[BaseTool], tool_executor: Optional[ToolExecutor] = None):
+        self.graph = graph
+        self.tools_by_name = {tool.name: tool for tool in tools}
+        self.tool_executor = tool_executor or ToolExecutor()
+
+    def _config(self, config: Optional[dict]) -> dict:
+        config = dict(config or {})
+        configurable = dict(config.get("configurable") or {})
+        configurable[SCOPED_TOOLS_KEY] = self.tools_by_name
+        configurable[TOOL_EXECUTOR_KEY] = self.tool_executor
+        config["configurable"] = configurable
+        return config
+
+    def astream(self, input, config: Optional[dict] = None, **kwargs):
+        return self.graph.astream(input, self._config(config), **kwargs)
+
+    def stream(self, input, config: Optional[dict] = None, **kwargs):
+        return self.graph.stream(input, self._config(config), **kwargs)
+
+    async def ainvoke(self, input, config: Optional[dict] = None, **kwargs):
+        return await self.graph.ainvoke(input, self._config(config), **kwargs)
+
+    def invoke(self, input, config: Optional[dict] = None, **kwargs):
+        return self.graph.invoke(input, self._config(config), **kwargs)
+
+
+def _sha256(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def llm_identity(llm_config: Dict[str, Any], **llm_options) -> str:
+    """
+    Stable identity for the LLM client a config produces
+
+    The API key is hashed so it never appears in cache keys.
+    """
+    identity = {field: llm_config.get(field) for field in _LLM_IDENTITY_FIELDS}
+    if identity.get("api_key"):
+        identity["api_key"] = _sha256(str(identity["api_key"]))
+    identity.update(llm_options)
+    return _sha256(json.dumps(identity, sort_keys=True, default=str))
+
+
+def tool_catalog_version(tools: List[BaseTool]) -> str:
+    """Hash of the tool names, descriptions and argument schemas"""
+    catalog = []
+    for tool in tools:
+        schema = tool.args_schema
+        if schema is not None and not isinstance(schema, dict):
+            try:
+                schema = tool.tool_call_schema.model_json_schema()
+            except Exception:
+                schema = tool.args
+        catalog.append((tool.name, tool.description, schema, tool.return_direct))
+    catalog.sort(key=lambda item: item[0])
+    return _sha256(json.dumps(catalog, sort_keys=True, default=str))
+
+
+class AgentCache:
+    """Bounded LRU cache of compiled agent graphs"""
+
+    def __init__(self, max_size: int = AGENT_CACHE_SIZE, ttl_seconds: int = AGENT_CACHE_TTL):
+        self._cache = get_cache("agent_graphs", default_ttl_seconds=ttl_seconds, max_entries=max_size)
+
+    def get_agent(
+        self,
+        llm,
+        llm_config: Dict[str, Any],
+        tools: List[BaseTool],
+        system_prompt: str,
+        builder: Callable[..., Any] = create_agent,
+        **llm_options
+    ) -> CachedAgent:
+        """
+        Get a compiled agent for this LLM, tool catalog and prompt
+
+        Args:
+            llm: Model client used when the graph has to be built
+            llm_config: Config the model client was created from
+            tools: This request's tool instances (already sanitized)
+            system_prompt: Rendered system prompt
+            builder: Agent factory (create_agent)
+            **llm_options: Options the client was created with (streaming, temperature)
+
+        Returns:
+            CachedAgent running the shared graph with this request's tools
+        """
+        if not all(isinstance(tool, BaseTool) for tool in tools):
+            # Plain callables cannot be proxied - build an uncached graph
+            with agent_build_seconds.time():
+                return builder(model=llm, tools=tools, system_prompt=system_prompt)
+
+        key = ":".join((
+            llm_identity(llm_config, **llm_options),
+            tool_catalog_version(tools),
+            _sha256(system_prompt or ""),
+        ))
+
+        def build():
+            with agent_build_seconds.time():
+                return builder(
+                    model=llm,
+                    tools=[ScopedTool.from_tool(tool) for tool in tools],
+                    system_prompt=system_prompt
+                )
+
+        graph = self._cache.get_or_compute_sync(key, build)
+        return CachedAgent(graph, tools)
+
+    def clear(self):
+        """Drop all compiled agents"""
+        self._cache.clear()
+
+    def metrics(self) -> dict:
+        """Hit/miss metrics"""
+        return self._cache.metrics()
+
+
+# Global agent cache instance
+agent_cache = AgentCache()
@@ -0,0 +1,141 @@
+"""
+Incremental agent event streaming
+Consumes the agent graph's "messages" (token deltas) and "updates" (per-node
+state deltas) streams instead of full "values" snapshots, so each step only
+touches the messages it produced and tokens can be forwarded as soon as the
+model emits them.
+"""
+import os
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+from src.services.message_normalizer import extract_text
+
+# Graph node that executes tools (token chunks from LLM calls made inside
+# tools must not leak into the answer stream)
+TOOLS_NODE = "tools"
+
+# Characters of a model step's text held back until the step is known not to
+# call tools. Text written before a tool call ("Let me look that up...") is
+# not part of the answer; a preamble longer than this has already been
+# streamed when the tool call arrives. 0 streams every delta immediately.
+AGENT_PREAMBLE_HOLD_CHARS = int(os.getenv("AGENT_PREAMBLE_HOLD_CHARS", "160"))
+
+
+@dataclass
+class AgentStreamEvent:
+    """
+    A single incremental agent event
+
+    kind is one of:
+    - "token": answer text delta (text)
+    - "tool_start": the model requested a tool call (tool_name, tool_call_id);
+      text of the same step sent before it as "token" events was a preamble,
+      not part of the answer
+    - "preamble": held-back text of a step that turned out to call tools
+      (text) - not sent as "token" events
+    - "tool_end": a tool call finished (tool_name, tool_call_id, error)
+    - "ai_message": a completed model message (message, as produced by the
+      model so usage metadata is kept) and its text content (text)
+    """
+    kind: str
+    text: str = ""
+    tool_name: Optional[str] = None
+    tool_call_id: Optional[str] = None
+    message: Optional[AIMessage] = None
+    error: bool = False
+
+
+async def stream_agent_events(agent, messages: list, config: Optional[dict] = None) -> AsyncIterator[AgentStreamEvent]:
+    """
+    Run an agent and yield incremental events
+
+    Models that do not stream tokens still produce one "token" event with
+    the full answer text when their message completes. The first
+    AGENT_PREAMBLE_HOLD_CHARS characters of each step are held until the
+    step either calls a tool (they become a "preamble" event) or writes
+    more (they are released as a "token" event).
+
+    Args:
+        agent: Compiled agent graph (or CachedAgent)
+        messages: Input messages (history + new user message)
+        config: Optional run config
+
+    Yields:
+        AgentStreamEvent objects in the order they happen
+    """
+    announced_calls = set()
+    # Per model step: text seen, text held back, whether a tool was called
+    step_streamed = False
+    held = ""
+    step_calls_tools = False
+
+    async for mode, chunk in agent.astream(
+        {"messages": messages},
+        config,
+        stream_mode=["messages", "updates"]
+    ):
+        if mode == "messages":
+            message, metadata = chunk
+            if not isinstance(message, AIMessageChunk):
+                continue
+            if (metadata or {}).get("langgraph_node") == TOOLS_NODE:
+                continue
+
+            call_chunks = getattr(message, "tool_call_chunks", None) or []
+            if call_chunks and not step_calls_tools:
+                step_calls_tools = True
+                if held:
+                    yield AgentStreamEvent(kind="preamble", text=held)
+                    held = ""
+
+            text = extract_text(message.content) if message.content else ""
+            if text:
+                step_streamed = True
+                if step_calls_tools:
+                    yield AgentStreamEvent(kind="preamble", text=text)
+                elif held is not None and len(held) + len(text) <= AGENT_PREAMBLE_HOLD_CHARS:
+                    held += text
+                else:
+                    # Past the hold window: stream live for the rest of the step
+                    yield AgentStreamEvent(kind="token", text=(held or "") + text)
+                    held = None
+
+            for call_chunk in call_chunks:
+                name = call_chunk.get("name")
+                call_id = call_chunk.get("id") or name
+                if name and call_id not in announced_calls:
+                    announced_calls.add(call_id)
+                    yield AgentStreamEvent(kind="tool_start", tool_name=name, tool_call_id=call_chunk.get("id"))
+
+        elif mode == "updates":
+            for update in (chunk or {}).values():
+                if not isinstance(update, dict):
+                    continue
+                for message in update.get("messages", []) or []:
+                    if isinstance(message, AIMessage):
+                        text = extract_text(message.content) if message.content else ""
+                        tool_calls = getattr(message, "tool_calls", None)
+                        if held:
+                            # Step complete: held text is answer or preamble
+                            yield AgentStreamEvent(kind="preamble" if tool_calls else "token", text=held)
+                        elif not step_streamed and text:
+                            yield AgentStreamEvent(kind="preamble" if tool_calls else "token", text=text)
+                        for call in tool_calls or []:
+                            call_id = call.get("id") or call.get("name")
+                            if call_id not in announced_calls:
+                                announced_calls.add(call_id)
+                                yield AgentStreamEvent(kind="tool_start", tool_name=call.get("name"), tool_call_id=call.get("id"))
+                        step_streamed = False
+                        held = ""
+                        step_calls_tools = False
+                        yield AgentStreamEvent(kind="ai_message", text=text, message=message)
+                    elif isinstance(message, ToolMessage):
+                        yield AgentStreamEvent(
+                            kind="tool_end",
+                            tool_name=message.name,
+                            tool_call_id=message.tool_call_id,
+                            error=getattr(message, "status", "success") == "error"
+                        )
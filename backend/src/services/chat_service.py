@@ -6,7 +6,6 @@ over time with RAG and Agent modes, but it works. Could probably split
 this further but keeping it together for now.
 """
 from typing import Optional, AsyncGenerator
-from langchain.agents import create_agent
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
@@ -20,6 +19,9 @@ from src.services.db_history import db_history_manager
 from src.services.tools import retrieve_dosiblog_context, load_custom_rag_tools, create_appointment_tool
 from src.services.advanced_rag import advanced_rag_system
 from src.services.react_agent import create_react_agent
+from src.services.agent_cache import agent_cache
+from src.services.agent_stream import stream_agent_events
+from src.services.message_normalizer import extract_text, normalize_message, normalize_messages
 from src.utils import sanitize_tools_for_gemini
 from src.utils.utils import extract_token_usage, estimate_tokens
 from src.core.constants import CHAT_MODE_AGENT, CHAT_MODE_RAG
@@ -116,6 +118,7 @@ class ChatService:
             # Use advanced RAG with retrieval (standard RAG mode)
             if user_id:
                 # Retrieve relevant documents - using k=5, could make this configurable
+                await advanced_rag_system.ready()
                 retrieved_docs = advanced_rag_system.retrieve(
                     query=message,
                     user_id=user_id,
@@ -137,6 +140,7 @@ class ChatService:
             else:
                 # Fallback to basic RAG for unauthenticated users
                 # Not ideal but better than nothing
+                await rag_system.ready()
                 context = rag_system.retrieve_context(message)
 
             llm = create_llm_from_config(llm_config, streaming=False, temperature=0)
@@ -282,21 +286,13 @@ class ChatService:
             # Run agent
             final_answer = ""
             last_ai_message = None
-            async for event in agent.astream({"messages": messages}, stream_mode="values"):
-                # Normalize all messages in the event to ensure no list content
-                event_messages = event.get("messages", [])
-                normalized_event_messages = ChatService._normalize_messages(event_messages)
-                event["messages"] = normalized_event_messages
-
-                last_msg = normalized_event_messages[-1] if normalized_event_messages else None
-
-                if isinstance(last_msg, AIMessage):
-                    last_ai_message = last_msg
-                    if getattr(last_msg, "tool_calls", None):
-                        for call in last_msg.tool_calls:
-                            tools_used.append(call['name'])
-                    else:
-                        final_answer = ChatService._extract_content(last_msg.content)
+            async for event in stream_agent_events(agent, messages):
+                if event.kind == "tool_start":
+                    tools_used.append(event.tool_name)
+                elif event.kind == "ai_message":
+                    last_ai_message = event.message
+                    if not getattr(event.message, "tool_calls", None):
+                        final_answer = event.text
 
             # Extract token usage from last AI message
             input_tokens, output_tokens, embedding_tokens = 0, 0, 0
@@ -344,6 +340,7 @@ class ChatService:
             history = history_manager.get_session_messages(session_id, user_id)
             session_history = history_manager.get_session_history(session_id, user_id)
 
+        await rag_system.ready()
         context = rag_system.retrieve_context(message)
 
         # Use custom prompt if provided, otherwise use default
@@ -448,10 +445,9 @@ class ChatService:
         sanitized_tools = sanitize_tools_for_gemini(tools, llm_config.get("type", ""))
 
         # Create the agent - LangChain handles the rest
-        return create_agent(
-            model=llm,
-            tools=sanitized_tools,
-            system_prompt=system_prompt
+        return agent_cache.get_agent(
+            llm, llm_config, sanitized_tools, system_prompt,
+            streaming=False, temperature=0
         )
 
     @staticmethod
@@ -459,70 +455,18 @@ class ChatService:
         """
         Extract text content from various content types
 
-        Different LLMs return content in different formats:
-        - String (simple)
-        - List of dicts (Gemini)
-        - Dict with text key
-        - Other weird formats
-
-        This handles all of them. Could probably simplify but this works.
+        Different LLMs return content in different formats (string, list of
+        content blocks, dict) - see message_normalizer.extract_text.
         """
-        if isinstance(content, str):
-            return content
-        elif isinstance(content, list):
-            # Handle list format (common with Gemini)
-            result = ""
-            for item in content:
-                if isinstance(item, dict):
-                    if "text" in item:
-                        result += item["text"]
-                    elif "type" in item and item.get("type") == "text":
-                        result += item.get("text", "")
-                elif isinstance(item, str):
-                    result += item
-            return result
-        elif isinstance(content, dict):
-            # Handle dict format
-            if "text" in content:
-                return content["text"]
-            return str(content)
-        else:
-            # Fallback - just convert to string
-            return str(content)
+        return extract_text(content)
 
     @staticmethod
     def _normalize_message_content(message):
         """Normalize message content to ensure it's a string (not a list)"""
-        from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
-
-        if not isinstance(message, BaseMessage):
-            return message
-
-        # If content is already a string, return as-is
-        if isinstance(message.content, str):
-            return message
-
-        # Extract content and create a new message with string content
-        normalized_content = ChatService._extract_content(message.content)
-
-        # Create a new message of the same type with normalized content
-        if isinstance(message, HumanMessage):
-            return HumanMessage(content=normalized_content)
-        elif isinstance(message, AIMessage):
-            new_msg = AIMessage(content=normalized_content)
-            # Preserve tool_calls if they exist
-            if hasattr(message, 'tool_calls'):
-                new_msg.tool_calls = message.tool_calls
-            return new_msg
-        elif isinstance(message, SystemMessage):
-            return SystemMessage(content=normalized_content)
-        else:
-            # For other message types, try to preserve attributes
-            message.content = normalized_content
-            return message
+        return normalize_message(message)
 
     @staticmethod
     def _normalize_messages(messages):
         """Normalize a list of messages to ensure all contents are strings"""
-        return [ChatService._normalize_message_content(msg) for msg in messages]
+        return normalize_messages(messages)
 
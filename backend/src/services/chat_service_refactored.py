@@ -3,7 +3,6 @@ Refactored Chat Service
 Following Refactoring.Guru: Introduce Parameter Object, Extract Method, Decompose Conditional, Replace Conditional with Polymorphism
 """
 from typing import Optional
-from langchain.agents import create_agent
 from langchain_core.messages import HumanMessage, AIMessage
 
 from typing import TYPE_CHECKING
@@ -15,6 +14,9 @@ from src.services import history_manager, create_llm_from_config, rag_system
 from src.services.db_history import db_history_manager
 from src.services.advanced_rag import advanced_rag_system
 from src.services.react_agent import create_react_agent
+from src.services.agent_cache import agent_cache
+from src.services.agent_stream import stream_agent_events
+from src.services.message_normalizer import normalize_messages
 from src.services.chat_models import ChatRequestParams, ChatResponseData, TokenUsage
 from src.services.chat_conditionals import ConditionalHelpers, GuardClauseHelpers
 from src.services.tool_manager import ToolManager
@@ -107,6 +109,8 @@ class ChatService:
     @staticmethod
     async def _process_rag_with_retrieval(params: ChatRequestParams, llm_config: dict) -> dict:
         """Process RAG mode with document retrieval"""
+        await rag_system.ready()
+        await advanced_rag_system.ready()
         context = ChatService._retrieve_context(params)
 
         llm = create_llm_from_config(llm_config, streaming=False, temperature=DEFAULT_LLM_TEMPERATURE)
@@ -224,26 +228,14 @@ class ChatService:
     @staticmethod
     async def _run_agent(agent, messages: list) -> tuple[str, list]:
         """Run agent and extract answer and tools used"""
-        from src.services.chat_helpers import ContentNormalizer
-
         final_answer = ""
         tools_used = []
-        last_ai_message = None
-
-        async for event in agent.astream({"messages": messages}, stream_mode="values"):
-            event_messages = event.get("messages", [])
-            normalized_event_messages = ChatService._normalize_messages(event_messages)
-            event["messages"] = normalized_event_messages
-
-            last_msg = normalized_event_messages[-1] if normalized_event_messages else None
 
-            if isinstance(last_msg, AIMessage):
-                last_ai_message = last_msg
-                if getattr(last_msg, "tool_calls", None):
-                    for call in last_msg.tool_calls:
-                        tools_used.append(call['name'])
-                else:
-                    final_answer = ContentNormalizer.normalize_content(last_msg.content)
+        async for event in stream_agent_events(agent, messages):
+            if event.kind == "tool_start":
+                tools_used.append(event.tool_name)
+            elif event.kind == "ai_message" and not getattr(event.message, "tool_calls", None):
+                final_answer = event.text
 
         return final_answer, tools_used
 
@@ -259,6 +251,7 @@ class ChatService:
             params.session_id, params.user_id, params.db
         )
 
+        await rag_system.ready()
         context = rag_system.retrieve_context(params.message)
 
         system_message = AgentPromptBuilder.create_agent_prompt(params.agent_prompt)
@@ -295,10 +288,9 @@ class ChatService:
         system_prompt = AgentPromptBuilder.create_agent_prompt(agent_prompt)
         sanitized_tools = sanitize_tools_for_gemini(tools, llm_config.get("type", ""))
 
-        return create_agent(
-            model=llm,
-            tools=sanitized_tools,
-            system_prompt=system_prompt
+        return agent_cache.get_agent(
+            llm, llm_config, sanitized_tools, system_prompt,
+            streaming=False, temperature=DEFAULT_LLM_TEMPERATURE
         )
 
     @staticmethod
@@ -382,33 +374,5 @@ class ChatService:
     @staticmethod
     def _normalize_messages(messages):
         """Normalize a list of messages to ensure all contents are strings"""
-        from src.services.chat_helpers import ContentNormalizer
-        from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
-
-        normalized = []
-        for msg in messages:
-            if not isinstance(msg, BaseMessage):
-                normalized.append(msg)
-                continue
-
-            if isinstance(msg.content, str):
-                normalized.append(msg)
-                continue
-
-            normalized_content = ContentNormalizer.normalize_content(msg.content)
-
-            if isinstance(msg, HumanMessage):
-                normalized.append(HumanMessage(content=normalized_content))
-            elif isinstance(msg, AIMessage):
-                new_msg = AIMessage(content=normalized_content)
-                if hasattr(msg, 'tool_calls'):
-                    new_msg.tool_calls = msg.tool_calls
-                normalized.append(new_msg)
-            elif isinstance(msg, SystemMessage):
-                normalized.append(SystemMessage(content=normalized_content))
-            else:
-                msg.content = normalized_content
-                normalized.append(msg)
-
-        return normalized
+        return normalize_messages(messages)
 
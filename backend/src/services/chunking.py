@@ -0,0 +1,613 @@
+"""
+Token-aware text chunking
+Splits documents into chunks measured in model tokens (tiktoken when
+installed, a regex estimate otherwise) so retrieved context fits model
+limits. A chunking strategy decides where text may be split; the chunker
+then makes a single forward pass:
+
+1. the strategy cuts the text into sections (hard boundaries, e.g. markdown
+   headings) and each section into units at its coarsest separator
+   (paragraphs, sentences, ...); only units over the token budget are cut
+   again at the next finer separator
+2. units are packed greedily into chunks, with the last few units of each
+   chunk repeated at the start of the next as overlap
+
+Every chunk is a verbatim slice of the input, so metadata start_char and
+end_char are exact: text[start_char:end_char] == content. Work is linear in
+the text length (each character is tokenized at most once per separator
+level).
+"""
+import bisect
+import os
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Pattern, Tuple
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# tiktoken encoding used to measure chunks
+CHUNK_TOKENIZER = os.getenv("CHUNK_TOKENIZER", "cl100k_base")
+# Default chunking strategy
+CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "recursive")
+# Default token budget per chunk
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "256"))
+# Default tokens repeated between consecutive chunks
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+
+# Characters per token, for converting legacy character budgets
+CHARS_PER_TOKEN = 4
+
+# Separators, coarsest to finest. A unit ends after its separator.
+PARAGRAPH = re.compile(r"\n[ \t]*\n\s*")
+LINE = re.compile(r"\n\s*")
+SENTENCE = re.compile(r"[.!?][\"')\]]*\s+")
+WORD = re.compile(r"\s+")
+# Besides whitespace, the characters the separators above are made of: a
+# match that more text could still extend can only start in a trailing run
+# of these
+_SEPARATOR_PUNCTUATION = frozenset(".!?\"')]")
+
+# Regex token estimate: words count one token per 4 characters, punctuation one each
+_APPROX_TOKEN = re.compile(r"\w{1,4}|[^\w\s]")
+
+
+# ----- tokenizer -----
+
+def _approximate_tokens(text: str) -> int:
+    return len(_APPROX_TOKEN.findall(text))
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(encoding: str = CHUNK_TOKENIZER) -> Callable[[str], int]:
+    """Token counting function for an encoding (regex estimate without tiktoken)"""
+    if TIKTOKEN_AVAILABLE:
+        try:
+            tokenizer = tiktoken.get_encoding(encoding)
+            return lambda text: len(tokenizer.encode_ordinary(text))
+        except Exception as e:
+            # Encoding files are downloaded on first use - offline hosts fall back
+            print(f"⚠️  tiktoken encoding '{encoding}' unavailable ({e}), estimating tokens")
+    return _approximate_tokens
+
+
+# ----- strategies -----
+
+class Section(NamedTuple):
+    """Span of text chunks may not cross, with metadata for its chunks"""
+    start: int
+    end: int
+    metadata: Dict[str, Any]
+
+
+class ChunkingStrategy(ABC):
+    """
+    Abstract base class for chunking strategies
+
+    A strategy supplies the separator levels used to cut oversized text
+    and, optionally, hard section boundaries.
+    """
+
+    @abstractmethod
+    def split_levels(self) -> Tuple[Pattern, ...]:
+        """Separator patterns, coarsest first"""
+        pass
+
+    @abstractmethod
+    def get_name(self) -> str:
+        """Strategy name recorded in chunk metadata"""
+        pass
+
+    def sections(self, text: str) -> Iterator[Section]:
+        """Hard boundaries; the whole text by default"""
+        yield Section(0, len(text), {})
+
+    def scan_sections(self, text: str, start: int = 0, state: Any = None) -> Iterator[Section]:
+        """
+        Sections of text[start:], resuming from the scan state at `start`
+        (see advance_state); used to chunk text that arrives in pieces.
+        Strategies whose sections depend on earlier text override both.
+        """
+        for section in self.sections(text[start:]):
+            yield Section(section.start + start, section.end + start, section.metadata)
+
+    def advance_state(self, text: str, start: int, end: int, state: Any = None) -> Any:
+        """Scan state at `end`, given the state at `start` (None when stateless)"""
+        return None
+
+
+class ParagraphChunkingStrategy(ChunkingStrategy):
+    """Packs whole paragraphs; long paragraphs fall back to sentences, then words"""
+
+    def split_levels(self) -> Tuple[Pattern, ...]:
+        return (PARAGRAPH, SENTENCE, WORD)
+
+    def get_name(self) -> str:
+        return "paragraph"
+
+
+class SentenceChunkingStrategy(ChunkingStrategy):
+    """Packs sentences, ignoring paragraph structure"""
+
+    def split_levels(self) -> Tuple[Pattern, ...]:
+        return (SENTENCE, WORD)
+
+    def get_name(self) -> str:
+        return "sentence"
+
+
+class RecursiveChunkingStrategy(ChunkingStrategy):
+    """Paragraphs, then lines, then sentences, then words"""
+
+    def split_levels(self) -> Tuple[Pattern, ...]:
+        return (PARAGRAPH, LINE, SENTENCE, WORD)
+
+    def get_name(self) -> str:
+        return "recursive"
+
+
+class MarkdownChunkingStrategy(RecursiveChunkingStrategy):
+    """
+    Never lets a chunk span two headings; chunks carry their heading path
+    (e.g. "Setup > Database") in metadata["headings"]. Headings inside
+    fenced code blocks are ignored.
+    """
+
+    _MARKERS = re.compile(r"^(?:(```|~~~)|(#{1,6})[ \t]+(.+?)[ \t#]*)$", re.MULTILINE)
+
+    def get_name(self) -> str:
+        return "markdown"
+
+    def sections(self, text: str) -> Iterator[Section]:
+        return self.scan_sections(text)
+
+    def scan_sections(self, text: str, start: int = 0, state: Any = None) -> Iterator[Section]:
+        # State is (heading path, inside a code fence)
+        path: List[Tuple[int, str]] = list(state[0]) if state else []
+        in_fence = state[1] if state else False
+        section_start = start
+        for match in self._MARKERS.finditer(text, start):
+            if match.group(1):
+                in_fence = not in_fence
+                continue
+            if in_fence:
+                continue
+            # A heading right at `start` yields an empty section, closing
+            # the one carried over from the earlier text
+            if match.start() > section_start or section_start == start > 0:
+                yield Section(section_start, match.start(), self._metadata(path))
+            self._enter_heading(path, match)
+            section_start = match.start()
+        if section_start < len(text):
+            yield Section(section_start, len(text), self._metadata(path))
+
+    def advance_state(self, text: str, start: int, end: int, state: Any = None) -> Any:
+        path: List[Tuple[int, str]] = list(state[0]) if state else []
+        in_fence = state[1] if state else False
+        for match in self._MARKERS.finditer(text, start):
+            if match.start() >= end:
+                break
+            if match.group(1):
+                in_fence = not in_fence
+            elif not in_fence:
+                self._enter_heading(path, match)
+        return tuple(path), in_fence
+
+    @staticmethod
+    def _enter_heading(path: List[Tuple[int, str]], match: "re.Match"):
+        level = len(match.group(2))
+        while path and path[-1][0] >= level:
+            path.pop()
+        path.append((level, match.group(3)))
+
+    @staticmethod
+    def _metadata(path: List[Tuple[int, str]]) -> Dict[str, Any]:
+        return {"headings": " > ".join(title for _, title in path)} if path else {}
+
+
+class ChunkingStrategyFactory:
+    """Factory for creating chunking strategies"""
+
+    _strategies = {
+        "paragraph": ParagraphChunkingStrategy,
+        "sentence": SentenceChunkingStrategy,
+        "recursive": RecursiveChunkingStrategy,
+        "markdown": MarkdownChunkingStrategy,
+    }
+
+    @classmethod
+    def create_strategy(cls, name: str) -> ChunkingStrategy:
+        """Create strategy by name"""
+        strategy_class = cls._strategies.get(name.lower())
+        if not strategy_class:
+            raise ValueError(f"Unknown chunking strategy: {name}")
+        return strategy_class()
+
+    @classmethod
+    def register_strategy(cls, name: str, strategy_class: type[ChunkingStrategy]):
+        """Register a new strategy"""
+        cls._strategies[name.lower()] = strategy_class
+
+    @classmethod
+    def available(cls) -> List[str]:
+        return sorted(cls._strategies)
+
+
+# ----- chunker -----
+
+class _Unit(NamedTuple):
+    start: int
+    end: int
+    tokens: int
+
+
+def _split_at(text: str, start: int, end: int, pattern: Pattern) -> Iterator[Tuple[int, int]]:
+    """Contiguous spans of text[start:end], each ending after a separator match"""
+    position = start
+    for match in pattern.finditer(text, start, end):
+        cut = match.end()
+        if cut >= end:
+            break
+        if cut > position:
+            yield position, cut
+            position = cut
+    if position < end:
+        yield position, end
+
+
+def _trailing_separator_start(text: str) -> int:
+    position = len(text)
+    while position and (text[position - 1].isspace() or text[position - 1] in _SEPARATOR_PUNCTUATION):
+        position -= 1
+    return position
+
+
+def _first_cut(text: str, start: int, end: int, pattern: Pattern, span_start: int) -> Optional[int]:
+    """
+    End of the span from `span_start` that _split_at() would yield, searching
+    for separators from `start`; None if it runs to `end`
+    """
+    for match in pattern.finditer(text, start, end):
+        cut = match.end()
+        if cut >= end:
+            return None
+        if cut > span_start:
+            return cut
+    return None
+
+
+class TextChunker:
+    """
+    Token-budgeted chunker driven by a ChunkingStrategy
+
+    Token counts of a chunk are the sum of its units' counts. Units end on
+    whitespace, where BPE tokenizers split anyway, so the sum is an upper
+    bound on the tokenized chunk.
+    """
+
+    def __init__(
+        self,
+        strategy: Optional[ChunkingStrategy] = None,
+        max_tokens: int = CHUNK_MAX_TOKENS,
+        overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+        count_tokens: Optional[Callable[[str], int]] = None
+    ):
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be at least 1")
+        self.strategy = strategy or ChunkingStrategyFactory.create_strategy(CHUNK_STRATEGY)
+        self.max_tokens = max_tokens
+        # Overlap must leave room for new content in every chunk
+        self.overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+        self.count_tokens = count_tokens or get_token_counter()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The default counter may wrap a tiktoken encoder: child processes
+        # rebuild it rather than receive it
+        state = self.__dict__.copy()
+        if state["count_tokens"] is get_token_counter():
+            state["count_tokens"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        if self.count_tokens is None:
+            self.count_tokens = get_token_counter()
+
+    def chunk(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Split text into chunks
+
+        Returns:
+            List of {"content", "chunk_index", "metadata"} dicts; metadata has
+            start_char, end_char, length, token_count, strategy and any
+            section metadata (e.g. headings)
+        """
+        chunks: List[Dict[str, Any]] = []
+        if not text or not text.strip():
+            return chunks
+        levels = self.strategy.split_levels()
+        for section in self.strategy.sections(text):
+            units = list(self._units(text, section.start, section.end, levels))
+            spans, _ = self._pack(units)
+            for start, end, tokens in spans:
+                self._emit(chunks, text, start, end, tokens, section.metadata)
+        return chunks
+
+    def _units(self, text: str, start: int, end: int, levels: Tuple[Pattern, ...]) -> Iterator[_Unit]:
+        """Spans within the token budget, cut at the coarsest level possible"""
+        if not levels:
+            yield from self._hard_split(text, start, end)
+            return
+        for piece_start, piece_end in _split_at(text, start, end, levels[0]):
+            tokens = self.count_tokens(text[piece_start:piece_end])
+            if tokens <= self.max_tokens:
+                yield _Unit(piece_start, piece_end, tokens)
+            else:
+                yield from self._units(text, piece_start, piece_end, levels[1:])
+
+    def _hard_split(self, text: str, start: int, end: int) -> Iterator[_Unit]:
+        """Fixed-width cuts for text with no usable separator (e.g. base64 blobs)"""
+        total = self.count_tokens(text[start:end])
+        # Characters per window from the span's average token density
+        window = max(1, (end - start) * self.max_tokens // (total + 1))
+        position = start
+        while position < end:
+            width = min(window, end - position)
+            tokens = self.count_tokens(text[position:position + width])
+            while tokens > self.max_tokens and width > 1:
+                width = max(1, width * self.max_tokens // (tokens + 1))
+                tokens = self.count_tokens(text[position:position + width])
+            yield _Unit(position, position + width, tokens)
+            position += width
+
+    def _pack(self, units: List[_Unit], final: bool = True) -> Tuple[List[Tuple[int, int, int]], int]:
+        """
+        Greedy packing into (start, end, tokens) spans with unit-level overlap
+
+        With final=False more units may follow, so a span is only produced
+        once the unit that doesn't fit in it is known.
+
+        Returns:
+            The spans, and the index of the unit the next span starts with
+        """
+        spans: List[Tuple[int, int, int]] = []
+        i, count = 0, len(units)
+        while i < count:
+            j, total = i, 0
+            while j < count and (j == i or total + units[j].tokens <= self.max_tokens):
+                total += units[j].tokens
+                j += 1
+            if j >= count and not final:
+                break
+            spans.append((units[i].start, units[j - 1].end, total))
+            if j >= count:
+                return spans, count
+            # Step back over trailing units that fit in the overlap while
+            # still leaving room for the next unit, so every chunk advances
+            k, back = j, 0
+            room = self.max_tokens - units[j].tokens
+            while k - 1 > i and back + units[k - 1].tokens <= min(self.overlap_tokens, room):
+                back += units[k - 1].tokens
+                k -= 1
+            i = k
+        return spans, i
+
+    def _emit(self, chunks: List[Dict[str, Any]], text: str, start: int, end: int, tokens: int, extra: Dict[str, Any]):
+        """Append a chunk, trimming surrounding whitespace from its offsets"""
+        content = text[start:end]
+        stripped = content.strip()
+        if not stripped:
+            return
+        start += len(content) - len(content.lstrip())
+        end = start + len(stripped)
+        chunks.append({
+            "content": stripped,
+            "chunk_index": len(chunks),
+            "metadata": {
+                "start_char": start,
+                "end_char": end,
+                "length": len(stripped),
+                "token_count": tokens,
+                "strategy": self.strategy.get_name(),
+                **extra,
+            }
+        })
+
+
+class StreamingChunker:
+    """
+    Incremental chunking of text that arrives in pieces (e.g. PDF pages)
+
+    Pieces are joined with `separator` and produce the same chunks and
+    offsets as chunking the joined text at once. Chunks carry the pieces'
+    page numbers (page_start, page_end).
+
+    The single forward pass of TextChunker is resumed rather than re-run:
+    units are computed once, for the text before the last separator of the
+    coarsest level (the last span may still grow), and the packer resumes
+    at the unit the next chunk starts with. A growing span that already
+    exceeds the budget is cut at the next level anyway, so the chunker
+    descends into it and only the last finer span stays open; text without
+    paragraph or sentence breaks doesn't pile up. Only the text from the
+    next chunk's first unit on is buffered, so memory is bounded by the
+    piece and chunk size, not the document size. Section state (e.g. the
+    markdown heading path) is carried across pieces with the strategy's
+    advance_state().
+
+    Assumes appending text never lowers a span's token count, which holds
+    for the regex estimate and in practice for BPE tokenizers.
+    """
+
+    def __init__(self, chunker: TextChunker, separator: str = "\n\n"):
+        self.chunker = chunker
+        self.separator = separator
+        self._buffer = ""
+        # Document offset of _buffer[0]
+        self._offset = 0
+        # Document offset from which units have not been computed yet, the
+        # starts of the over-budget spans enclosing it (one per level) and
+        # the strategy's section scan state there
+        self._scan_pos = 0
+        self._enclosing: List[int] = []
+        self._scan_state: Any = None
+        # Separator matches still growing start at or after this offset
+        self._rescan_from = 0
+        # Units (document offsets) from the start of the next chunk on
+        self._pending: List[_Unit] = []
+        # (document offset, page) for each piece still overlapping the buffer
+        self._page_offsets: List[int] = []
+        self._pages: List[Optional[int]] = []
+        self._chunk_count = 0
+        self._started = False
+
+    def feed(self, text: str, page: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Add a piece; returns chunks that can no longer change"""
+        if not text or not text.strip():
+            return []
+        if self._started:
+            self._buffer += self.separator
+        self._started = True
+        self._page_offsets.append(self._offset + len(self._buffer))
+        self._pages.append(page)
+        self._buffer += text
+        return self._drain(final=False)
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Flush the remaining buffer"""
+        return self._drain(final=True)
+
+    def _drain(self, final: bool) -> List[Dict[str, Any]]:
+        chunker = self.chunker
+        strategy = chunker.strategy
+        text, base = self._buffer, self._offset
+        scan = self._scan_pos - base
+        chunks: List[Dict[str, Any]] = []
+
+        sections = list(strategy.scan_sections(text, scan, self._scan_state)) if text.strip() else []
+        next_scan, next_enclosing = len(text), []
+        enclosing = [position - base for position in self._enclosing]
+        for n, section in enumerate(sections):
+            is_open = not final and n == len(sections) - 1
+            units, open_start, open_enclosing = self._resume_units(
+                text, section.start, section.end, enclosing if n == 0 else [], is_open
+            )
+            if is_open:
+                next_scan, next_enclosing = open_start, open_enclosing
+            self._pending.extend(_Unit(unit.start + base, unit.end + base, unit.tokens) for unit in units)
+            spans, keep = chunker._pack(self._pending, final=not is_open)
+            for start, end, tokens in spans:
+                chunker._emit(chunks, text, start - base, end - base, tokens, section.metadata)
+            self._pending = self._pending[keep:] if is_open else []
+
+        self._scan_state = strategy.advance_state(text, scan, next_scan, self._scan_state)
+        self._scan_pos = base + next_scan
+        self._enclosing = [base + position for position in next_enclosing]
+        self._rescan_from = base + _trailing_separator_start(text)
+
+        for chunk in chunks:
+            metadata = chunk["metadata"]
+            metadata["start_char"] += base
+            metadata["end_char"] += base
+            page_start = self._page_at(metadata["start_char"])
+            page_end = self._page_at(metadata["end_char"] - 1)
+            if page_start is not None:
+                metadata["page_start"] = page_start
+                metadata["page_end"] = page_end if page_end is not None else page_start
+            chunk["chunk_index"] = self._chunk_count
+            self._chunk_count += 1
+
+        # Keep the text still needed, plus one character so line anchors
+        # (^) at the new buffer start resolve as they do in the joined text
+        keep_from = min(self._pending[0].start if self._pending else self._scan_pos, self._scan_pos)
+        keep_from = max(self._offset, keep_from - 1)
+        self._buffer = self._buffer[keep_from - base:]
+        self._offset = keep_from
+        # Keep the piece containing the new buffer start and every later one
+        keep = max(0, bisect.bisect_right(self._page_offsets, self._offset) - 1)
+        del self._page_offsets[:keep]
+        del self._pages[:keep]
+        return chunks
+
+    def _resume_units(self, text: str, start: int, end: int, enclosing: List[int], is_open: bool) -> Tuple[List[_Unit], int, List[int]]:
+        """
+        Final units of the section text[start:end]
+
+        `enclosing` holds the starts (buffer offsets, coarsest level first)
+        of the over-budget spans the previous drain stopped inside; `start`
+        lies in the innermost one.
+
+        Returns:
+            The units, the start of the span that may still grow and the
+            over-budget spans enclosing it (end and [] once the section is
+            closed)
+        """
+        chunker = self.chunker
+        levels = chunker.strategy.split_levels()
+        units: List[_Unit] = []
+        if not levels:
+            # Fixed-width cuts depend on the whole span
+            if is_open:
+                return units, start, []
+            return list(chunker._units(text, start, end, levels)), end, []
+
+        # Ends of the enclosing spans, coarsest first: None while one is still
+        # open; a span ends no later than the span around it
+        rescan = self._rescan_from - self._offset
+        ends: List[Optional[int]] = []
+        limit, bounded = end, not is_open
+        for level, span_start in enumerate(enclosing):
+            cut = _first_cut(text, max(span_start, rescan), limit, levels[level], span_start)
+            if cut is None and bounded:
+                cut = limit
+            if cut is not None:
+                limit, bounded = cut, True
+            ends.append(cut)
+        enclosing = list(enclosing)
+        position = start
+        while enclosing and ends[-1] is not None:
+            level = len(enclosing) - 1
+            units.extend(chunker._units(text, position, ends[level], levels[level + 1:]))
+            position = ends.pop()
+            enclosing.pop()
+
+        depth = len(enclosing)
+        if not is_open:
+            units.extend(chunker._units(text, position, end, levels))
+            return units, end, []
+        while True:
+            pieces = list(_split_at(text, position, end, levels[depth]))
+            if not pieces:
+                return units, position, enclosing
+            last_start, last_end = pieces.pop()
+            for piece_start, piece_end in pieces:
+                units.extend(chunker._units(text, piece_start, piece_end, levels[depth:]))
+            # The last span may still grow with the next piece; once over
+            # budget it is cut at the next level whatever follows
+            if depth + 1 < len(levels) and chunker.count_tokens(text[last_start:last_end]) > chunker.max_tokens:
+                enclosing.append(last_start)
+                position, depth = last_start, depth + 1
+                continue
+            return units, last_start, enclosing
+
+    def _page_at(self, offset: int) -> Optional[int]:
+        index = bisect.bisect_right(self._page_offsets, offset) - 1
+        return self._pages[index] if index >= 0 else None
+
+
+def chunk_text(
+    text: str,
+    strategy: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Chunk text with a named strategy and the configured defaults"""
+    chunker = TextChunker(
+        strategy=ChunkingStrategyFactory.create_strategy(strategy or CHUNK_STRATEGY),
+        max_tokens=max_tokens or CHUNK_MAX_TOKENS,
+        overlap_tokens=CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens,
+    )
+    return chunker.chunk(text)
@@ -10,6 +10,9 @@ from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
 
 from src.core import get_db_context, DB_AVAILABLE, Conversation, Message, User
+from src.services.message_normalizer import extract_text
+from src.utils.logger import get_logger
+from src.utils.metrics import history_persist_seconds
 from src.core.constants import (
     SUMMARY_UPDATE_MILESTONES,
     SUMMARY_MAX_MESSAGES,
@@ -18,6 +21,8 @@ from src.core.constants import (
     KEEP_LAST_N_MESSAGES
 )
 
+log = get_logger(__name__)
+
 
 class DatabaseChatMessageHistory(BaseChatMessageHistory):
     """Database-backed chat message history"""
@@ -53,7 +58,7 @@ class DatabaseChatMessageHistory(BaseChatMessageHistory):
                 self.db.add(self._conversation)
                 self.db.commit()
                 self.db.refresh(self._conversation)
-                print(f"📝 Created new DB conversation: {self.session_id}")
+                log.debug("Created new DB conversation", {"session_id": self.session_id})
 
         return self._conversation
 
@@ -69,20 +74,7 @@ class DatabaseChatMessageHistory(BaseChatMessageHistory):
         langchain_messages = []
         for msg in db_messages:
             # Normalize content to string (in case it was stored as JSON/list)
-            content = msg.content
-            if isinstance(content, list):
-                # Convert list to string
-                content_str = ""
-                for item in content:
-                    if isinstance(item, dict) and "text" in item:
-                        content_str += item["text"]
-                    elif isinstance(item, str):
-                        content_str += item
-                    else:
-                        content_str += str(item)
-                content = content_str
-            elif not isinstance(content, str):
-                content = str(content)
+            content = extract_text(msg.content)
 
             if msg.role == "user":
                 langchain_messages.append(HumanMessage(content=content))
@@ -93,6 +85,7 @@ class DatabaseChatMessageHistory(BaseChatMessageHistory):
 
         return langchain_messages
 
+    @history_persist_seconds.time(operation="add_message")
     def add_message(self, message: BaseMessage) -> None:
         """Add a message to the conversation"""
         import json
@@ -176,7 +169,7 @@ class DatabaseChatMessageHistory(BaseChatMessageHistory):
                 try:
                     conv.summary = generate_simple_summary(all_messages, max_messages=messages_to_include)
                 except Exception as e:
-                    print(f"⚠️  Failed to generate summary: {e}")
+                    log.warning("Failed to generate summary", {"session_id": self.session_id, "error": str(e)})
 
         # Optional: Cleanup old messages after summary is generated
         # Keep only last N messages for context, delete older ones
@@ -201,7 +194,7 @@ class DatabaseChatMessageHistory(BaseChatMessageHistory):
 
                 # Update message count
                 conv.message_count = KEEP_LAST_N_MESSAGES
-                print(f"🗑️  Cleaned up {messages_to_delete} old messages from conversation {conv.session_id}")
+                log.debug("Cleaned up old messages", {"session_id": conv.session_id, "deleted": messages_to_delete})
 
         # Update conversation updated_at
         from sqlalchemy.sql import func
@@ -227,7 +220,7 @@ class DatabaseChatMessageHistory(BaseChatMessageHistory):
             # Delete the conversation itself
             self.db.delete(conv)
             self.db.commit()
-            print(f"🗑️  Deleted conversation {self.session_id} and all messages")
+            log.info("Deleted conversation and all messages", {"session_id": self.session_id})
 
 
 class DatabaseConversationHistoryManager:
@@ -311,7 +304,7 @@ class DatabaseConversationHistoryManager:
             # Without login: use in-memory storage (temporary, browser reload will clear)
             from .history import history_manager
             history_manager.clear_session(session_id, user_id)
-            print(f"🗑️  Cleared temporary session {session_id} (not logged in - will be lost on reload)")
+            log.debug("Cleared temporary session", {"session_id": session_id})
             return
 
         # With login: delete from database (permanent)
@@ -331,9 +324,9 @@ class DatabaseConversationHistoryManager:
                 # Delete the conversation itself
                 db.delete(conv)
                 db.commit()
-                print(f"🗑️  Deleted conversation {session_id} and {message_count} messages from database")
+                log.info("Deleted conversation from database", {"session_id": session_id, "messages": message_count})
             else:
-                print(f"⚠️  Conversation {session_id} not found")
+                log.warning("Conversation not found", {"session_id": session_id})
         else:
             # Create new session
             with get_db_context() as session:
@@ -351,9 +344,9 @@ class DatabaseConversationHistoryManager:
                     # Delete the conversation
                     session.delete(conv)
                     session.commit()
-                    print(f"🗑️  Deleted conversation {session_id} and {message_count} messages from database")
+                    log.info("Deleted conversation from database", {"session_id": session_id, "messages": message_count})
                 else:
-                    print(f"⚠️  Conversation {session_id} not found")
+                    log.warning("Conversation not found", {"session_id": session_id})
 
     def list_sessions(self, user_id: Optional[int] = None, db: Optional[Session] = None) -> List[dict]:
         """
@@ -432,15 +425,15 @@ class DatabaseConversationHistoryManager:
                 )
                 conv.summary = summary
                 db.commit()
-                print(f"✓ Updated summary for conversation {session_id} ({conv.message_count} messages)")
+                log.debug("Updated conversation summary", {"session_id": session_id, "messages": conv.message_count})
             except Exception as e:
                 # Fallback to simple summary
-                print(f"⚠️  LLM summary failed, using simple summary: {e}")
+                log.warning("LLM summary failed, using simple summary", {"session_id": session_id, "error": str(e)})
                 from src.services.conversation_summary import generate_simple_summary
                 conv.summary = generate_simple_summary(langchain_messages, max_messages=messages_to_include)
                 db.commit()
         except Exception as e:
-            print(f"⚠️  Failed to update summary: {e}")
+            log.warning("Failed to update summary", {"session_id": session_id, "error": str(e)})
             db.rollback()
 
 
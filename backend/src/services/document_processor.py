@@ -4,8 +4,10 @@ Document processing service for file uploads and text extraction
 import os
 import uuid
 import json
+import asyncio
+import hashlib
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Any, Iterator, List, Dict, Optional, Tuple
 import chardet
 
 # Try to import document processing libraries
@@ -28,6 +30,7 @@ except ImportError:
     print("⚠️  python-docx not available. DOCX processing will be limited.")
 
 from src.core import Config
+from src.services.chunking import CHARS_PER_TOKEN, chunk_text
 
 
 class DocumentProcessor:
@@ -44,6 +47,9 @@ class DocumentProcessor:
     
     # Maximum file size (100MB)
     MAX_FILE_SIZE = 100 * 1024 * 1024
+
+    # Read/write granularity for streamed uploads (1MB)
+    UPLOAD_CHUNK_SIZE = 1024 * 1024
     
     def __init__(self, upload_dir: Optional[str] = None):
         """Initialize document processor"""
@@ -58,21 +64,28 @@ class DocumentProcessor:
         ext = Path(filename).suffix.lower().lstrip('.')
         return ext in self.SUPPORTED_TYPES
     
+    def size_error_message(self) -> str:
+        """Error message for oversized files"""
+        return f"File size exceeds maximum of {self.MAX_FILE_SIZE / (1024*1024):.1f}MB"
+
+    def validate_filename(self, filename: str) -> Tuple[bool, Optional[str]]:
+        """Validate uploaded file type from its name"""
+        if not filename or not self.is_supported_file(filename):
+            ext = Path(filename or "").suffix.lower().lstrip('.')
+            return False, f"Unsupported file type: {ext}. Supported types: {', '.join(self.SUPPORTED_TYPES.keys())}"
+        return True, None
+
     def validate_file(self, file_content: bytes, filename: str) -> Tuple[bool, Optional[str]]:
         """Validate uploaded file"""
         # Check file size
         if len(file_content) > self.MAX_FILE_SIZE:
-            return False, f"File size exceeds maximum of {self.MAX_FILE_SIZE / (1024*1024):.1f}MB"
+            return False, self.size_error_message()
         
         # Check file type
-        if not self.is_supported_file(filename):
-            ext = Path(filename).suffix.lower().lstrip('.')
-            return False, f"Unsupported file type: {ext}. Supported types: {', '.join(self.SUPPORTED_TYPES.keys())}"
-        
-        return True, None
+        return self.validate_filename(filename)
     
-    def save_file(self, file_content: bytes, original_filename: str, user_id: int) -> Tuple[str, str]:
-        """Save uploaded file to disk"""
+    def _new_file_path(self, original_filename: str, user_id: int) -> Tuple[Path, str]:
+        """Reserve a unique path in the user's upload directory"""
         # Create user-specific directory
         user_dir = self.upload_dir / str(user_id)
         user_dir.mkdir(parents=True, exist_ok=True)
@@ -80,64 +93,140 @@ class DocumentProcessor:
         # Generate unique filename
         ext = Path(original_filename).suffix
         unique_filename = f"{uuid.uuid4()}{ext}"
-        file_path = user_dir / unique_filename
+        return user_dir / unique_filename, unique_filename
+
+    def save_file(self, file_content: bytes, original_filename: str, user_id: int) -> Tuple[str, str]:
+        """Save uploaded file to disk"""
+        file_path, unique_filename = self._new_file_path(original_filename, user_id)
         
         # Save file
         with open(file_path, 'wb') as f:
             f.write(file_content)
         
         return str(file_path), unique_filename
+
+    async def save_upload_stream(self, upload, original_filename: str, user_id: int) -> Tuple[str, str, int, str]:
+        """
+        Stream an upload to disk in chunks
+
+        Reads UPLOAD_CHUNK_SIZE bytes at a time, hashing and counting as it
+        goes, and writes each chunk off the event loop. The file is written
+        to a temporary ".part" path and only moved into place once complete,
+        so an aborted upload never leaves a partial document behind.
+
+        Args:
+            upload: Object with an async read(size) method (e.g. UploadFile)
+            original_filename: Client-supplied filename
+            user_id: Owner of the upload
+
+        Returns:
+            Tuple of (file_path, unique_filename, file_size, sha256_hex)
+
+        Raises:
+            ValueError: If the upload exceeds MAX_FILE_SIZE
+        """
+        file_path, unique_filename = self._new_file_path(original_filename, user_id)
+        part_path = file_path.with_name(file_path.name + ".part")
+        digest = hashlib.sha256()
+        size = 0
+
+        f = await asyncio.to_thread(open, part_path, 'wb')
+        try:
+            while True:
+                chunk = await upload.read(self.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > self.MAX_FILE_SIZE:
+                    raise ValueError(self.size_error_message())
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+        except BaseException:
+            await asyncio.to_thread(f.close)
+            await asyncio.to_thread(part_path.unlink, True)
+            raise
+        await asyncio.to_thread(f.close)
+        await asyncio.to_thread(os.replace, part_path, file_path)
+
+        return str(file_path), unique_filename, size, digest.hexdigest()
     
     def extract_text(self, file_path: str, file_type: str) -> Tuple[str, Dict]:
         """Extract text from document"""
+        metadata = self.file_metadata(file_path, file_type)
+        pages = [text for _, text in self.iter_pages(file_path, file_type, metadata) if text.strip()]
+        return "\n\n".join(pages), metadata
+
+    def file_metadata(self, file_path: str, file_type: str) -> Dict:
+        """Base metadata for an extraction"""
         file_path_obj = Path(file_path)
         
         if not file_path_obj.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        metadata = {
+        return {
             "file_type": file_type,
             "file_size": file_path_obj.stat().st_size,
         }
-        
+
+    def iter_pages(self, file_path: str, file_type: str, metadata: Dict) -> Iterator[Tuple[Optional[int], str]]:
+        """
+        Extract text incrementally as (page_number, text) pieces
+
+        PDF pages and DOCX rendered pages carry their page number; plain
+        text comes back as one piece with page None. Extraction metadata is
+        added to metadata as pieces are produced.
+        """
         if file_type == 'pdf':
-            return self._extract_from_pdf(file_path, metadata)
+            page_count = self.pdf_page_count(file_path)
+            metadata["page_count"] = page_count
+            for page_number, page_text in self.extract_pdf_pages(file_path, 0, page_count):
+                metadata[f"page_{page_number}"] = len(page_text)
+                yield page_number, page_text
         elif file_type == 'txt' or file_type == 'md':
-            return self._extract_from_text(file_path, metadata)
+            text, metadata = self._extract_from_text(file_path, metadata)
+            yield None, text
         elif file_type == 'docx':
-            return self._extract_from_docx(file_path, metadata)
+            yield from self._iter_docx_pages(file_path, metadata)
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
-    
-    def _extract_from_pdf(self, file_path: str, metadata: Dict) -> Tuple[str, Dict]:
-        """Extract text from PDF"""
+
+    @staticmethod
+    def _open_pdf(f):
         if not PDF_AVAILABLE:
             raise ImportError("PyPDF2 is required for PDF processing")
-        
-        text_parts = []
-        page_count = 0
-        
         try:
-            with open(file_path, 'rb') as f:
-                pdf_reader = PyPDF2.PdfReader(f)
-                page_count = len(pdf_reader.pages)
-                
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    try:
-                        page_text = page.extract_text()
-                        if page_text.strip():
-                            text_parts.append(page_text)
-                            metadata[f"page_{page_num}"] = len(page_text)
-                    except Exception as e:
-                        print(f"⚠️  Error extracting text from page {page_num}: {e}")
-                        continue
+            return PyPDF2.PdfReader(f)
         except Exception as e:
             raise ValueError(f"Failed to read PDF: {str(e)}")
-        
-        metadata["page_count"] = page_count
-        full_text = "\n\n".join(text_parts)
-        
-        return full_text, metadata
+
+    def pdf_page_count(self, file_path: str) -> int:
+        """Number of pages in a PDF"""
+        with open(file_path, 'rb') as f:
+            return len(self._open_pdf(f).pages)
+
+    def extract_pdf_pages(self, file_path: str, first: int, last: int) -> List[Tuple[int, str]]:
+        """
+        Extract text from PDF pages [first, last) (0-based)
+
+        Each call opens its own reader, so page ranges can be extracted in
+        parallel processes.
+
+        Returns:
+            List of (page_number, text) with 1-based page numbers; pages
+            without text are omitted
+        """
+        pages = []
+        with open(file_path, 'rb') as f:
+            pdf_reader = self._open_pdf(f)
+            for index in range(first, min(last, len(pdf_reader.pages))):
+                page_number = index + 1
+                try:
+                    page_text = pdf_reader.pages[index].extract_text()
+                    if page_text and page_text.strip():
+                        pages.append((page_number, page_text))
+                except Exception as e:
+                    print(f"⚠️  Error extracting text from page {page_number}: {e}")
+        return pages
     
     def _extract_from_text(self, file_path: str, metadata: Dict) -> Tuple[str, Dict]:
         """Extract text from plain text file"""
@@ -160,153 +249,82 @@ class DocumentProcessor:
         
         return text, metadata
     
-    def _extract_from_docx(self, file_path: str, metadata: Dict) -> Tuple[str, Dict]:
-        """Extract text from DOCX file"""
+    def _iter_docx_pages(self, file_path: str, metadata: Dict) -> Iterator[Tuple[Optional[int], str]]:
+        """
+        Extract DOCX paragraphs grouped by page
+
+        DOCX has no fixed pages; page numbers follow the page breaks Word
+        recorded when the file was last saved, so they are approximate.
+        Tables follow the body text without a page number.
+        """
         if not DOCX_AVAILABLE:
             raise ImportError("python-docx is required for DOCX processing")
         
         try:
             doc = DocxDocument(file_path)
-            paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
-            text = "\n\n".join(paragraphs)
-            
-            metadata["paragraph_count"] = len(paragraphs)
-            
-            # Extract tables if any
-            table_texts = []
-            for table in doc.tables:
-                for row in table.rows:
-                    row_text = " | ".join([cell.text.strip() for cell in row.cells])
-                    if row_text.strip():
-                        table_texts.append(row_text)
-            
-            if table_texts:
-                text += "\n\n" + "\n".join(table_texts)
-                metadata["table_count"] = len(doc.tables)
-            
-            return text, metadata
         except Exception as e:
             raise ValueError(f"Failed to read DOCX: {str(e)}")
+
+        page = 1
+        page_paragraphs = []
+        paragraph_count = 0
+        for paragraph in doc.paragraphs:
+            breaks = len(paragraph._p.xpath('.//w:lastRenderedPageBreak')) or len(paragraph._p.xpath('.//w:br[@w:type="page"]'))
+            if breaks:
+                if page_paragraphs:
+                    yield page, "\n\n".join(page_paragraphs)
+                    page_paragraphs = []
+                page += breaks
+            if paragraph.text.strip():
+                page_paragraphs.append(paragraph.text)
+                paragraph_count += 1
+        if page_paragraphs:
+            yield page, "\n\n".join(page_paragraphs)
+
+        metadata["paragraph_count"] = paragraph_count
+        metadata["page_count"] = page
+        
+        # Extract tables if any
+        table_texts = []
+        for table in doc.tables:
+            for row in table.rows:
+                row_text = " | ".join([cell.text.strip() for cell in row.cells])
+                if row_text.strip():
+                    table_texts.append(row_text)
+        
+        if table_texts:
+            metadata["table_count"] = len(doc.tables)
+            yield None, "\n".join(table_texts)
     
-    def chunk_text(self, text: str, chunk_size: int = 1000, chunk_overlap: int = 200) -> List[Dict[str, any]]:
+    def chunk_text(
+        self,
+        text: str,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+        strategy: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Split text into chunks with overlap
+        Split text into token-budgeted chunks
         
         Args:
             text: Text to chunk
-            chunk_size: Target size of each chunk (in characters)
-            chunk_overlap: Overlap between chunks (in characters)
+            chunk_size: Legacy character budget, converted to tokens when max_tokens is not given
+            chunk_overlap: Legacy character overlap, converted to tokens when overlap_tokens is not given
+            strategy: Chunking strategy (paragraph, sentence, recursive, markdown)
+            max_tokens: Token budget per chunk
+            overlap_tokens: Tokens repeated between consecutive chunks
         
         Returns:
-            List of chunk dictionaries with content and metadata
+            List of chunk dictionaries with content and metadata; metadata
+            start_char/end_char are exact offsets into text
         """
-        if not text or not text.strip():
-            return []
-        
-        chunks = []
-        start = 0
-        chunk_index = 0
-        
-        # Split by paragraphs first for better semantic boundaries
-        paragraphs = text.split('\n\n')
-        current_chunk = []
-        current_length = 0
-        
-        for para in paragraphs:
-            para = para.strip()
-            if not para:
-                continue
-            
-            para_length = len(para)
-            
-            # If paragraph itself is larger than chunk_size, split it
-            if para_length > chunk_size:
-                # Save current chunk if any
-                if current_chunk:
-                    chunk_text = '\n\n'.join(current_chunk)
-                    chunks.append({
-                        "content": chunk_text,
-                        "chunk_index": chunk_index,
-                        "metadata": {
-                            "start_char": start,
-                            "end_char": start + len(chunk_text),
-                            "length": len(chunk_text)
-                        }
-                    })
-                    start += len(chunk_text) - chunk_overlap
-                    chunk_index += 1
-                    current_chunk = []
-                    current_length = 0
-                
-                # Split large paragraph
-                words = para.split()
-                temp_chunk = []
-                temp_length = 0
-                
-                for word in words:
-                    word_with_space = word + ' '
-                    word_length = len(word_with_space)
-                    
-                    if temp_length + word_length > chunk_size and temp_chunk:
-                        chunk_text = ' '.join(temp_chunk)
-                        chunks.append({
-                            "content": chunk_text,
-                            "chunk_index": chunk_index,
-                            "metadata": {
-                                "start_char": start,
-                                "end_char": start + len(chunk_text),
-                                "length": len(chunk_text)
-                            }
-                        })
-                        start += len(chunk_text) - chunk_overlap
-                        chunk_index += 1
-                        temp_chunk = []
-                        temp_length = 0
-                    
-                    temp_chunk.append(word)
-                    temp_length += word_length
-                
-                if temp_chunk:
-                    current_chunk = temp_chunk
-                    current_length = temp_length
-            else:
-                # Check if adding this paragraph would exceed chunk_size
-                if current_length + para_length + 2 > chunk_size and current_chunk:
-                    # Save current chunk
-                    chunk_text = '\n\n'.join(current_chunk)
-                    chunks.append({
-                        "content": chunk_text,
-                        "chunk_index": chunk_index,
-                        "metadata": {
-                            "start_char": start,
-                            "end_char": start + len(chunk_text),
-                            "length": len(chunk_text)
-                        }
-                    })
-                    # Start new chunk with overlap
-                    overlap_text = chunk_text[-chunk_overlap:] if len(chunk_text) > chunk_overlap else chunk_text
-                    start += len(chunk_text) - len(overlap_text)
-                    current_chunk = [overlap_text] if overlap_text else []
-                    current_length = len(overlap_text)
-                    chunk_index += 1
-                
-                current_chunk.append(para)
-                current_length += para_length + 2  # +2 for '\n\n'
-        
-        # Add remaining chunk
-        if current_chunk:
-            chunk_text = '\n\n'.join(current_chunk)
-            chunks.append({
-                "content": chunk_text,
-                "chunk_index": chunk_index,
-                "metadata": {
-                    "start_char": start,
-                    "end_char": start + len(chunk_text),
-                    "length": len(chunk_text)
-                }
-            })
-        
-        return chunks
+        if max_tokens is None and chunk_size is not None:
+            max_tokens = max(1, chunk_size // CHARS_PER_TOKEN)
+        if overlap_tokens is None and chunk_overlap is not None:
+            overlap_tokens = chunk_overlap // CHARS_PER_TOKEN
+        return chunk_text(text, strategy=strategy, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
 
 
 # Global instance
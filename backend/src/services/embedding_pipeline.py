@@ -0,0 +1,198 @@
+"""
+Batched, rate-aware embedding
+Embeds texts in batches with several requests in flight, and adapts to
+provider rate limits instead of failing on them:
+
+- a rate-limit response (HTTP 429) pauses all workers for the provider's
+  Retry-After, or for an exponential backoff with jitter, and the batch is
+  retried
+- each rate limit halves the number of concurrent requests; after a run of
+  successful batches the limit grows by one again (AIMD), so throughput
+  settles just under the provider's quota
+
+Batches are yielded in input order as they complete, so callers can add
+vectors to an index and checkpoint progress incrementally.
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+# Texts per embeddings request
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+# Maximum concurrent embeddings requests
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+# Attempts per batch before giving up on rate limits / transient errors
+EMBEDDING_MAX_ATTEMPTS = int(os.getenv("EMBEDDING_MAX_ATTEMPTS", "8"))
+# Backoff bounds (seconds)
+EMBEDDING_BACKOFF_BASE = float(os.getenv("EMBEDDING_BACKOFF_BASE", "1.0"))
+EMBEDDING_BACKOFF_MAX = float(os.getenv("EMBEDDING_BACKOFF_MAX", "60.0"))
+
+# Successful batches before the concurrency limit grows by one
+_RECOVERY_BATCHES = 8
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True for provider rate-limit errors (HTTP 429 / RateLimitError)"""
+    if _status_code(error) == 429 or "RateLimit" in type(error).__name__:
+        return True
+    message = str(error).lower()
+    return "rate limit" in message or "too many requests" in message
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """True for errors worth retrying: rate limits, timeouts, 5xx"""
+    if is_rate_limit_error(error):
+        return True
+    status = _status_code(error)
+    if status is not None:
+        return status >= 500
+    return isinstance(error, (TimeoutError, ConnectionError)) or "Timeout" in type(error).__name__
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Retry-After header of a rate-limit response, if the error carries one"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that halves on rate limits and recovers gradually"""
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self._active = 0
+        self._successes = 0
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while True:
+                wait = self._paused_until - time.monotonic()
+                if wait <= 0 and self._active < self.limit:
+                    self._active += 1
+                    return
+                self._condition.wait(timeout=wait if wait > 0 else None)
+
+    def release(self, succeeded: bool):
+        with self._condition:
+            self._active -= 1
+            if succeeded:
+                self._successes += 1
+                if self._successes >= _RECOVERY_BATCHES and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
+
+    def rate_limited(self, pause: float):
+        """Halve the limit and pause every worker for `pause` seconds"""
+        with self._condition:
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            self._condition.notify_all()
+
+
+class EmbeddingPipeline:
+    """
+    Embeds texts in concurrent, rate-limit-aware batches
+
+    The concurrency limiter lives on the pipeline, so every caller sharing
+    a pipeline (one per embeddings client) shares what it learned about
+    the provider's rate limit.
+    """
+
+    def __init__(
+        self,
+        embeddings: Any,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        concurrency: int = EMBEDDING_CONCURRENCY,
+        max_attempts: int = EMBEDDING_MAX_ATTEMPTS
+    ):
+        self.embeddings = embeddings
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.limiter = AdaptiveLimiter(self.concurrency)
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch, retrying transient errors with backoff"""
+        attempt = 0
+        while True:
+            attempt += 1
+            self.limiter.acquire()
+            try:
+                vectors = self.embeddings.embed_documents(texts)
+            except Exception as e:
+                self.limiter.release(succeeded=False)
+                if attempt >= self.max_attempts or not is_transient_error(e):
+                    raise
+                backoff = min(EMBEDDING_BACKOFF_MAX, EMBEDDING_BACKOFF_BASE * (2 ** (attempt - 1)))
+                pause = retry_after_seconds(e) or random.uniform(backoff / 2, backoff)
+                if is_rate_limit_error(e):
+                    self.limiter.rate_limited(pause)
+                    print(f"⚠️  Embedding rate limited, retrying in {pause:.1f}s (concurrency {self.limiter.limit})")
+                else:
+                    print(f"⚠️  Embedding request failed ({e}), retrying in {pause:.1f}s")
+                    time.sleep(pause)
+                continue
+            self.limiter.release(succeeded=True)
+            return vectors
+
+    def iter_batches(self, texts: Sequence[str], batch_size: Optional[int] = None) -> Iterator[Tuple[int, List[List[float]]]]:
+        """
+        Embed texts, yielding (start_index, vectors) per batch in input order
+
+        Args:
+            texts: Texts to embed
+            batch_size: Texts per request (default: the pipeline's batch size)
+
+        At most two batches per worker are outstanding, so finished vectors
+        never pile up far ahead of the consumer.
+
+        Raises:
+            The last error of a batch that failed after max_attempts
+        """
+        batch_size = max(1, batch_size or self.batch_size)
+        starts = range(0, len(texts), batch_size)
+        if not starts:
+            return
+        pending: deque = deque()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="embed") as executor:
+            try:
+                submitted = 0
+                for _ in starts:
+                    while submitted < len(starts) and len(pending) < self.concurrency * 2:
+                        start = starts[submitted]
+                        batch = list(texts[start:start + batch_size])
+                        pending.append((start, executor.submit(self._embed_batch, batch)))
+                        submitted += 1
+                    start, future = pending.popleft()
+                    yield start, future.result()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed all texts (convenience wrapper around iter_batches)"""
+        vectors: List[List[float]] = []
+        for _, batch in self.iter_batches(texts):
+            vectors.extend(batch)
+        return vectors
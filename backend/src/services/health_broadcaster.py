@@ -0,0 +1,253 @@
+"""
+Shared health publisher for /api/ws/health
+One task in the app lifespan computes the health snapshot - global status
+plus enabled MCP server counts per user, from a single GROUP BY query - when
+the mcp-servers routes report a change (and on a slow safety-net timer).
+Changes reach the other web workers through Postgres LISTEN/NOTIFY, so every
+worker refreshes, not just the one that served the change.
+Connected sockets subscribe by audience (user id, or None for anonymous) and
+only receive a message when their audience's snapshot changed, so the number
+of open dashboards no longer multiplies database load.
+"""
+import asyncio
+import os
+import select
+import threading
+import uuid
+from typing import Dict, Optional, Set
+
+from src.core import DB_AVAILABLE, MCPServer, get_db_context
+from src.observers.event_dispatcher import Event, EventType, event_dispatcher
+
+# Seconds between snapshot refreshes when no change event arrives
+HEALTH_REFRESH_INTERVAL = float(os.getenv("HEALTH_REFRESH_INTERVAL", "60"))
+# Seconds a socket may stay silent before the cached snapshot is re-sent as keepalive
+HEALTH_KEEPALIVE_SECONDS = float(os.getenv("HEALTH_KEEPALIVE_SECONDS", "30"))
+# Change events arriving within this window are coalesced into one refresh
+HEALTH_DEBOUNCE_SECONDS = 0.25
+# Postgres channel carrying MCP server changes between workers
+HEALTH_NOTIFY_CHANNEL = "mcp_servers_changed"
+# Seconds the listener waits for a notification before checking for shutdown
+HEALTH_LISTEN_POLL_SECONDS = 5.0
+
+HEALTH_VERSION = "1.0.0"
+
+
+class HealthBroadcaster:
+    """Computes health snapshots once and fans them out to subscribed sockets"""
+
+    def __init__(self, refresh_interval: float = HEALTH_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        # audience (user id or None) -> per-socket queues holding the latest payload
+        self._subscribers: Dict[Optional[int], Set[asyncio.Queue]] = {}
+        # Last payload sent per audience
+        self._sent: Dict[Optional[int], dict] = {}
+        self._counts: Dict[int, int] = {}
+        self._total = 0
+        self._rag_available = False
+        self._status = "healthy"
+        self._loaded = False
+        self._changed: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        # Tags this worker's NOTIFYs so its listener can skip them
+        self._origin = uuid.uuid4().hex
+        self._listener: Optional[threading.Thread] = None
+        self._stop_listening = threading.Event()
+
+    # ----- snapshot -----
+
+    @staticmethod
+    def _load_counts() -> Dict[Optional[int], int]:
+        """Enabled MCP servers per owner (None = global servers)"""
+        if not DB_AVAILABLE:
+            return {}
+        from sqlalchemy import func
+        with get_db_context() as db:
+            rows = db.query(MCPServer.user_id, func.count(MCPServer.id)).filter(
+                MCPServer.enabled == True
+            ).group_by(MCPServer.user_id).all()
+        return {user_id: count for user_id, count in rows}
+
+    @staticmethod
+    def _check_rag() -> bool:
+        try:
+            from src.services.advanced_rag import is_advanced_rag_available
+            return is_advanced_rag_available()
+        except Exception:
+            return False
+
+    async def refresh(self):
+        """Recompute the snapshot and push it to audiences whose payload changed"""
+        try:
+            counts = await asyncio.to_thread(self._load_counts)
+            self._counts = {user_id: count for user_id, count in counts.items() if user_id is not None}
+            self._total = sum(counts.values())
+            self._rag_available = self._check_rag()
+            self._status = "healthy"
+        except Exception as e:
+            print(f"⚠️  Error computing health snapshot: {e}")
+            self._status = "unhealthy"
+        self._loaded = True
+
+        for audience, queues in list(self._subscribers.items()):
+            payload = self.snapshot(audience)
+            if payload == self._sent.get(audience):
+                continue
+            self._sent[audience] = payload
+            for queue in list(queues):
+                self._offer(queue, payload)
+
+    def snapshot(self, user_id: Optional[int] = None) -> dict:
+        """Current health payload for an audience (no database access)"""
+        if self._status != "healthy":
+            return {"status": self._status, "version": HEALTH_VERSION, "rag_available": False, "mcp_servers": 0}
+        # Anonymous clients see all enabled servers; users see their own
+        mcp_servers = self._total if user_id is None else self._counts.get(user_id, 0)
+        return {
+            "status": "healthy",
+            "version": HEALTH_VERSION,
+            "rag_available": self._rag_available,
+            "mcp_servers": mcp_servers,
+        }
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, payload: dict):
+        """Replace whatever the socket hasn't sent yet - only the latest state matters"""
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(payload)
+
+    # ----- subscriptions -----
+
+    async def subscribe(self, user_id: Optional[int] = None) -> asyncio.Queue:
+        """Register a socket; returns a queue that receives changed snapshots"""
+        if not self._loaded:
+            await self.refresh()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        self._sent.setdefault(user_id, self.snapshot(user_id))
+        return queue
+
+    def unsubscribe(self, user_id: Optional[int], queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+            self._sent.pop(user_id, None)
+
+    def is_loaded(self) -> bool:
+        """True once a snapshot has been computed"""
+        return self._loaded
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    # ----- change notification -----
+
+    def notify_changed(self, event: Optional[Event] = None):
+        """Schedule a refresh here and tell the other workers (blocking; safe from any thread)"""
+        self._schedule_refresh()
+        if event is not None and self._listener is not None:
+            try:
+                self._publish_change()
+            except Exception as e:
+                print(f"⚠️  Could not notify other workers of an MCP server change: {e}")
+
+    def _publish_change(self):
+        from sqlalchemy import text
+        with get_db_context() as db:
+            db.execute(
+                text("SELECT pg_notify(:channel, :origin)"),
+                {"channel": HEALTH_NOTIFY_CHANNEL, "origin": self._origin}
+            )
+
+    def _listen(self):
+        """Turn other workers' NOTIFYs into refreshes (runs in a thread)"""
+        from src.core.database import engine
+        while not self._stop_listening.is_set():
+            connection = None
+            try:
+                # A dedicated session: LISTEN state must not go back to the pool
+                connection = engine.raw_connection()
+                connection.detach()
+                driver = connection.driver_connection
+                driver.rollback()
+                driver.autocommit = True
+                with driver.cursor() as cursor:
+                    cursor.execute(f"LISTEN {HEALTH_NOTIFY_CHANNEL}")
+                while not self._stop_listening.is_set():
+                    if not select.select([driver], [], [], HEALTH_LISTEN_POLL_SECONDS)[0]:
+                        continue
+                    driver.poll()
+                    origins = {notification.payload for notification in driver.notifies}
+                    driver.notifies.clear()
+                    if origins - {self._origin}:
+                        self._schedule_refresh()
+            except Exception as e:
+                print(f"⚠️  Health change listener failed, reconnecting: {e}")
+                self._stop_listening.wait(HEALTH_LISTEN_POLL_SECONDS)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+    def _schedule_refresh(self):
+        if self._loop is None or self._changed is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._changed.set)
+        except RuntimeError:
+            # Loop already closed (shutdown)
+            pass
+
+    async def _run(self):
+        """Refresh on change events or the safety-net interval until cancelled"""
+        while True:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=self.refresh_interval)
+                # Let a burst of changes settle into one refresh
+                await asyncio.sleep(HEALTH_DEBOUNCE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._changed.clear()
+            await self.refresh()
+
+    async def start(self):
+        """Compute the first snapshot and start the publisher task"""
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+        # Blocking: publishing the change to other workers is a DB round trip
+        event_dispatcher.subscribe(EventType.MCP_SERVERS_CHANGED, self.notify_changed, blocking=True)
+        await self.refresh()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        if DB_AVAILABLE and self._listener is None:
+            self._stop_listening.clear()
+            self._listener = threading.Thread(target=self._listen, name="health-change-listener", daemon=True)
+            self._listener.start()
+
+    async def stop(self):
+        """Stop the publisher task"""
+        if self._loop is not None:
+            event_dispatcher.unsubscribe(EventType.MCP_SERVERS_CHANGED, self.notify_changed)
+        if self._listener is not None:
+            # The daemon thread exits within HEALTH_LISTEN_POLL_SECONDS
+            self._stop_listening.set()
+            self._listener = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+
+
+# Global health publisher
+health_broadcaster = HealthBroadcaster()
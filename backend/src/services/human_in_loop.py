@@ -92,8 +92,18 @@ class HumanInTheLoop:
         - Low text extraction confidence
         - Suspicious content patterns
         """
-        text_length = len(extracted_text)
+        alnum_count = sum(1 for c in extracted_text if c.isalnum())
+        return HumanInTheLoop.should_require_review_for_stats(len(extracted_text), alnum_count)
+    
+    @staticmethod
+    def should_require_review_for_stats(text_length: int, alnum_count: int) -> bool:
+        """
+        Review heuristics from running totals, for text extracted incrementally
         
+        Args:
+            text_length: Total characters extracted
+            alnum_count: Alphanumeric characters among them
+        """
         # Very short or very long documents
         if text_length < 100:
             return True
@@ -103,7 +113,7 @@ class HumanInTheLoop:
         
         # Check extraction quality (simple heuristic)
         # If text is mostly whitespace or special characters, might need review
-        non_whitespace_ratio = len([c for c in extracted_text if c.isalnum()]) / max(text_length, 1)
+        non_whitespace_ratio = alnum_count / max(text_length, 1)
         if non_whitespace_ratio < 0.3:
             return True
         
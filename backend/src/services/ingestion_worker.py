@@ -0,0 +1,539 @@
+"""
+Document ingestion worker pool
+Processes uploaded documents from a durable, DB-backed job queue
+(IngestionJob) outside the request path: CPU-bound text extraction (PDFs
+as parallel page ranges) and chunking run in a process pool, DB writes and
+embedding run in worker threads, so the web worker's event loop stays
+responsive during bulk uploads.
+
+Extracted pages stream through the chunker into the database in batches
+and embedding reads the stored chunks back in batches, so memory use is
+bounded by the batch sizes rather than the document size. Embedded chunks
+are checkpointed (DocumentChunk.embedded_at); a retried job whose
+extraction already finished only embeds the remaining chunks.
+"""
+import asyncio
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.core import DB_AVAILABLE, get_db_context
+from src.core.models import Document, DocumentChunk, IngestionJob
+from src.services.chunking import CHUNK_STRATEGY, ChunkingStrategyFactory, StreamingChunker, TextChunker
+
+# Maximum documents ingested concurrently per web worker
+INGESTION_CONCURRENCY = int(os.getenv("INGESTION_CONCURRENCY", "2"))
+# Processes used for text extraction and chunking
+INGESTION_PROCESS_WORKERS = int(os.getenv("INGESTION_PROCESS_WORKERS", "2"))
+# Pages extracted (PDF) or chunked per process-pool task
+INGESTION_PAGES_PER_TASK = int(os.getenv("INGESTION_PAGES_PER_TASK", "16"))
+# Chunks embedded per embeddings request
+INGESTION_EMBED_BATCH_SIZE = int(os.getenv("INGESTION_EMBED_BATCH_SIZE", "64"))
+# Chunks written to / read back from the database per batch
+INGESTION_CHUNK_BATCH_SIZE = int(os.getenv("INGESTION_CHUNK_BATCH_SIZE", "512"))
+# Seconds between queue polls when idle
+INGESTION_POLL_INTERVAL = float(os.getenv("INGESTION_POLL_INTERVAL", "5"))
+# Running jobs whose lock is older than this are considered abandoned
+INGESTION_STALE_AFTER = timedelta(minutes=int(os.getenv("INGESTION_STALE_MINUTES", "30")))
+# Base delay for retry backoff (doubles per attempt)
+INGESTION_RETRY_BASE_SECONDS = 30
+
+
+def _pdf_page_count(file_path: str) -> int:
+    """Page count of a PDF (runs in a child process)"""
+    from src.services.document_processor import document_processor
+    return document_processor.pdf_page_count(file_path)
+
+
+def _extract_pdf_pages(file_path: str, first: int, last: int) -> List[Tuple[int, str]]:
+    """Text of PDF pages [first, last) (runs in a child process)"""
+    from src.services.document_processor import document_processor
+    return document_processor.extract_pdf_pages(file_path, first, last)
+
+
+def _extract_pages(file_path: str, file_type: str) -> Tuple[Dict[str, Any], List[Tuple[Optional[int], str]]]:
+    """Extract a non-PDF document as (page, text) pieces (runs in a child process)"""
+    from src.services.document_processor import document_processor
+    metadata = document_processor.file_metadata(file_path, file_type)
+    pages = list(document_processor.iter_pages(file_path, file_type, metadata))
+    return metadata, pages
+
+
+def _chunk_pages(
+    chunker: StreamingChunker,
+    pages: List[Tuple[Optional[int], str]],
+    final: bool
+) -> Tuple[StreamingChunker, List[Dict[str, Any]]]:
+    """
+    Feed pages through a streaming chunker (runs in a child process)
+
+    The chunker's state is small (the text after the last finished chunk),
+    so it travels with each call and comes back with the chunks.
+    """
+    chunks: List[Dict[str, Any]] = []
+    for page_number, page_text in pages:
+        chunks.extend(chunker.feed(page_text, page_number))
+    if final:
+        chunks.extend(chunker.finish())
+    return chunker, chunks
+
+
+class IngestionWorkerPool:
+    """
+    Background consumer for IngestionJob rows
+
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several web
+    workers can share the queue. Failed jobs are retried with exponential
+    backoff up to max_attempts; progress is written to the job row and to
+    Document.status / Document.embedding_status.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = INGESTION_CONCURRENCY,
+        process_workers: int = INGESTION_PROCESS_WORKERS,
+        embed_batch_size: int = INGESTION_EMBED_BATCH_SIZE
+    ):
+        self.concurrency = max(1, concurrency)
+        self.process_workers = max(1, process_workers)
+        self.embed_batch_size = embed_batch_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    # ----- queue operations -----
+
+    @staticmethod
+    def enqueue(db: Session, document_id: int, user_id: int) -> "IngestionJob":
+        """Add a document to the ingestion queue (caller commits)"""
+        job = IngestionJob(document_id=document_id, user_id=user_id, status="queued")
+        db.add(job)
+        return job
+
+    def notify(self):
+        """Wake idle consumers after enqueueing (no-op if not started)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    @staticmethod
+    def _claim_next() -> Optional[Tuple[int, int, int, bool]]:
+        """
+        Claim the next runnable job
+
+        Returns:
+            Tuple of (job_id, document_id, user_id, resume_embedding), or None
+            if the queue is empty. resume_embedding is True when a previous
+            attempt finished extraction, so only unembedded chunks remain.
+        """
+        now = datetime.now(timezone.utc)
+        with get_db_context() as db:
+            job = db.query(IngestionJob).filter(
+                IngestionJob.status == "queued",
+                IngestionJob.run_after <= now
+            ).order_by(IngestionJob.id).with_for_update(skip_locked=True).first()
+            if not job:
+                return None
+            job.status = "running"
+            job.attempts += 1
+            job.locked_at = now
+            job.progress = 0
+            return job.id, job.document_id, job.user_id, job.stage == "embedding"
+
+    @staticmethod
+    def requeue_stale() -> int:
+        """Return abandoned running jobs (e.g. after a crash) to the queue"""
+        cutoff = datetime.now(timezone.utc) - INGESTION_STALE_AFTER
+        with get_db_context() as db:
+            return db.query(IngestionJob).filter(
+                IngestionJob.status == "running",
+                IngestionJob.locked_at < cutoff
+            ).update({IngestionJob.status: "queued", IngestionJob.locked_at: None}, synchronize_session=False)
+
+    @staticmethod
+    def _update(job_id: int, document_id: int, job_fields: Dict[str, Any], document_fields: Optional[Dict[str, Any]] = None):
+        """Persist job progress and document status"""
+        with get_db_context() as db:
+            if job_fields:
+                db.query(IngestionJob).filter(IngestionJob.id == job_id).update(job_fields, synchronize_session=False)
+            if document_fields:
+                db.query(Document).filter(Document.id == document_id).update(document_fields, synchronize_session=False)
+
+    # ----- job execution -----
+
+    @staticmethod
+    def _reset_chunks(document_id: int) -> bool:
+        """
+        Drop chunks left by a previous attempt so a retried job doesn't duplicate them
+
+        Returns:
+            False if the document was deleted meanwhile
+        """
+        with get_db_context() as db:
+            if db.query(Document.id).filter(Document.id == document_id).first() is None:
+                return False
+            db.query(DocumentChunk).filter(DocumentChunk.document_id == document_id).delete(synchronize_session=False)
+            return True
+
+    @staticmethod
+    def _insert_chunks(document_id: int, chunks: List[Dict[str, Any]]):
+        """Store a batch of chunks"""
+        with get_db_context() as db:
+            db.add_all([
+                DocumentChunk(
+                    document_id=document_id,
+                    chunk_index=chunk_data["chunk_index"],
+                    content=chunk_data["content"],
+                    chunk_metadata=json.dumps(chunk_data.get("metadata", {}))
+                )
+                for chunk_data in chunks
+            ])
+
+    @staticmethod
+    def _finish_extraction(document_id: int, metadata: Dict[str, Any], needs_review: bool, chunk_count: int) -> Optional[Dict[str, Any]]:
+        """
+        Record extraction results on the document
+
+        Returns:
+            Document info, or None if the document was deleted meanwhile
+        """
+        with get_db_context() as db:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if not document:
+                return None
+
+            document.chunk_count = chunk_count
+            document.document_metadata = IngestionWorkerPool._merged_metadata(document, metadata)
+            document.status = "needs_review" if needs_review else "ready"
+            document.embedding_status = "pending"
+            return IngestionWorkerPool._document_info(document)
+
+    @staticmethod
+    def _merged_metadata(document: Document, updates: Dict[str, Any]) -> str:
+        """Document metadata JSON with updates applied, keeping upload-time fields (content hash)"""
+        metadata: Dict[str, Any] = {}
+        if document.document_metadata:
+            try:
+                metadata = json.loads(document.document_metadata)
+            except json.JSONDecodeError:
+                pass
+        return json.dumps({**metadata, **updates})
+
+    @staticmethod
+    def _document_info(document: Document) -> Dict[str, Any]:
+        return {
+            "status": document.status,
+            "collection_id": document.collection_id,
+            "original_filename": document.original_filename,
+            "chunk_count": document.chunk_count or 0,
+        }
+
+    @staticmethod
+    def _load_document_info(document_id: int) -> Optional[Dict[str, Any]]:
+        """Document info for a job resuming at the embedding stage"""
+        with get_db_context() as db:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            return IngestionWorkerPool._document_info(document) if document else None
+
+    @staticmethod
+    def _count_unembedded(document_id: int) -> int:
+        with get_db_context() as db:
+            return db.query(DocumentChunk).filter(
+                DocumentChunk.document_id == document_id,
+                DocumentChunk.embedded_at.is_(None)
+            ).count()
+
+    @staticmethod
+    def _mark_embedded(chunk_ids: List[int]):
+        """Checkpoint: these chunks are saved in the vectorstore"""
+        with get_db_context() as db:
+            db.query(DocumentChunk).filter(DocumentChunk.id.in_(chunk_ids)).update(
+                {DocumentChunk.embedded_at: datetime.now(timezone.utc)}, synchronize_session=False
+            )
+
+    @staticmethod
+    def _load_rag_chunks(document_id: int, original_filename: str, after_index: int, limit: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Read back unembedded chunks with chunk_index > after_index, in vectorstore format
+
+        Returns:
+            Tuple of (last chunk_index read, rag_chunks)
+        """
+        with get_db_context() as db:
+            chunk_objects = db.query(DocumentChunk).filter(
+                DocumentChunk.document_id == document_id,
+                DocumentChunk.chunk_index > after_index,
+                DocumentChunk.embedded_at.is_(None)
+            ).order_by(DocumentChunk.chunk_index).limit(limit).all()
+            rag_chunks = [
+                {
+                    "content": chunk_obj.content,
+                    "metadata": {
+                        **json.loads(chunk_obj.chunk_metadata or "{}"),
+                        "chunk_id": chunk_obj.id,
+                        "document_id": document_id,
+                        "original_filename": original_filename
+                    }
+                }
+                for chunk_obj in chunk_objects
+            ]
+            last_index = chunk_objects[-1].chunk_index if chunk_objects else after_index
+            return last_index, rag_chunks
+
+    async def _iter_pages(
+        self,
+        file_path: str,
+        file_type: str,
+        metadata: Dict[str, Any],
+        progress: Callable[[int, int], Awaitable[None]]
+    ) -> AsyncIterator[Tuple[Optional[int], str]]:
+        """
+        Yield (page_number, text) pieces in document order
+
+        PDFs are split into page ranges extracted across the process pool;
+        at most two ranges per process are in flight, so finished pages
+        don't pile up ahead of the chunker.
+        """
+        loop = asyncio.get_running_loop()
+        if file_type != "pdf":
+            extracted, pages = await loop.run_in_executor(self._executor, _extract_pages, file_path, file_type)
+            metadata.update(extracted)
+            for page in pages:
+                yield page
+            return
+
+        page_count = await loop.run_in_executor(self._executor, _pdf_page_count, file_path)
+        metadata["page_count"] = page_count
+        ranges = [(first, min(first + INGESTION_PAGES_PER_TASK, page_count)) for first in range(0, page_count, INGESTION_PAGES_PER_TASK)]
+        pending: deque = deque()
+        submitted = 0
+        try:
+            for done in range(1, len(ranges) + 1):
+                while submitted < len(ranges) and len(pending) < self.process_workers * 2:
+                    pending.append(loop.run_in_executor(self._executor, _extract_pdf_pages, file_path, *ranges[submitted]))
+                    submitted += 1
+                for page_number, page_text in await pending.popleft():
+                    metadata[f"page_{page_number}"] = len(page_text)
+                    yield page_number, page_text
+                await progress(done, len(ranges))
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def _run_job(self, job_id: int, document_id: int, user_id: int, resume_embedding: bool = False):
+        """Run a claimed job end to end"""
+        if resume_embedding:
+            info = await asyncio.to_thread(self._load_document_info, document_id)
+        else:
+            info = await self._extract(job_id, document_id)
+        if info is None:
+            await asyncio.to_thread(self._update, job_id, document_id, {"status": "completed", "stage": "skipped", "progress": 100})
+            return
+
+        if info["status"] == "ready" and info["chunk_count"]:
+            await self._embed(job_id, document_id, user_id, info)
+
+        await asyncio.to_thread(
+            self._update, job_id, document_id,
+            {"status": "completed", "stage": "done", "progress": 100, "locked_at": None, "last_error": None}
+        )
+        print(f"✓ Processed document {document_id}: {info['chunk_count']} chunks")
+
+    async def _extract(self, job_id: int, document_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Extract, chunk and store a document
+
+        Returns:
+            Document info, or None if the document was deleted meanwhile
+        """
+        from src.services.document_processor import document_processor
+        from src.services.human_in_loop import HumanInTheLoop
+
+        def load_document():
+            with get_db_context() as db:
+                document = db.query(Document).filter(Document.id == document_id).first()
+                if not document:
+                    return None
+                document.status = "processing"
+                return document.file_path, document.file_type
+
+        paths = await asyncio.to_thread(load_document)
+        if paths is None or not await asyncio.to_thread(self._reset_chunks, document_id):
+            return None
+        file_path, file_type = paths
+
+        await asyncio.to_thread(self._update, job_id, document_id, {"stage": "extracting", "progress": 5})
+
+        async def extraction_progress(done: int, total: int):
+            await asyncio.to_thread(self._update, job_id, document_id, {"progress": 5 + int(30 * done / max(total, 1))})
+
+        # Markdown keeps chunks within one heading section; other types use the configured default
+        strategy = ChunkingStrategyFactory.create_strategy("markdown" if file_type == "md" else CHUNK_STRATEGY)
+        chunker = StreamingChunker(TextChunker(strategy))
+        metadata = await asyncio.to_thread(document_processor.file_metadata, file_path, file_type)
+        text_length = alnum_count = chunk_count = 0
+        batch: List[Dict[str, Any]] = []
+        pages: List[Tuple[Optional[int], str]] = []
+        loop = asyncio.get_running_loop()
+
+        async def chunk_pages(final: bool = False):
+            nonlocal chunker, pages
+            chunker, chunks = await loop.run_in_executor(self._executor, _chunk_pages, chunker, pages, final)
+            pages = []
+            batch.extend(chunks)
+
+        async def flush():
+            nonlocal batch, chunk_count
+            if batch:
+                await asyncio.to_thread(self._insert_chunks, document_id, batch)
+                chunk_count += len(batch)
+                batch = []
+
+        async for page_number, page_text in self._iter_pages(file_path, file_type, metadata, extraction_progress):
+            text_length += len(page_text)
+            alnum_count += sum(1 for c in page_text if c.isalnum())
+            # Pages are chunked in groups to amortize the round trip
+            pages.append((page_number, page_text))
+            if len(pages) >= INGESTION_PAGES_PER_TASK:
+                await chunk_pages()
+            if len(batch) >= INGESTION_CHUNK_BATCH_SIZE:
+                await flush()
+        await chunk_pages(final=True)
+        await flush()
+
+        needs_review = HumanInTheLoop.should_require_review_for_stats(text_length, alnum_count)
+        await asyncio.to_thread(self._update, job_id, document_id, {"stage": "storing", "progress": 35})
+        return await asyncio.to_thread(self._finish_extraction, document_id, metadata, needs_review, chunk_count)
+
+    async def _embed(self, job_id: int, document_id: int, user_id: int, info: Dict[str, Any]):
+        """
+        Embed the document's unembedded chunks, checkpointing after each batch
+
+        Each add_documents call saves the vectorstore before its chunks are
+        marked embedded, so a retried job resumes where this one stopped.
+        """
+        from src.services.advanced_rag import advanced_rag_system
+
+        # Entering this stage makes a retry skip extraction
+        await asyncio.to_thread(
+            self._update, job_id, document_id,
+            {"stage": "embedding", "progress": 40},
+            {"embedding_status": "processing"}
+        )
+
+        chunk_count = info["chunk_count"]
+        remaining = await asyncio.to_thread(self._count_unembedded, document_id)
+        embedded = chunk_count - remaining
+        after_index = -1
+        while True:
+            after_index, rag_chunks = await asyncio.to_thread(
+                self._load_rag_chunks, document_id, info["original_filename"], after_index, INGESTION_CHUNK_BATCH_SIZE
+            )
+            if not rag_chunks:
+                break
+
+            def report(done: int, total: int, base: int = embedded):
+                progress = 40 + int(55 * (base + done) / max(chunk_count, 1))
+                self._update(job_id, document_id, {"progress": progress})
+
+            success = await asyncio.to_thread(
+                advanced_rag_system.add_documents,
+                user_id,
+                rag_chunks,
+                info["collection_id"],
+                self.embed_batch_size,
+                report
+            )
+            if not success:
+                await asyncio.to_thread(self._update, job_id, document_id, {}, {"embedding_status": "failed"})
+                raise RuntimeError("Embedding failed")
+            await asyncio.to_thread(self._mark_embedded, [chunk["metadata"]["chunk_id"] for chunk in rag_chunks])
+            embedded += len(rag_chunks)
+        await asyncio.to_thread(self._update, job_id, document_id, {}, {"embedding_status": "completed"})
+
+    def _fail(self, job_id: int, document_id: int, error: Exception):
+        """Schedule a retry, or mark the job and document as failed"""
+        with get_db_context() as db:
+            job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+            if not job:
+                return
+            job.last_error = str(error)
+            job.locked_at = None
+            if job.attempts < job.max_attempts:
+                delay = INGESTION_RETRY_BASE_SECONDS * (2 ** (job.attempts - 1))
+                job.status = "queued"
+                job.run_after = datetime.now(timezone.utc) + timedelta(seconds=delay)
+                print(f"⚠️  Ingestion of document {document_id} failed (attempt {job.attempts}/{job.max_attempts}), retrying in {delay}s: {error}")
+                return
+
+            job.status = "failed"
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if document:
+                document.status = "error"
+                document.document_metadata = self._merged_metadata(document, {"error": str(error)})
+            print(f"❌ Error processing document {document_id}: {error}")
+
+    async def _consume(self):
+        """Consumer loop: claim and run jobs until cancelled"""
+        while True:
+            try:
+                claimed = await asyncio.to_thread(self._claim_next)
+            except Exception as e:
+                print(f"⚠️  Failed to claim ingestion job: {e}")
+                claimed = None
+
+            if claimed is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=INGESTION_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_id, document_id, user_id, resume_embedding = claimed
+            try:
+                await self._run_job(job_id, document_id, user_id, resume_embedding)
+            except asyncio.CancelledError:
+                # Shutting down - leave the job for requeue_stale on next start
+                raise
+            except Exception as e:
+                try:
+                    await asyncio.to_thread(self._fail, job_id, document_id, e)
+                except Exception as db_error:
+                    print(f"⚠️  Failed to record ingestion failure: {db_error}")
+
+    # ----- lifecycle -----
+
+    async def start(self):
+        """Start consumer tasks and the extraction process pool"""
+        if not DB_AVAILABLE or self._tasks:
+            return
+        try:
+            requeued = await asyncio.to_thread(self.requeue_stale)
+            if requeued:
+                print(f"ℹ️  Requeued {requeued} abandoned ingestion job(s)")
+        except Exception as e:
+            print(f"⚠️  Could not requeue stale ingestion jobs: {e}")
+
+        self._executor = ProcessPoolExecutor(max_workers=self.process_workers)
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.concurrency)]
+        print(f"✓ Ingestion worker pool started ({self.concurrency} consumer(s), {self.process_workers} process(es))")
+
+    async def stop(self):
+        """Stop consumers and shut down the process pool"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global worker pool instance
+ingestion_worker_pool = IngestionWorkerPool()
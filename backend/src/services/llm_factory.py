@@ -3,49 +3,62 @@ LLM Factory - Creates LLM instances based on configuration
 """
 from langchain_openai import ChatOpenAI
 from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage
+from langchain_core.messages import BaseMessage
 from typing import Optional, List, Any, AsyncIterator
+from functools import lru_cache
 from pydantic import Field
 import os
 
-# Try to import ChatOllama from langchain_ollama (preferred) or fallback to langchain_community
-try:
-    from langchain_ollama import ChatOllama
-except ImportError:
+from src.services.message_normalizer import extract_text, normalize_message, normalize_messages, normalize_input
+
+
+# Provider SDKs are imported the first time a config of that type is used, so
+# workers that only talk to OpenAI-compatible APIs never load them
+@lru_cache(maxsize=None)
+def _chat_ollama_class():
+    """ChatOllama from langchain_ollama (preferred) or langchain_community, or None"""
     try:
-        from langchain_community.chat_models import ChatOllama
+        from langchain_ollama import ChatOllama
     except ImportError:
-        ChatOllama = None
+        try:
+            from langchain_community.chat_models import ChatOllama
+        except ImportError:
+            ChatOllama = None
+    return ChatOllama
 
-# Try to import ChatGoogleGenerativeAI for Gemini support
-try:
-    from langchain_google_genai import ChatGoogleGenerativeAI
-except ImportError:
+
+@lru_cache(maxsize=None)
+def _chat_gemini_class():
+    """ChatGoogleGenerativeAI for Gemini support, or None"""
     try:
-        from langchain_community.chat_models import ChatGoogleGenerativeAI
+        from langchain_google_genai import ChatGoogleGenerativeAI
     except ImportError:
-        # Try to add common installation paths
-        import sys
-        import os
-        common_paths = [
-            '/home/jack/.local/share/uv/lib/python3.13/site-packages',
-            os.path.expanduser('~/.local/lib/python3.13/site-packages'),
-            '/usr/local/lib/python3.13/site-packages',
-        ]
-        for path in common_paths:
-            if os.path.exists(path) and path not in sys.path:
-                sys.path.insert(0, path)
-        
         try:
-            from langchain_google_genai import ChatGoogleGenerativeAI
+            from langchain_community.chat_models import ChatGoogleGenerativeAI
         except ImportError:
-            ChatGoogleGenerativeAI = None
+            # Try to add common installation paths
+            import sys
+            common_paths = [
+                '/home/jack/.local/share/uv/lib/python3.13/site-packages',
+                os.path.expanduser('~/.local/lib/python3.13/site-packages'),
+                '/usr/local/lib/python3.13/site-packages',
+            ]
+            for path in common_paths:
+                if os.path.exists(path) and path not in sys.path:
+                    sys.path.insert(0, path)
+
+            try:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+            except ImportError:
+                ChatGoogleGenerativeAI = None
+    return ChatGoogleGenerativeAI
 
 
 class MessageNormalizingLLM(BaseChatModel):
     """
     Wrapper LLM that normalizes message contents to strings before sending to the underlying LLM.
     This ensures that list/dict content is converted to strings to prevent API errors.
+    Inputs whose messages already have string content are passed through untouched.
     """
     
     # Declare llm as a class variable with Field for Pydantic
@@ -78,203 +91,32 @@ class MessageNormalizingLLM(BaseChatModel):
     
     def _normalize_message_content(self, content: Any) -> str:
         """Normalize message content to string"""
-        if isinstance(content, str):
-            return content
-        elif isinstance(content, list):
-            result = ""
-            for item in content:
-                if isinstance(item, dict):
-                    if "text" in item:
-                        result += item["text"]
-                    elif "type" in item and item.get("type") == "text":
-                        result += item.get("text", "")
-                    else:
-                        result += str(item)
-                elif isinstance(item, str):
-                    result += item
-                else:
-                    result += str(item)
-            return result
-        elif isinstance(content, dict):
-            if "text" in content:
-                return content["text"]
-            return str(content)
-        else:
-            return str(content)
+        return extract_text(content)
     
     def _normalize_message(self, message: BaseMessage) -> BaseMessage:
-        """Normalize a single message's content"""
-        # Skip if content is already a string
-        if isinstance(message.content, str):
-            return message
-        
-        # Normalize the content
-        normalized_content = self._normalize_message_content(message.content)
-        
-        # Create a new message of the same type with normalized content
-        try:
-            if isinstance(message, HumanMessage):
-                return HumanMessage(content=normalized_content)
-            elif isinstance(message, AIMessage):
-                new_msg = AIMessage(content=normalized_content)
-                # Preserve tool_calls if they exist
-                if hasattr(message, 'tool_calls') and message.tool_calls:
-                    new_msg.tool_calls = message.tool_calls
-                # Preserve response_metadata if it exists
-                if hasattr(message, 'response_metadata'):
-                    new_msg.response_metadata = message.response_metadata
-                return new_msg
-            elif isinstance(message, SystemMessage):
-                return SystemMessage(content=normalized_content)
-            elif isinstance(message, ToolMessage):
-                # Preserve tool_call_id for ToolMessage
-                tool_call_id = getattr(message, 'tool_call_id', None)
-                new_msg = ToolMessage(content=normalized_content, tool_call_id=tool_call_id)
-                return new_msg
-            else:
-                # For other message types, try to create a new instance
-                msg_class = type(message)
-                # Try to preserve common attributes
-                kwargs = {'content': normalized_content}
-                if hasattr(message, 'tool_call_id'):
-                    kwargs['tool_call_id'] = message.tool_call_id
-                if hasattr(message, 'name'):
-                    kwargs['name'] = message.name
-                if hasattr(message, 'id'):
-                    kwargs['id'] = message.id
-                
-                try:
-                    return msg_class(**kwargs)
-                except:
-                    # Fallback: try with just content
-                    try:
-                        return msg_class(content=normalized_content)
-                    except:
-                        # Last resort: modify in place
-                        message.content = normalized_content
-                        return message
-        except Exception as e:
-            # If normalization fails, log and return original message
-            import logging
-            logging.warning(f"Failed to normalize message: {e}, using original message")
-            # Try to at least convert content to string
-            try:
-                message.content = str(message.content) if not isinstance(message.content, str) else message.content
-            except:
-                pass
-            return message
+        """Normalize a single message's content (no copy if already a string)"""
+        return normalize_message(message)
     
     def _normalize_messages(self, messages: List[BaseMessage]) -> List[BaseMessage]:
-        """Normalize a list of messages"""
-        normalized = []
-        for msg in messages:
-            try:
-                normalized.append(self._normalize_message(msg))
-            except Exception as e:
-                # If normalization fails for a message, try to at least convert content to string
-                import logging
-                logging.warning(f"Failed to normalize message in list: {e}, converting content to string")
-                try:
-                    if hasattr(msg, 'content') and not isinstance(msg.content, str):
-                        msg.content = str(msg.content)
-                except:
-                    pass
-                normalized.append(msg)
-        return normalized
+        """Normalize a list of messages (returns the same list if already normalized)"""
+        return normalize_messages(messages)
     
     def invoke(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> Any:
         """Invoke the LLM with normalized messages"""
-        if isinstance(input, list):
-            # Normalize messages before invoking
-            normalized_input = self._normalize_messages(input)
-            return self.llm.invoke(normalized_input, config=config, **kwargs)
-        elif isinstance(input, dict) and 'messages' in input:
-            # Input is a dict with messages key
-            normalized_messages = self._normalize_messages(input['messages'])
-            normalized_input = {**input, 'messages': normalized_messages}
-            return self.llm.invoke(normalized_input, config=config, **kwargs)
-        elif hasattr(input, 'messages') and isinstance(input.messages, list):
-            # Input is an object with messages attribute - create a copy
-            import copy
-            normalized_input = copy.deepcopy(input) if hasattr(copy, 'deepcopy') else input
-            normalized_messages = self._normalize_messages(input.messages)
-            normalized_input.messages = normalized_messages
-            return self.llm.invoke(normalized_input, config=config, **kwargs)
-        else:
-            return self.llm.invoke(input, config=config, **kwargs)
+        return self.llm.invoke(normalize_input(input), config=config, **kwargs)
     
     async def ainvoke(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> Any:
         """Async invoke the LLM with normalized messages"""
-        try:
-            if isinstance(input, list):
-                # Normalize messages before invoking
-                normalized_input = self._normalize_messages(input)
-                return await self.llm.ainvoke(normalized_input, config=config, **kwargs)
-            elif isinstance(input, dict) and 'messages' in input:
-                # Input is a dict with messages key
-                normalized_messages = self._normalize_messages(input['messages'])
-                normalized_input = {**input, 'messages': normalized_messages}
-                return await self.llm.ainvoke(normalized_input, config=config, **kwargs)
-            elif hasattr(input, 'messages') and isinstance(input.messages, list):
-                # Input is an object with messages attribute - create a copy
-                import copy
-                normalized_input = copy.deepcopy(input) if hasattr(copy, 'deepcopy') else input
-                normalized_messages = self._normalize_messages(input.messages)
-                normalized_input.messages = normalized_messages
-                return await self.llm.ainvoke(normalized_input, config=config, **kwargs)
-            else:
-                return await self.llm.ainvoke(input, config=config, **kwargs)
-        except Exception as e:
-            # If ainvoke fails, try to normalize and retry
-            import logging
-            logging.warning(f"Error in ainvoke, attempting message normalization: {e}")
-            if isinstance(input, list):
-                try:
-                    normalized_input = self._normalize_messages(input)
-                    return await self.llm.ainvoke(normalized_input, config=config, **kwargs)
-                except:
-                    raise
-            raise
+        return await self.llm.ainvoke(normalize_input(input), config=config, **kwargs)
     
     def stream(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> Any:
         """Stream the LLM with normalized messages"""
-        if isinstance(input, list):
-            normalized_input = self._normalize_messages(input)
-            return self.llm.stream(normalized_input, config=config, **kwargs)
-        elif isinstance(input, dict) and 'messages' in input:
-            normalized_messages = self._normalize_messages(input['messages'])
-            normalized_input = {**input, 'messages': normalized_messages}
-            return self.llm.stream(normalized_input, config=config, **kwargs)
-        elif hasattr(input, 'messages') and isinstance(input.messages, list):
-            import copy
-            normalized_input = copy.deepcopy(input) if hasattr(copy, 'deepcopy') else input
-            normalized_messages = self._normalize_messages(input.messages)
-            normalized_input.messages = normalized_messages
-            return self.llm.stream(normalized_input, config=config, **kwargs)
-        else:
-            return self.llm.stream(input, config=config, **kwargs)
+        return self.llm.stream(normalize_input(input), config=config, **kwargs)
     
     async def astream(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> AsyncIterator[Any]:
         """Async stream the LLM with normalized messages"""
-        if isinstance(input, list):
-            normalized_input = self._normalize_messages(input)
-            async for chunk in self.llm.astream(normalized_input, config=config, **kwargs):
-                yield chunk
-        elif isinstance(input, dict) and 'messages' in input:
-            normalized_messages = self._normalize_messages(input['messages'])
-            normalized_input = {**input, 'messages': normalized_messages}
-            async for chunk in self.llm.astream(normalized_input, config=config, **kwargs):
-                yield chunk
-        elif hasattr(input, 'messages') and isinstance(input.messages, list):
-            import copy
-            normalized_input = copy.deepcopy(input) if hasattr(copy, 'deepcopy') else input
-            normalized_messages = self._normalize_messages(input.messages)
-            normalized_input.messages = normalized_messages
-            async for chunk in self.llm.astream(normalized_input, config=config, **kwargs):
-                yield chunk
-        else:
-            async for chunk in self.llm.astream(input, config=config, **kwargs):
-                yield chunk
+        async for chunk in self.llm.astream(normalize_input(input), config=config, **kwargs):
+            yield chunk
     
     def bind_tools(self, tools: Any, **kwargs: Any) -> Any:
         """Bind tools to the underlying LLM"""
@@ -287,51 +129,11 @@ class MessageNormalizingLLM(BaseChatModel):
     
     def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Optional[Any] = None, **kwargs: Any) -> Any:
         """Core generation method - normalize messages before calling underlying LLM"""
-        try:
-            normalized_messages = self._normalize_messages(messages)
-            return self.llm._generate(normalized_messages, stop=stop, run_manager=run_manager, **kwargs)
-        except Exception as e:
-            # If normalization fails, try to normalize each message individually
-            import logging
-            logging.warning(f"Error in _generate normalization: {e}, attempting individual message normalization")
-            try:
-                safe_messages = []
-                for msg in messages:
-                    try:
-                        safe_messages.append(self._normalize_message(msg))
-                    except:
-                        # If individual normalization fails, try to convert content to string
-                        if hasattr(msg, 'content') and not isinstance(msg.content, str):
-                            msg.content = str(msg.content)
-                        safe_messages.append(msg)
-                return self.llm._generate(safe_messages, stop=stop, run_manager=run_manager, **kwargs)
-            except:
-                # Last resort: pass through and let the underlying LLM handle it
-                return self.llm._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        return self.llm._generate(normalize_messages(messages), stop=stop, run_manager=run_manager, **kwargs)
     
     async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Optional[Any] = None, **kwargs: Any) -> Any:
         """Async core generation method - normalize messages before calling underlying LLM"""
-        try:
-            normalized_messages = self._normalize_messages(messages)
-            return await self.llm._agenerate(normalized_messages, stop=stop, run_manager=run_manager, **kwargs)
-        except Exception as e:
-            # If normalization fails, try to normalize each message individually
-            import logging
-            logging.warning(f"Error in _agenerate normalization: {e}, attempting individual message normalization")
-            try:
-                safe_messages = []
-                for msg in messages:
-                    try:
-                        safe_messages.append(self._normalize_message(msg))
-                    except:
-                        # If individual normalization fails, try to convert content to string
-                        if hasattr(msg, 'content') and not isinstance(msg.content, str):
-                            msg.content = str(msg.content)
-                        safe_messages.append(msg)
-                return await self.llm._agenerate(safe_messages, stop=stop, run_manager=run_manager, **kwargs)
-            except:
-                # Last resort: pass through and let the underlying LLM handle it
-                return await self.llm._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        return await self.llm._agenerate(normalize_messages(messages), stop=stop, run_manager=run_manager, **kwargs)
     
     @property
     def _identifying_params(self) -> dict:
@@ -373,6 +175,7 @@ def create_llm_from_config(config: dict, streaming: bool = False, temperature: f
     
     if llm_type == "ollama":
         # Local Ollama instance
+        ChatOllama = _chat_ollama_class()
         if ChatOllama is None:
             raise ImportError(
                 "ChatOllama is not available. Ensure 'langchain-ollama' is in requirements.txt and redeploy."
@@ -433,6 +236,7 @@ def create_llm_from_config(config: dict, streaming: bool = False, temperature: f
     
     elif llm_type == "gemini":
         # Google Gemini API
+        ChatGoogleGenerativeAI = _chat_gemini_class()
         if ChatGoogleGenerativeAI is None:
             raise ImportError(
                 "ChatGoogleGenerativeAI is not available. Ensure 'langchain-google-genai' is in requirements.txt and redeploy."
@@ -7,6 +7,10 @@ from mcp.client.streamable_http import streamablehttp_client
 from langchain_mcp_adapters.tools import load_mcp_tools
 from typing import List
 from langchain_core.tools import BaseTool
+from src.utils.logger import get_logger
+from src.utils.metrics import mcp_stage_seconds
+
+log = get_logger(__name__)
 
 # Suppress verbose MCP library errors
 logging.getLogger("mcp").setLevel(logging.WARNING)
@@ -61,9 +65,9 @@ class MCPClientManager:
                         old_url = server_config.get("url", "")
                         server_config["url"] = local_url
                         self.local_servers_used.add(config_name)
-                        print(f"🔄 Using local MCP server for {config_name} (was: {old_url})")
+                        log.debug("Using local MCP server", {"server": config_name, "was": old_url})
             except Exception as e:
-                print(f"Note: Could not optimize to local servers: {e}")
+                log.debug("Could not optimize to local MCP servers", {"error": str(e)})
         
         # Now load all configured servers (only from config, no auto-discovery)
         # Filter out disabled servers
@@ -71,7 +75,7 @@ class MCPClientManager:
             # Skip disabled servers
             if server_config.get("enabled", True) is False:
                 server_name = server_config.get("name", "Unknown")
-                print(f"⏭️  Skipping disabled MCP server: {server_name}")
+                log.debug("Skipping disabled MCP server", {"server": server_name})
                 continue
             
             server_name = server_config.get("name", "Unknown")
@@ -99,7 +103,7 @@ class MCPClientManager:
                     if not final_url.endswith('/mcp'):
                         final_url = final_url.rstrip('/') + '/mcp'
             
-            print(f"Loading tools from {server_name} MCP server ({connection_type}: {final_url})...")
+            log.debug("Loading MCP tools", {"server": server_name, "connection_type": connection_type, "url": final_url})
             
             try:
                 # Build headers: start with existing headers
@@ -125,7 +129,7 @@ class MCPClientManager:
                         # Parse command
                         command_parts = shlex.split(final_url)
                         if not command_parts:
-                            print(f"⚠️  Invalid command for stdio connection: {server_name}")
+                            log.warning("Invalid command for stdio MCP connection", {"server": server_name})
                             continue
                         
                         server_params = {"command": command_parts}
@@ -146,32 +150,38 @@ class MCPClientManager:
                         if headers:
                             server_params["headers"] = headers
                         client = streamablehttp_client(**server_params)
-                    read, write, _ = await asyncio.wait_for(
-                        client.__aenter__(),
-                        timeout=5.0  # 5 second timeout per server connection
-                    )
+                    with mcp_stage_seconds.time(server=server_name, stage="connect"):
+                        read, write, _ = await asyncio.wait_for(
+                            client.__aenter__(),
+                            timeout=5.0  # 5 second timeout per server connection
+                        )
                     session = ClientSession(read, write)
-                    await asyncio.wait_for(
-                        session.__aenter__(),
-                        timeout=3.0
-                    )
-                    await asyncio.wait_for(
-                        session.initialize(),
-                        timeout=5.0  # 5 second timeout for initialization
-                    )
+                    with mcp_stage_seconds.time(server=server_name, stage="initialize"):
+                        await asyncio.wait_for(
+                            session.__aenter__(),
+                            timeout=3.0
+                        )
+                        await asyncio.wait_for(
+                            session.initialize(),
+                            timeout=5.0  # 5 second timeout for initialization
+                        )
                     
                     # Load tools with timeout
-                    tools = await asyncio.wait_for(
-                        load_mcp_tools(session),
-                        timeout=10.0  # 10 second timeout for loading tools
-                    )
+                    with mcp_stage_seconds.time(server=server_name, stage="load_tools"):
+                        tools = await asyncio.wait_for(
+                            load_mcp_tools(session),
+                            timeout=10.0  # 10 second timeout for loading tools
+                        )
                     
                     self.tools.extend(tools)
                     self.sessions.append((client, session))
                     
-                    print(f"✓ Loaded {len(tools)} tool(s) from {server_name} MCP server")
-                    for tool in tools:
-                        print(f"  - {tool.name}: {tool.description}")
+                    log.info("Loaded MCP tools", {"server": server_name, "count": len(tools)})
+                    if log.is_enabled(logging.DEBUG):
+                        log.debug("MCP tool listing", {
+                            "server": server_name,
+                            "tools": {tool.name: tool.description for tool in tools},
+                        })
                 except (asyncio.TimeoutError, asyncio.CancelledError) as e:
                     # Clean up on timeout/cancellation
                     if session:
@@ -184,8 +194,7 @@ class MCPClientManager:
                             await asyncio.wait_for(client.__aexit__(None, None, None), timeout=1.0)
                         except:
                             pass
-                    print(f"⏱️  Timeout connecting to MCP server: {server_name}")
-                    print(f"   Skipping this server and continuing with others...")
+                    log.warning("Timeout connecting to MCP server, skipping", {"server": server_name})
                     continue
                 except BaseExceptionGroup as e:
                     # Handle exception groups (common with MCP connection errors)
@@ -206,11 +215,9 @@ class MCPClientManager:
                         for exc in e.exceptions
                     )
                     if has_connection_error:
-                        print(f"⚠️  Cannot connect to {server_name} MCP server")
-                        print(f"   Server may not be running. Skipping and continuing...")
+                        log.warning("Cannot connect to MCP server, skipping", {"server": server_name})
                     else:
-                        print(f"⚠️  Connection error with {server_name} MCP server")
-                        print(f"   Skipping this server and continuing...")
+                        log.warning("Connection error with MCP server, skipping", {"server": server_name})
                     continue
                 except Exception as e:
                     # Clean up on any error
@@ -230,32 +237,26 @@ class MCPClientManager:
                     
                     # Don't fail completely on connection errors - just log and continue
                     if "502" in error_msg or "Bad Gateway" in error_msg:
-                        print(f"⚠️  {server_name} MCP server unavailable (502)")
-                        print(f"   Skipping this server and continuing with others...")
+                        log.warning("MCP server unavailable (502), skipping", {"server": server_name})
                     elif "ConnectError" in error_type or "ConnectError" in error_msg or "connection" in error_msg.lower() or "refused" in error_msg.lower() or "All connection attempts failed" in error_msg:
-                        print(f"⚠️  Cannot connect to {server_name} MCP server")
-                        print(f"   Server may not be running. Skipping and continuing...")
+                        log.warning("Cannot connect to MCP server, skipping", {"server": server_name})
                     elif "cancel scope" in error_msg.lower() or "RuntimeError" in error_msg or "CancelledError" in error_type:
                         # These are cleanup/cancellation errors - suppress them
-                        print(f"⚠️  Connection issue with {server_name} (server unavailable)")
-                        print(f"   Skipping this server and continuing...")
+                        log.warning("MCP server unavailable, skipping", {"server": server_name})
                     elif "BaseExceptionGroup" in error_type or "BaseExceptionGroup" in error_msg:
                         # Suppress verbose exception groups
-                        print(f"⚠️  Connection error with {server_name} MCP server")
-                        print(f"   Skipping this server and continuing...")
+                        log.warning("Connection error with MCP server, skipping", {"server": server_name})
                     else:
                         # For other errors, show a brief message
-                        print(f"⚠️  Failed to load {server_name} MCP tools: {error_type}")
-                        print(f"   Skipping this server and continuing...")
+                        log.warning("Failed to load MCP tools, skipping", {"server": server_name, "error": error_type})
                     # Continue with other servers instead of failing completely
                     continue
             except Exception as e:
                 # Outer exception handler for any other errors
                 error_msg = str(e)
-                print(f"✗ Unexpected error loading {server_name} MCP server: {error_msg}")
+                log.error("Unexpected error loading MCP server", {"server": server_name, "error": error_msg})
                 continue
-            
-            print()  # Empty line between servers
+
         
         return self.tools
     
@@ -265,7 +266,7 @@ class MCPClientManager:
         if not self.sessions:
             return  # No sessions to close
         
-        print("\n🔄 Closing MCP sessions...")
+        log.debug("Closing MCP sessions", {"count": len(self.sessions)})
         import asyncio
         
         # Suppress all errors during cleanup - they're expected due to async context manager
@@ -297,5 +298,5 @@ class MCPClientManager:
                     pass
         
         self.sessions.clear()
-        print("✓ All MCP sessions closed")
+        log.debug("All MCP sessions closed")
 
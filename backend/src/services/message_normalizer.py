@@ -0,0 +1,91 @@
+"""
+Message content normalization
+Some providers (Gemini in particular) return content as a list of content
+blocks instead of a string. This is the single place that turns such
+content into plain text.
+
+String content is the "already normalized" marker: messages whose content
+is a str are returned as-is, and a list of such messages is returned as the
+same list object, so normalizing an already-normalized history costs one
+isinstance check per message and no allocations.
+"""
+from typing import Any, List
+
+from langchain_core.messages import BaseMessage
+
+
+def extract_text(content: Any) -> str:
+    """
+    Extract text content from various content types
+
+    Handles plain strings, lists of content blocks (Gemini), dicts with a
+    "text" key and anything else (stringified). Non-text blocks in a list
+    (tool_use, images) are skipped.
+    """
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = []
+        for item in content:
+            if isinstance(item, str):
+                parts.append(item)
+            elif isinstance(item, dict) and "text" in item:
+                parts.append(item["text"] or "")
+        return "".join(parts)
+    if isinstance(content, dict):
+        if "text" in content:
+            return content["text"]
+        return str(content)
+    return str(content)
+
+
+def is_normalized(messages: List[Any]) -> bool:
+    """Check whether every message already has string content"""
+    for msg in messages:
+        if isinstance(msg, BaseMessage) and not isinstance(msg.content, str):
+            return False
+    return True
+
+
+def normalize_message(message: Any) -> Any:
+    """
+    Normalize one message's content to a string
+
+    Returns the same object if it is already normalized; otherwise a
+    shallow copy with only the content replaced, so tool calls, ids,
+    usage and response metadata are preserved.
+    """
+    if not isinstance(message, BaseMessage) or isinstance(message.content, str):
+        return message
+    return message.model_copy(update={"content": extract_text(message.content)})
+
+
+def normalize_messages(messages: List[Any]) -> List[Any]:
+    """
+    Normalize a list of messages
+
+    Returns the input list itself when nothing needs to change.
+    """
+    if is_normalized(messages):
+        return messages
+    return [normalize_message(msg) for msg in messages]
+
+
+def normalize_input(input: Any) -> Any:
+    """
+    Normalize a model input (message list, {"messages": [...]} dict or
+    prompt value) without copying anything that is already normalized
+    """
+    if isinstance(input, list):
+        return normalize_messages(input)
+    if isinstance(input, dict) and isinstance(input.get("messages"), list):
+        messages = normalize_messages(input["messages"])
+        if messages is input["messages"]:
+            return input
+        return {**input, "messages": messages}
+    messages = getattr(input, "messages", None)
+    if isinstance(messages, list) and not is_normalized(messages):
+        # Prompt values (ChatPromptValue) are pydantic models - shallow copy
+        if hasattr(input, "model_copy"):
+            return input.model_copy(update={"messages": normalize_messages(messages)})
+    return input
@@ -0,0 +1,242 @@
+"""
+In-memory daily quota engine
+Keeps per-principal daily request counters in process memory so admission
+control does not need a database round-trip, and reconciles them with the
+APIUsage table on startup and on a timer.
+"""
+import asyncio
+import os
+import threading
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+
+# Seconds between reconciliation passes against the APIUsage table
+QUOTA_RECONCILE_INTERVAL = int(os.getenv("QUOTA_RECONCILE_INTERVAL", "30"))
+
+
+def principal_key(
+    user_id: Optional[int],
+    ip_address: Optional[str] = None,
+    guest_email: Optional[str] = None
+) -> Optional[str]:
+    """
+    Build the counter key for a principal
+
+    Authenticated users are keyed by user_id, guests by email when they
+    provided one, and anonymous users by IP address.
+
+    Returns:
+        Counter key, or None if the principal cannot be identified
+    """
+    if user_id is not None:
+        return f"user:{user_id}"
+    if guest_email:
+        return f"guest:{guest_email.lower()}"
+    if ip_address:
+        return f"ip:{ip_address}"
+    return None
+
+
+class QuotaBackend:
+    """
+    Storage interface for daily quota counters
+
+    All counters belong to a single day; implementations must drop the
+    previous day's counters when a different day is passed in.
+    A shared-store implementation (e.g. Redis INCR with expiry) can be
+    plugged in via QuotaEngine(backend=...) so limits hold across workers.
+    """
+
+    def get(self, day: date, key: str) -> Optional[int]:
+        """Get current counter value, or None if the key is unknown"""
+        raise NotImplementedError
+
+    def incr_if_below(self, day: date, key: str, limit: int, seed: int = 0) -> Tuple[bool, int]:
+        """
+        Atomically increment a counter if it is below the limit
+
+        Args:
+            day: Day the counter belongs to
+            key: Principal key
+            limit: Maximum allowed value after increment
+            seed: Starting value if the key is unknown
+
+        Returns:
+            Tuple of (is_allowed, count_before_increment)
+        """
+        raise NotImplementedError
+
+    def merge(self, day: date, counts: Dict[str, int]):
+        """Raise counters to at least the given values (never lowers them)"""
+        raise NotImplementedError
+
+    def clear(self):
+        """Clear all counters"""
+        raise NotImplementedError
+
+
+class InMemoryQuotaBackend(QuotaBackend):
+    """Process-local quota backend guarded by a lock"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._day: Optional[date] = None
+        self._counters: Dict[str, int] = {}
+
+    def _roll(self, day: date):
+        """Reset counters on day rollover (caller must hold the lock)"""
+        if self._day != day:
+            self._day = day
+            self._counters = {}
+
+    def get(self, day: date, key: str) -> Optional[int]:
+        with self._lock:
+            self._roll(day)
+            return self._counters.get(key)
+
+    def incr_if_below(self, day: date, key: str, limit: int, seed: int = 0) -> Tuple[bool, int]:
+        with self._lock:
+            self._roll(day)
+            current = self._counters.get(key, seed)
+            if current >= limit:
+                self._counters[key] = current
+                return False, current
+            self._counters[key] = current + 1
+            return True, current
+
+    def merge(self, day: date, counts: Dict[str, int]):
+        with self._lock:
+            self._roll(day)
+            for key, count in counts.items():
+                if count > self._counters.get(key, 0):
+                    self._counters[key] = count
+
+    def clear(self):
+        with self._lock:
+            self._day = None
+            self._counters = {}
+
+
+class QuotaEngine:
+    """
+    Daily quota engine
+
+    Counters are incremented at admission time, so a request is counted as
+    soon as it is let in. Reconciliation merges the persisted APIUsage counts
+    with max() semantics: requests admitted by other workers are picked up,
+    and in-flight requests that are not yet persisted are not lost.
+    """
+
+    def __init__(self, backend: Optional[QuotaBackend] = None):
+        self.backend = backend or InMemoryQuotaBackend()
+        self._reconciled_day: Optional[date] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def today() -> date:
+        """Current quota day (matches UsageTracker.get_today_start)"""
+        from src.services.usage_tracker import UsageTracker
+        return UsageTracker.get_today_start().date()
+
+    def is_warm(self) -> bool:
+        """True if counters were reconciled with the database for today"""
+        return self._reconciled_day == self.today()
+
+    def peek(self, key: str) -> Optional[int]:
+        """Get today's count for a key without incrementing"""
+        return self.backend.get(self.today(), key)
+
+    def check_and_increment(self, key: str, limit: int, seed: int = 0) -> Tuple[bool, int]:
+        """
+        Admit a request if the principal is under its daily limit
+
+        Args:
+            key: Principal key (see principal_key)
+            limit: Daily request limit
+            seed: Count to start from if the key has no counter yet
+
+        Returns:
+            Tuple of (is_allowed, count_before_this_request)
+        """
+        return self.backend.incr_if_below(self.today(), key, limit, seed=seed)
+
+    def seed(self, key: str, count: int):
+        """Set a lower bound for a key's counter (e.g. from a DB lookup)"""
+        self.backend.merge(self.today(), {key: count})
+
+    @staticmethod
+    def _keys_for_row(row) -> Iterable[str]:
+        """Yield every principal key an APIUsage row counts towards"""
+        if row.user_id is not None:
+            yield f"user:{row.user_id}"
+            return
+        if row.guest_email:
+            yield f"guest:{row.guest_email.lower()}"
+        if row.ip_address:
+            yield f"ip:{row.ip_address}"
+
+    def reconcile(self) -> int:
+        """
+        Merge today's APIUsage counts into the in-memory counters
+
+        Returns:
+            Number of APIUsage rows merged
+        """
+        from sqlalchemy import func
+        from src.core import get_db_context, DB_AVAILABLE
+        from src.core.models import APIUsage
+
+        if not DB_AVAILABLE:
+            return 0
+
+        day = self.today()
+        counts: Dict[str, int] = {}
+        with get_db_context() as db:
+            rows = db.query(
+                APIUsage.user_id,
+                APIUsage.guest_email,
+                APIUsage.ip_address,
+                APIUsage.request_count
+            ).filter(func.date(APIUsage.usage_date) == day).all()
+
+        for row in rows:
+            for key in self._keys_for_row(row):
+                counts[key] = max(counts.get(key, 0), row.request_count)
+
+        self.backend.merge(day, counts)
+        self._reconciled_day = day
+        return len(rows)
+
+    async def _reconcile_loop(self, interval: int):
+        """Reconcile periodically until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.reconcile)
+            except Exception as e:
+                print(f"⚠️  Quota reconciliation failed: {e}")
+
+    async def start(self, interval: int = QUOTA_RECONCILE_INTERVAL):
+        """Reconcile once and start the periodic reconciliation task"""
+        try:
+            rows = await asyncio.to_thread(self.reconcile)
+            print(f"✓ Quota engine warmed with {rows} usage record(s)")
+        except Exception as e:
+            print(f"⚠️  Initial quota reconciliation failed: {e}")
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._reconcile_loop(interval))
+
+    async def stop(self):
+        """Stop the periodic reconciliation task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global quota engine instance
+quota_engine = QuotaEngine()
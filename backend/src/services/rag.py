@@ -1,16 +1,18 @@
 """
 RAG (Retrieval Augmented Generation) system with FAISS vectorstore
+
+The built-in corpus is served from a precomputed on-disk index (see
+rag_index.py); the embeddings API is only called when the texts change.
 """
 import os
-from langchain_community.vectorstores import FAISS
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain_classic.chains import create_retrieval_chain, create_history_aware_retriever
-from langchain_classic.chains.combine_documents import create_stuff_documents_chain
 
 from .history import history_manager
+from .rag_index import PrecomputedIndex
 from src.core import Config
+from src.dependency_injection.container import get_container
 
 
 class EnhancedRAGSystem:
@@ -53,10 +55,12 @@ class EnhancedRAGSystem:
                 )
             
             self.embeddings = OpenAIEmbeddings(api_key=openai_api_key)
-            self.vectorstore = FAISS.from_texts(self.texts, embedding=self.embeddings)
+            self.index = PrecomputedIndex("dosibridge", self.texts, self.embeddings)
+            self.vectorstore, built = self.index.load_or_build()
             self.retriever = self.vectorstore.as_retriever(search_kwargs={"k": 3})
             self.available = True
-            print("✓ Enhanced RAG System initialized with FAISS vectorstore")
+            source = "built" if built else "loaded"
+            print(f"✓ Enhanced RAG System initialized with FAISS vectorstore ({source} {self.index.path.name})")
         except Exception as e:
             print(f"⚠️  FAISS not available, RAG tool disabled: {e}")
             self.available = False
@@ -89,6 +93,10 @@ class EnhancedRAGSystem:
         """
         if not self.available:
             return "RAG system not available."
+
+        # Chain builders are only needed here (CLI agent) - keep them off the import path
+        from langchain_classic.chains import create_retrieval_chain, create_history_aware_retriever
+        from langchain_classic.chains.combine_documents import create_stuff_documents_chain
         
         # Contextualization prompt for history-aware retrieval
         contextualize_prompt = ChatPromptTemplate.from_messages([
@@ -155,6 +163,13 @@ class EnhancedRAGSystem:
         return result["answer"]
 
 
-# Global RAG system instance
-rag_system = EnhancedRAGSystem()
+# Global RAG system instance - built on first use or by the lifespan warm-up
+rag_system = get_container().register_lazy("rag_system", EnhancedRAGSystem)
+
 
+if __name__ == "__main__":
+    # Prebuild the index artifact: python -m src.services.rag
+    if rag_system.available:
+        print(f"RAG index ready at {rag_system.index.path}")
+    else:
+        raise SystemExit(1)
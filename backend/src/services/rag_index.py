@@ -0,0 +1,181 @@
+"""
+Precomputed FAISS index for the built-in RAG corpus
+The static corpus is embedded once into a versioned on-disk artifact keyed by
+a hash of the texts and the embedding model. Later starts (workers, --reload)
+memory-map the stored index instead of calling the embeddings API, so boot
+time does not depend on it. Re-embedding only happens when the texts or the
+model change.
+
+Artifact layout (one directory per version):
+    <RAG_INDEX_DIR>/<name>-<key>/index.faiss   raw FAISS index
+    <RAG_INDEX_DIR>/<name>-<key>/texts.json    texts in index order + metadata
+
+Build ahead of time (e.g. in CI or an image build step):
+    python -m src.services.rag
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+
+from src.core import Config
+
+# Directory holding built-in index artifacts
+RAG_INDEX_DIR = os.getenv("RAG_INDEX_DIR", os.path.join(Config.ROOT_DIR, "vectorstores", "builtin"))
+
+ARTIFACT_FORMAT_VERSION = 1
+INDEX_FILE = "index.faiss"
+TEXTS_FILE = "texts.json"
+
+
+def embedding_model_name(embeddings: Any) -> str:
+    """Identifier of the embedding model (part of the artifact key)"""
+    model = getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None)
+    return f"{type(embeddings).__name__}:{model or 'default'}"
+
+
+def corpus_key(texts: List[str], model: str) -> str:
+    """Version key for a corpus embedded with a given model"""
+    digest = hashlib.sha256()
+    digest.update(f"v{ARTIFACT_FORMAT_VERSION}\0{model}\0".encode("utf-8"))
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+class PrecomputedIndex:
+    """Load-or-build a FAISS vectorstore for a static corpus"""
+
+    def __init__(self, name: str, texts: List[str], embeddings: Any, index_dir: Optional[str] = None):
+        self.name = name
+        self.texts = list(texts)
+        self.embeddings = embeddings
+        self.index_dir = Path(index_dir or RAG_INDEX_DIR)
+        self.model = embedding_model_name(embeddings)
+        self.key = corpus_key(self.texts, self.model)
+
+    @property
+    def path(self) -> Path:
+        return self.index_dir / f"{self.name}-{self.key}"
+
+    def exists(self) -> bool:
+        return (self.path / INDEX_FILE).is_file() and (self.path / TEXTS_FILE).is_file()
+
+    def load_or_build(self):
+        """
+        Return a FAISS vectorstore, embedding the corpus only if no artifact
+        matches the current texts and model
+
+        Returns:
+            Tuple of (vectorstore, built) where built is True if the
+            embeddings API was called
+        """
+        if self.exists():
+            try:
+                return self.load(), False
+            except Exception as e:
+                print(f"⚠️  Could not load RAG index {self.path.name}, rebuilding: {e}")
+        try:
+            self.build()
+            return self.load(), True
+        except Exception as e:
+            print(f"❌ Could not build RAG index {self.path.name}: {e}")
+            raise
+
+    def load(self):
+        """Memory-map the stored index and rebuild the docstore from texts.json"""
+        import faiss
+        from langchain_community.docstore.in_memory import InMemoryDocstore
+        from langchain_community.vectorstores import FAISS
+        from langchain_core.documents import Document
+
+        with open(self.path / TEXTS_FILE, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        if stored.get("key") != self.key:
+            raise ValueError("artifact key mismatch")
+
+        index_path = str(self.path / INDEX_FILE)
+        try:
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except Exception:
+            # Older FAISS builds cannot mmap every index type
+            index = faiss.read_index(index_path)
+
+        texts = stored["texts"]
+        if index.ntotal != len(texts):
+            raise ValueError(f"index has {index.ntotal} vectors for {len(texts)} texts")
+
+        ids = [str(i) for i in range(len(texts))]
+        docstore = InMemoryDocstore({
+            doc_id: Document(page_content=text, id=doc_id)
+            for doc_id, text in zip(ids, texts)
+        })
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=dict(enumerate(ids)),
+        )
+
+    def build(self):
+        """Embed the corpus and write the artifact atomically"""
+        import faiss
+        import numpy as np
+
+        started = time.perf_counter()
+        vectors = np.asarray(self.embeddings.embed_documents(self.texts), dtype="float32")
+        index = faiss.IndexFlatL2(vectors.shape[1])
+        index.add(vectors)
+
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{self.name}-", dir=self.index_dir))
+        try:
+            faiss.write_index(index, str(tmp_dir / INDEX_FILE))
+            with open(tmp_dir / TEXTS_FILE, "w", encoding="utf-8") as f:
+                json.dump({
+                    "key": self.key,
+                    "model": self.model,
+                    "dimension": int(vectors.shape[1]),
+                    "texts": self.texts,
+                }, f, ensure_ascii=False)
+            self._publish(tmp_dir)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self._prune_old_versions()
+        print(f"✓ Built RAG index {self.path.name} ({len(self.texts)} texts, {time.perf_counter() - started:.2f}s)")
+
+    def _publish(self, tmp_dir: Path):
+        """Move a built artifact into place, replacing one that failed to load"""
+        try:
+            os.replace(tmp_dir, self.path)
+            return
+        except OSError:
+            # The version directory exists: an artifact that failed to load,
+            # or one another worker just published
+            pass
+        stale_dir = Path(tempfile.mkdtemp(prefix=f".{self.name}-stale-", dir=self.index_dir))
+        try:
+            try:
+                os.replace(self.path, stale_dir / self.path.name)
+            except FileNotFoundError:
+                pass
+            try:
+                os.replace(tmp_dir, self.path)
+            except OSError:
+                # Another worker published the same version meanwhile
+                if not self.exists():
+                    raise
+        finally:
+            shutil.rmtree(stale_dir, ignore_errors=True)
+
+    def _prune_old_versions(self):
+        """Remove artifacts of this corpus built from older texts/models"""
+        for path in self.index_dir.glob(f"{self.name}-*"):
+            if path.is_dir() and path != self.path:
+                shutil.rmtree(path, ignore_errors=True)
@@ -3,14 +3,15 @@ ReAct (Reasoning and Acting) Agent implementation
 Combines reasoning with tool use for better problem-solving
 """
 from typing import List, Dict, Optional, Any
-from langchain.agents import create_agent
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.tools import BaseTool
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from src.services.advanced_rag import advanced_rag_system
 from src.services.llm_factory import create_llm_from_config
+from src.services.agent_cache import agent_cache
 from src.core import Config
+from src.utils.safe_eval import evaluate_isolated
 
 
 class ReActAgent:
@@ -118,20 +119,7 @@ class ReActAgent:
                 Calculation result
             """
             try:
-                # Safe evaluation of mathematical expressions
-                import math
-                allowed_names = {
-                    k: v for k, v in math.__dict__.items() if not k.startswith("__")
-                }
-                allowed_names.update({
-                    "abs": abs,
-                    "round": round,
-                    "min": min,
-                    "max": max,
-                    "sum": sum,
-                })
-                result = eval(expression, {"__builtins__": {}}, allowed_names)
-                return str(result)
+                return str(evaluate_isolated(expression))
             except Exception as e:
                 return f"Calculation error: {str(e)}"
         
@@ -185,10 +173,9 @@ class ReActAgent:
             )
         
         # Create agent
-        agent = create_agent(
-            model=self.llm,
-            tools=tools,
-            system_prompt=system_prompt
+        agent = agent_cache.get_agent(
+            self.llm, self.llm_config, tools, system_prompt,
+            streaming=False, temperature=0.1
         )
         
         # Prepare messages - normalize content to ensure strings (not lists)
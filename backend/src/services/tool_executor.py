@@ -0,0 +1,147 @@
+"""
+Tool call execution
+The agent's tool node runs the tool calls of one model turn concurrently.
+This module bounds that concurrency per request, applies per-tool timeouts
+and runs sync tools (custom_rag_retriever, schedule_appointment_or_contact)
+on a bounded thread pool instead of the event loop or the default executor.
+Tools with a cache policy are memoized (see src/utils/tool_cache.py).
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool, StructuredTool
+
+from src.observers.event_dispatcher import EventType, event_dispatcher
+from src.utils.metrics import tool_execution_seconds
+from src.utils.tool_cache import aget_or_call, tool_cache_policy
+
+# Maximum tool calls running at once for one agent run
+TOOL_CONCURRENCY = int(os.getenv("TOOL_CONCURRENCY", "4"))
+# Default seconds a tool call may take (tool.metadata["timeout"] overrides)
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "60"))
+# Threads shared by all sync tool calls in this worker
+TOOL_THREAD_POOL_SIZE = int(os.getenv("TOOL_THREAD_POOL_SIZE", "8"))
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+
+
+def get_tool_thread_pool() -> ThreadPoolExecutor:
+    """Get (or create) the thread pool used for sync tools"""
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=TOOL_THREAD_POOL_SIZE, thread_name_prefix="tool")
+    return _thread_pool
+
+
+async def shutdown_tool_thread_pool():
+    """Shut down the sync tool thread pool (app shutdown)"""
+    global _thread_pool
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+
+
+def is_sync_tool(tool: BaseTool) -> bool:
+    """True if the tool has no native async implementation"""
+    if isinstance(tool, StructuredTool):
+        return tool.coroutine is None
+    return type(tool)._arun is BaseTool._arun
+
+
+def tool_timeout(tool: BaseTool, default: float = TOOL_TIMEOUT_SECONDS) -> float:
+    """Timeout for a tool, from tool.metadata["timeout"] or the default"""
+    timeout = (tool.metadata or {}).get("timeout")
+    return float(timeout) if timeout else default
+
+
+class ToolExecutor:
+    """
+    Runs the tool calls of one agent run
+
+    One instance per request: the semaphore caps how many of the run's tool
+    calls execute at once, so a turn with N independent calls finishes in
+    roughly the time of the slowest one (up to the limit).
+    """
+
+    def __init__(self, max_concurrency: int = TOOL_CONCURRENCY, default_timeout: float = TOOL_TIMEOUT_SECONDS):
+        self.default_timeout = default_timeout
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def _execute(self, tool: BaseTool, input: Any, config: Optional[dict], timeout: float, **kwargs) -> Any:
+        """Run the tool under the timeout (raises asyncio.TimeoutError)"""
+        if is_sync_tool(tool):
+            loop = asyncio.get_running_loop()
+            # Copy the context so callbacks/tracing see this run
+            call = functools.partial(
+                contextvars.copy_context().run, tool.invoke, input, config, **kwargs
+            )
+            return await asyncio.wait_for(loop.run_in_executor(get_tool_thread_pool(), call), timeout)
+        return await asyncio.wait_for(tool.ainvoke(input, config, **kwargs), timeout)
+
+    async def run(self, tool: BaseTool, input: Any, config: Optional[dict] = None, **kwargs) -> Any:
+        """
+        Execute one tool call
+
+        Tools declaring a cache policy (metadata["cache_policy"]) are served
+        from the tool result cache when called with equivalent arguments.
+
+        Args:
+            tool: The request's tool instance
+            input: Tool call (dict with id/name/args) or plain arguments
+            config: Run config
+
+        Returns:
+            The tool's result; a ToolMessage with status "error" if the call
+            timed out (so the model can react instead of the run failing)
+        """
+        timeout = tool_timeout(tool, self.default_timeout)
+        is_tool_call = isinstance(input, dict) and input.get("type") == "tool_call"
+        policy = tool_cache_policy(tool)
+        async with self._semaphore:
+            started = time.perf_counter()
+            status = "error"
+            try:
+                if policy.cacheable and is_tool_call and tool.response_format == "content":
+                    args = input.get("args") or {}
+                    output = await aget_or_call(
+                        tool.name, policy, args,
+                        lambda: self._execute(tool, args, config, timeout, **kwargs)
+                    )
+                    status = "success"
+                    return ToolMessage(
+                        content=output if isinstance(output, str) else json.dumps(output, default=str),
+                        name=tool.name,
+                        tool_call_id=input.get("id")
+                    )
+                result = await self._execute(tool, input, config, timeout, **kwargs)
+                status = "success"
+                return result
+            except asyncio.TimeoutError:
+                status = "timeout"
+                # A timed-out sync tool keeps its pool thread until it returns;
+                # the pool size bounds how many such threads can pile up
+                message = f"Error: tool '{tool.name}' timed out after {timeout:g}s"
+                if is_tool_call:
+                    return ToolMessage(
+                        content=message,
+                        name=tool.name,
+                        tool_call_id=input.get("id"),
+                        status="error"
+                    )
+                return message
+            finally:
+                duration = time.perf_counter() - started
+                tool_execution_seconds.observe(duration, tool=tool.name, status=status)
+                # Enqueue only; observers run on the event bus
+                event_dispatcher.emit(EventType.TOOL_CALLED, {
+                    "tool": tool.name,
+                    "status": status,
+                    "duration_ms": round(duration * 1000, 1),
+                })
@@ -7,19 +7,26 @@ from .rag import rag_system
 from .advanced_rag import advanced_rag_system
 from src.core import CustomRAGTool, DB_AVAILABLE, AppointmentRequest
 from src.utils.email_service import email_service
+from src.utils.tool_cache import minutes
+from src.utils.logger import get_logger
 import json
 from datetime import datetime
-import threading
+
+log = get_logger(__name__)
 
 
 @tool("retrieve_dosiblog_context")
 def retrieve_dosiblog_context(query: str) -> str:
     """Retrieves relevant context about DOSIBridge projects, services, and related topics."""
-    print(f"🔍 Calling Enhanced RAG Tool for query: {query}")
+    log.debug("Calling RAG tool", {"tool": "retrieve_dosiblog_context", "query": query})
     context = rag_system.retrieve_context(query)
     return f"Retrieved context:\n{context}"
 
 
+# Same query within a few minutes returns the same context (see ToolExecutor)
+retrieve_dosiblog_context.metadata = {"cache_policy": minutes(5)}
+
+
 def create_appointment_tool(user_id: Optional[int] = None, db=None) -> BaseTool:
     """
     Create an appointment scheduling tool with database access.
@@ -58,7 +65,7 @@ def create_appointment_tool(user_id: Optional[int] = None, db=None) -> BaseTool:
         Returns:
             Confirmation message with appointment request ID
         """
-        print(f"📅 Scheduling appointment/contact request for: {name} ({email})")
+        log.info("Scheduling appointment/contact request", {"user_id": user_id, "request_type": request_type})
         
         if not DB_AVAILABLE or AppointmentRequest is None:
             return "Error: Database not available. Cannot schedule appointment at this time."
@@ -104,35 +111,19 @@ def create_appointment_tool(user_id: Optional[int] = None, db=None) -> BaseTool:
             db_session.commit()
             db_session.refresh(appointment)
             
-            # Send emails in background thread (non-blocking)
-            def send_emails():
-                try:
-                    email_service.send_appointment_confirmation(
-                        to_email=email,
-                        to_name=name,
-                        appointment_id=appointment.id,
-                        request_type=request_type,
-                        preferred_date=preferred_date,
-                        preferred_time=preferred_time
-                    )
-                    email_service.send_appointment_notification_to_team(
-                        appointment_id=appointment.id,
-                        name=name,
-                        email=email,
-                        phone=phone,
-                        request_type=request_type,
-                        subject=subject,
-                        message=message,
-                        preferred_date=preferred_date,
-                        preferred_time=preferred_time,
-                        user_id=user_id
-                    )
-                except Exception as e:
-                    print(f"⚠️  Failed to send emails: {e}")
-            
-            # Start email sending in background thread
-            email_thread = threading.Thread(target=send_emails, daemon=True)
-            email_thread.start()
+            # Queue confirmation/notification emails (delivered in the background)
+            email_service.queue_appointment_emails(
+                appointment_id=appointment.id,
+                name=name,
+                email=email,
+                phone=phone,
+                request_type=request_type,
+                subject=subject,
+                message=message,
+                preferred_date=preferred_date,
+                preferred_time=preferred_time,
+                user_id=user_id
+            )
             
             result = (
                 f"✅ Appointment/contact request created successfully!\n\n"
@@ -180,7 +171,7 @@ def create_custom_rag_tool(tool_config: dict, user_id: int) -> BaseTool:
     @tool(tool_name)
     def custom_rag_retriever(query: str) -> str:
         """Custom RAG tool for retrieving information from user's documents."""
-        print(f"🔍 Calling Custom RAG Tool '{tool_name}' for query: {query}")
+        log.debug("Calling custom RAG tool", {"tool": tool_name, "query": query})
         
         try:
             # Use advanced RAG system to retrieve from user's documents
@@ -212,7 +203,7 @@ def create_custom_rag_tool(tool_config: dict, user_id: int) -> BaseTool:
                 return f"Error: RAG system requires OPENAI_API_KEY to be set. Please configure it in your environment variables."
             return f"Error retrieving context: {error_msg}"
         except Exception as e:
-            print(f"⚠️  Error in custom RAG tool '{tool_name}': {e}")
+            log.warning("Error in custom RAG tool", {"tool": tool_name, "error": str(e)})
             return f"Error retrieving context: {str(e)}"
     
     # Update the tool's description
@@ -248,11 +239,11 @@ def load_custom_rag_tools(user_id: Optional[int], db=None) -> List[BaseTool]:
                 langchain_tool = create_custom_rag_tool(tool_dict, user_id)
                 langchain_tools.append(langchain_tool)
             except Exception as e:
-                print(f"⚠️  Failed to create custom RAG tool '{tool_config.name}': {e}")
+                log.warning("Failed to create custom RAG tool", {"tool": tool_config.name, "error": str(e)})
                 continue
         
         return langchain_tools
     except Exception as e:
-        print(f"⚠️  Error loading custom RAG tools: {e}")
+        log.warning("Error loading custom RAG tools", {"error": str(e)})
         return []
 
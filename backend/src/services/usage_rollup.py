@@ -0,0 +1,251 @@
+"""
+Hourly usage rollups and raw-request compaction
+Every recorded APIRequest also increments its (hour, user) row in
+api_request_hourly, so dashboards aggregate a few rows per hour with GROUP BY
+instead of loading every request. A background job deletes raw APIRequest
+rows past a retention window once their hours are rolled up, keeping
+dashboard latency independent of traffic volume.
+
+Every worker runs the job; a transaction-scoped advisory lock makes
+backfill and compaction run in one worker at a time, and each hour is
+re-rolled and deleted in a single transaction, so a pass that stops
+midway never leaves an hour with part of its raw rows.
+
+All buckets are UTC hours.
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import and_, case, func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from src.core import get_db_context, DB_AVAILABLE
+from src.core.models import APIRequest, APIRequestHourly
+
+# Days raw APIRequest rows are kept (minute-level stats and /usage/requests only cover this window)
+USAGE_RAW_RETENTION_DAYS = int(os.getenv("USAGE_RAW_RETENTION_DAYS", "30"))
+# Seconds between compaction passes
+USAGE_COMPACTION_INTERVAL = int(os.getenv("USAGE_COMPACTION_INTERVAL", "3600"))
+
+# Rollup user_id for anonymous requests
+ANONYMOUS_USER_ID = 0
+
+# pg advisory lock key shared by all workers for backfill / compaction
+USAGE_ROLLUP_LOCK_KEY = 7_410_341_001
+
+COUNTER_COLUMNS = (
+    "request_count",
+    "valid_requests",
+    "error_count",
+    "input_tokens",
+    "output_tokens",
+    "embedding_tokens",
+    "total_tokens",
+)
+
+
+def utc_trunc(unit: str, column):
+    """SQL expression truncating a timestamptz column to a UTC hour/day/minute"""
+    # Literal unit so identical expressions in SELECT and GROUP BY compare equal
+    utc = literal_column("'UTC'")
+    return func.timezone(utc, func.date_trunc(literal_column(f"'{unit}'"), func.timezone(utc, column)))
+
+
+def hour_start(moment: datetime) -> datetime:
+    """Start of the UTC hour containing moment"""
+    return moment.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def rollup_user_id(user_id: Optional[int]) -> int:
+    return ANONYMOUS_USER_ID if user_id is None else user_id
+
+
+def record_hourly(
+    db: Session,
+    user_id: Optional[int],
+    request_timestamp: datetime,
+    input_tokens: int,
+    output_tokens: int,
+    embedding_tokens: int,
+    total_tokens: int,
+    success: bool
+):
+    """
+    Add one request to its hourly rollup row (caller commits)
+
+    Uses INSERT ... ON CONFLICT DO UPDATE so concurrent writers increment the
+    same row atomically.
+    """
+    values = {
+        "bucket_start": hour_start(request_timestamp),
+        "user_id": rollup_user_id(user_id),
+        "request_count": 1,
+        "valid_requests": 1 if success and total_tokens > 0 else 0,
+        "error_count": 0 if success else 1,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "embedding_tokens": embedding_tokens,
+        "total_tokens": total_tokens,
+    }
+    stmt = pg_insert(APIRequestHourly).values(**values)
+    table = APIRequestHourly.__table__
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_api_request_hourly_bucket_user",
+        set_={name: table.c[name] + stmt.excluded[name] for name in COUNTER_COLUMNS}
+    )
+    db.execute(stmt)
+
+
+def rebuild_rollups(db: Session, start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+    """
+    Recompute rollup rows from raw APIRequest rows in [start, end) (caller commits)
+
+    Only valid for hours whose raw rows have not been compacted yet (an
+    hour with no raw rows left is not touched). Used to backfill rows
+    recorded before rollups existed and to make sure an hour is complete
+    before its raw rows are deleted. Callers hold the rollup advisory lock.
+
+    Returns:
+        Number of rollup rows written
+    """
+    bucket = utc_trunc("hour", APIRequest.request_timestamp)
+    user = func.coalesce(APIRequest.user_id, literal_column(str(ANONYMOUS_USER_ID)))
+    conditions = []
+    if start is not None:
+        conditions.append(APIRequest.request_timestamp >= start)
+    if end is not None:
+        conditions.append(APIRequest.request_timestamp < end)
+
+    aggregated = select(
+        bucket.label("bucket_start"),
+        user.label("user_id"),
+        func.count().label("request_count"),
+        func.sum(case((and_(APIRequest.success.is_(True), APIRequest.total_tokens > 0), 1), else_=0)).label("valid_requests"),
+        func.sum(case((APIRequest.success.is_(False), 1), else_=0)).label("error_count"),
+        func.sum(APIRequest.input_tokens).label("input_tokens"),
+        func.sum(APIRequest.output_tokens).label("output_tokens"),
+        func.sum(APIRequest.embedding_tokens).label("embedding_tokens"),
+        func.sum(APIRequest.total_tokens).label("total_tokens"),
+    ).where(*conditions).group_by(bucket, user)
+
+    stmt = pg_insert(APIRequestHourly).from_select(["bucket_start", "user_id", *COUNTER_COLUMNS], aggregated)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_api_request_hourly_bucket_user",
+        set_={name: stmt.excluded[name] for name in COUNTER_COLUMNS}
+    )
+    return db.execute(stmt).rowcount or 0
+
+
+def _lock_rollups(db: Session, wait: bool = True) -> bool:
+    """
+    Take the rollup advisory lock for the current transaction
+
+    Args:
+        wait: Block until the lock is free; otherwise return False if another
+            worker holds it
+    """
+    if wait:
+        db.execute(select(func.pg_advisory_xact_lock(USAGE_ROLLUP_LOCK_KEY)))
+        return True
+    return bool(db.execute(select(func.pg_try_advisory_xact_lock(USAGE_ROLLUP_LOCK_KEY))).scalar())
+
+
+def backfill_rollups() -> int:
+    """Build rollups from existing raw rows if the rollup table is empty"""
+    if not DB_AVAILABLE:
+        return 0
+    with get_db_context() as db:
+        _lock_rollups(db)
+        if db.query(APIRequestHourly.id).first() is not None:
+            return 0
+        # Stop at the current hour - its rows are being incremented by live writes
+        rows = rebuild_rollups(db, end=hour_start(datetime.now(timezone.utc)))
+        db.commit()
+        return rows
+
+
+def compact_raw_requests(retention_days: int = USAGE_RAW_RETENTION_DAYS) -> int:
+    """
+    Delete raw APIRequest rows older than the retention window
+
+    Works one hour at a time, oldest first: each hour is re-rolled from its
+    raw rows and those rows are deleted in the same transaction, under the
+    rollup advisory lock. Rollups stay exact even for rows written before
+    rollups existed, and compacted hours have no raw rows left to be
+    re-rolled from. If another worker holds the lock, this pass stops and
+    leaves the remaining hours to it.
+
+    Returns:
+        Number of raw rows deleted
+    """
+    if not DB_AVAILABLE:
+        return 0
+
+    cutoff = hour_start(datetime.now(timezone.utc) - timedelta(days=retention_days))
+    deleted = 0
+    with get_db_context() as db:
+        while True:
+            if not _lock_rollups(db, wait=False):
+                db.rollback()
+                break
+            oldest = db.query(func.min(APIRequest.request_timestamp)).filter(
+                APIRequest.request_timestamp < cutoff
+            ).scalar()
+            if oldest is None:
+                db.rollback()
+                break
+            start = hour_start(oldest)
+            end = min(start + timedelta(hours=1), cutoff)
+            rebuild_rollups(db, start=start, end=end)
+            deleted += db.query(APIRequest).filter(
+                APIRequest.request_timestamp >= start,
+                APIRequest.request_timestamp < end
+            ).delete(synchronize_session=False)
+            db.commit()
+    return deleted
+
+
+class UsageCompactionJob:
+    """Periodically compacts raw usage rows into hourly rollups"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def _loop(self, interval: int):
+        """Compact periodically until cancelled"""
+        while True:
+            try:
+                deleted = await asyncio.to_thread(compact_raw_requests)
+                if deleted:
+                    print(f"✓ Compacted {deleted} raw usage row(s) older than {USAGE_RAW_RETENTION_DAYS} days")
+            except Exception as e:
+                print(f"⚠️  Usage compaction failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def start(self, interval: int = USAGE_COMPACTION_INTERVAL):
+        """Backfill rollups if needed and start the compaction task"""
+        try:
+            rows = await asyncio.to_thread(backfill_rollups)
+            if rows:
+                print(f"✓ Backfilled {rows} hourly usage rollup row(s)")
+        except Exception as e:
+            print(f"⚠️  Usage rollup backfill failed: {e}")
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(interval))
+
+    async def stop(self):
+        """Stop the compaction task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global compaction job
+usage_compaction_job = UsageCompactionJob()
@@ -1,14 +1,27 @@
 """
 API Usage Tracking Service
 Tracks user API usage for monitoring and rate limiting
+
+Analytics are aggregated in the database: hour/day series come from the
+hourly rollup table (see usage_rollup.py), minute series from GROUP BY over
+raw rows within the retention window.
 """
-from datetime import datetime, date, timedelta, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, case
 from src.core import get_db_context, DB_AVAILABLE
-from src.core.models import APIUsage, APIRequest, User
+from src.core.models import APIUsage, APIRequest, APIRequestHourly, User
 from src.core.constants import DAILY_REQUEST_LIMIT, DAILY_REQUEST_LIMIT_UNAUTHENTICATED
+from src.services.quota_engine import quota_engine, principal_key
+from src.services.usage_rollup import record_hourly, rollup_user_id, utc_trunc
+
+# Bucket key format per grouping period
+BUCKET_FORMATS = {
+    "minute": "%Y-%m-%d %H:%M",
+    "hour": "%Y-%m-%d %H:00",
+    "day": "%Y-%m-%d",
+}
 
 
 class UsageTracker:
@@ -17,8 +30,13 @@ class UsageTracker:
     @staticmethod
     def get_today_start() -> datetime:
         """Get start of today in UTC"""
-        today = date.today()
-        return datetime.combine(today, datetime.min.time()).replace(tzinfo=timezone.utc)
+        return UsageTracker.get_day_start(datetime.now(timezone.utc))
+
+    @staticmethod
+    def get_day_start(moment: datetime) -> datetime:
+        """Start of the usage day containing `moment` (same day boundary as get_today_start)"""
+        day = moment.astimezone().date()
+        return datetime.combine(day, datetime.min.time()).replace(tzinfo=timezone.utc)
     
     @staticmethod
     def get_client_ip(request) -> Optional[str]:
@@ -39,89 +57,153 @@ class UsageTracker:
             return request.client.host
         return None
     
+    @staticmethod
+    def _find_today_usage(
+        db: Session,
+        user_id: Optional[int],
+        ip_address: Optional[str] = None,
+        guest_email: Optional[str] = None
+    ) -> Optional[APIUsage]:
+        """
+        Find today's APIUsage row for a principal
+
+        Guests with an email are matched by email first, then by IP address.
+        """
+        today = UsageTracker.get_today_start().date()
+        if user_id is not None:
+            return db.query(APIUsage).filter(
+                APIUsage.user_id == user_id,
+                func.date(APIUsage.usage_date) == today
+            ).first()
+
+        usage = None
+        if guest_email:
+            usage = db.query(APIUsage).filter(
+                APIUsage.user_id.is_(None),
+                APIUsage.guest_email == guest_email,
+                func.date(APIUsage.usage_date) == today
+            ).first()
+        if not usage and ip_address:
+            # Don't filter by guest_email here, to match any record for this IP
+            usage = db.query(APIUsage).filter(
+                APIUsage.user_id.is_(None),
+                APIUsage.ip_address == ip_address,
+                func.date(APIUsage.usage_date) == today
+            ).first()
+        return usage
+
+    @staticmethod
+    def _seed_count(
+        key: str,
+        db: Session,
+        user_id: Optional[int],
+        ip_address: Optional[str],
+        guest_email: Optional[str]
+    ) -> int:
+        """
+        Starting count for a principal that has no in-memory counter yet
+
+        Once the quota engine is warm, a missing counter means no usage today
+        (a guest that just added an email inherits its IP counter). Before the
+        first reconciliation, fall back to a single DB lookup.
+        """
+        if quota_engine.is_warm():
+            if guest_email and ip_address:
+                return quota_engine.peek(principal_key(None, ip_address)) or 0
+            return 0
+        usage = UsageTracker._find_today_usage(db, user_id, ip_address, guest_email)
+        count = usage.request_count if usage else 0
+        quota_engine.seed(key, count)
+        return count
+
+    @staticmethod
+    def _resolve_limit(
+        user_id: Optional[int],
+        is_default_llm: bool,
+        ip_address: Optional[str],
+        guest_email: Optional[str]
+    ) -> Tuple[Optional[str], Optional[Tuple[bool, int, int]]]:
+        """
+        Resolve the quota key for a request, or an immediate result
+
+        Returns:
+            Tuple of (principal_key, early_result); early_result is set when
+            the request is not subject to quota accounting
+        """
+        limit = DAILY_REQUEST_LIMIT_UNAUTHENTICATED if user_id is None else DAILY_REQUEST_LIMIT
+        if not DB_AVAILABLE:
+            # If database not available, allow all requests
+            return None, (True, 0, limit)
+
+        # If using custom API key (not default LLM), no limit
+        if not is_default_llm:
+            return None, (True, 0, -1)  # -1 means unlimited
+
+        key = principal_key(user_id, ip_address, guest_email)
+        if key is None:
+            # If no IP and no email, allow but warn (shouldn't happen)
+            return None, (True, 0, limit)
+        return key, None
+
     @staticmethod
     def check_daily_limit(user_id: Optional[int], db: Session, is_default_llm: bool = False, ip_address: Optional[str] = None, guest_email: Optional[str] = None) -> Tuple[bool, int, int]:
         """
-        Check if user has exceeded daily request limit
-        
+        Check if user has exceeded daily request limit (read-only)
+
+        Served from the in-memory quota engine; does not count the request.
+        Use admit_request() on the chat path to check and count atomically.
+
         Args:
             user_id: User ID (None for anonymous users)
             db: Database session
             is_default_llm: True if using default DeepSeek LLM, False for custom API keys (unlimited)
             ip_address: IP address for anonymous users (required when user_id is None)
             guest_email: Optional email for guest users tracking
-            
+
         Returns:
-            Tuple of (is_allowed, current_count, limit)
+            Tuple of (is_allowed, current_count, remaining)
         """
-        if not DB_AVAILABLE:
-            # If database not available, allow all requests
-            limit = DAILY_REQUEST_LIMIT_UNAUTHENTICATED if user_id is None else DAILY_REQUEST_LIMIT
-            return True, 0, limit
-        
-        # If using custom API key (not default LLM), no limit
-        if not is_default_llm:
-            return True, 0, -1  # -1 means unlimited
-        
+        key, early_result = UsageTracker._resolve_limit(user_id, is_default_llm, ip_address, guest_email)
+        if early_result:
+            return early_result
+
+        limit = DAILY_REQUEST_LIMIT_UNAUTHENTICATED if user_id is None else DAILY_REQUEST_LIMIT
         try:
-            today_start = UsageTracker.get_today_start()
-            
-            # Determine the limit based on authentication status and guest email
-            if user_id is None:
-                # Unauthenticated user
-                # If guest email provided, they get 10 requests/day (as per requirement)
-                # If no email (truly anonymous), defaulting to 5 or keeping same strict limit?
-                # User requirement: "without logni also user can use chat but limite par day is 10"
-                # And "when a user without login to chat then for monetoing get a dialog box to get email"
-                
-                limit = 10 # Explicit 10/day limit for unauthenticated users
-                
-                if guest_email:
-                     # First try to find by email
-                    usage = db.query(APIUsage).filter(
-                        APIUsage.user_id.is_(None),
-                        APIUsage.guest_email == guest_email,
-                        func.date(APIUsage.usage_date) == today_start.date()
-                    ).first()
-                    
-                    # If not found by email, try to find by IP and merge/upgrade
-                    if not usage and ip_address:
-                        usage = db.query(APIUsage).filter(
-                            APIUsage.user_id.is_(None),
-                            APIUsage.ip_address == ip_address,
-                            func.date(APIUsage.usage_date) == today_start.date()
-                        ).first()
-                elif ip_address:
-                    # Query by IP address for anonymous users without email
-                    usage = db.query(APIUsage).filter(
-                        APIUsage.user_id.is_(None),
-                         # Don't filter by guest_email is None here, to match any record for this IP
-                        APIUsage.ip_address == ip_address,
-                        func.date(APIUsage.usage_date) == today_start.date()
-                    ).first()
-                else:
-                    # If no IP and no email, allow but warn (shouldn't happen)
-                    return True, 0, limit
-            else:
-                # Authenticated user - 100 requests per day
-                limit = DAILY_REQUEST_LIMIT
-                # Query by user_id for authenticated users
-                usage = db.query(APIUsage).filter(
-                    APIUsage.user_id == user_id,
-                    func.date(APIUsage.usage_date) == today_start.date()
-                ).first()
-            
-            current_count = usage.request_count if usage else 0
-            is_allowed = current_count < limit
-            remaining = max(0, limit - current_count)
-            
-            return is_allowed, current_count, remaining
+            current_count = quota_engine.peek(key)
+            if current_count is None:
+                current_count = UsageTracker._seed_count(key, db, user_id, ip_address, guest_email)
+            return current_count < limit, current_count, max(0, limit - current_count)
         except Exception as e:
             print(f"⚠️  Error checking daily limit: {e}")
             # On error, allow the request
-            limit = 10 if user_id is None else DAILY_REQUEST_LIMIT
             return True, 0, limit
-    
+
+    @staticmethod
+    def admit_request(user_id: Optional[int], db: Session, is_default_llm: bool = False, ip_address: Optional[str] = None, guest_email: Optional[str] = None) -> Tuple[bool, int, int]:
+        """
+        Atomically check the daily limit and count the request if allowed
+
+        Same arguments and return value as check_daily_limit(); current_count
+        is the count before this request. The DB row is still written later by
+        record_request() and picked up by quota reconciliation.
+        """
+        key, early_result = UsageTracker._resolve_limit(user_id, is_default_llm, ip_address, guest_email)
+        if early_result:
+            return early_result
+
+        limit = DAILY_REQUEST_LIMIT_UNAUTHENTICATED if user_id is None else DAILY_REQUEST_LIMIT
+        try:
+            seed = 0
+            if quota_engine.peek(key) is None:
+                seed = UsageTracker._seed_count(key, db, user_id, ip_address, guest_email)
+            is_allowed, current_count = quota_engine.check_and_increment(key, limit, seed=seed)
+            used = current_count + 1 if is_allowed else current_count
+            return is_allowed, current_count, max(0, limit - used)
+        except Exception as e:
+            print(f"⚠️  Error admitting request: {e}")
+            # On error, allow the request
+            return True, 0, limit
+
     @staticmethod
     def record_request(
         user_id: Optional[int],
@@ -135,7 +217,8 @@ class UsageTracker:
         session_id: Optional[str] = None,
         success: bool = True,
         ip_address: Optional[str] = None,
-        guest_email: Optional[str] = None
+        guest_email: Optional[str] = None,
+        timestamp: Optional[datetime] = None
     ) -> bool:
         """
         Record an API request (both daily aggregate and individual request)
@@ -153,6 +236,8 @@ class UsageTracker:
             success: Whether the request was successful
             ip_address: Client IP
             guest_email: Optional guest email for unauthenticated users
+            timestamp: When the request happened (default: now); decides
+                the hourly rollup bucket and the usage day
             
         Returns:
             True if recorded successfully
@@ -161,104 +246,170 @@ class UsageTracker:
             return False
         
         try:
-            from datetime import datetime, timezone
-            request_timestamp = datetime.now(timezone.utc)
-            today_start = UsageTracker.get_today_start()
-            total_tokens = input_tokens + output_tokens + embedding_tokens
-            
-            # Record individual request
-            if APIRequest:
-                api_request = APIRequest(
-                    user_id=user_id,
-                    request_timestamp=request_timestamp,
-                    llm_provider=llm_provider,
-                    llm_model=llm_model,
-                    input_tokens=input_tokens,
-                    output_tokens=output_tokens,
-                    embedding_tokens=embedding_tokens,
-                    total_tokens=total_tokens,
-                    mode=mode,
-                    session_id=session_id,
-                    success=success,
-                    guest_email=guest_email if user_id is None else None
-                )
-                db.add(api_request)
-            
-            # Get or create today's usage record (for daily aggregates)
-            if user_id is None:
-                # For unauthenticated users
-                # For unauthenticated users
-                if guest_email:
-                    # First try to find by email
-                    usage = db.query(APIUsage).filter(
-                        APIUsage.user_id.is_(None),
-                        APIUsage.guest_email == guest_email,
-                        func.date(APIUsage.usage_date) == today_start.date()
-                    ).first()
-                    
-                    # If not found by email, try to find by IP and upgrade it
-                    if not usage and ip_address:
-                        usage = db.query(APIUsage).filter(
-                            APIUsage.user_id.is_(None),
-                            APIUsage.ip_address == ip_address,
-                            func.date(APIUsage.usage_date) == today_start.date()
-                        ).first()
-                        
-                        # If found by IP but no email, update it with the email
-                        if usage and not usage.guest_email:
-                            usage.guest_email = guest_email
-                elif ip_address:
+            if not UsageTracker._apply_request(
+                db, user_id, llm_provider, llm_model, input_tokens, output_tokens,
+                embedding_tokens, mode, session_id, success, ip_address, guest_email, timestamp
+            ):
+                return False
+            db.commit()
+            return True
+        except Exception as e:
+            print(f"⚠️  Error recording usage: {e}")
+            db.rollback()
+            return False
+
+    @staticmethod
+    def record_requests(records: List[Dict], db: Session) -> int:
+        """
+        Record many API requests in one transaction
+
+        Args:
+            records: Keyword arguments of record_request() (without db), one dict per request
+            db: Database session
+
+        Returns:
+            Number of requests recorded; a record that fails is skipped
+            without losing the rest of the batch
+        """
+        if not DB_AVAILABLE or not records:
+            return 0
+
+        recorded = 0
+        for record in records:
+            # Savepoint per record: an unattributable or failing record is
+            # rolled back on its own
+            savepoint = db.begin_nested()
+            try:
+                if UsageTracker._apply_request(db, **record):
+                    savepoint.commit()
+                    recorded += 1
+                else:
+                    savepoint.rollback()
+            except Exception as e:
+                print(f"⚠️  Error recording usage: {e}")
+                savepoint.rollback()
+        try:
+            db.commit()
+        except Exception as e:
+            print(f"⚠️  Error recording usage batch: {e}")
+            db.rollback()
+            return 0
+        return recorded
+
+    @staticmethod
+    def _apply_request(
+        db: Session,
+        user_id: Optional[int],
+        llm_provider: Optional[str] = None,
+        llm_model: Optional[str] = None,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        embedding_tokens: int = 0,
+        mode: Optional[str] = None,
+        session_id: Optional[str] = None,
+        success: bool = True,
+        ip_address: Optional[str] = None,
+        guest_email: Optional[str] = None,
+        timestamp: Optional[datetime] = None
+    ) -> bool:
+        """Add one request's rows to the session (no commit); False if it can't be attributed"""
+        # Queued/batched events are written later: bucket by when they happened
+        request_timestamp = timestamp or datetime.now(timezone.utc)
+        today_start = UsageTracker.get_day_start(request_timestamp)
+        total_tokens = input_tokens + output_tokens + embedding_tokens
+        
+        # Record individual request
+        if APIRequest:
+            api_request = APIRequest(
+                user_id=user_id,
+                request_timestamp=request_timestamp,
+                llm_provider=llm_provider,
+                llm_model=llm_model,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                embedding_tokens=embedding_tokens,
+                total_tokens=total_tokens,
+                mode=mode,
+                session_id=session_id,
+                success=success,
+                guest_email=guest_email if user_id is None else None
+            )
+            db.add(api_request)
+            # Keep the hourly rollup in step (same transaction)
+            record_hourly(
+                db, user_id, request_timestamp,
+                input_tokens, output_tokens, embedding_tokens, total_tokens, success
+            )
+        
+        # Get or create today's usage record (for daily aggregates)
+        if user_id is None:
+            # For unauthenticated users
+            # For unauthenticated users
+            if guest_email:
+                # First try to find by email
+                usage = db.query(APIUsage).filter(
+                    APIUsage.user_id.is_(None),
+                    APIUsage.guest_email == guest_email,
+                    func.date(APIUsage.usage_date) == today_start.date()
+                ).first()
+                
+                # If not found by email, try to find by IP and upgrade it
+                if not usage and ip_address:
                     usage = db.query(APIUsage).filter(
                         APIUsage.user_id.is_(None),
-                        # Don't filter by guest_email here, find any record for this IP
-                        # This covers cases where they might have added email previously
                         APIUsage.ip_address == ip_address,
                         func.date(APIUsage.usage_date) == today_start.date()
                     ).first()
-                else:
-                    return False
-            else:
-                # For authenticated users, query by user_id
+                    
+                    # If found by IP but no email, update it with the email
+                    if usage and not usage.guest_email:
+                        usage.guest_email = guest_email
+            elif ip_address:
                 usage = db.query(APIUsage).filter(
-                    APIUsage.user_id == user_id,
+                    APIUsage.user_id.is_(None),
+                    # Don't filter by guest_email here, find any record for this IP
+                    # This covers cases where they might have added email previously
+                    APIUsage.ip_address == ip_address,
                     func.date(APIUsage.usage_date) == today_start.date()
                 ).first()
-            
-            if usage:
-                # Update existing record
-                usage.request_count += 1
-                usage.input_tokens += input_tokens
-                usage.output_tokens += output_tokens
-                usage.embedding_tokens += embedding_tokens
-                if llm_provider:
-                    usage.llm_provider = llm_provider
-                if llm_model:
-                    usage.llm_model = llm_model
-                if mode:
-                    usage.mode = mode
             else:
-                # Create new record
-                usage = APIUsage(
-                    user_id=user_id,
-                    ip_address=ip_address if user_id is None else None,
-                    usage_date=today_start,
-                    request_count=1,
-                    llm_provider=llm_provider,
-                    llm_model=llm_model,
-                    input_tokens=input_tokens,
-                    output_tokens=output_tokens,
-                    embedding_tokens=embedding_tokens,
-                    mode=mode,
-                    guest_email=guest_email if user_id is None else None
-                )
-                db.add(usage)
-            
-            db.commit()
-            return True
-        except Exception as e:
-            print(f"⚠️  Error recording usage: {e}")
-            db.rollback()
-            return False
+                return False
+        else:
+            # For authenticated users, query by user_id
+            usage = db.query(APIUsage).filter(
+                APIUsage.user_id == user_id,
+                func.date(APIUsage.usage_date) == today_start.date()
+            ).first()
+        
+        if usage:
+            # Update existing record
+            usage.request_count += 1
+            usage.input_tokens += input_tokens
+            usage.output_tokens += output_tokens
+            usage.embedding_tokens += embedding_tokens
+            if llm_provider:
+                usage.llm_provider = llm_provider
+            if llm_model:
+                usage.llm_model = llm_model
+            if mode:
+                usage.mode = mode
+        else:
+            # Create new record
+            usage = APIUsage(
+                user_id=user_id,
+                ip_address=ip_address if user_id is None else None,
+                usage_date=today_start,
+                request_count=1,
+                llm_provider=llm_provider,
+                llm_model=llm_model,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                embedding_tokens=embedding_tokens,
+                mode=mode,
+                guest_email=guest_email if user_id is None else None
+            )
+            db.add(usage)
+        return True
     
     @staticmethod
     def get_user_usage_stats(
@@ -404,17 +555,46 @@ class UsageTracker:
             today_start = UsageTracker.get_today_start()
             start_date = today_start - timedelta(days=days - 1)
             
-            # Get all users with usage in the period
-            users_with_usage = db.query(User).join(APIUsage).filter(
+            limit = DAILY_REQUEST_LIMIT
+            today = today_start.date()
+
+            # One query for every user's daily rows in the period (users x days,
+            # independent of request volume) instead of two queries per user
+            rows = db.query(APIUsage, User).join(User, APIUsage.user_id == User.id).filter(
                 APIUsage.usage_date >= start_date
-            ).distinct().all()
-            
+            ).order_by(APIUsage.user_id, APIUsage.usage_date.desc()).all()
+
             stats = []
-            for user in users_with_usage:
-                user_stats = UsageTracker.get_user_usage_stats(user.id, db, days)
-                user_stats["user"] = user.to_dict()
-                stats.append(user_stats)
-            
+            by_user: Dict[int, Dict] = {}
+            for usage, user in rows:
+                user_stats = by_user.get(user.id)
+                if user_stats is None:
+                    user_stats = by_user[user.id] = {
+                        "today": {"request_count": 0, "remaining": limit, "limit": limit,
+                                  "input_tokens": 0, "output_tokens": 0, "embedding_tokens": 0,
+                                  "llm_provider": None, "llm_model": None},
+                        "recent_days": [],
+                        "total_requests": 0,
+                        "total_tokens": 0,
+                        "days_analyzed": days,
+                        "user": user.to_dict(),
+                    }
+                    stats.append(user_stats)
+                if usage.usage_date.date() == today:
+                    user_stats["today"] = {
+                        "request_count": usage.request_count,
+                        "remaining": max(0, limit - usage.request_count),
+                        "limit": limit,
+                        "input_tokens": usage.input_tokens,
+                        "output_tokens": usage.output_tokens,
+                        "embedding_tokens": usage.embedding_tokens,
+                        "llm_provider": usage.llm_provider,
+                        "llm_model": usage.llm_model,
+                    }
+                user_stats["recent_days"].append(usage.to_dict())
+                user_stats["total_requests"] += usage.request_count
+                user_stats["total_tokens"] += usage.input_tokens + usage.output_tokens + usage.embedding_tokens
+
             return stats
         except Exception as e:
             print(f"⚠️  Error getting all users usage stats: {e}")
@@ -449,84 +629,77 @@ class UsageTracker:
             }
         
         try:
-            from datetime import datetime, timedelta, timezone
             today_start = UsageTracker.get_today_start()
             start_date = today_start - timedelta(days=days - 1)
-            
-            # Get all individual requests
-            if user_id is None:
-                if not ip_address:
-                    return {
-                        "requests": [],
-                        "total_requests": 0,
-                        "group_by": group_by,
-                        "days": days
-                    }
-                # For anonymous users, we need to track by IP - but APIRequest doesn't have IP field
-                # For now, query all anonymous requests (user_id is None)
-                # In future, we might add ip_address to APIRequest as well
-                requests = db.query(APIRequest).filter(
-                    APIRequest.user_id.is_(None),
-                    APIRequest.request_timestamp >= start_date
-                ).order_by(APIRequest.request_timestamp.asc()).all()
+
+            if user_id is None and not ip_address:
+                return {
+                    "requests": [],
+                    "total_requests": 0,
+                    "group_by": group_by,
+                    "days": days
+                }
+            # APIRequest has no IP field, so anonymous stats cover all
+            # anonymous requests (user_id is None / rollup user 0)
+            group_by_key = group_by if group_by in BUCKET_FORMATS else "day"
+
+            if group_by_key == "minute":
+                # Finer than the rollups - aggregate raw rows (retention window only)
+                source = APIRequest
+                bucket = utc_trunc("minute", APIRequest.request_timestamp)
+                user_filter = (
+                    APIRequest.user_id.is_(None) if user_id is None else APIRequest.user_id == user_id
+                )
+                time_filter = APIRequest.request_timestamp >= start_date
+                columns = [
+                    func.count().label("request_count"),
+                    func.sum(APIRequest.total_tokens).label("total_tokens"),
+                    func.sum(APIRequest.input_tokens).label("input_tokens"),
+                    func.sum(APIRequest.output_tokens).label("output_tokens"),
+                    func.sum(APIRequest.embedding_tokens).label("embedding_tokens"),
+                    func.sum(case((and_(APIRequest.success.is_(True), APIRequest.total_tokens > 0), 1), else_=0)).label("valid_requests"),
+                ]
             else:
-                requests = db.query(APIRequest).filter(
-                    APIRequest.user_id == user_id,
-                    APIRequest.request_timestamp >= start_date
-                ).order_by(APIRequest.request_timestamp.asc()).all()
-            
-            # Group requests by time period
-            grouped_requests = {}
-            for req in requests:
-                timestamp = req.request_timestamp
-                
-                # Group by selected period
-                if group_by == "hour":
-                    key = timestamp.strftime("%Y-%m-%d %H:00")
-                elif group_by == "day":
-                    key = timestamp.strftime("%Y-%m-%d")
-                elif group_by == "minute":
-                    key = timestamp.strftime("%Y-%m-%d %H:%M")
-                else:
-                    key = timestamp.strftime("%Y-%m-%d")
-                
-                if key not in grouped_requests:
-                    grouped_requests[key] = {
-                        "timestamp": key,
-                        "request_count": 0,
-                        "total_tokens": 0,
-                        "input_tokens": 0,
-                        "output_tokens": 0,
-                        "embedding_tokens": 0,
-                        "valid_requests": 0,
-                        "invalid_requests": 0,
-                        "avg_tokens_per_request": 0,
-                    }
-                
-                grouped_requests[key]["request_count"] += 1
-                grouped_requests[key]["total_tokens"] += req.total_tokens
-                grouped_requests[key]["input_tokens"] += req.input_tokens
-                grouped_requests[key]["output_tokens"] += req.output_tokens
-                grouped_requests[key]["embedding_tokens"] += req.embedding_tokens
-                
-                if req.success and req.total_tokens > 0:
-                    grouped_requests[key]["valid_requests"] += 1
-                else:
-                    grouped_requests[key]["invalid_requests"] += 1
-            
-            # Calculate averages and format
+                source = APIRequestHourly
+                bucket = utc_trunc(group_by_key, APIRequestHourly.bucket_start)
+                user_filter = APIRequestHourly.user_id == rollup_user_id(user_id)
+                time_filter = APIRequestHourly.bucket_start >= start_date
+                columns = [
+                    func.sum(APIRequestHourly.request_count).label("request_count"),
+                    func.sum(APIRequestHourly.total_tokens).label("total_tokens"),
+                    func.sum(APIRequestHourly.input_tokens).label("input_tokens"),
+                    func.sum(APIRequestHourly.output_tokens).label("output_tokens"),
+                    func.sum(APIRequestHourly.embedding_tokens).label("embedding_tokens"),
+                    func.sum(APIRequestHourly.valid_requests).label("valid_requests"),
+                ]
+
+            rows = db.query(bucket.label("bucket"), *columns).select_from(source).filter(
+                user_filter, time_filter
+            ).group_by(bucket).order_by(bucket).all()
+
+            fmt = BUCKET_FORMATS[group_by_key]
             requests_list = []
-            for key in sorted(grouped_requests.keys()):
-                group = grouped_requests[key]
-                if group["request_count"] > 0:
-                    group["avg_tokens_per_request"] = round(
-                        group["total_tokens"] / group["request_count"]
-                    )
-                requests_list.append(group)
-            
+            total_requests = 0
+            for row in rows:
+                request_count = int(row.request_count or 0)
+                total_tokens = int(row.total_tokens or 0)
+                valid_requests = int(row.valid_requests or 0)
+                total_requests += request_count
+                requests_list.append({
+                    "timestamp": row.bucket.astimezone(timezone.utc).strftime(fmt),
+                    "request_count": request_count,
+                    "total_tokens": total_tokens,
+                    "input_tokens": int(row.input_tokens or 0),
+                    "output_tokens": int(row.output_tokens or 0),
+                    "embedding_tokens": int(row.embedding_tokens or 0),
+                    "valid_requests": valid_requests,
+                    "invalid_requests": request_count - valid_requests,
+                    "avg_tokens_per_request": round(total_tokens / request_count) if request_count else 0,
+                })
+
             return {
                 "requests": requests_list,
-                "total_requests": len(requests),
+                "total_requests": total_requests,
                 "group_by": group_by,
                 "days": days
             }
@@ -565,22 +738,27 @@ class UsageTracker:
             }
         
         try:
-            from datetime import datetime, timedelta
             today_start = UsageTracker.get_today_start()
             start_date = today_start - timedelta(days=days - 1)
-            
-            # Query all requests within the time range
-            requests = db.query(APIRequest).filter(
-                APIRequest.request_timestamp >= start_date
-            ).order_by(APIRequest.request_timestamp.asc()).all()
-            
-            # Group requests by time period
-            grouped_data = {}
-            
+
+            # Daily totals across all users, summed from the hourly rollups
+            bucket = utc_trunc("day", APIRequestHourly.bucket_start)
+            rows = db.query(
+                bucket.label("bucket"),
+                func.sum(APIRequestHourly.request_count).label("requests"),
+                func.sum(APIRequestHourly.total_tokens).label("tokens"),
+                func.sum(APIRequestHourly.input_tokens).label("input_tokens"),
+                func.sum(APIRequestHourly.output_tokens).label("output_tokens"),
+                func.sum(APIRequestHourly.embedding_tokens).label("embedding_tokens"),
+                func.sum(APIRequestHourly.error_count).label("errors"),
+            ).filter(
+                APIRequestHourly.bucket_start >= start_date
+            ).group_by(bucket).all()
+
             # Initialize all days in range with 0 to ensure continuous chart
+            grouped_data = {}
             for i in range(days):
-                current_date = start_date + timedelta(days=i)
-                date_key = current_date.strftime("%Y-%m-%d")
+                date_key = (start_date + timedelta(days=i)).strftime("%Y-%m-%d")
                 grouped_data[date_key] = {
                     "date": date_key,
                     "requests": 0,
@@ -591,21 +769,18 @@ class UsageTracker:
                     "errors": 0
                 }
 
-            for req in requests:
-                timestamp = req.request_timestamp
-                # For now we only support daily grouping for the main chart
-                key = timestamp.strftime("%Y-%m-%d")
-                
+            for row in rows:
+                key = row.bucket.astimezone(timezone.utc).strftime("%Y-%m-%d")
                 if key in grouped_data:
-                    grouped_data[key]["requests"] += 1
-                    grouped_data[key]["tokens"] += req.total_tokens
-                    grouped_data[key]["input_tokens"] += req.input_tokens
-                    grouped_data[key]["output_tokens"] += req.output_tokens
-                    grouped_data[key]["embedding_tokens"] += req.embedding_tokens
-                    
-                    if not req.success:
-                        grouped_data[key]["errors"] += 1
-            
+                    grouped_data[key].update({
+                        "requests": int(row.requests or 0),
+                        "tokens": int(row.tokens or 0),
+                        "input_tokens": int(row.input_tokens or 0),
+                        "output_tokens": int(row.output_tokens or 0),
+                        "embedding_tokens": int(row.embedding_tokens or 0),
+                        "errors": int(row.errors or 0),
+                    })
+
             # Convert to list and sort
             history_list = sorted(grouped_data.values(), key=lambda x: x["date"])
             
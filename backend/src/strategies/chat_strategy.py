@@ -58,6 +58,7 @@ class RAGChatStrategy(ChatStrategy):
 
         # Retrieve context
         if ConditionalHelpers.should_use_advanced_rag(params.user_id):
+            await advanced_rag_system.ready()
             retrieved_docs = advanced_rag_system.retrieve(
                 query=params.message,
                 user_id=params.user_id,
@@ -76,6 +77,7 @@ class RAGChatStrategy(ChatStrategy):
 
             context = "\n".join(context_parts) if context_parts else "No relevant documents found."
         else:
+            await rag_system.ready()
             context = rag_system.retrieve_context(params.message)
 
         # Create LLM
@@ -133,8 +135,8 @@ class AgentChatStrategy(ChatStrategy):
 
     async def process(self, params: ChatRequestParams, context: ChatContext) -> ChatResponseData:
         """Process Agent mode chat"""
-        from langchain.agents import create_agent
         from langchain_core.messages import HumanMessage
+        from src.services.agent_cache import agent_cache
         from src.services.tool_manager import ToolManager
         from src.services.llm_provider_factory import LLMProviderFactory
         from src.services.chat_helpers import ChatHistoryManager, AgentPromptBuilder, ContentNormalizer
@@ -184,10 +186,9 @@ class AgentChatStrategy(ChatStrategy):
         # Create agent with tools
         system_prompt = AgentPromptBuilder.create_agent_prompt(params.agent_prompt)
         sanitized_tools = sanitize_tools_for_gemini(all_tools, context.llm_config.get("type", ""))
-        agent = create_agent(
-            model=llm,
-            tools=sanitized_tools,
-            system_prompt=system_prompt
+        agent = agent_cache.get_agent(
+            llm, context.llm_config, sanitized_tools, system_prompt,
+            streaming=False, temperature=DEFAULT_LLM_TEMPERATURE
         )
 
         # Get history and run agent
@@ -243,6 +244,7 @@ class AgentChatStrategy(ChatStrategy):
             params.session_id, params.user_id, params.db
         )
 
+        await rag_system.ready()
         context_text = rag_system.retrieve_context(params.message)
         system_message = AgentPromptBuilder.create_agent_prompt(params.agent_prompt)
         system_message = system_message.replace("{context}", context_text)
@@ -283,59 +285,23 @@ class AgentChatStrategy(ChatStrategy):
 
     async def _run_agent(self, agent, messages: list) -> tuple[str, list]:
         """Run agent and extract answer"""
-        from src.services.chat_helpers import ContentNormalizer
+        from src.services.agent_stream import stream_agent_events
 
         final_answer = ""
         tools_used = []
 
-        async for event in agent.astream({"messages": messages}, stream_mode="values"):
-            event_messages = event.get("messages", [])
-            normalized_messages = self._normalize_messages(event_messages)
-            event["messages"] = normalized_messages
-
-            last_msg = normalized_messages[-1] if normalized_messages else None
-
-            from langchain_core.messages import AIMessage
-            if isinstance(last_msg, AIMessage):
-                if hasattr(last_msg, "tool_calls") and last_msg.tool_calls:
-                    for call in last_msg.tool_calls:
-                        tools_used.append(call.get('name', 'unknown'))
-                else:
-                    final_answer = ContentNormalizer.normalize_content(last_msg.content)
+        async for event in stream_agent_events(agent, messages):
+            if event.kind == "tool_start":
+                tools_used.append(event.tool_name or 'unknown')
+            elif event.kind == "ai_message" and not getattr(event.message, "tool_calls", None):
+                final_answer = event.text
 
         return final_answer, tools_used
 
     def _normalize_messages(self, messages):
         """Normalize messages"""
-        from src.services.chat_helpers import ContentNormalizer
-        from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
-
-        normalized = []
-        for msg in messages:
-            if not isinstance(msg, BaseMessage):
-                normalized.append(msg)
-                continue
-
-            if isinstance(msg.content, str):
-                normalized.append(msg)
-                continue
-
-            normalized_content = ContentNormalizer.normalize_content(msg.content)
-
-            if isinstance(msg, HumanMessage):
-                normalized.append(HumanMessage(content=normalized_content))
-            elif isinstance(msg, AIMessage):
-                new_msg = AIMessage(content=normalized_content)
-                if hasattr(msg, 'tool_calls'):
-                    new_msg.tool_calls = msg.tool_calls
-                normalized.append(new_msg)
-            elif isinstance(msg, SystemMessage):
-                normalized.append(SystemMessage(content=normalized_content))
-            else:
-                msg.content = normalized_content
-                normalized.append(msg)
-
-        return normalized
+        from src.services.message_normalizer import normalize_messages
+        return normalize_messages(messages)
 
     def get_mode(self) -> str:
         return "agent"
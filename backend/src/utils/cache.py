@@ -1,54 +1,359 @@
 """
-Simple in-memory cache with TTL
+In-memory cache with LRU + TTL eviction, size bounds and stampede protection
+Caches are grouped into namespaces, each with its own entry/memory budget
+and hit/miss metrics. Concurrent misses for the same key are coalesced so
+only one caller computes the value.
 """
-from typing import Optional, TypeVar, Callable
-from datetime import datetime, timedelta
+import asyncio
+import sys
+import threading
 import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
 
 T = TypeVar('T')
 
+# Sentinel for "not in cache" (None is a valid cached value)
+_MISSING = object()
+# Result given to coalesced waiters when the computing caller was cancelled
+_OWNER_CANCELLED = object()
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Rough memory footprint of a value in bytes
+
+    Walks containers a few levels deep; good enough for enforcing budgets,
+    not an exact accounting.
+    """
+    size = sys.getsizeof(value)
+    if _depth >= 3:
+        return size
+    if isinstance(value, dict):
+        size += sum(
+            estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+            for k, v in value.items()
+        )
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _depth + 1) for item in value)
+    return size
+
+
+class CacheStats:
+    """Hit/miss/eviction counters for a cache namespace"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    def to_dict(self) -> dict:
+        """Convert stats to dictionary"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "coalesced": self.coalesced,
+        }
+
+
+class CacheBackend:
+    """
+    Storage interface for a cache namespace
+
+    A shared implementation (e.g. Redis) can be passed to Cache(backend=...);
+    it is then responsible for its own eviction policy.
+    """
+
+    def get(self, key: str) -> Any:
+        """Get a value, or _MISSING if absent or expired"""
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        """Store a value with a TTL"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        """Delete a key"""
+        raise NotImplementedError
+
+    def clear(self):
+        """Delete all keys"""
+        raise NotImplementedError
+
+    def info(self) -> dict:
+        """Size information for metrics"""
+        return {}
+
+
+class LocalCacheBackend(CacheBackend):
+    """
+    In-process LRU cache with TTL, entry-count and byte budgets
+
+    Expired entries are dropped on read; never-read entries age out of the
+    least recently used end once the budget is reached.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: Optional[int] = None,
+        stats: Optional[CacheStats] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = stats or CacheStats()
+        self._lock = threading.Lock()
+        # key -> (expires_at, size, value), least recently used first
+        self._data: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+
+    def _remove(self, key: str):
+        """Remove a key and update accounting (caller must hold the lock)"""
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def _enforce_budget(self, now: float):
+        """Evict from the least recently used end until within budget (caller must hold the lock)"""
+        while self._data and (
+            len(self._data) > self.max_entries
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            key, (expires_at, _, _) = next(iter(self._data.items()))
+            self._remove(key)
+            if expires_at <= now:
+                self.stats.expirations += 1
+            else:
+                self.stats.evictions += 1
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= now:
+                self._remove(key)
+                self.stats.expirations += 1
+                return _MISSING
+            self._data.move_to_end(key)
+            return entry[2]
+
+    def set(self, key, value, ttl_seconds):
+        now = time.monotonic()
+        size = estimate_size(value) if self.max_bytes is not None else 0
+        with self._lock:
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Larger than the whole budget - don't cache it
+                return
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (now + ttl_seconds, size, value)
+            self._bytes += size
+            self._enforce_budget(now)
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def info(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
+
 
 class Cache:
-    """Simple in-memory cache with expiration"""
-    
-    def __init__(self, default_ttl_seconds: int = 300):
-        self._cache: dict = {}
+    """In-memory cache with expiration, LRU bounds and single-flight loading"""
+
+    def __init__(
+        self,
+        default_ttl_seconds: int = 300,
+        max_entries: int = 10000,
+        max_bytes: Optional[int] = None,
+        backend: Optional[CacheBackend] = None,
+        name: str = "default"
+    ):
+        self.name = name
         self.default_ttl = default_ttl_seconds
-    
-    def get(self, key: str) -> Optional[any]:
+        self.stats = CacheStats()
+        self.backend = backend or LocalCacheBackend(max_entries, max_bytes, self.stats)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._sync_inflight: Dict[str, threading.Event] = {}
+        self._sync_lock = threading.Lock()
+
+    def _lookup(self, key: str) -> Any:
+        """Get a value or _MISSING, recording hit/miss"""
+        value = self.backend.get(key)
+        if value is _MISSING:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
         """Get value from cache"""
-        if key not in self._cache:
-            return None
-        
-        entry = self._cache[key]
-        if time.time() > entry['expires_at']:
-            del self._cache[key]
-            return None
-        
-        return entry['value']
-    
-    def set(self, key: str, value: any, ttl_seconds: Optional[int] = None):
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None):
         """Set value in cache"""
         ttl = ttl_seconds or self.default_ttl
-        self._cache[key] = {
-            'value': value,
-            'expires_at': time.time() + ttl
-        }
-    
+        self.backend.set(key, value, ttl)
+
     def delete(self, key: str):
         """Delete key from cache"""
-        if key in self._cache:
-            del self._cache[key]
-    
+        self.backend.delete(key)
+
     def clear(self):
         """Clear all cache"""
-        self._cache.clear()
-    
+        self.backend.clear()
+
     def has(self, key: str) -> bool:
         """Check if key exists and is not expired"""
-        return self.get(key) is not None
+        return self.backend.get(key) is not _MISSING
 
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[T]],
+        ttl_seconds: Optional[int] = None
+    ) -> T:
+        """
+        Get a value, computing it on miss
 
-# Global cache instance
-cache = Cache()
+        Concurrent callers missing on the same key share a single call to
+        compute(); if it raises, every waiter gets the exception and nothing
+        is cached. If the computing caller is cancelled (e.g. its client
+        disconnected), the waiters are not: one of them computes instead.
+
+        Args:
+            key: Cache key
+            compute: Async callable producing the value
+            ttl_seconds: TTL override
+
+        Returns:
+            Cached or freshly computed value
+        """
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats.coalesced += 1
+            value = await asyncio.shield(inflight)
+            if value is _OWNER_CANCELLED:
+                return await self.get_or_compute(key, compute, ttl_seconds)
+            return value
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.set_result(_OWNER_CANCELLED)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved if nobody else was waiting
+            future.exception()
+            raise
+        else:
+            self.set(key, value, ttl_seconds)
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
 
+    def get_or_compute_sync(
+        self,
+        key: str,
+        compute: Callable[[], T],
+        ttl_seconds: Optional[int] = None
+    ) -> T:
+        """
+        Blocking variant of get_or_compute for sync call sites
+
+        Threads missing on the same key wait for the first one's result
+        instead of computing it again.
+        """
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        with self._sync_lock:
+            event = self._sync_inflight.get(key)
+            owner = event is None
+            if owner:
+                event = threading.Event()
+                self._sync_inflight[key] = event
+
+        if not owner:
+            self.stats.coalesced += 1
+            event.wait()
+            value = self.backend.get(key)
+            if value is not _MISSING:
+                return value
+            # The owner failed - compute ourselves
+            return compute()
+
+        try:
+            value = compute()
+            self.set(key, value, ttl_seconds)
+            return value
+        finally:
+            with self._sync_lock:
+                self._sync_inflight.pop(key, None)
+            event.set()
+
+    def metrics(self) -> dict:
+        """Hit/miss metrics and size information"""
+        return {"namespace": self.name, **self.stats.to_dict(), **self.backend.info()}
+
+
+# Registry of cache namespaces
+_namespaces: Dict[str, Cache] = {}
+_namespaces_lock = threading.Lock()
+
+
+def get_cache(
+    namespace: str,
+    default_ttl_seconds: int = 300,
+    max_entries: int = 10000,
+    max_bytes: Optional[int] = None,
+    backend: Optional[CacheBackend] = None
+) -> Cache:
+    """
+    Get or create the cache for a namespace
+
+    Budget arguments only apply when the namespace is first created.
+    """
+    with _namespaces_lock:
+        ns_cache = _namespaces.get(namespace)
+        if ns_cache is None:
+            ns_cache = Cache(default_ttl_seconds, max_entries, max_bytes, backend, name=namespace)
+            _namespaces[namespace] = ns_cache
+        return ns_cache
+
+
+def cache_metrics() -> Dict[str, dict]:
+    """Metrics for every registered namespace"""
+    return {name: ns_cache.metrics() for name, ns_cache in list(_namespaces.items())}
+
+
+# Global cache instance
+cache = get_cache("default")
@@ -0,0 +1,328 @@
+"""
+Outbound email queue
+A bounded pool of worker threads drains an in-memory queue and delivers
+messages over persistent, authenticated SMTP connections (one handshake per
+connection instead of per message). Ready messages are sent in batches on
+one connection, transient failures are retried with exponential backoff and
+messages that keep failing end up in a dead-letter list for inspection.
+
+Works against any SMTP server, including a local stand-in such as
+`python -m aiosmtpd -n -l localhost:1025` (SMTP_STARTTLS=false, SMTP_AUTH=false).
+"""
+import heapq
+import itertools
+import smtplib
+import ssl
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.message import Message
+from typing import Deque, List, Optional, Tuple
+
+from src.utils.logger import app_logger
+
+# Errors that will not go away by retrying the same message
+PERMANENT_ERRORS = (
+    smtplib.SMTPAuthenticationError,
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPNotSupportedError,
+)
+
+
+class SMTPConnectionPool:
+    """
+    Reusable SMTP connections
+
+    Connections are checked out by one thread at a time (smtplib objects are
+    not thread-safe) and returned to an idle stack. Idle connections older
+    than max_idle_seconds are closed instead of reused, since servers drop
+    them after a few minutes.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str = "",
+        password: str = "",
+        use_ssl: bool = False,
+        use_starttls: bool = True,
+        use_auth: bool = True,
+        timeout: float = 30.0,
+        max_idle_seconds: float = 60.0
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_ssl = use_ssl
+        self.use_starttls = use_starttls and not use_ssl
+        self.use_auth = use_auth
+        self.timeout = timeout
+        self.max_idle_seconds = max_idle_seconds
+        self._lock = threading.Lock()
+        # (connection, last_used) - most recently used last
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+
+    def _connect(self) -> smtplib.SMTP:
+        """Open, secure and authenticate a new connection"""
+        if self.use_ssl:
+            conn = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.use_starttls:
+                conn.starttls(context=ssl.create_default_context())
+        if self.use_auth and self.user:
+            conn.login(self.user, self.password)
+        return conn
+
+    @staticmethod
+    def _close(conn: smtplib.SMTP):
+        try:
+            conn.quit()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def acquire(self) -> smtplib.SMTP:
+        """Get an idle connection or open a new one"""
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                conn, last_used = self._idle.pop()
+                if now - last_used <= self.max_idle_seconds:
+                    return conn
+                self._close(conn)
+        return self._connect()
+
+    def release(self, conn: smtplib.SMTP, healthy: bool = True):
+        """Return a connection for reuse (or close it if it failed)"""
+        if not healthy:
+            self._close(conn)
+            return
+        with self._lock:
+            self._idle.append((conn, time.monotonic()))
+
+    def send_batch(self, messages: List[Tuple[Message, str, List[str]]]) -> List[Optional[Exception]]:
+        """
+        Send messages back-to-back on one connection
+
+        Args:
+            messages: (message, from_addr, recipients) tuples
+
+        Returns:
+            One entry per message: None if sent, otherwise the exception
+        """
+        results: List[Optional[Exception]] = []
+        try:
+            conn = self.acquire()
+        except Exception as e:
+            return [e] * len(messages)
+
+        healthy = True
+        for msg, from_addr, recipients in messages:
+            try:
+                try:
+                    conn.send_message(msg, from_addr=from_addr, to_addrs=recipients)
+                except smtplib.SMTPServerDisconnected:
+                    # Server dropped the pooled connection - reconnect once
+                    self._close(conn)
+                    conn = self._connect()
+                    conn.send_message(msg, from_addr=from_addr, to_addrs=recipients)
+                results.append(None)
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                # This message was refused - the connection is still usable
+                results.append(e)
+                try:
+                    conn.rset()
+                except Exception:
+                    healthy = False
+                    break
+            except Exception as e:
+                # Connection-level failure (socket error, disconnect, timeout)
+                results.append(e)
+                healthy = False
+                break
+
+        if len(results) < len(messages):
+            # Connection broke mid-batch - remaining messages fail with the same error
+            results.extend([results[-1]] * (len(messages) - len(results)))
+        self.release(conn, healthy)
+        return results
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._close(conn)
+
+
+@dataclass(order=True)
+class EmailJob:
+    """A queued message (ordered by the time it may next be attempted)"""
+    ready_at: float
+    seq: int
+    message: Message = field(compare=False)
+    from_addr: str = field(compare=False)
+    recipients: List[str] = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+
+    def describe(self) -> dict:
+        return {"to": self.recipients, "subject": self.message.get("Subject")}
+
+
+class EmailQueue:
+    """
+    Bounded delivery queue with worker threads, batching, retries and a
+    dead-letter list
+    """
+
+    def __init__(
+        self,
+        pool: SMTPConnectionPool,
+        workers: int = 2,
+        max_size: int = 1000,
+        batch_size: int = 20,
+        max_attempts: int = 5,
+        backoff_base: float = 2.0,
+        dead_letter_size: int = 200
+    ):
+        self.pool = pool
+        self.workers = max(1, workers)
+        self.max_size = max_size
+        self.batch_size = max(1, batch_size)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self._heap: List[EmailJob] = []
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._running = False
+        self.dead_letters: Deque[dict] = deque(maxlen=dead_letter_size)
+        self.sent = 0
+        self.failed = 0
+
+    # ----- producer side -----
+
+    def enqueue(self, message: Message, from_addr: str, recipients: List[str]) -> bool:
+        """
+        Queue a message for delivery
+
+        Returns:
+            False if the queue is full (the message is dead-lettered)
+        """
+        if not self._running:
+            self.start()
+        job = EmailJob(time.monotonic(), next(self._seq), message, from_addr, recipients)
+        with self._cond:
+            if len(self._heap) >= self.max_size:
+                self._dead_letter(job, "queue full")
+                return False
+            heapq.heappush(self._heap, job)
+            self._cond.notify()
+        return True
+
+    # ----- consumer side -----
+
+    def _next_batch(self) -> List[EmailJob]:
+        """Block until jobs are ready (or the queue stops); return up to batch_size"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._heap and self._heap[0].ready_at <= now:
+                    batch = []
+                    while self._heap and self._heap[0].ready_at <= now and len(batch) < self.batch_size:
+                        batch.append(heapq.heappop(self._heap))
+                    return batch
+                if not self._running:
+                    return []
+                wait = self._heap[0].ready_at - now if self._heap else None
+                self._cond.wait(timeout=wait)
+
+    def _worker(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            results = self.pool.send_batch([(job.message, job.from_addr, job.recipients) for job in batch])
+            for job, error in zip(batch, results):
+                if error is None:
+                    self.sent += 1
+                    app_logger.info("Email sent successfully", job.describe())
+                else:
+                    self._handle_failure(job, error)
+
+    def _handle_failure(self, job: EmailJob, error: Exception):
+        job.attempts += 1
+        if isinstance(error, PERMANENT_ERRORS) or job.attempts >= self.max_attempts:
+            self._dead_letter(job, f"{type(error).__name__}: {error}")
+            return
+        delay = self.backoff_base * (2 ** (job.attempts - 1))
+        app_logger.warning(
+            "Email delivery failed, retrying",
+            {**job.describe(), "attempt": job.attempts, "retry_in_seconds": delay, "error": str(error)}
+        )
+        with self._cond:
+            job.ready_at = time.monotonic() + delay
+            heapq.heappush(self._heap, job)
+            self._cond.notify()
+
+    def _dead_letter(self, job: EmailJob, reason: str):
+        self.failed += 1
+        entry = {
+            **job.describe(),
+            "attempts": job.attempts,
+            "error": reason,
+            "failed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self.dead_letters.append(entry)
+        app_logger.error("Email moved to dead-letter list", entry)
+
+    # ----- lifecycle -----
+
+    def start(self):
+        """Start the worker threads"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"email-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Stop the workers after they deliver what is ready; messages still
+        waiting for a retry are dead-lettered
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads = []
+        with self._cond:
+            pending, self._heap = self._heap, []
+        for job in pending:
+            self._dead_letter(job, "not delivered before shutdown")
+        self.pool.close_all()
+
+    def stats(self) -> dict:
+        """Queue counters"""
+        return {
+            "queued": len(self._heap),
+            "sent": self.sent,
+            "failed": self.failed,
+            "dead_letters": len(self.dead_letters),
+            "workers": len(self._threads),
+        }
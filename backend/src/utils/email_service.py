@@ -9,6 +9,17 @@ Environment Variables Required:
     SMTP_FROM_EMAIL or EMAIL_FROM: From email address (defaults to SMTP_USER)
     CONTACT_EMAIL or ADMIN_EMAIL or EMAIL_ADMIN: Admin email for notifications (default: admin@dosibridge.com)
 
+Optional:
+    SMTP_STARTTLS: Upgrade plain connections with STARTTLS (default: true; ignored on port 465)
+    SMTP_AUTH: Log in with SMTP_USER/SMTP_PASSWORD (default: true). Set to false for a
+               local SMTP stand-in, which then enables the service without credentials
+    EMAIL_QUEUE_WORKERS: Delivery worker threads (default: 2)
+    EMAIL_QUEUE_MAX_SIZE: Maximum queued messages (default: 1000)
+    EMAIL_BATCH_SIZE: Messages sent per connection checkout (default: 20)
+    EMAIL_MAX_ATTEMPTS: Delivery attempts before dead-lettering (default: 5)
+    EMAIL_RETRY_BACKOFF: Base retry delay in seconds, doubled per attempt (default: 2)
+    SMTP_MAX_IDLE_SECONDS: Seconds an idle pooled connection is reused (default: 60)
+
 Example .env configuration:
     SMTP_HOST=smtp.gmail.com
     SMTP_PORT=587
@@ -26,8 +37,9 @@ import os
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from src.utils.logger import app_logger
+from src.utils.email_queue import SMTPConnectionPool, EmailQueue
 
 # Load environment variables
 try:
@@ -56,8 +68,31 @@ class EmailService:
             os.getenv("EMAIL_ADMIN", "admin@dosibridge.com")
         )
         
+        self.use_starttls = os.getenv("SMTP_STARTTLS", "true").lower() != "false"
+        self.use_auth = os.getenv("SMTP_AUTH", "true").lower() != "false"
+
         # Check if email service is enabled
-        self.enabled = bool(self.smtp_user and self.smtp_password)
+        self.enabled = bool(self.smtp_user and self.smtp_password) or (not self.use_auth and bool(self.smtp_host))
+
+        # Persistent connections shared by sync sends and the delivery queue
+        self.pool = SMTPConnectionPool(
+            host=self.smtp_host,
+            port=self.smtp_port,
+            user=self.smtp_user,
+            password=self.smtp_password,
+            use_ssl=self.smtp_port == 465,
+            use_starttls=self.use_starttls,
+            use_auth=self.use_auth,
+            max_idle_seconds=float(os.getenv("SMTP_MAX_IDLE_SECONDS", "60"))
+        )
+        self.queue = EmailQueue(
+            self.pool,
+            workers=int(os.getenv("EMAIL_QUEUE_WORKERS", "2")),
+            max_size=int(os.getenv("EMAIL_QUEUE_MAX_SIZE", "1000")),
+            batch_size=int(os.getenv("EMAIL_BATCH_SIZE", "20")),
+            max_attempts=int(os.getenv("EMAIL_MAX_ATTEMPTS", "5")),
+            backoff_base=float(os.getenv("EMAIL_RETRY_BACKOFF", "2"))
+        )
         
         if not self.enabled:
             app_logger.warning(
@@ -82,6 +117,32 @@ class EmailService:
                 }
             )
     
+    def _build_message(
+        self,
+        to_email: str,
+        subject: str,
+        html_body: str,
+        text_body: Optional[str] = None,
+        cc: Optional[List[str]] = None
+    ) -> Tuple[MIMEMultipart, List[str]]:
+        """Build a MIME message and its recipient list"""
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = subject
+        msg["From"] = self.from_email
+        msg["To"] = to_email
+        if cc:
+            msg["Cc"] = ", ".join(cc)
+
+        # Add text and HTML parts
+        if text_body:
+            msg.attach(MIMEText(text_body, "plain"))
+        msg.attach(MIMEText(html_body, "html"))
+
+        recipients = [to_email]
+        if cc:
+            recipients.extend(cc)
+        return msg, recipients
+
     def send_email(
         self,
         to_email: str,
@@ -91,7 +152,7 @@ class EmailService:
         cc: Optional[List[str]] = None
     ) -> bool:
         """
-        Send an email
+        Send an email now (blocking) over a pooled SMTP connection
         
         Args:
             to_email: Recipient email address
@@ -109,91 +170,69 @@ class EmailService:
                 {"to": to_email, "subject": subject}
             )
             return False
-        
-        try:
-            # Create message
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = self.from_email
-            msg["To"] = to_email
-            if cc:
-                msg["Cc"] = ", ".join(cc)
-            
-            # Add text and HTML parts
-            if text_body:
-                text_part = MIMEText(text_body, "plain")
-                msg.attach(text_part)
-            
-            html_part = MIMEText(html_body, "html")
-            msg.attach(html_part)
-            
-            # Send email - handle both TLS (587) and SSL (465) connections
-            if self.smtp_port == 465:
-                # SSL connection for port 465
-                with smtplib.SMTP_SSL(self.smtp_host, self.smtp_port) as server:
-                    server.login(self.smtp_user, self.smtp_password)
-                    recipients = [to_email]
-                    if cc:
-                        recipients.extend(cc)
-                    server.send_message(msg, to_addrs=recipients)
-            else:
-                # TLS connection for port 587 or others
-                with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                    server.starttls()
-                    server.login(self.smtp_user, self.smtp_password)
-                    recipients = [to_email]
-                    if cc:
-                        recipients.extend(cc)
-                    server.send_message(msg, to_addrs=recipients)
-            
+
+        msg, recipients = self._build_message(to_email, subject, html_body, text_body, cc)
+        error = self.pool.send_batch([(msg, self.from_email, recipients)])[0]
+        if error is None:
             app_logger.info(
                 "Email sent successfully",
                 {"to": to_email, "subject": subject}
             )
             return True
-            
-        except smtplib.SMTPAuthenticationError as e:
-            app_logger.error(
-                "SMTP authentication failed",
-                {
-                    "to": to_email,
-                    "subject": subject,
-                    "error": str(e),
-                    "smtp_host": self.smtp_host,
-                    "smtp_port": self.smtp_port,
-                    "smtp_user": self.smtp_user
-                },
-                exc_info=True
-            )
-            return False
-        except smtplib.SMTPException as e:
-            app_logger.error(
-                "SMTP error occurred",
-                {
-                    "to": to_email,
-                    "subject": subject,
-                    "error": str(e),
-                    "smtp_host": self.smtp_host,
-                    "smtp_port": self.smtp_port
-                },
-                exc_info=True
-            )
-            return False
-        except Exception as e:
-            app_logger.error(
-                "Failed to send email",
-                {
-                    "to": to_email,
-                    "subject": subject,
-                    "error": str(e),
-                    "error_type": type(e).__name__,
-                    "smtp_host": self.smtp_host,
-                    "smtp_port": self.smtp_port
-                },
-                exc_info=True
+
+        app_logger.error(
+            "SMTP authentication failed" if isinstance(error, smtplib.SMTPAuthenticationError) else "Failed to send email",
+            {
+                "to": to_email,
+                "subject": subject,
+                "error": str(error),
+                "error_type": type(error).__name__,
+                "smtp_host": self.smtp_host,
+                "smtp_port": self.smtp_port
+            }
+        )
+        return False
+
+    def queue_email(
+        self,
+        to_email: str,
+        subject: str,
+        html_body: str,
+        text_body: Optional[str] = None,
+        cc: Optional[List[str]] = None
+    ) -> bool:
+        """
+        Queue an email for background delivery (non-blocking)
+
+        Delivery is retried with backoff; messages that keep failing are kept
+        in the queue's dead-letter list.
+
+        Returns:
+            True if the message was queued, False otherwise
+        """
+        if not self.enabled:
+            app_logger.info(
+                "Email not queued (email service disabled)",
+                {"to": to_email, "subject": subject}
             )
             return False
-    
+
+        msg, recipients = self._build_message(to_email, subject, html_body, text_body, cc)
+        return self.queue.enqueue(msg, self.from_email, recipients)
+
+    def start(self):
+        """Start the delivery workers (also started lazily on first queued email)"""
+        if self.enabled:
+            self.queue.start()
+
+    def stop(self):
+        """Deliver what is ready, stop the workers and close pooled connections"""
+        self.queue.stop()
+
+    def dead_letters(self) -> List[dict]:
+        """Messages that could not be delivered"""
+        return list(self.queue.dead_letters)
+
     def send_appointment_confirmation(
         self,
         to_email: str,
@@ -201,7 +240,8 @@ class EmailService:
         appointment_id: int,
         request_type: str,
         preferred_date: Optional[str] = None,
-        preferred_time: Optional[str] = None
+        preferred_time: Optional[str] = None,
+        background: bool = False
     ) -> bool:
         """
         Send appointment confirmation email to the user
@@ -213,9 +253,10 @@ class EmailService:
             request_type: Type of request (appointment, contact, support)
             preferred_date: Preferred date (optional)
             preferred_time: Preferred time (optional)
+            background: Queue for background delivery instead of sending now
         
         Returns:
-            True if email sent successfully, False otherwise
+            True if email sent (or queued) successfully, False otherwise
         """
         request_type_label = {
             "appointment": "Appointment",
@@ -288,7 +329,8 @@ If you have any urgent questions, please don't hesitate to reach out to us direc
 This is an automated confirmation email.
         """
         
-        return self.send_email(to_email, subject, html_body, text_body)
+        deliver = self.queue_email if background else self.send_email
+        return deliver(to_email, subject, html_body, text_body)
     
     def send_appointment_notification_to_team(
         self,
@@ -301,7 +343,8 @@ This is an automated confirmation email.
         message: str,
         preferred_date: Optional[str] = None,
         preferred_time: Optional[str] = None,
-        user_id: Optional[int] = None
+        user_id: Optional[int] = None,
+        background: bool = False
     ) -> bool:
         """
         Send notification email to DOSIBridge team about new appointment request
@@ -317,9 +360,10 @@ This is an automated confirmation email.
             preferred_date: Preferred date (optional)
             preferred_time: Preferred time (optional)
             user_id: User ID if authenticated (optional)
+            background: Queue for background delivery instead of sending now
         
         Returns:
-            True if email sent successfully, False otherwise
+            True if email sent (or queued) successfully, False otherwise
         """
         request_type_label = {
             "appointment": "Appointment",
@@ -400,7 +444,51 @@ Message:
 Reply to: {email}
         """
         
-        return self.send_email(self.admin_email, subject_line, html_body, text_body)
+        deliver = self.queue_email if background else self.send_email
+        return deliver(self.admin_email, subject_line, html_body, text_body)
+
+    def queue_appointment_emails(
+        self,
+        appointment_id: int,
+        name: str,
+        email: str,
+        phone: Optional[str],
+        request_type: str,
+        subject: Optional[str],
+        message: str,
+        preferred_date: Optional[str] = None,
+        preferred_time: Optional[str] = None,
+        user_id: Optional[int] = None
+    ) -> bool:
+        """
+        Queue the user confirmation and team notification for an appointment
+
+        Returns:
+            True if both emails were queued
+        """
+        confirmation_queued = self.send_appointment_confirmation(
+            to_email=email,
+            to_name=name,
+            appointment_id=appointment_id,
+            request_type=request_type,
+            preferred_date=preferred_date,
+            preferred_time=preferred_time,
+            background=True
+        )
+        notification_queued = self.send_appointment_notification_to_team(
+            appointment_id=appointment_id,
+            name=name,
+            email=email,
+            phone=phone,
+            request_type=request_type,
+            subject=subject,
+            message=message,
+            preferred_date=preferred_date,
+            preferred_time=preferred_time,
+            user_id=user_id,
+            background=True
+        )
+        return confirmation_queued and notification_queued
 
 
 # Global email service instance
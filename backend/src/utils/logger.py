@@ -1,65 +1,238 @@
 """
 Professional logging utilities
+
+Logging never blocks the caller on stdout:
+
+- records go into a bounded in-memory queue and a background thread writes
+  them; if the writer falls behind and the queue fills up, new records are
+  dropped (and counted) instead of stalling the event loop
+- level checks happen before anything is formatted, and the message and
+  context are rendered on the writer thread, so disabled debug logging
+  costs one comparison
+- high-volume events can be sampled with `sample_rate`
+- every record carries the id of the request it was logged from
+  (`request_id_var`, set by the request middleware)
 """
+import atexit
+import contextvars
+import json
 import logging
+import os
+import queue
+import random
 import sys
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional, Dict, Any
-import json
 
-# Configure root logger
+# Minimum level written (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Output format: "text" (human readable) or "json" (one object per line)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+# Records buffered for the writer thread before new records are dropped
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Request id of the request being handled in the current context
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id (runs in the caller's context)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._drop_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only resolve what can't safely cross threads: %-args may be mutated
+        # after the call returns and tracebacks reference live frames.
+        # Timestamps, context and the final line are rendered by the writer.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+
+
+def _render_context(context: Optional[Dict[str, Any]]) -> str:
+    try:
+        return json.dumps(context, default=str)
+    except Exception:
+        return str(context)
+
+
+class TextFormatter(logging.Formatter):
+    """`time - name - LEVEL - message [request_id] | Context: {...}`"""
+
+    def __init__(self):
+        super().__init__(
+            fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        request_id = getattr(record, "request_id", None)
+        context = getattr(record, "context", None)
+        if request_id or context:
+            # Keep the traceback (if any) below the decorated first line
+            first, sep, rest = line.partition("\n")
+            if request_id:
+                first += f" [{request_id}]"
+            if context:
+                first += f" | Context: {_render_context(context)}"
+            line = first + sep + rest
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        context = getattr(record, "context", None)
+        if context:
+            entry["context"] = context
+        sample_rate = getattr(record, "sample_rate", None)
+        if sample_rate is not None:
+            entry["sample_rate"] = sample_rate
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        try:
+            return json.dumps(entry, default=str)
+        except Exception:
+            entry["context"] = str(context)
+            return json.dumps(entry, default=str)
+
+
+_formatter: logging.Formatter = JsonFormatter() if LOG_FORMAT == "json" else TextFormatter()
+
+_queue: queue.Queue = queue.Queue(maxsize=max(1, LOG_QUEUE_SIZE))
+_queue_handler = NonBlockingQueueHandler(_queue)
+_queue_handler.addFilter(RequestIdFilter())
+
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(_formatter)
+_listener = QueueListener(_queue, _stream_handler, respect_handler_level=False)
+
+# Configure root logger: every logger writes through the queue
 logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
+    level=getattr(logging, LOG_LEVEL, logging.INFO),
+    handlers=[_queue_handler],
+    force=True,
 )
+_listener.start()
+_listener_running = True
 
 # Create logger instance
 logger = logging.getLogger("dosibridge")
 
 
+def shutdown_logging():
+    """Flush queued records and stop the writer thread (idempotent)"""
+    global _listener_running
+    if _listener_running:
+        _listener_running = False
+        _listener.stop()
+    _stream_handler.flush()
+
+
+atexit.register(shutdown_logging)
+
+
+def flush_logging(timeout: float = 2.0):
+    """Wait (up to `timeout` seconds) until the writer has written every queued record"""
+    deadline = time.monotonic() + timeout
+    while _queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.01)
+    _stream_handler.flush()
+
+
+def get_log_stats() -> Dict[str, int]:
+    """Records waiting for the writer and records dropped because the queue was full"""
+    return {"queued": _queue.qsize(), "dropped": _queue_handler.dropped}
+
+
 class StructuredLogger:
     """Structured logging with context"""
-    
-    @staticmethod
-    def _format_context(context: Optional[Dict[str, Any]] = None) -> str:
-        """Format context as JSON string"""
-        if not context:
-            return ""
-        try:
-            return f" | Context: {json.dumps(context, default=str)}"
-        except Exception:
-            return f" | Context: {str(context)}"
-    
-    @staticmethod
-    def info(message: str, context: Optional[Dict[str, Any]] = None):
+
+    def __init__(self, name: str = "dosibridge"):
+        self._logger = logging.getLogger(name)
+
+    def is_enabled(self, level: int) -> bool:
+        """Check before building expensive context for a log call"""
+        return self._logger.isEnabledFor(level)
+
+    def _log(
+        self,
+        level: int,
+        message: str,
+        context: Optional[Dict[str, Any]],
+        exc_info: bool = False,
+        sample_rate: Optional[float] = None
+    ):
+        if not self._logger.isEnabledFor(level):
+            return
+        if sample_rate is not None and sample_rate < 1.0 and random.random() >= sample_rate:
+            return
+        extra: Dict[str, Any] = {"context": dict(context) if context else None}
+        if sample_rate is not None:
+            extra["sample_rate"] = sample_rate
+        self._logger.log(level, message, exc_info=exc_info, extra=extra, stacklevel=3)
+
+    def info(self, message: str, context: Optional[Dict[str, Any]] = None, sample_rate: Optional[float] = None):
         """Log info message with optional context"""
-        logger.info(f"{message}{StructuredLogger._format_context(context)}")
-    
-    @staticmethod
-    def warning(message: str, context: Optional[Dict[str, Any]] = None):
+        self._log(logging.INFO, message, context, sample_rate=sample_rate)
+
+    def warning(self, message: str, context: Optional[Dict[str, Any]] = None, sample_rate: Optional[float] = None):
         """Log warning message with optional context"""
-        logger.warning(f"{message}{StructuredLogger._format_context(context)}")
-    
-    @staticmethod
-    def error(message: str, context: Optional[Dict[str, Any]] = None, exc_info: bool = False):
+        self._log(logging.WARNING, message, context, sample_rate=sample_rate)
+
+    def error(self, message: str, context: Optional[Dict[str, Any]] = None, exc_info: bool = False):
         """Log error message with optional context and exception info"""
-        logger.error(f"{message}{StructuredLogger._format_context(context)}", exc_info=exc_info)
-    
-    @staticmethod
-    def debug(message: str, context: Optional[Dict[str, Any]] = None):
+        self._log(logging.ERROR, message, context, exc_info=exc_info)
+
+    def debug(self, message: str, context: Optional[Dict[str, Any]] = None, sample_rate: Optional[float] = None):
         """Log debug message with optional context"""
-        logger.debug(f"{message}{StructuredLogger._format_context(context)}")
-    
-    @staticmethod
-    def critical(message: str, context: Optional[Dict[str, Any]] = None, exc_info: bool = False):
+        self._log(logging.DEBUG, message, context, sample_rate=sample_rate)
+
+    def critical(self, message: str, context: Optional[Dict[str, Any]] = None, exc_info: bool = False):
         """Log critical message with optional context and exception info"""
-        logger.critical(f"{message}{StructuredLogger._format_context(context)}", exc_info=exc_info)
+        self._log(logging.CRITICAL, message, context, exc_info=exc_info)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """Structured logger for a module (`get_logger(__name__)`)"""
+    return StructuredLogger(name)
 
 
 # Export structured logger
 app_logger = StructuredLogger()
-
@@ -0,0 +1,316 @@
+"""
+In-process metrics
+Latency histograms and counters for the request hot path, rendered in the
+Prometheus text exposition format by /api/monitoring/metrics.
+
+Recording a value is a dict lookup, a bisect and a few additions under a
+lock. Label values that come from user data (tool and MCP server names)
+are capped per metric: past METRICS_MAX_SERIES series, new label sets are
+recorded as "other". Metrics are per worker process; Prometheus sums
+them across scrape targets.
+"""
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Set to "false" to make recording a no-op
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# Label sets kept per metric before new ones are folded into "other"
+METRICS_MAX_SERIES = int(os.getenv("METRICS_MAX_SERIES", "500"))
+
+# Seconds; spans cache hits (sub-millisecond) to slow LLM / MCP calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+OTHER_LABEL = "other"
+
+# (labels, value) pairs produced by a collector
+Sample = Tuple[Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Labelled series with a cap on the number of label sets"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        if key not in self._series and len(self._series) >= METRICS_MAX_SERIES:
+            key = (OTHER_LABEL,) * len(self.labelnames)
+        return key
+
+    def _new_series(self) -> list:
+        raise NotImplementedError
+
+    def _series_for(self, labels: Dict[str, str]) -> list:
+        """Series for the labels (caller must hold the lock)"""
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = self._new_series()
+        return series
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            series = [(key, list(values)) for key, values in self._series.items()]
+        for key, values in series:
+            lines.extend(self._render_series(self._labels(key), values))
+        return lines
+
+    def _render_series(self, labels: Dict[str, str], values: list) -> List[str]:
+        raise NotImplementedError
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    type_name = "counter"
+
+    def _new_series(self) -> list:
+        return [0.0]
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._series_for(labels)[0] += amount
+
+    def _render_series(self, labels, values):
+        return [f"{self.name}{_format_labels(labels)} {_format_value(values[0])}"]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (seconds) in cumulative buckets"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_series(self) -> list:
+        # Per-bucket (non-cumulative) counts, +Inf bucket, sum, count
+        return [0] * (len(self.buckets) + 1) + [0.0, 0]
+
+    def observe(self, value: float, **labels):
+        """Record one value"""
+        if not METRICS_ENABLED:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series_for(labels)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a block (or, as a decorator, of a sync function call)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_series(self, labels, values):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), values):
+            cumulative += count
+            bucket_labels = {**labels, "le": _format_value(bound)}
+            lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(values[-2])}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {values[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics and collectors rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        # name -> (type, help, callable returning samples)
+        self._collectors: Dict[str, Tuple[str, str, Callable[[], Iterable[Sample]]]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with a different definition")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Get or create a histogram"""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter"""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def register_collector(
+        self,
+        name: str,
+        type_name: str,
+        documentation: str,
+        collect: Callable[[], Iterable[Sample]]
+    ):
+        """
+        Register values read at scrape time (queue depths, counters kept elsewhere)
+
+        Args:
+            name: Metric name
+            type_name: "gauge" or "counter"
+            documentation: Help text
+            collect: Returns (labels, value) samples
+        """
+        with self._lock:
+            self._collectors[name] = (type_name, documentation, collect)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.items())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for name, (type_name, documentation, collect) in collectors:
+            try:
+                samples = list(collect())
+            except Exception as e:
+                lines.append(f"# collector {name} failed: {_escape(str(e))}")
+                continue
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {type_name}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Reset every recorded series (collectors are kept)"""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
+
+# ----- hot path metrics -----
+
+http_request_seconds = metrics.histogram(
+    "dosibridge_http_request_duration_seconds",
+    "HTTP request duration until the response body completed (stream lifetime for SSE)",
+    ["method", "route", "status"],
+)
+config_load_seconds = metrics.histogram(
+    "dosibridge_config_load_seconds",
+    "Time to load LLM / MCP server configuration",
+    ["config"],
+)
+mcp_stage_seconds = metrics.histogram(
+    "dosibridge_mcp_stage_seconds",
+    "MCP server connect, initialize and tool load time",
+    ["server", "stage"],
+)
+agent_build_seconds = metrics.histogram(
+    "dosibridge_agent_build_seconds",
+    "Agent graph build time (agent cache misses)",
+)
+time_to_first_token_seconds = metrics.histogram(
+    "dosibridge_chat_time_to_first_token_seconds",
+    "Time from the start of a streaming chat request to its first content chunk",
+    ["mode"],
+)
+tool_execution_seconds = metrics.histogram(
+    "dosibridge_tool_execution_seconds",
+    "Agent tool call duration",
+    ["tool", "status"],
+)
+rag_stage_seconds = metrics.histogram(
+    "dosibridge_rag_stage_seconds",
+    "Retrieval stage duration (embed, faiss, bm25_index, bm25, db, rerank)",
+    ["stage"],
+)
+history_persist_seconds = metrics.histogram(
+    "dosibridge_history_persist_seconds",
+    "Time to persist conversation history",
+    ["operation"],
+)
+
+
+def _log_queue_samples() -> Iterable[Sample]:
+    from src.utils.logger import get_log_stats
+    return [({}, get_log_stats()["queued"])]
+
+
+def _log_dropped_samples() -> Iterable[Sample]:
+    from src.utils.logger import get_log_stats
+    return [({}, get_log_stats()["dropped"])]
+
+
+metrics.register_collector(
+    "dosibridge_log_queue_depth",
+    "gauge",
+    "Log records waiting for the writer thread",
+    _log_queue_samples,
+)
+metrics.register_collector(
+    "dosibridge_log_records_dropped_total",
+    "counter",
+    "Log records dropped because the writer queue was full",
+    _log_dropped_samples,
+)
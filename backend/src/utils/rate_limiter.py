@@ -1,59 +1,394 @@
 """
 Rate limiting utilities
+Token-bucket and sliding-window-counter limiters with fixed-size state per
+key, idle-key eviction and a pluggable storage backend. The same backend
+also serves slowapi/limits through the "engine://" storage URI, and
+limiter_for_storage() returns a limiter for any limits storage URI (e.g.
+redis://) so limits can be shared by workers.
 """
-from collections import defaultdict
-from datetime import datetime, timedelta
-from typing import Dict, Tuple
+import re
+import threading
 import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
 
+# Seconds a key may stay idle before its state is evicted
+DEFAULT_IDLE_TTL = 3600
+
+_RATE_LIMIT_PATTERN = re.compile(r"^\s*(\d+)\s*(?:/|per)\s*(\d+)?\s*(second|minute|hour|day)s?\s*$", re.IGNORECASE)
+_PERIOD_SECONDS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate_limit(limit: str) -> Tuple[int, int]:
+    """
+    Parse a limits-style rate string ("200/minute", "10 per 5 seconds")
+
+    Returns:
+        Tuple of (max_requests, window_seconds)
+    """
+    match = _RATE_LIMIT_PATTERN.match(limit)
+    if not match:
+        raise ValueError(f"Invalid rate limit: {limit!r}")
+    amount, multiple, period = match.groups()
+    return int(amount), int(multiple or 1) * _PERIOD_SECONDS[period.lower()]
+
+
+class RateLimitBackend:
+    """
+    Storage interface for per-key limiter state
+
+    update() must be atomic per key. A shared implementation (e.g. a Redis
+    script or a DB row lock) can be passed to RateLimiter/EngineStorage so
+    limits hold across workers.
+    """
+
+    def update(
+        self,
+        key: str,
+        fn: Callable[[Optional[Any]], Tuple[Any, Any]],
+        ttl: float
+    ) -> Any:
+        """
+        Atomically transform the state stored for a key
+
+        Args:
+            key: State key
+            fn: Called with the current state (None if missing); returns
+                (new_state, result). A new_state of None deletes the key.
+            ttl: Seconds the key may stay idle before eviction
+
+        Returns:
+            The result returned by fn
+        """
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get the state stored for a key (None if missing or evicted)"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        """Delete the state for a key"""
+        raise NotImplementedError
+
+    def clear(self):
+        """Delete all state"""
+        raise NotImplementedError
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Process-local backend
+
+    Keys are kept in access order so idle keys can be evicted from the
+    front of the OrderedDict in amortized O(1) per operation.
+    """
 
-class RateLimiter:
-    """Simple in-memory rate limiter"""
-    
     def __init__(self):
-        self.requests: Dict[str, list] = defaultdict(list)
-    
+        self._lock = threading.Lock()
+        # key -> (expires_at, state), least recently touched first
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def _evict(self, now: float):
+        """Drop expired keys from the idle end (caller must hold the lock)"""
+        while self._data:
+            key, (expires_at, _) = next(iter(self._data.items()))
+            if expires_at > now:
+                break
+            del self._data[key]
+
+    def update(self, key, fn, ttl):
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._data.get(key)
+            new_state, result = fn(entry[1] if entry else None)
+            if new_state is None:
+                self._data.pop(key, None)
+            else:
+                self._data[key] = (now + ttl, new_state)
+                self._data.move_to_end(key)
+            return result
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                return None
+            return entry[1]
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SlidingWindowCounter:
+    """
+    Sliding window counter
+
+    State is (window_start, previous_count, current_count). The effective
+    count weights the previous window by how much of it still overlaps the
+    sliding window, which approximates a true sliding log in O(1) memory.
+    """
+
+    name = "sliding_window"
+
+    @staticmethod
+    def hit(state, now: float, limit: int, window: float, cost: int = 1):
+        """
+        Try to consume `cost` requests
+
+        Returns:
+            (new_state, (is_allowed, remaining))
+        """
+        start, previous, current = state or (now - now % window, 0, 0)
+        elapsed_windows = int((now - start) // window)
+        if elapsed_windows >= 1:
+            previous = current if elapsed_windows == 1 else 0
+            current = 0
+            start += elapsed_windows * window
+
+        weight = 1.0 - (now - start) / window
+        used = previous * weight + current
+        if used + cost > limit:
+            return (start, previous, current), (False, max(0, int(limit - used)))
+        current += cost
+        return (start, previous, current), (True, max(0, int(limit - used - cost)))
+
+
+class TokenBucket:
+    """
+    Token bucket
+
+    State is (tokens, last_refill). The bucket holds up to `limit` tokens
+    and refills at limit / window tokens per second, allowing short bursts.
+    """
+
+    name = "token_bucket"
+
+    @staticmethod
+    def hit(state, now: float, limit: int, window: float, cost: int = 1):
+        """
+        Try to take `cost` tokens
+
+        Returns:
+            (new_state, (is_allowed, remaining))
+        """
+        tokens, last = state or (float(limit), now)
+        tokens = min(float(limit), tokens + (now - last) * (limit / window))
+        if tokens < cost:
+            return (tokens, now), (False, int(tokens))
+        tokens -= cost
+        return (tokens, now), (True, int(tokens))
+
+
+ALGORITHMS = {
+    SlidingWindowCounter.name: SlidingWindowCounter,
+    TokenBucket.name: TokenBucket,
+}
+
+
+class RateLimiter:
+    """In-memory (or shared-backend) rate limiter with O(1) state per key"""
+
+    def __init__(
+        self,
+        algorithm: str = SlidingWindowCounter.name,
+        backend: Optional[RateLimitBackend] = None,
+        idle_ttl: float = DEFAULT_IDLE_TTL
+    ):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
+        self.algorithm = ALGORITHMS[algorithm]
+        self.backend = backend or InMemoryRateLimitBackend()
+        self.idle_ttl = idle_ttl
+
     def is_allowed(
         self,
         key: str,
         max_requests: int = 10,
-        window_seconds: int = 60
+        window_seconds: int = 60,
+        cost: int = 1
     ) -> Tuple[bool, int]:
         """
-        Check if request is allowed
-        
+        Check if request is allowed and count it if so
+
         Returns:
             Tuple of (is_allowed, remaining_requests)
         """
         now = time.time()
-        window_start = now - window_seconds
-        
-        # Clean old requests
-        self.requests[key] = [
-            req_time for req_time in self.requests[key]
-            if req_time > window_start
-        ]
-        
-        # Check limit
-        if len(self.requests[key]) >= max_requests:
-            return False, 0
-        
-        # Add current request
-        self.requests[key].append(now)
-        
-        remaining = max_requests - len(self.requests[key])
-        return True, remaining
-    
+        ttl = max(self.idle_ttl, 2 * window_seconds)
+        return self.backend.update(
+            f"{self.algorithm.name}:{key}",
+            lambda state: self.algorithm.hit(state, now, max_requests, window_seconds, cost),
+            ttl
+        )
+
     def reset(self, key: str):
         """Reset rate limit for a key"""
-        if key in self.requests:
-            del self.requests[key]
-    
+        self.backend.delete(f"{self.algorithm.name}:{key}")
+
     def clear(self):
         """Clear all rate limits"""
-        self.requests.clear()
+        self.backend.clear()
+
 
+# Backend shared by the global limiter and the slowapi storage
+default_backend = InMemoryRateLimitBackend()
 
 # Global rate limiter instance
-rate_limiter = RateLimiter()
+rate_limiter = RateLimiter(backend=default_backend)
+
+
+# slowapi storage adapter (optional - only if the limits package is installed)
+try:
+    from limits.storage import Storage as _LimitsStorage
+except ImportError:
+    _LimitsStorage = None
+
+if _LimitsStorage is not None:
+    class EngineStorage(_LimitsStorage):
+        """
+        limits storage backed by a RateLimitBackend
+
+        Registered under the "engine://" scheme so slowapi's Limiter can use
+        it via storage_uri; swapping default_backend for a shared backend
+        makes slowapi limits hold across workers.
+        """
+
+        STORAGE_SCHEME = ["engine"]
+
+        def __init__(self, uri: Optional[str] = None, backend: Optional[RateLimitBackend] = None, **options):
+            super().__init__(uri, **options)
+            self.backend = backend or default_backend
+
+        @property
+        def base_exceptions(self):
+            return ValueError
+
+        @staticmethod
+        def _fixed_window(state, now):
+            """Return (count, expires_at) if the window is still open"""
+            if state is None or state[1] <= now:
+                return None
+            return state
+
+        def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+            now = time.time()
+
+            def fn(state):
+                current = self._fixed_window(state, now)
+                if current is None:
+                    new_state = (amount, now + expiry)
+                else:
+                    expires_at = now + expiry if elastic_expiry else current[1]
+                    new_state = (current[0] + amount, expires_at)
+                return new_state, new_state[0]
+
+            return self.backend.update(f"fw:{key}", fn, expiry)
+
+        def get(self, key: str) -> int:
+            current = self._fixed_window(self.backend.get(f"fw:{key}"), time.time())
+            return current[0] if current else 0
+
+        def get_expiry(self, key: str) -> float:
+            current = self._fixed_window(self.backend.get(f"fw:{key}"), time.time())
+            return current[1] if current else time.time()
+
+        def check(self) -> bool:
+            return True
+
+        def reset(self) -> Optional[int]:
+            self.backend.clear()
+            return None
+
+        def clear(self, key: str):
+            self.backend.delete(f"fw:{key}")
+            self.backend.delete(f"sw:{key}")
+
+        # Sliding window counter support (limits >= 4.1 "sliding-window-counter" strategy)
+        def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+            now = time.time()
+            allowed, _ = self.backend.update(
+                f"sw:{key}",
+                lambda state: SlidingWindowCounter.hit(state, now, limit, expiry, amount),
+                2 * expiry
+            )
+            return allowed
+
+        def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+            now = time.time()
+            state = self.backend.get(f"sw:{key}")
+            if state is None:
+                return 0, 0.0, 0, 0.0
+            start, previous, current = state
+            if now - start >= 2 * expiry:
+                return 0, 0.0, 0, 0.0
+            if now - start >= expiry:
+                previous, current, start = current, 0, start + expiry
+            previous_ttl = max(0.0, start - now + expiry) if previous else 0.0
+            current_ttl = start + 2 * expiry - now
+            return previous, previous_ttl, current, current_ttl
+
+        def clear_sliding_window(self, key: str, expiry: int) -> None:
+            self.backend.delete(f"sw:{key}")
+else:
+    EngineStorage = None
+
+
+class StorageRateLimiter:
+    """
+    RateLimiter interface over a limits storage (fixed window, like slowapi)
+
+    One storage round trip per check. Storage calls are synchronous, as they
+    were under slowapi's middleware.
+    """
+
+    def __init__(self, storage_uri: str):
+        from limits import RateLimitItemPerSecond
+        from limits.storage import storage_from_string
+        self._item = RateLimitItemPerSecond
+        self.storage = storage_from_string(storage_uri)
+
+    def is_allowed(
+        self,
+        key: str,
+        max_requests: int = 10,
+        window_seconds: int = 60,
+        cost: int = 1
+    ) -> Tuple[bool, int]:
+        """
+        Check if request is allowed and count it if so
+
+        Returns:
+            Tuple of (is_allowed, remaining_requests)
+        """
+        item = self._item(max_requests, window_seconds)
+        count = self.storage.incr(item.key_for(key), item.get_expiry(), amount=cost)
+        return count <= max_requests, max(0, max_requests - count)
+
+    def clear(self):
+        """Clear all rate limits"""
+        self.storage.reset()
+
+
+def limiter_for_storage(storage_uri: Optional[str]):
+    """
+    Limiter for a limits storage URI
 
+    "engine://" (or no URI) is the process-local rate_limiter; any other URI
+    is used through StorageRateLimiter, which needs the limits package.
+    """
+    if not storage_uri or storage_uri.startswith("engine://"):
+        return rate_limiter
+    if _LimitsStorage is None:
+        print(f"⚠️  limits not installed, using the in-process rate limiter instead of {storage_uri.split('://')[0]}://")
+        return rate_limiter
+    return StorageRateLimiter(storage_uri)
@@ -0,0 +1,381 @@
+"""
+Bounded-cost arithmetic expression evaluator
+Evaluates LLM-produced math expressions by walking the AST instead of
+calling eval(). Only whitelisted operators, functions and constants are
+accepted, and every operation that can blow up is checked before it runs:
+
+- integer results are capped at MATH_MAX_INT_BITS bits (pow, *, <<,
+  factorial, comb and perm are estimated up front, so 9**9**9 or
+  factorial(10**7) are rejected instantly instead of pinning a core;
+  lcm is checked argument by argument)
+- expressions are capped in length and node count
+- arithmetic operators take numbers only; list/tuple literals are only
+  accepted as direct arguments to aggregates (sum([1, 2]), max((a, b)))
+  and their elements are charged to the budget, so [1]*10**9 never runs
+- evaluation draws from an operation budget (big-integer work costs more)
+
+Optionally expressions run in a small process pool with a hard timeout
+(MATH_EVAL_PROCESSES > 0), bounding worst-case latency even if a guard is
+missed.
+"""
+import ast
+import asyncio
+import math
+import operator
+import os
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, Union
+
+# Longest expression accepted (characters)
+MATH_MAX_EXPRESSION_LENGTH = int(os.getenv("MATH_MAX_EXPRESSION_LENGTH", "2000"))
+# Most AST nodes accepted
+MATH_MAX_NODES = int(os.getenv("MATH_MAX_NODES", "500"))
+# Largest integer result (bits); 10000 bits is about 3000 decimal digits
+MATH_MAX_INT_BITS = int(os.getenv("MATH_MAX_INT_BITS", "10000"))
+# Operation budget per expression
+MATH_MAX_OPERATIONS = int(os.getenv("MATH_MAX_OPERATIONS", "100000"))
+# Most elements in a list/tuple literal passed to an aggregate
+MATH_MAX_SEQUENCE_LENGTH = int(os.getenv("MATH_MAX_SEQUENCE_LENGTH", "1000"))
+# Worker processes for isolated evaluation (0 = evaluate in-process)
+MATH_EVAL_PROCESSES = int(os.getenv("MATH_EVAL_PROCESSES", "0"))
+# Hard timeout for pooled evaluation (seconds)
+MATH_EVAL_TIMEOUT = float(os.getenv("MATH_EVAL_TIMEOUT", "2.0"))
+
+Number = Union[int, float, complex]
+
+
+class ExpressionError(ValueError):
+    """Expression is invalid, not allowed, or too expensive to evaluate"""
+
+
+# ----- guards -----
+
+def _int_bits(value: Any) -> int:
+    return abs(value).bit_length() if isinstance(value, int) else 0
+
+
+def _check_bits(bits: float, what: str):
+    if bits > MATH_MAX_INT_BITS:
+        raise ExpressionError(f"{what} result too large (limit {MATH_MAX_INT_BITS} bits)")
+
+
+def _log2_factorial(n: int) -> float:
+    return math.lgamma(n + 1) / math.log(2) if n > 1 else 0.0
+
+
+def _require_int(value: Any, name: str) -> int:
+    if isinstance(value, bool) or not isinstance(value, int):
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        raise ExpressionError(f"{name} requires an integer")
+    return value
+
+
+def checked_pow(base: Any, exponent: Any, modulus: Any = None) -> Number:
+    """pow() that refuses integer results over MATH_MAX_INT_BITS"""
+    if modulus is not None:
+        base, exponent, modulus = (_require_int(v, "pow") for v in (base, exponent, modulus))
+        _check_bits(max(_int_bits(base), _int_bits(exponent), _int_bits(modulus)), "pow")
+        return pow(base, exponent, modulus)
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1:
+        _check_bits(exponent * math.log2(abs(base)), "Power")
+    try:
+        return operator.pow(base, exponent)
+    except OverflowError:
+        raise ExpressionError("Power result too large")
+
+
+def _mul(a: Any, b: Any) -> Number:
+    if isinstance(a, int) and isinstance(b, int):
+        _check_bits(_int_bits(a) + _int_bits(b), "Multiplication")
+    return operator.mul(a, b)
+
+
+def _lshift(a: Any, b: Any) -> int:
+    if isinstance(b, int) and b > 0:
+        _check_bits(_int_bits(a) + b, "Shift")
+    return operator.lshift(a, b)
+
+
+def _factorial(n: Any) -> int:
+    n = _require_int(n, "factorial")
+    if n < 0:
+        raise ExpressionError("Factorial of negative number is undefined")
+    _check_bits(_log2_factorial(n), "Factorial")
+    return math.factorial(n)
+
+
+def _comb(n: Any, k: Any) -> int:
+    n, k = _require_int(n, "comb"), _require_int(k, "comb")
+    if 0 <= k <= n:
+        _check_bits(_log2_factorial(n) - _log2_factorial(k) - _log2_factorial(n - k), "comb")
+    return math.comb(n, k)
+
+
+def _perm(n: Any, k: Any = None) -> int:
+    n = _require_int(n, "perm")
+    k = n if k is None else _require_int(k, "perm")
+    if 0 <= k <= n:
+        _check_bits(_log2_factorial(n) - _log2_factorial(n - k), "perm")
+    return math.perm(n, k)
+
+
+def _lcm(*args: Any) -> int:
+    result = 1
+    for value in args:
+        # Each step multiplies numbers of at most MATH_MAX_INT_BITS bits
+        result = math.lcm(result, _require_int(value, "lcm"))
+        _check_bits(_int_bits(result), "lcm")
+    return result
+
+
+def _round(value: Any, ndigits: Any = None) -> Number:
+    if ndigits is not None:
+        ndigits = _require_int(ndigits, "round")
+        # round(5, -10**9) would build 10**(10**9) internally
+        if abs(ndigits) > 1000:
+            raise ExpressionError("round() ndigits out of range")
+        return round(value, ndigits)
+    return round(value)
+
+
+def _isqrt(n: Any) -> int:
+    return math.isqrt(_require_int(n, "isqrt"))
+
+
+BINARY_OPERATORS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: _mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: checked_pow,
+    ast.LShift: _lshift,
+    ast.RShift: operator.rshift,
+    ast.BitAnd: operator.and_,
+    ast.BitOr: operator.or_,
+    ast.BitXor: operator.xor,
+}
+
+UNARY_OPERATORS: Dict[type, Callable[[Any], Any]] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "abs": abs, "round": _round, "min": min, "max": max, "sum": sum,
+    "int": int, "float": float, "pow": checked_pow,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "asin": math.asin, "acos": math.acos, "atan": math.atan, "atan2": math.atan2,
+    "sinh": math.sinh, "cosh": math.cosh, "tanh": math.tanh,
+    "asinh": math.asinh, "acosh": math.acosh, "atanh": math.atanh,
+    "exp": math.exp, "log": math.log, "log10": math.log10, "log2": math.log2, "log1p": math.log1p,
+    "sqrt": math.sqrt, "cbrt": lambda x: math.copysign(abs(x) ** (1 / 3), x), "isqrt": _isqrt,
+    "ceil": math.ceil, "floor": math.floor, "trunc": math.trunc,
+    "degrees": math.degrees, "radians": math.radians, "hypot": math.hypot,
+    "fabs": math.fabs, "fmod": math.fmod, "copysign": math.copysign,
+    "factorial": _factorial, "comb": _comb, "perm": _perm,
+    "gcd": math.gcd, "lcm": _lcm,
+}
+
+# Functions that take a list/tuple literal as an argument
+SEQUENCE_FUNCTIONS = frozenset({"sum", "min", "max"})
+
+CONSTANTS: Dict[str, Number] = {
+    "pi": math.pi, "e": math.e, "tau": math.tau, "inf": math.inf,
+}
+
+
+# ----- evaluator -----
+
+class _Evaluator:
+    """Walks a parsed expression, charging each step to an operation budget"""
+
+    def __init__(self, budget: int):
+        self.remaining = budget
+
+    def _charge(self, cost: int = 1):
+        self.remaining -= cost
+        if self.remaining < 0:
+            raise ExpressionError("Expression exceeds the operation budget")
+
+    @staticmethod
+    def _number(value: Any, what: str) -> Number:
+        # Sequence repetition ([1] * n) would bypass the integer guards
+        if isinstance(value, bool) or not isinstance(value, (int, float, complex)):
+            raise ExpressionError(f"{what} requires numeric operands")
+        return value
+
+    def _charge_result(self, value: Any) -> Any:
+        # Big-integer arithmetic costs roughly per machine word
+        if isinstance(value, int):
+            self._charge(_int_bits(value) // 64)
+        return value
+
+    def visit(self, node: ast.AST) -> Any:
+        self._charge()
+        if isinstance(node, ast.Expression):
+            return self.visit(node.body)
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float, complex)):
+                raise ExpressionError("Only numeric literals are allowed")
+            return node.value
+        if isinstance(node, ast.BinOp):
+            op = BINARY_OPERATORS.get(type(node.op))
+            if op is None:
+                raise ExpressionError(f"Operator {type(node.op).__name__} is not allowed")
+            left = self._number(self.visit(node.left), type(node.op).__name__)
+            right = self._number(self.visit(node.right), type(node.op).__name__)
+            return self._charge_result(op(left, right))
+        if isinstance(node, ast.UnaryOp):
+            op = UNARY_OPERATORS.get(type(node.op))
+            if op is None:
+                raise ExpressionError(f"Operator {type(node.op).__name__} is not allowed")
+            return op(self._number(self.visit(node.operand), type(node.op).__name__))
+        if isinstance(node, ast.Name):
+            if node.id in CONSTANTS:
+                return CONSTANTS[node.id]
+            raise ExpressionError(f"Unknown name '{node.id}'")
+        if isinstance(node, ast.Attribute):
+            # math.pi as well as pi
+            if isinstance(node.value, ast.Name) and node.value.id == "math" and node.attr in CONSTANTS:
+                return CONSTANTS[node.attr]
+            raise ExpressionError("Attribute is not allowed")
+        if isinstance(node, (ast.Tuple, ast.List)):
+            raise ExpressionError(f"Lists are only allowed as arguments to {', '.join(sorted(SEQUENCE_FUNCTIONS))}")
+        if isinstance(node, ast.Call):
+            name = self._function_name(node.func)
+            func = FUNCTIONS[name]
+            args = [
+                self._sequence(arg) if name in SEQUENCE_FUNCTIONS and isinstance(arg, (ast.Tuple, ast.List))
+                else self.visit(arg)
+                for arg in node.args
+            ]
+            kwargs = {}
+            for keyword in node.keywords:
+                if keyword.arg is None:
+                    raise ExpressionError("Argument unpacking is not allowed")
+                kwargs[keyword.arg] = self.visit(keyword.value)
+            return self._charge_result(func(*args, **kwargs))
+        raise ExpressionError(f"{type(node).__name__} is not allowed in expressions")
+
+    def _sequence(self, node: Union[ast.Tuple, ast.List]) -> list:
+        """Elements of a list/tuple literal passed to an aggregate"""
+        if len(node.elts) > MATH_MAX_SEQUENCE_LENGTH:
+            raise ExpressionError(f"List too long (limit {MATH_MAX_SEQUENCE_LENGTH} elements)")
+        self._charge(len(node.elts))
+        return [self._number(self.visit(item), "List element") for item in node.elts]
+
+    @staticmethod
+    def _function_name(node: ast.AST) -> str:
+        # Accept both sqrt(x) and math.sqrt(x)
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "math":
+            name = node.attr
+        elif isinstance(node, ast.Name):
+            name = node.id
+        else:
+            raise ExpressionError("Only named math functions can be called")
+        if name not in FUNCTIONS:
+            raise ExpressionError(f"Function '{name}' is not allowed")
+        return name
+
+
+def parse_expression(expr: str) -> ast.Expression:
+    """Parse and size-check an expression"""
+    if len(expr) > MATH_MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expression too long (limit {MATH_MAX_EXPRESSION_LENGTH} characters)")
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression syntax: {e.msg}")
+    if sum(1 for _ in ast.walk(tree)) > MATH_MAX_NODES:
+        raise ExpressionError(f"Expression too complex (limit {MATH_MAX_NODES} nodes)")
+    return tree
+
+
+def evaluate(expr: str, budget: int = MATH_MAX_OPERATIONS) -> Number:
+    """
+    Evaluate an arithmetic expression in-process
+
+    Raises:
+        ExpressionError: Invalid, disallowed or too expensive expression
+    """
+    tree = parse_expression(expr)
+    try:
+        result = _Evaluator(budget).visit(tree)
+    except ExpressionError:
+        raise
+    except ZeroDivisionError:
+        raise ExpressionError("Division by zero")
+    except OverflowError:
+        raise ExpressionError("Result too large")
+    except (ValueError, TypeError, ArithmeticError) as e:
+        raise ExpressionError(f"Evaluation error: {e}")
+    if isinstance(result, bool) or not isinstance(result, (int, float, complex)):
+        raise ExpressionError(f"Expression returned non-numeric: {type(result).__name__}")
+    return result
+
+
+# ----- isolated evaluation -----
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=MATH_EVAL_PROCESSES)
+    return _pool
+
+
+def _kill_pool():
+    """Terminate a pool whose worker is stuck; the next call starts a fresh one"""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is None:
+        return
+    for process in list(getattr(pool, "_processes", {}).values()):
+        process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def evaluate_isolated(expr: str, timeout: float = MATH_EVAL_TIMEOUT) -> Number:
+    """
+    Evaluate with a hard timeout in the process pool (in-process if the
+    pool is disabled)
+
+    Raises:
+        ExpressionError: As evaluate(), or when the timeout expires
+    """
+    if MATH_EVAL_PROCESSES <= 0:
+        return evaluate(expr)
+    parse_expression(expr)  # Reject oversized input before paying for IPC
+    future = _get_pool().submit(evaluate, expr)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        _kill_pool()
+        raise ExpressionError(f"Evaluation timed out after {timeout:g}s")
+
+
+async def aevaluate(expr: str, timeout: float = MATH_EVAL_TIMEOUT) -> Number:
+    """Async evaluate_isolated() that never blocks the event loop on the pool"""
+    if MATH_EVAL_PROCESSES <= 0:
+        # Guards keep in-process evaluation to milliseconds
+        return evaluate(expr)
+    parse_expression(expr)
+    future = asyncio.wrap_future(_get_pool().submit(evaluate, expr))
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        _kill_pool()
+        raise ExpressionError(f"Evaluation timed out after {timeout:g}s")
+
+
+def shutdown_eval_pool():
+    """Stop pooled evaluation workers (app shutdown)"""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
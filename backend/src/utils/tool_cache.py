@@ -0,0 +1,182 @@
+"""
+Tool result memoization
+Tools declare a cache policy - PURE (deterministic), minutes(n) (slow-changing
+remote data) or NEVER (side effects / time-dependent). Results are cached per
+tool under a key built from normalized arguments, so repeated calls with the
+same arguments skip the network round-trip or recomputation.
+
+- Functions (built-in MCP tools and their helpers) use the @memoize decorator.
+- LangChain tools set metadata={"cache_policy": ...}; ToolExecutor honours it.
+
+Failed calls (exceptions, {"ok": False} responses) are never cached.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from src.utils.cache import get_cache
+
+# Seconds a PURE result is kept (bounded only to cap memory)
+PURE_TTL_SECONDS = int(os.getenv("TOOL_CACHE_PURE_TTL", "86400"))
+# Maximum cached tool results per worker
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "5000"))
+# Memory budget for cached tool results
+TOOL_CACHE_MAX_BYTES = int(os.getenv("TOOL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_tool_cache = get_cache(
+    "tool_results",
+    default_ttl_seconds=PURE_TTL_SECONDS,
+    max_entries=TOOL_CACHE_MAX_ENTRIES,
+    max_bytes=TOOL_CACHE_MAX_BYTES
+)
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """How long a tool's results may be reused"""
+    kind: str  # "pure", "ttl" or "never"
+    ttl_seconds: int = 0
+    # Treat string arguments case-insensitively ("Paris" == "paris")
+    ignore_case: bool = False
+
+    @property
+    def cacheable(self) -> bool:
+        return self.kind != "never" and self.ttl_seconds > 0
+
+
+PURE = CachePolicy("pure", PURE_TTL_SECONDS)
+NEVER = CachePolicy("never")
+
+
+def minutes(n: float, ignore_case: bool = False) -> CachePolicy:
+    """Policy for results that may be reused for n minutes"""
+    return CachePolicy("ttl", int(n * 60), ignore_case)
+
+
+def _normalize_value(value: Any, ignore_case: bool) -> Any:
+    """Canonical form of an argument value"""
+    if isinstance(value, str):
+        value = " ".join(value.split())
+        return value.casefold() if ignore_case else value
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {
+            str(k): _normalize_value(v, ignore_case)
+            for k, v in value.items()
+            if v is not None
+        }
+    if isinstance(value, (list, tuple)):
+        return [_normalize_value(v, ignore_case) for v in value]
+    return value
+
+
+def make_key(tool_name: str, args: Any, policy: CachePolicy = PURE) -> str:
+    """
+    Cache key for a tool call
+
+    Whitespace in strings is collapsed, None-valued keyword arguments are
+    dropped and integral floats equal their int, so calls that differ only
+    in formatting share an entry.
+    """
+    canonical = json.dumps(_normalize_value(args, policy.ignore_case), sort_keys=True, default=str)
+    return f"{tool_name}:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
+
+
+def is_cacheable_result(result: Any) -> bool:
+    """False for error responses ({"ok": False, ...} envelopes)"""
+    return not (isinstance(result, dict) and result.get("ok") is False)
+
+
+class _Uncacheable(Exception):
+    """Carries a result that must be returned but not cached"""
+
+    def __init__(self, result: Any):
+        super().__init__("uncacheable result")
+        self.result = result
+
+
+def get_or_call(tool_name: str, policy: CachePolicy, args: Any, call: Callable[[], Any]) -> Any:
+    """Return a cached result for these arguments, or call and cache it"""
+    if not policy.cacheable:
+        return call()
+
+    def compute():
+        result = call()
+        if not is_cacheable_result(result):
+            raise _Uncacheable(result)
+        return result
+
+    try:
+        return _tool_cache.get_or_compute_sync(make_key(tool_name, args, policy), compute, policy.ttl_seconds)
+    except _Uncacheable as e:
+        return e.result
+
+
+async def aget_or_call(tool_name: str, policy: CachePolicy, args: Any, call: Callable[[], Any]) -> Any:
+    """Async variant of get_or_call; call returns an awaitable"""
+    if not policy.cacheable:
+        return await call()
+
+    async def compute():
+        result = await call()
+        if not is_cacheable_result(result):
+            raise _Uncacheable(result)
+        return result
+
+    try:
+        return await _tool_cache.get_or_compute(make_key(tool_name, args, policy), compute, policy.ttl_seconds)
+    except _Uncacheable as e:
+        return e.result
+
+
+def memoize(policy: CachePolicy, name: Optional[str] = None):
+    """
+    Cache a function's (sync or async) results under a policy
+
+    The wrapper keeps the function's signature, so it can sit directly under
+    @mcp.tool() and the tool schema is unchanged.
+
+    Args:
+        policy: Cache policy
+        name: Cache namespace for the function (defaults to module.qualname)
+    """
+    def decorator(fn):
+        tool_name = name or f"{fn.__module__}.{fn.__qualname__}"
+        signature = inspect.signature(fn)
+
+        def key_args(args, kwargs) -> dict:
+            # Bind so positional and keyword calls share a key
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return dict(bound.arguments)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                return await aget_or_call(tool_name, policy, key_args(args, kwargs), lambda: fn(*args, **kwargs))
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                return get_or_call(tool_name, policy, key_args(args, kwargs), lambda: fn(*args, **kwargs))
+
+        wrapper.cache_policy = policy
+        return wrapper
+    return decorator
+
+
+def tool_cache_policy(tool: Any) -> CachePolicy:
+    """Cache policy declared in a LangChain tool's metadata (NEVER if none)"""
+    policy = (getattr(tool, "metadata", None) or {}).get("cache_policy")
+    return policy if isinstance(policy, CachePolicy) else NEVER
+
+
+def tool_cache_metrics() -> dict:
+    """Hit/miss metrics for the tool result cache"""
+    return _tool_cache.metrics()